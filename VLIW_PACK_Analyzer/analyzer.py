@@ -3,74 +3,226 @@
 """
 
 import os
-from typing import Dict
-from parser import DisassemblyParser
-from dependency import DependencyAnalyzer
-from packer import VLIWPacker
-from statistics import StatisticsCollector
+import sys
+from typing import Dict, Iterable, List, Tuple
+from parser import DisassemblyParser, STDIN_PATH, open_text_input
+from instruction import VLIWPackage
+from dependency import DependencyAnalyzer, OnlineDependencyCounter
+from packer import VLIWPacker, OnlinePacker, ForwardingDepthSweep
+from timing import StallEstimator
+from statistics import StatisticsCollector, StatsAccumulator
 from exporter import DisassemblyExporter
+from bundle_encoding import BundleEncodingModel
+from icache import ICacheSimulator, compare_layouts, load_trace
+from checker import BundleLegalityChecker
+from equivalence import EquivalenceChecker
+from scheduler import SearchPacker
+from strategies import create_strategy, compare_strategies
+from unroll import UnrollEstimator
+from frequency import StaticProfile, compare_weighted
+from config import FORWARDING_DEPTH_SWEEP, EQUIVALENCE_LANES, SEARCH_BLOCK_BUDGET_MS, UNROLL_FACTORS
+
+
+def function_record(function: Dict) -> Dict:
+    """补全函数记录中的派生字段（填充数、可删除填充数、平均每包有效指令数）"""
+    record = dict(function)
+    record['padding'] = record['instructions'] - record['valid']
+    record['removable_padding'] = record['leading'] + record['trailing']
+    record['avg_valid_per_package'] = (
+        record['valid'] / record['packages'] if record['packages'] > 0 else 0
+    )
+    return record
+
+
+class PackageRecordStream:
+    """
+    边解析边输出包记录与函数记录
+    
+    每个包确定后立即输出包记录；包的起始地址进入下一个函数时输出上一个函数的汇总记录
+    （函数划分与 split_functions 相同），因此记录随解析逐条写出，不需要在分析结束后
+    再遍历一次包列表。
+    """
+    
+    def __init__(self, record_writer, parser: DisassemblyParser):
+        """
+        Args:
+            record_writer: 流式记录输出器
+            parser: 正在解析输入的解析器（符号表随解析增长）
+        """
+        self.record_writer = record_writer
+        self.parser = parser
+        self.symbol_idx = -1
+        self.name = None
+        self.function = None
+        self.total = StatsAccumulator()
+        self.index = 0
+    
+    def add(self, pkg: VLIWPackage):
+        """输出一个包的记录（必要时先输出上一个函数的记录）"""
+        symbols = self.parser.symbols
+        next_idx = self.symbol_idx
+        while next_idx + 1 < len(symbols) and symbols[next_idx + 1][0] <= pkg.start_address:
+            next_idx += 1
+        if self.function is None or next_idx != self.symbol_idx:
+            self._close_function()
+            self.symbol_idx = next_idx
+            self.name = symbols[next_idx][1] if next_idx >= 0 else ''
+            self.function = StatsAccumulator()
+            self.address = pkg.start_address
+        
+        counts = StatsAccumulator((pkg,))
+        self.record_writer.write_package({
+            'function': self.name,
+            'index': self.index,
+            'address': f"0x{pkg.start_address:08x}",
+            'instructions': counts.instructions,
+            'valid': counts.valid,
+            'padding': counts.instructions - counts.valid,
+            'leading': counts.leading,
+            'trailing': counts.trailing,
+            'middle': counts.middle
+        })
+        self.index += 1
+        self.function.merge(counts)
+    
+    def finish(self) -> StatsAccumulator:
+        """
+        输入结束：输出最后一个函数的记录
+        
+        Returns:
+            全部包的统计累加器（由逐函数累加器合并得到）
+        """
+        self._close_function()
+        return self.total
+    
+    def _close_function(self):
+        """输出当前函数的汇总记录"""
+        function = self.function
+        if function is None:
+            return
+        self.record_writer.write_function(function_record({
+            'function': self.name,
+            'address': f"0x{self.address:08x}",
+            'packages': function.packages,
+            'instructions': function.instructions,
+            'valid': function.valid,
+            'leading': function.leading,
+            'trailing': function.trailing,
+            'middle': function.middle
+        }))
+        self.total.merge(function)
+        self.function = None
+
+
+def violation_record(violation: Dict) -> Dict:
+    """将违例转换为可序列化的记录（地址格式化为十六进制）"""
+    record = dict(violation)
+    record['address'] = f"0x{violation['address']:08x}"
+    record['bundle'] = f"0x{violation['bundle']:08x}"
+    return record
 
 
 class VLIWAnalyzer:
     """主分析器，协调各模块"""
     
-    def __init__(self, filepath: str):
+    def __init__(
+        self,
+        filepath: str,
+        log_file=sys.stdout,
+        parse_jobs: int = 1,
+        fast_parse: bool = False,
+        strategy: str = 'greedy'
+    ):
         """
         初始化分析器
         
         Args:
-            filepath: 反汇编文件路径
+            filepath: 反汇编文件路径（'-' 为标准输入，支持 .gz / .bz2 / .xz）
+            log_file: 进度信息输出流（None 表示不输出）
+            parse_jobs: 解析大文件时使用的进程数（1 为串行，0 为全部 CPU）
+            fast_parse: 使用 mmap + 字节正则的快速解析模式
+            strategy: 重打包使用的打包策略名（见 strategies.PACKING_STRATEGIES）
         """
         self.filepath = filepath
-        self.filename = os.path.basename(filepath)
+        self.filename = '<stdin>' if filepath == STDIN_PATH else os.path.basename(filepath)
+        self.log_file = log_file
+        self.parse_jobs = parse_jobs
+        self.fast_parse = fast_parse
         
         # 初始化各模块
         self.parser = DisassemblyParser()
         self.dep_analyzer = DependencyAnalyzer()
         self.packer = VLIWPacker()
+        self.strategy = create_strategy(strategy, self.packer.model, self.packer.machine)
         self.stats_collector = StatisticsCollector()
         self.exporter = DisassemblyExporter()
+        self.checker = BundleLegalityChecker(self.dep_analyzer, self.packer.model, self.packer.machine)
         
         # 数据存储
         self.original_packages = []
         self.optimized_packages = []
-        self.dep_graph = {}
+        self.search_packages = []
+        self.dep_graph = None
         self.all_stats = {}
     
-    def run_full_analysis(self) -> Dict:
+    def _log(self, message: str = ''):
+        """输出进度信息"""
+        if self.log_file is not None:
+            print(message, file=self.log_file)
+    
+    def run_full_analysis(self, record_writer=None) -> Dict:
         """
         运行完整分析流程
         
+        Args:
+            record_writer: 流式记录输出器（可选），解析过程中每个包确定后立即输出包记录，
+                           每个函数结束时输出函数记录（此时按行串行解析，不使用并行 / 快速解析）；
+                           汇总记录由调用方在全部分析结束后通过 summary_record() 输出
+        
         Returns:
             所有统计数据的字典
         """
-        print(f"正在分析文件: {self.filename}")
-        print()
+        self._log(f"正在分析文件: {self.filename}")
+        self._log()
         
         # 1. 解析反汇编文件
-        print("[1/6] 解析反汇编文件...")
-        self.original_packages = self.parser.parse_file(self.filepath)
-        print(f"  解析完成：{len(self.original_packages)} 个 VLIW 包")
+        # 原始包、填充与指令类型统计在同一遍遍历中累加；
+        # 流式输出时由逐包 / 逐函数的累加器合并得到总计
+        self._log("[1/6] 解析反汇编文件...")
+        if record_writer:
+            records = PackageRecordStream(record_writer, self.parser)
+            self.original_packages = []
+            with open_text_input(self.filepath) as f:
+                for pkg in self.parser.iter_packages(f):
+                    self.original_packages.append(pkg)
+                    records.add(pkg)
+            counts = records.finish()
+        else:
+            self.original_packages = self.parser.parse_file(
+                self.filepath, jobs=self.parse_jobs, fast=self.fast_parse
+            )
+            counts = StatsAccumulator(self.original_packages)
+        self._log(f"  解析完成：{len(self.original_packages)} 个 VLIW 包")
         
         # 2. 分析原始包统计
-        print("[2/6] 分析原始包统计...")
-        original_stats = self.stats_collector.analyze_original_packages(self.original_packages)
+        self._log("[2/6] 分析原始包统计...")
+        original_stats = counts.original_stats()
         self.all_stats['original'] = original_stats
-        print(f"  有效指令：{original_stats['valid_instructions']} / {original_stats['total_instructions']}")
+        self._log(f"  有效指令：{original_stats['valid_instructions']} / {original_stats['total_instructions']}")
         
         # 3. 分析填充指令
-        print("[3/6] 分析填充指令...")
-        padding_stats = self.stats_collector.analyze_padding_instructions(self.original_packages)
+        self._log("[3/6] 分析填充指令...")
+        padding_stats = counts.padding_stats()
         self.all_stats['padding'] = padding_stats
-        print(f"  可删除填充：{padding_stats['removable_padding']} 条")
+        self._log(f"  可删除填充：{padding_stats['removable_padding']} 条")
         
         # 4. 分析指令类型分布
-        print("[4/6] 分析指令类型分布...")
-        type_stats = self.stats_collector.analyze_instruction_types(self.original_packages)
+        self._log("[4/6] 分析指令类型分布...")
+        type_stats = counts.type_stats()
         self.all_stats['types'] = type_stats
         
         # 5. 构建依赖图并分析
-        print("[5/6] 构建依赖图...")
+        self._log("[5/6] 构建依赖图...")
         # 提取所有有效指令
         valid_instructions = []
         for pkg in self.original_packages:
@@ -83,26 +235,362 @@ class VLIWAnalyzer:
             valid_instructions, self.dep_graph
         )
         self.all_stats['dependency'] = dependency_stats
-        print(f"  一层依赖对：{dependency_stats['one_level_pairs']} 对")
+        self._log(f"  一层依赖对：{dependency_stats['one_level_pairs']} 对")
         
-        # 6. 重打包（允许一层依赖）
-        print("[6/6] 重打包分析...")
-        self.optimized_packages, repack_stats = self.packer.repack_with_one_level_dependency(
-            self.original_packages
-        )
+        # 6. 重打包（默认为允许一层依赖的贪心打包）
+        self._log("[6/6] 重打包分析...")
+        self.optimized_packages, repack_stats = self.strategy.pack(self.original_packages)
         
         # 合并重打包统计
-        packing_stats = self.stats_collector.compare_packing_results(
-            self.original_packages,
-            self.optimized_packages
+        packing_stats = counts.packing_stats(
+            len(self.optimized_packages),
+            sum(pkg.valid_count for pkg in self.optimized_packages)
         )
-        packing_stats['merged_pairs'] = repack_stats['merged_pairs']
+        packing_stats['merged_pairs'] = repack_stats.get('merged_pairs', 0)
         self.all_stats['packing'] = packing_stats
-        print(f"  优化后包数：{packing_stats['optimized_package_count']}")
-        print()
+        self._log(f"  优化后包数：{packing_stats['optimized_package_count']}")
+        self._log()
+        
+        return self.all_stats
+    
+    def run_streaming_analysis(self, forwarding_depths: List[int] = None, record_writer=None) -> Dict:
+        """
+        流式分析：边解析边统计与重打包，不保留包列表，内存占用与输入大小无关
+        
+        统计结果与 run_full_analysis 相同，但不保留原始包与重打包结果，
+        因此不能再导出、检查或运行附加分析（前递链深度对比除外，它同样是流式的）。
+        向后的分支目标在读到分支之前无法得知，流式重打包不会在这些目标处开始新包，
+        含循环的程序的优化包数可能比 run_full_analysis 少。
+        
+        Args:
+            forwarding_depths: 同时对比的最大前递链深度（可选，结果同 compare_forwarding_depths）
+            record_writer: 流式记录输出器（可选），与 run_full_analysis 相同，边解析边输出包/函数记录
+        
+        Returns:
+            所有统计数据的字典
+        """
+        self._log(f"正在流式分析文件: {self.filename}")
+        
+        counts = StatsAccumulator()
+        dependency = OnlineDependencyCounter()
+        packer = OnlinePacker(self.packer.model)
+        sweep = None
+        if forwarding_depths is not None:
+            estimator = StallEstimator()
+            sweep = ForwardingDepthSweep(forwarding_depths, self.packer.model.levels, estimator)
+            timeline = estimator.timeline()
+        records = PackageRecordStream(record_writer, self.parser) if record_writer else None
+        
+        with open_text_input(self.filepath) as f:
+            for pkg in self.parser.iter_packages(f):
+                counts.add_package(pkg)
+                if records is not None:
+                    records.add(pkg)
+                if sweep is not None:
+                    timeline.add_package(pkg)
+                for inst in pkg.instructions:
+                    if not inst.is_nop:
+                        dependency.push(inst)
+                        packer.push(inst)
+                        if sweep is not None:
+                            sweep.push(inst)
+        if records is not None:
+            records.finish()
+        packer.flush()
+        
+        if sweep is not None:
+            sweep.flush()
+            original_cycles = timeline.result()['cycles']
+            self.all_stats['forwarding'] = {
+                'chain_depth': self.packer.model.max_depth,
+                'original_packages': counts.packages,
+                'original_cycles': original_cycles,
+                'depths': sweep.results(counts.packages, original_cycles)
+            }
+        
+        packing_stats = counts.packing_stats(packer.emitted)
+        packing_stats['merged_pairs'] = packer.merged_pairs
+        self.all_stats.update({
+            'original': counts.original_stats(),
+            'padding': counts.padding_stats(),
+            'types': counts.type_stats(),
+            'dependency': dependency.statistics(),
+            'packing': packing_stats
+        })
+        self._log(f"  解析完成：{counts.packages} 个 VLIW 包，优化后 {packer.emitted} 个")
+        self._log()
         
         return self.all_stats
     
+    def compare_forwarding_depths(self, depths: List[int] = FORWARDING_DEPTH_SWEEP) -> Dict:
+        """
+        对比不同最大前递链深度下重打包的包数与估算周期
+        
+        Args:
+            depths: 要对比的最大链深（其余前递规则同当前重打包模型）
+            
+        Returns:
+            {'chain_depth': 当前重打包使用的最大链深, 'original_packages', 'original_cycles',
+             'depths': 按深度升序的包数、周期与收益}
+        """
+        forwarding_stats = {'chain_depth': self.packer.model.max_depth}
+        forwarding_stats.update(self.packer.compare_forwarding_depths(self.original_packages, depths))
+        self.all_stats['forwarding'] = forwarding_stats
+        return forwarding_stats
+    
+    def compare_bypass(
+        self,
+        add: Iterable[Tuple[int, int, str]] = (),
+        drop: Iterable[Tuple[int, int, str]] = ()
+    ) -> Dict:
+        """
+        旁路拓扑 what-if：增删旁路路径后重新打包并估算周期，与当前机器描述对比
+        
+        Args:
+            add: 增加的旁路路径（(生产者槽位, 消费者槽位, 级)，见 parse_bypass_spec）
+            drop: 删除的旁路路径
+            
+        Returns:
+            VLIWPacker.compare_bypass 的返回值
+        """
+        machine = self.packer.machine.with_paths(add, drop)
+        bypass_stats = self.packer.compare_bypass(self.original_packages, machine)
+        self.all_stats['bypass'] = bypass_stats
+        return bypass_stats
+    
+    def analyze_bundle_encoding(
+        self,
+        scheme: str = 'stop_bit',
+        fetch_block_bytes: int = 32,
+        exec_counts: Dict[int, int] = None
+    ) -> Dict:
+        """
+        评估变长包编码下原始代码与重排代码的大小和取指带宽
+        
+        Args:
+            scheme: 编码方案（见 BundleEncodingModel.SCHEMES）
+            fetch_block_bytes: 取指块大小（字节）
+            exec_counts: 原始包执行次数（可选，缺省时每包按 1 次计）
+            
+        Returns:
+            编码评估统计字典
+        """
+        model = BundleEncodingModel(scheme, fetch_block_bytes=fetch_block_bytes)
+        encoding_stats = model.compare(self.original_packages, self.optimized_packages, exec_counts)
+        self.all_stats['encoding'] = encoding_stats
+        return encoding_stats
+    
+    def simulate_icache(
+        self,
+        size_bytes: int = 8192,
+        line_bytes: int = 64,
+        associativity: int = 2,
+        miss_penalty: int = 10,
+        trace_path: str = None,
+        encoding_scheme: str = None
+    ) -> Dict:
+        """
+        模拟 I-Cache，对比原始布局与重排（及压缩）布局的缺失率与缺失周期
+        
+        Args:
+            size_bytes: Cache 容量（字节）
+            line_bytes: Cache 行大小（字节）
+            associativity: 相联度
+            miss_penalty: 每次缺失的停顿周期数
+            trace_path: 取包 PC 序列文件（可选），缺省时按静态布局顺序各取一次
+            encoding_scheme: 压缩布局使用的编码方案（可选）
+            
+        Returns:
+            I-Cache 统计字典
+        """
+        simulator = ICacheSimulator(size_bytes, line_bytes, associativity, miss_penalty)
+        trace = load_trace(trace_path) if trace_path else None
+        encoding_model = BundleEncodingModel(encoding_scheme) if encoding_scheme else None
+        
+        layouts = compare_layouts(
+            simulator,
+            self.original_packages,
+            self.optimized_packages,
+            trace=trace,
+            encoding_model=encoding_model
+        )
+        icache_stats = {
+            'size_bytes': size_bytes,
+            'line_bytes': line_bytes,
+            'associativity': associativity,
+            'miss_penalty': miss_penalty,
+            'source': 'trace' if trace is not None else 'static',
+            'layouts': layouts
+        }
+        self.all_stats['icache'] = icache_stats
+        return icache_stats
+    
+    def check_legality(self, record_writer=None) -> List[Dict]:
+        """
+        检查原始 VLIW 包的合法性：包内不可前递的写后读、写后写、
+        槽位类别不匹配与槽位超额（只需解析，不运行重打包分析）
+        
+        Args:
+            record_writer: 流式记录输出器（可选），逐条输出违例记录
+            
+        Returns:
+            违例列表（见 BundleLegalityChecker.check）
+        """
+        if not self.original_packages:
+            self._log(f"正在检查文件: {self.filename}")
+            self.original_packages = self.parser.parse_file(
+                self.filepath, jobs=self.parse_jobs, fast=self.fast_parse
+            )
+        
+        violations = self.checker.check(self.original_packages)
+        legality_stats = self.checker.summarize(self.original_packages, violations)
+        self.all_stats['legality'] = legality_stats
+        self._log(
+            f"  已检查 {legality_stats['checked_packages']} 个包，"
+            f"违例 {legality_stats['violations']} 处（{legality_stats['illegal_packages']} 个包）"
+        )
+        
+        if record_writer:
+            for violation in violations:
+                record_writer.write_violation(self.violation_record(violation))
+        
+        return violations
+    
+    def verify_equivalence(self, lanes: int = EQUIVALENCE_LANES) -> Dict:
+        """
+        检查重打包结果与原始代码逐基本块等价（需要 NumPy，需先运行 run_full_analysis）
+        
+        Args:
+            lanes: 每个基本块并行执行的随机初始状态数
+            
+        Returns:
+            EquivalenceChecker.check 的返回值
+        """
+        checker = EquivalenceChecker(lanes, model=self.packer.model, machine=self.packer.machine)
+        equivalence_stats = checker.check(self.original_packages, self.optimized_packages)
+        self.all_stats['equivalence'] = equivalence_stats
+        if equivalence_stats['equivalent']:
+            self._log(f"  等价性检查通过：{equivalence_stats['checked_blocks']} 个基本块")
+        else:
+            first = equivalence_stats['first_divergence']
+            self._log(
+                f"  等价性检查失败：{equivalence_stats['divergent_blocks']} 个基本块不等价，"
+                f"第一个为 {first['block']}（{first['kind']} {first['location']}）"
+            )
+        return equivalence_stats
+    
+    def search_repack(self, budget_ms: float = SEARCH_BLOCK_BUDGET_MS, jobs: int = 1) -> Dict:
+        """
+        逐基本块搜索式重打包，与逐块贪心打包对比（结果保存在 search_packages）
+        
+        Args:
+            budget_ms: 每个基本块的墙钟预算（毫秒）
+            jobs: 并行搜索的进程数（1 为串行，0 为全部 CPU）
+            
+        Returns:
+            SearchPacker.repack 的统计信息
+        """
+        packer = SearchPacker(self.packer.model, self.packer.machine, budget_ms=budget_ms, jobs=jobs)
+        self.search_packages, search_stats = packer.repack(self.original_packages)
+        self.all_stats['search'] = search_stats
+        self._log(
+            f"  搜索式重打包：{search_stats['improved_blocks']}/{search_stats['searched_blocks']} 个基本块改进，"
+            f"估算周期 {search_stats['greedy']['cycles']} → {search_stats['search']['cycles']}"
+        )
+        return search_stats
+    
+    def compare_strategies(self, names: List[str], parallel: bool = True, measure_memory: bool = False) -> Dict:
+        """
+        在已解析的原始包上对比多个打包策略（需先运行 run_full_analysis）
+        
+        Args:
+            names: 策略名（见 strategies.PACKING_STRATEGIES）
+            parallel: 多核时在多个进程中同时运行各策略
+            measure_memory: 另运行一次各策略测量内存峰值
+            
+        Returns:
+            strategies.compare_strategies 的返回值
+        """
+        strategy_stats = compare_strategies(
+            names, self.original_packages, self.packer.model, self.packer.machine,
+            parallel=parallel, measure_memory=measure_memory
+        )
+        self.all_stats['strategies'] = strategy_stats
+        best = min(strategy_stats['strategies'], key=lambda row: row['cycles'])
+        self._log(f"  打包策略对比：{len(names)} 个策略，估算周期最少的为 {best['strategy']}（{best['cycles']} 周期）")
+        return strategy_stats
+    
+    def estimate_unrolling(self, factors: List[int] = UNROLL_FACTORS) -> Dict:
+        """
+        循环展开 what-if：虚拟展开最内层循环并重新打包（需先运行 run_full_analysis）
+        
+        Args:
+            factors: 展开倍数
+            
+        Returns:
+            UnrollEstimator.analyze 的返回值
+        """
+        estimator = UnrollEstimator(self.packer.model, self.packer.machine, factors)
+        unroll_stats = estimator.analyze(self.original_packages, self.parser.symbols)
+        self.all_stats['unroll'] = unroll_stats
+        improved = sum(1 for loop in unroll_stats['loops'] if loop['best_factor'] > 1)
+        self._log(f"  循环展开假设分析：{len(unroll_stats['loops'])} 个最内层循环，其中 {improved} 个展开后更快")
+        return unroll_stats
+    
+    def estimate_static_profile(self) -> Dict:
+        """
+        静态执行频率估算，给出原始包、重打包（与搜索式重打包）结果按频率加权的统计
+        （需先运行 run_full_analysis；search_repack 在此之前运行时一并加权）
+        
+        Returns:
+            {'profile': StaticProfile.summary 的返回值, 'layouts': compare_weighted 的返回值}
+        """
+        profile = StaticProfile(self.original_packages)
+        layouts = {'original': self.original_packages, 'optimized': self.optimized_packages}
+        if self.search_packages:
+            layouts['search'] = self.search_packages
+        profile_stats = {
+            'profile': profile.summary(),
+            'layouts': compare_weighted(layouts, profile, self.packer.machine)
+        }
+        self.all_stats['profile'] = profile_stats
+        summary = profile_stats['profile']
+        optimized = profile_stats['layouts']['optimized']
+        self._log(
+            f"  静态执行频率：{summary['loops']} 个循环（{summary['inferred_loops']} 个推断出迭代次数），"
+            f"加权包数量减少 {optimized['weighted']['package_reduction_percentage']:.1f}%"
+            f"（静态 {optimized['static']['package_reduction_percentage']:.1f}%）"
+        )
+        return profile_stats
+    
+    def violation_record(self, violation: Dict) -> Dict:
+        """将违例转换为可序列化的记录（地址格式化为十六进制）"""
+        return violation_record(violation)
+    
+    def summary_record(self) -> Dict:
+        """
+        生成汇总记录（不含逐对依赖列表等大体积字段）
+        
+        Returns:
+            可直接序列化为 JSON 的汇总字典
+        """
+        dependency = {
+            key: value for key, value in self.all_stats.get('dependency', {}).items()
+            if key != 'one_level_pair_list'
+        }
+        summary = {
+            'file': self.filename,
+            'original': self.all_stats.get('original', {}),
+            'padding': self.all_stats.get('padding', {}),
+            'types': self.all_stats.get('types', {}),
+            'dependency': dependency,
+            'packing': self.all_stats.get('packing', {})
+        }
+        for key in ('forwarding', 'bypass', 'encoding', 'icache', 'equivalence', 'search', 'strategies', 'unroll', 'profile', 'legality'):
+            if key in self.all_stats:
+                summary[key] = self.all_stats[key]
+        return summary
+    
     def generate_report(self, verbose: bool = False) -> str:
         """
         生成分析报告
@@ -128,7 +616,16 @@ class VLIWAnalyzer:
             padding_stats=self.all_stats['padding'],
             type_stats=self.all_stats['types'] if verbose else None,
             packing_stats=self.all_stats['packing'],
-            dependency_stats=dependency_stats
+            dependency_stats=dependency_stats,
+            encoding_stats=self.all_stats.get('encoding'),
+            icache_stats=self.all_stats.get('icache'),
+            forwarding_stats=self.all_stats.get('forwarding'),
+            bypass_stats=self.all_stats.get('bypass'),
+            equivalence_stats=self.all_stats.get('equivalence'),
+            search_stats=self.all_stats.get('search'),
+            strategy_stats=self.all_stats.get('strategies'),
+            unroll_stats=self.all_stats.get('unroll'),
+            profile_stats=self.all_stats.get('profile')
         )
         
         # 添加文件名
@@ -151,7 +648,7 @@ class VLIWAnalyzer:
         with open(output_path, 'w', encoding='utf-8') as f:
             f.write(report)
         
-        print(f"报告已保存到: {output_path}")
+        self._log(f"报告已保存到: {output_path}")
     
     def export_reordered_asm(self, output_path: str):
         """
@@ -161,7 +658,7 @@ class VLIWAnalyzer:
             output_path: 输出文件路径
         """
         if not self.optimized_packages:
-            print("错误：尚未运行分析，请先调用 run_full_analysis()")
+            self._log("错误：尚未运行分析，请先调用 run_full_analysis()")
             return
         
         self.exporter.export_reordered_asm(
@@ -169,5 +666,50 @@ class VLIWAnalyzer:
             self.optimized_packages,
             output_path
         )
-        print(f"重排后反汇编已保存到: {output_path}")
-
+        self._log(f"重排后反汇编已保存到: {output_path}")
+    
+    def export_relocated_image(
+        self,
+        output_path: str,
+        base_address: int = 0x80000000,
+        allow_misaligned: bool = False
+    ) -> Dict:
+        """
+        导出重排并重定位后的内存镜像（.hex 后缀输出文本格式，否则输出二进制）
+        
+        Args:
+            output_path: 输出文件路径
+            base_address: 镜像起始地址
+            allow_misaligned: 跳转目标不在包起始位置或包跨越基本块时仍然导出
+            
+        Returns:
+            重定位统计字典
+        
+        Raises:
+            ValueError: 重排结果的控制流与原程序不同，且未指定 allow_misaligned
+        """
+        if not self.optimized_packages:
+            self._log("错误：尚未运行分析，请先调用 run_full_analysis()")
+            return {}
+        
+        image_format = 'hex' if output_path.endswith('.hex') else 'bin'
+        stats = self.exporter.export_relocated_image(
+            self.original_packages,
+            self.optimized_packages,
+            output_path,
+            base_address=base_address,
+            image_format=image_format,
+            allow_misaligned=allow_misaligned
+        )
+        self._log(f"重定位镜像已保存到: {output_path} ({stats['image_bytes']} 字节)")
+        self._log(f"  重编码分支：{stats['relocated_branches']} 条，跳转：{stats['relocated_jumps']} 条")
+        if stats['out_of_range'] or stats['unresolved_targets']:
+            self._log(f"  警告：{stats['out_of_range']} 条超出立即数范围，{stats['unresolved_targets']} 条目标无法解析")
+        if stats['misaligned_targets'] or stats['straddling_bundles']:
+            self._log(
+                f"  警告：{stats['misaligned_targets']} 个跳转目标不在包起始位置，"
+                f"{stats['straddling_bundles']} 个包跨越基本块"
+            )
+        if stats['auipc_unrelocated']:
+            self._log(f"  警告：{stats['auipc_unrelocated']} 条 auipc 未重定位（auipc 组合寻址需人工检查）")
+        return stats
@@ -0,0 +1,350 @@
+"""
+嵌入式 Python 接口：直接分析内存中的指令字、原始字节或已解析的指令/包，
+不读写文件、不输出任何信息，各项分析在首次访问时才计算
+"""
+
+import struct
+from dataclasses import dataclass, asdict
+from functools import cached_property
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from instruction import Instruction, VLIWPackage, decode_instruction
+from parser import DisassemblyParser
+from dependency import DependencyAnalyzer, DependencyGraph, np
+from packer import VLIWPacker
+from statistics import StatsAccumulator
+from checker import BundleLegalityChecker
+from encoding import disassemble, opcode, OPCODE_BRANCH, OPCODE_JAL
+from config import VLIW_PACKAGE_SIZE
+
+
+class StatsRecord:
+    """统计结果数据类的公共方法"""
+    
+    def as_dict(self) -> Dict:
+        """转换为与 VLIWAnalyzer.all_stats 相同结构的字典"""
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class OriginalStats(StatsRecord):
+    """原始包统计（见 StatisticsCollector.analyze_original_packages）"""
+    total_packages: int
+    total_instructions: int
+    valid_instructions: int
+    padding_instructions: int
+    nop_count: int
+    feq_zero_count: int
+    avg_valid_per_package: float
+    valid_percentage: float
+
+
+@dataclass(frozen=True)
+class PaddingStats(StatsRecord):
+    """填充指令统计（见 StatisticsCollector.analyze_padding_instructions）"""
+    leading_padding: int
+    trailing_padding: int
+    middle_padding: int
+    total_padding: int
+    removable_padding: int
+    original_size_bytes: int
+    optimized_size_bytes: int
+    size_reduction_bytes: int
+    reduction_percentage: float
+
+
+@dataclass(frozen=True)
+class TypeStats(StatsRecord):
+    """指令类型分布（见 StatisticsCollector.analyze_instruction_types）"""
+    total_valid_instructions: int
+    type_distribution: Dict[str, Dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class DependencyStats(StatsRecord):
+    """依赖统计（见 DependencyAnalyzer.analyze_dependency_statistics）"""
+    total_valid_instructions: int
+    single_cycle_count: int
+    independent_count: int
+    dependent_count: int
+    one_level_pairs: int
+    one_level_pair_list: List[Tuple[int, int]]
+    
+    def as_dict(self) -> Dict:
+        """转换为字典（与汇总记录一致，不含逐对列表）"""
+        record = asdict(self)
+        del record['one_level_pair_list']
+        return record
+
+
+@dataclass(frozen=True)
+class PackingStats(StatsRecord):
+    """重打包对比统计（见 StatisticsCollector.compare_packing_results）"""
+    original_package_count: int
+    optimized_package_count: int
+    package_reduction: int
+    reduction_percentage: float
+    original_valid_instructions: int
+    optimized_valid_instructions: int
+    original_avg_density: float
+    optimized_avg_density: float
+    density_improvement: float
+    merged_pairs: int
+
+
+@dataclass(frozen=True)
+class LegalityStats(StatsRecord):
+    """包合法性检查汇总（见 BundleLegalityChecker.summarize）"""
+    checked_packages: int
+    illegal_packages: int
+    violations: int
+    by_reason: Dict[str, int]
+    legal: bool
+
+
+@dataclass(frozen=True)
+class PackageArrays:
+    """
+    包的数组视图：安装 NumPy 时为 ndarray，否则为嵌套列表
+    
+    - addresses：(包数,) 包起始地址
+    - words：(包数, 8) 按槽位的指令字，空槽位为 0
+    - valid：(包数, 8) 槽位上是否为有效（非填充）指令
+    """
+    addresses: Any
+    words: Any
+    valid: Any
+    
+    def __len__(self) -> int:
+        return len(self.addresses)
+
+
+def package_arrays(packages: List[VLIWPackage]) -> PackageArrays:
+    """
+    构建包列表的数组视图（重打包结果按 slots 记录的槽位排布）
+    
+    Args:
+        packages: VLIW 包列表
+    
+    Returns:
+        PackageArrays
+    """
+    addresses = [pkg.start_address for pkg in packages]
+    words = []
+    valid = []
+    for pkg in packages:
+        row_words = [0] * VLIW_PACKAGE_SIZE
+        row_valid = [False] * VLIW_PACKAGE_SIZE
+        for slot, inst in enumerate(pkg.slotted()):
+            if inst is None:
+                continue
+            row_words[slot] = int(inst.hex_code, 16)
+            row_valid[slot] = not inst.is_nop
+        words.append(row_words)
+        valid.append(row_valid)
+    
+    if np is None:
+        return PackageArrays(addresses, words, valid)
+    return PackageArrays(
+        np.array(addresses, dtype=np.uint32),
+        np.array(words, dtype=np.uint32).reshape(-1, VLIW_PACKAGE_SIZE),
+        np.array(valid, dtype=bool).reshape(-1, VLIW_PACKAGE_SIZE)
+    )
+
+
+def instructions_from_words(words: Iterable[Tuple[int, int]]) -> List[Instruction]:
+    """
+    将 (地址, 指令字) 序列反汇编为指令列表
+    
+    Args:
+        words: (地址, 32 位指令字) 序列，按地址顺序
+    
+    Returns:
+        指令列表
+    """
+    instructions = []
+    decoded_by_word = {}  # 与地址无关的指令字 -> 译码结果
+    
+    for address, word in words:
+        decoded = decoded_by_word.get(word)
+        if decoded is None:
+            mnemonic, operands = disassemble(word, address)
+            decoded = decode_instruction(f"{word:08x}", mnemonic, operands)
+            # 分支 / jal 的操作数包含目标地址，不能按指令字共享
+            if opcode(word) not in (OPCODE_BRANCH, OPCODE_JAL):
+                decoded_by_word[word] = decoded
+        instructions.append(Instruction.from_decoded(address, decoded))
+    
+    return instructions
+
+
+def instructions_from_bytes(data, base_address: int = 0, byteorder: str = 'little') -> List[Instruction]:
+    """
+    将原始代码字节（如 .text 段内容）反汇编为指令列表
+    
+    Args:
+        data: bytes / bytearray / memoryview，长度为 4 的整数倍
+        base_address: 第一条指令的地址
+        byteorder: 'little' 或 'big'
+    
+    Returns:
+        指令列表
+    """
+    data = memoryview(data).cast('B')
+    if len(data) % 4:
+        raise ValueError(f"代码字节数必须是 4 的整数倍: {len(data)}")
+    fmt = '<I' if byteorder == 'little' else '>I'
+    return instructions_from_words(
+        (base_address + 4 * i, word) for i, (word,) in enumerate(struct.iter_unpack(fmt, data))
+    )
+
+
+def load_packages(source, base_address: int = 0) -> List[VLIWPackage]:
+    """
+    将各种输入统一转换为原始 VLIW 包列表
+    
+    Args:
+        source: 原始字节、(地址, 指令字) 序列、Instruction 列表或 VLIWPackage 列表
+        base_address: source 为原始字节时第一条指令的地址
+    
+    Returns:
+        VLIW 包列表
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        instructions = instructions_from_bytes(source, base_address)
+    else:
+        items = list(source)
+        if not items:
+            return []
+        if isinstance(items[0], VLIWPackage):
+            return items
+        if isinstance(items[0], Instruction):
+            instructions = items
+        else:
+            instructions = instructions_from_words(items)
+    return DisassemblyParser().identify_packages(instructions)
+
+
+class AnalysisResult:
+    """
+    惰性分析结果：每项分析在首次访问对应属性时计算并缓存，
+    只访问原始包统计时不会构建依赖图或运行重打包
+    """
+    
+    def __init__(self, packages: List[VLIWPackage], symbols: Optional[List[Tuple[int, str]]] = None):
+        """
+        Args:
+            packages: 原始 VLIW 包列表
+            symbols: 符号表 [(起始地址, 函数名)]（可选）
+        """
+        self.packages = packages
+        self.symbols = list(symbols or [])
+        self.dep_analyzer = DependencyAnalyzer()
+    
+    @cached_property
+    def valid_instructions(self) -> List[Instruction]:
+        """按程序顺序排列的全部有效（非填充）指令"""
+        return [inst for pkg in self.packages for inst in pkg.instructions if not inst.is_nop]
+    
+    @cached_property
+    def counts(self) -> StatsAccumulator:
+        """原始包、填充与指令类型统计的单遍累加器"""
+        return StatsAccumulator(self.packages)
+    
+    @cached_property
+    def original(self) -> OriginalStats:
+        return OriginalStats(**self.counts.original_stats())
+    
+    @cached_property
+    def padding(self) -> PaddingStats:
+        return PaddingStats(**self.counts.padding_stats())
+    
+    @cached_property
+    def types(self) -> TypeStats:
+        return TypeStats(**self.counts.type_stats())
+    
+    @cached_property
+    def dep_graph(self) -> DependencyGraph:
+        """有效指令的依赖图（节点编号对应 valid_instructions 的下标）"""
+        return self.dep_analyzer.build_dependency_graph(self.valid_instructions)
+    
+    @cached_property
+    def dependency(self) -> DependencyStats:
+        return DependencyStats(**self.dep_analyzer.analyze_dependency_statistics(
+            self.valid_instructions, self.dep_graph
+        ))
+    
+    @cached_property
+    def _repack(self) -> Tuple[List[VLIWPackage], Dict]:
+        return VLIWPacker().repack_with_one_level_dependency(self.packages)
+    
+    @property
+    def optimized_packages(self) -> List[VLIWPackage]:
+        """允许一层依赖的重打包结果"""
+        return self._repack[0]
+    
+    @cached_property
+    def packing(self) -> PackingStats:
+        optimized, repack_stats = self._repack
+        stats = self.counts.packing_stats(len(optimized), sum(pkg.valid_count for pkg in optimized))
+        stats['merged_pairs'] = repack_stats['merged_pairs']
+        return PackingStats(**stats)
+    
+    @cached_property
+    def violations(self) -> List[Dict]:
+        """原始包的合法性违例（见 BundleLegalityChecker.check）"""
+        return BundleLegalityChecker(self.dep_analyzer).check(self.packages)
+    
+    @cached_property
+    def legality(self) -> LegalityStats:
+        checker = BundleLegalityChecker(self.dep_analyzer)
+        return LegalityStats(**checker.summarize(self.packages, self.violations))
+    
+    @cached_property
+    def arrays(self) -> PackageArrays:
+        """原始包的数组视图"""
+        return package_arrays(self.packages)
+    
+    @cached_property
+    def optimized_arrays(self) -> PackageArrays:
+        """重打包结果的数组视图"""
+        return package_arrays(self.optimized_packages)
+    
+    def summary(self, check: bool = False) -> Dict:
+        """
+        生成与 VLIWAnalyzer.summary_record 相同结构的汇总字典（不含 file 字段）
+        
+        Args:
+            check: 是否包含合法性检查结果
+        
+        Returns:
+            汇总字典
+        """
+        summary = {
+            'original': self.original.as_dict(),
+            'padding': self.padding.as_dict(),
+            'types': self.types.as_dict(),
+            'dependency': self.dependency.as_dict(),
+            'packing': self.packing.as_dict()
+        }
+        if check:
+            summary['legality'] = self.legality.as_dict()
+        return summary
+
+
+def analyze(
+    source: Union[bytes, bytearray, memoryview, Iterable],
+    base_address: int = 0,
+    symbols: Optional[List[Tuple[int, str]]] = None
+) -> AnalysisResult:
+    """
+    分析内存中的程序（不读写文件、不输出信息）
+    
+    Args:
+        source: 原始代码字节、(地址, 指令字) 序列、Instruction 列表或 VLIWPackage 列表
+        base_address: source 为原始字节时第一条指令的地址
+        symbols: 符号表 [(起始地址, 函数名)]（可选）
+    
+    Returns:
+        AnalysisResult，各项统计在首次访问时计算
+    """
+    return AnalysisResult(load_packages(source, base_address), symbols)
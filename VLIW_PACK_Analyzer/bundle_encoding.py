@@ -0,0 +1,202 @@
+"""
+变长包编码评估：估算压缩包格式下的代码大小与取指带宽
+"""
+
+from typing import Dict, List
+from instruction import VLIWPackage
+from config import VLIW_PACKAGE_SIZE
+
+
+class BundleEncodingModel:
+    """
+    变长 VLIW 包编码的 what-if 模型
+    
+    支持的编码方案：
+    - fixed：当前硬件格式，每包固定 8 个字
+    - stop_bit：每条指令附加 1 位停止位标记包尾（32 位指令字没有空闲位，
+      停止位按字节计入包大小），删除包前/包后填充，包中填充与空槽位仍按槽位保留
+    - length_header：包头记录包长，删除包前/包后填充，包中填充保留
+    - slot_mask：包头为 8 位槽位掩码，删除全部填充，由掩码恢复槽位
+    """
+    
+    SCHEMES = ('fixed', 'stop_bit', 'length_header', 'slot_mask')
+    
+    def __init__(
+        self,
+        scheme: str = 'stop_bit',
+        fetch_block_bytes: int = 32,
+        header_bits: int = 8,
+        align_bytes: int = 4,
+        fetch_buffer: bool = True
+    ):
+        """
+        Args:
+            scheme: 编码方案
+            fetch_block_bytes: 取指块大小（字节，按块对齐取指）
+            header_bits: length_header / slot_mask 方案的包头位数
+            align_bytes: 每个编码后的包的对齐字节数
+            fetch_buffer: 顺序执行时，上一个包取回的最后一个取指块可被下一个包复用
+        """
+        if scheme not in self.SCHEMES:
+            raise ValueError(f"不支持的编码方案: {scheme}")
+        self.scheme = scheme
+        self.fetch_block_bytes = fetch_block_bytes
+        self.header_bits = header_bits
+        self.align_bytes = align_bytes
+        self.fetch_buffer = fetch_buffer
+    
+    def encoded_size(self, pkg: VLIWPackage) -> int:
+        """
+        计算单个包编码后的字节数
+        
+        Args:
+            pkg: VLIW 包
+        
+        Returns:
+            编码后的字节数
+        """
+        if self.scheme == 'fixed':
+            return VLIW_PACKAGE_SIZE * 4
+        
+        if self.scheme == 'slot_mask':
+            kept = pkg.valid_count
+        elif pkg.slots is not None:
+            # 重打包分配了槽位：保留首条到末条有效指令之间的全部槽位（空槽位编码为 nop）
+            occupied = [
+                slot for slot, inst in enumerate(pkg.slotted())
+                if inst is not None and not inst.is_nop
+            ]
+            kept = occupied[-1] - occupied[0] + 1 if occupied else 0
+        else:
+            padding = pkg.get_padding_stats()
+            kept = len(pkg.instructions) - padding['leading'] - padding['trailing']
+        
+        size = kept * 4
+        if self.scheme == 'stop_bit':
+            size += (kept + 7) // 8
+        elif self.scheme in ('length_header', 'slot_mask'):
+            size += (self.header_bits + 7) // 8
+        
+        return -(-size // self.align_bytes) * self.align_bytes
+    
+    def fetch_bytes(self, offset: int, size: int) -> int:
+        """
+        计算取出位于 [offset, offset + size) 的包需要读取的字节数（按取指块对齐）
+        """
+        if size == 0:
+            return 0
+        first_block = offset // self.fetch_block_bytes
+        last_block = (offset + size - 1) // self.fetch_block_bytes
+        return (last_block - first_block + 1) * self.fetch_block_bytes
+    
+    def analyze(self, packages: List[VLIWPackage], exec_counts: Dict[int, int] = None) -> Dict:
+        """
+        按编码后的连续布局统计代码大小与取指字节数
+        
+        Args:
+            packages: VLIW 包列表（按布局顺序）
+            exec_counts: 各包执行次数（key 为包起始地址），缺省时每包执行 1 次
+        
+        Returns:
+            统计字典
+        """
+        offset = 0
+        executed_bundles = 0
+        executed_valid = 0
+        fetch_total = 0
+        prev_last_block = -1
+        prev_count = 0
+        
+        for pkg in packages:
+            size = self.encoded_size(pkg)
+            count = exec_counts.get(pkg.start_address, 0) if exec_counts is not None else 1
+            if count and size:
+                executed_bundles += count
+                executed_valid += count * pkg.valid_count
+                fetch_total += count * self.fetch_bytes(offset, size)
+                
+                # 顺序执行到本包时，与上一个包共享的取指块无需重取
+                first_block = offset // self.fetch_block_bytes
+                if self.fetch_buffer and first_block == prev_last_block:
+                    fetch_total -= min(count, prev_count) * self.fetch_block_bytes
+                
+                prev_last_block = (offset + size - 1) // self.fetch_block_bytes
+                prev_count = count
+            else:
+                prev_count = 0
+            offset += size
+        
+        return {
+            'scheme': self.scheme,
+            'bundle_count': len(packages),
+            'code_size_bytes': offset,
+            'executed_bundles': executed_bundles,
+            'fetch_bytes': fetch_total,
+            'fetch_bytes_per_bundle': fetch_total / executed_bundles if executed_bundles > 0 else 0,
+            'fetch_bytes_per_instruction': fetch_total / executed_valid if executed_valid > 0 else 0
+        }
+    
+    def derive_exec_counts(
+        self,
+        original_packages: List[VLIWPackage],
+        optimized_packages: List[VLIWPackage],
+        exec_counts: Dict[int, int]
+    ) -> Dict[int, int]:
+        """
+        将原始包的执行次数映射到重排后的包：
+        每个优化包取其首条指令所在原始包的执行次数
+        """
+        if exec_counts is None:
+            return None
+        
+        inst_counts = {}
+        for pkg in original_packages:
+            count = exec_counts.get(pkg.start_address, 0)
+            for inst in pkg.instructions:
+                inst_counts[inst.address] = count
+        
+        return {
+            pkg.start_address: inst_counts.get(pkg.instructions[0].address, 0)
+            for pkg in optimized_packages if pkg.instructions
+        }
+    
+    def compare(
+        self,
+        original_packages: List[VLIWPackage],
+        optimized_packages: List[VLIWPackage],
+        exec_counts: Dict[int, int] = None
+    ) -> Dict:
+        """
+        对比固定格式原始代码、压缩格式原始代码与压缩格式重排代码
+        
+        Args:
+            original_packages: 原始 VLIW 包列表
+            optimized_packages: 优化后的 VLIW 包列表
+            exec_counts: 原始包执行次数（可选）
+        
+        Returns:
+            {'baseline': ..., 'original': ..., 'optimized': ..., 差值字段}
+        """
+        baseline = BundleEncodingModel(
+            'fixed', self.fetch_block_bytes, self.header_bits, self.align_bytes, self.fetch_buffer
+        ).analyze(original_packages, exec_counts)
+        original = self.analyze(original_packages, exec_counts)
+        optimized = self.analyze(
+            optimized_packages,
+            self.derive_exec_counts(original_packages, optimized_packages, exec_counts)
+        )
+        
+        def reduction(before: int, after: int) -> float:
+            return (before - after) / before * 100 if before > 0 else 0
+        
+        return {
+            'scheme': self.scheme,
+            'fetch_block_bytes': self.fetch_block_bytes,
+            'baseline': baseline,
+            'original': original,
+            'optimized': optimized,
+            'original_size_reduction': reduction(baseline['code_size_bytes'], original['code_size_bytes']),
+            'optimized_size_reduction': reduction(baseline['code_size_bytes'], optimized['code_size_bytes']),
+            'original_fetch_reduction': reduction(baseline['fetch_bytes'], original['fetch_bytes']),
+            'optimized_fetch_reduction': reduction(baseline['fetch_bytes'], optimized['fetch_bytes'])
+        }
@@ -0,0 +1,91 @@
+"""
+分析结果缓存：按估算内存上限淘汰的 LRU 缓存与基于指令内容的缓存键
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List
+from instruction import Instruction, VLIWPackage
+
+
+class LRUCache:
+    """按估算字节数限制容量的 LRU 缓存"""
+    
+    def __init__(self, max_bytes: int):
+        """
+        Args:
+            max_bytes: 缓存条目估算字节数之和的上限（超出时淘汰最久未使用的条目）
+        """
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (value, 估算字节数)
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key):
+        """查找条目并标记为最近使用，未命中返回 None"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+    
+    def put(self, key, value, nbytes: int):
+        """
+        加入条目并按容量淘汰旧条目（最新加入的条目总是保留）
+        
+        Args:
+            key: 缓存键
+            value: 缓存值
+            nbytes: 条目的估算字节数
+        """
+        self.pop(key)
+        self.entries[key] = (value, nbytes)
+        self.nbytes += nbytes
+        while self.nbytes > self.max_bytes and len(self.entries) > 1:
+            _, (_, size) = self.entries.popitem(last=False)
+            self.nbytes -= size
+            self.evictions += 1
+    
+    def pop(self, key):
+        """删除条目，返回其值（不存在时返回 None）"""
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return None
+        self.nbytes -= entry[1]
+        return entry[0]
+    
+    def clear(self):
+        """清空缓存"""
+        self.entries.clear()
+        self.nbytes = 0
+    
+    def stats(self) -> Dict:
+        """缓存统计"""
+        return {
+            'entries': len(self.entries),
+            'bytes': self.nbytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+
+def instruction_key(inst: Instruction) -> bytes:
+    """指令的内容键（与地址无关：移动位置的相同函数可复用分析结果）"""
+    decoded = inst.decoded
+    return f"{decoded.hex_code} {decoded.mnemonic} {decoded.operands}\n".encode('utf-8')
+
+
+def function_digest(packages: List[VLIWPackage]) -> bytes:
+    """函数内容摘要：全部指令（含填充）的内容键，并标记包边界"""
+    digest = hashlib.sha1()
+    for pkg in packages:
+        for inst in pkg.instructions:
+            digest.update(instruction_key(inst))
+        digest.update(b'|')
+    return digest.digest()
@@ -0,0 +1,341 @@
+"""
+包合法性检查：验证编译器生成的 VLIW 包能否在 Zircon 上正确执行
+"""
+
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple
+from instruction import VLIWPackage
+from dependency import DependencyAnalyzer, np
+from machine import MachineDescription, default_machine, slot_class
+from packer import ForwardingModel
+from config import VLIW_PACKAGE_SIZE, SLOT_CLASSES
+
+
+# 违例原因代码
+REASON_RAW = 'RAW'          # 包内存在不可前递的写后读
+REASON_WAW = 'WAW'          # 包内两条指令写同一寄存器
+REASON_SLOT = 'SLOT'        # 指令所在槽位的流水线不支持该指令
+REASON_OVERSUB = 'OVERSUB'  # 包内某类指令数量超过可用槽位，无论如何排布都放不下
+
+REASONS = (REASON_RAW, REASON_WAW, REASON_SLOT, REASON_OVERSUB)
+
+# 包内前递的检查结果
+FORWARD_OK = 0
+FORWARD_TOO_DEEP = 1  # 生产者的链深已达模型的最大链深
+FORWARD_TYPE = 2      # 该链深下生产者 / 消费者类型不允许前递
+FORWARD_NO_PATH = 3   # 机器描述中没有生产者槽位到消费者槽位的包内旁路
+
+CLASS_NAMES = tuple(SLOT_CLASSES)
+CLASS_INDEX = {name: i for i, name in enumerate(CLASS_NAMES)}
+NO_CLASS = -1
+
+# 每个槽位类别的可用槽位位掩码
+CLASS_SLOT_MASKS = tuple(
+    sum(1 << slot for slot in SLOT_CLASSES[name]) for name in CLASS_NAMES
+)
+
+
+def _hall_subsets() -> List[Tuple[Tuple[int, ...], int]]:
+    """
+    列出所有槽位类别子集及其可用槽位数（按子集大小升序）
+    
+    由 Hall 定理，包内指令能分配到互不相同的合法槽位，
+    当且仅当任意类别子集中的指令数不超过这些类别可用槽位的并集大小。
+    """
+    subsets = []
+    for size in range(1, len(CLASS_NAMES) + 1):
+        for subset in combinations(range(len(CLASS_NAMES)), size):
+            union = 0
+            for cls in subset:
+                union |= CLASS_SLOT_MASKS[cls]
+            subsets.append((subset, bin(union).count('1')))
+    return subsets
+
+
+HALL_SUBSETS = _hall_subsets()
+
+
+@lru_cache(maxsize=None)
+def find_oversubscription(counts: Tuple[int, ...]) -> Optional[Tuple[Tuple[int, ...], int]]:
+    """
+    检查一个包的各类别指令数能否分配到合法槽位
+    
+    Args:
+        counts: 各槽位类别的指令数（按 CLASS_NAMES 顺序）
+        
+    Returns:
+        最小的违例类别子集及其可用槽位数；可以分配时返回 None
+    """
+    present = {c for c, n in enumerate(counts) if n}
+    for subset, capacity in HALL_SUBSETS:
+        if present.issuperset(subset) and sum(counts[c] for c in subset) > capacity:
+            return subset, capacity
+    return None
+
+
+class BundleLegalityChecker:
+    """
+    批量检查原始 VLIW 包的合法性
+    
+    包内写后读的规则与重打包、等价性检查相同：消费者读取的是包内最近一次写入该寄存器
+    的生产者，生产者的链深与类型须允许前递给消费者（见 ForwardingModel），且机器描述中
+    存在生产者槽位到消费者槽位的包内旁路；消费者的链深为前递给它的生产者链深的最大值 + 1。
+    """
+    
+    def __init__(
+        self,
+        dep_analyzer: DependencyAnalyzer = None,
+        model: ForwardingModel = None,
+        machine: MachineDescription = None
+    ):
+        """
+        Args:
+            dep_analyzer: 依赖分析器（可选）
+            model: 包内前递链模型（默认一层依赖）
+            machine: 机器描述（包内旁路，默认 default_machine()）
+        """
+        self.dep_analyzer = dep_analyzer or DependencyAnalyzer()
+        self.model = model or ForwardingModel()
+        self.machine = machine or default_machine()
+    
+    def check(self, packages: List[VLIWPackage]) -> List[Dict]:
+        """
+        检查所有包，返回违例列表
+        
+        安装 NumPy 时在 (包数 × 8) 的寄存器掩码矩阵和槽位类别矩阵上
+        一次完成全部检查，否则逐包检查。
+        
+        Args:
+            packages: VLIW 包列表
+            
+        Returns:
+            违例列表，每项为 {'address', 'bundle', 'slot', 'reason', 'detail'}，
+            按地址排序；OVERSUB 违例的 address 为包起始地址、slot 为 None
+        """
+        classes = self.class_matrix(packages)
+        types, names = self.type_matrix(packages)
+        if np is not None:
+            found = self._check_vectorized(packages, classes, types, names)
+        else:
+            found = self._check_scalar(packages, classes, types, names)
+        
+        violations = []
+        for bundle_idx, slot, reason, detail in found:
+            pkg = packages[bundle_idx]
+            address = pkg.instructions[slot].address if slot is not None else pkg.start_address
+            violations.append({
+                'address': address,
+                'bundle': pkg.start_address,
+                'slot': slot,
+                'reason': reason,
+                'detail': detail
+            })
+        
+        violations.sort(key=lambda v: (v['address'], REASONS.index(v['reason'])))
+        return violations
+    
+    def class_matrix(self, packages: List[VLIWPackage]) -> List[List[int]]:
+        """
+        构建 (包数 × 8) 的槽位类别矩阵，空槽位与填充指令为 NO_CLASS
+        """
+        cache = {}
+        rows = []
+        for pkg in packages:
+            row = [NO_CLASS] * VLIW_PACKAGE_SIZE
+            for slot, inst in enumerate(pkg.instructions):
+                if inst.is_nop:
+                    continue
+                key = (inst.inst_type, inst.mnemonic)
+                cls = cache.get(key)
+                if cls is None:
+                    cls = cache[key] = CLASS_INDEX[slot_class(inst)]
+                row[slot] = cls
+            rows.append(row)
+        return rows
+    
+    def type_matrix(self, packages: List[VLIWPackage]) -> Tuple[List[List[int]], List[str]]:
+        """
+        构建 (包数 × 8) 的指令类型编号矩阵，空槽位与填充指令为 NO_CLASS
+        
+        Returns:
+            (类型编号矩阵, 编号 -> 指令类型)
+        """
+        codes = {}
+        rows = []
+        for pkg in packages:
+            row = [NO_CLASS] * VLIW_PACKAGE_SIZE
+            for slot, inst in enumerate(pkg.instructions):
+                if not inst.is_nop:
+                    row[slot] = codes.setdefault(inst.inst_type, len(codes))
+            rows.append(row)
+        return rows, list(codes)
+    
+    def forwarding_table(self, names: List[str]) -> List[List[List[bool]]]:
+        """
+        [链深][生产者类型][消费者类型] -> 能否在包内前递（链深小于模型的最大链深）
+        """
+        return [
+            [[consumer in self.model.targets(depth, producer) for consumer in names] for producer in names]
+            for depth in range(max(self.model.max_depth, 1))
+        ]
+    
+    def _raw_detail(self, producer: int, problem: int) -> str:
+        """写后读违例的说明（problem 见 _forwarding_problem）"""
+        if problem == FORWARD_TOO_DEEP:
+            return f"依赖槽位 {producer} 的结果，包内前递链超过 {self.model.max_depth} 级"
+        if problem == FORWARD_NO_PATH:
+            return f"依赖槽位 {producer} 的结果，该槽位没有到本槽位的包内旁路"
+        return f"依赖槽位 {producer} 的结果，不能在包内前递"
+    
+    def _check_vectorized(
+        self,
+        packages: List[VLIWPackage],
+        classes: List[List[int]],
+        types: List[List[int]],
+        names: List[str]
+    ) -> List[Tuple]:
+        """NumPy 路径：所有包的每个槽位对 / 类别子集各做一次整列运算"""
+        reads, writes, _, _ = self.dep_analyzer.bundle_register_matrix(packages)
+        shape = (len(packages), VLIW_PACKAGE_SIZE)
+        classes = np.array(classes, dtype=np.int8).reshape(shape)
+        types = np.array(types, dtype=np.int64).reshape(shape)
+        table = np.array(self.forwarding_table(names), dtype=bool).reshape(-1, len(names), len(names))
+        bundle_targets = self.machine.bundle_targets
+        depth = np.zeros(shape, dtype=np.int64)
+        found = []
+        
+        # 写后读与写后写：槽位 i 的指令先于槽位 j；由近到远找包内生产者，
+        # 被更近的写入覆盖的寄存器不再依赖更远的生产者
+        for j in range(VLIW_PACKAGE_SIZE):
+            covered = np.zeros(len(packages), dtype=np.uint64)
+            for i in range(j - 1, -1, -1):
+                raw = (writes[:, i] & reads[:, j] & ~covered) != 0
+                covered |= writes[:, i]
+                if raw.any():
+                    too_deep = depth[:, i] >= self.model.max_depth
+                    level = np.minimum(depth[:, i], len(table) - 1)
+                    problem = np.where(
+                        too_deep, FORWARD_TOO_DEEP,
+                        np.where(
+                            ~table[level, types[:, i], types[:, j]], FORWARD_TYPE,
+                            FORWARD_OK if bundle_targets[i] >> j & 1 else FORWARD_NO_PATH
+                        )
+                    )
+                    for b in np.flatnonzero(raw & (problem != FORWARD_OK)).tolist():
+                        found.append((b, j, REASON_RAW, self._raw_detail(i, int(problem[b]))))
+                    forwarded = raw & (problem == FORWARD_OK)
+                    depth[:, j] = np.where(forwarded, np.maximum(depth[:, j], depth[:, i] + 1), depth[:, j])
+                waw = (writes[:, i] & writes[:, j]) != 0
+                for b in np.flatnonzero(waw).tolist():
+                    found.append((b, j, REASON_WAW, f"与槽位 {i} 写同一寄存器"))
+        
+        # 槽位类别：查表得到每个类别的可用槽位掩码
+        masks = np.array(CLASS_SLOT_MASKS + (0,), dtype=np.int32)[classes]
+        slot_bits = np.left_shift(1, np.arange(VLIW_PACKAGE_SIZE, dtype=np.int32))
+        bad_slot = (classes != NO_CLASS) & ((masks & slot_bits) == 0)
+        for b, slot in zip(*(a.tolist() for a in np.nonzero(bad_slot))):
+            name = CLASS_NAMES[classes[b, slot]]
+            found.append((b, slot, REASON_SLOT, f"{name} 指令只能位于槽位 {SLOT_CLASSES[name]}"))
+        
+        # 超额：相同的类别计数只需按 Hall 条件判断一次
+        counts = np.stack([(classes == c).sum(axis=1) for c in range(len(CLASS_NAMES))], axis=1)
+        if len(packages):
+            patterns, inverse = np.unique(counts, axis=0, return_inverse=True)
+            inverse = inverse.reshape(-1)
+            for p, pattern in enumerate(patterns.tolist()):
+                result = find_oversubscription(tuple(pattern))
+                if result is None:
+                    continue
+                for b in np.flatnonzero(inverse == p).tolist():
+                    found.append((b, None, REASON_OVERSUB, self._oversub_detail(*result)))
+        
+        return found
+    
+    def _forwarding_problem(
+        self,
+        producer: int,
+        consumer: int,
+        depth: int,
+        table: List[List[List[bool]]],
+        producer_type: int,
+        consumer_type: int
+    ) -> int:
+        """包内生产者能否前递给消费者：FORWARD_OK 或违例原因"""
+        if depth >= self.model.max_depth:
+            return FORWARD_TOO_DEEP
+        if not table[depth][producer_type][consumer_type]:
+            return FORWARD_TYPE
+        if not self.machine.bundle_targets[producer] >> consumer & 1:
+            return FORWARD_NO_PATH
+        return FORWARD_OK
+    
+    def _check_scalar(
+        self,
+        packages: List[VLIWPackage],
+        classes: List[List[int]],
+        types: List[List[int]],
+        names: List[str]
+    ) -> List[Tuple]:
+        """纯 Python 路径：逐包检查，结果与 NumPy 路径一致"""
+        reads, writes, _, _ = self.dep_analyzer.bundle_register_matrix(packages)
+        table = self.forwarding_table(names)
+        found = []
+        
+        for b, row in enumerate(classes):
+            depth = [0] * VLIW_PACKAGE_SIZE
+            for j in range(VLIW_PACKAGE_SIZE):
+                covered = 0
+                for i in range(j - 1, -1, -1):
+                    raw = writes[b][i] & reads[b][j]
+                    if raw and (raw | covered) != covered:
+                        problem = self._forwarding_problem(i, j, depth[i], table, types[b][i], types[b][j])
+                        if problem != FORWARD_OK:
+                            found.append((b, j, REASON_RAW, self._raw_detail(i, problem)))
+                        else:
+                            depth[j] = max(depth[j], depth[i] + 1)
+                    covered |= writes[b][i]
+                    if writes[b][i] & writes[b][j]:
+                        found.append((b, j, REASON_WAW, f"与槽位 {i} 写同一寄存器"))
+            
+            counts = [0] * len(CLASS_NAMES)
+            for slot, cls in enumerate(row):
+                if cls == NO_CLASS:
+                    continue
+                counts[cls] += 1
+                if not CLASS_SLOT_MASKS[cls] >> slot & 1:
+                    name = CLASS_NAMES[cls]
+                    found.append((b, slot, REASON_SLOT, f"{name} 指令只能位于槽位 {SLOT_CLASSES[name]}"))
+            
+            result = find_oversubscription(tuple(counts))
+            if result is not None:
+                found.append((b, None, REASON_OVERSUB, self._oversub_detail(*result)))
+        
+        return found
+    
+    def _oversub_detail(self, subset: Tuple[int, ...], capacity: int) -> str:
+        names = '+'.join(CLASS_NAMES[c] for c in subset)
+        return f"{names} 指令数超过可用槽位数 {capacity}"
+    
+    def summarize(self, packages: List[VLIWPackage], violations: List[Dict]) -> Dict:
+        """
+        汇总检查结果
+        
+        Args:
+            packages: 被检查的包列表
+            violations: check() 的返回值
+            
+        Returns:
+            统计字典
+        """
+        by_reason = {reason: 0 for reason in REASONS}
+        for v in violations:
+            by_reason[v['reason']] += 1
+        
+        return {
+            'checked_packages': len(packages),
+            'illegal_packages': len({v['bundle'] for v in violations}),
+            'violations': len(violations),
+            'by_reason': by_reason,
+            'legal': not violations
+        }
@@ -0,0 +1,148 @@
+"""
+分析服务客户端：只依赖标准库，启动开销小，适合被自动调优脚本频繁调用
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+from typing import Dict
+from config import SERVER_SOCKET_PATH
+
+
+class AnalysisClient:
+    """常驻分析服务的客户端，一个连接可发送多条请求"""
+    
+    def __init__(self, socket_path: str = SERVER_SOCKET_PATH, timeout: float = None):
+        """
+        Args:
+            socket_path: 分析服务的 Unix 套接字路径
+            timeout: 等待响应的超时时间（秒），None 表示一直等待
+        """
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(socket_path)
+        self.reader = self.sock.makefile('r', encoding='utf-8')
+    
+    def request(self, op: str, **params) -> Dict:
+        """
+        发送一条请求并等待响应
+        
+        Args:
+            op: 操作名（ping / analyze / check / diff / stats / evict / shutdown）
+            **params: 请求参数
+        
+        Returns:
+            响应字典
+        
+        Raises:
+            RuntimeError: 服务返回错误
+            ConnectionError: 服务关闭了连接
+        """
+        message = dict(params)
+        message['op'] = op
+        self.sock.sendall((json.dumps(message, ensure_ascii=False) + '\n').encode('utf-8'))
+        
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("分析服务已关闭连接")
+        response = json.loads(line)
+        if not response.get('ok'):
+            raise RuntimeError(response.get('error', '未知错误'))
+        return response
+    
+    def analyze(self, path: str, functions: bool = False, check: bool = False) -> Dict:
+        """
+        请求分析文件（路径按客户端的当前目录解析为绝对路径）
+        
+        Args:
+            path: 反汇编文件路径
+            functions: 是否返回逐函数记录
+            check: 是否同时检查包合法性
+        
+        Returns:
+            响应字典，汇总统计在 'summary' 字段
+        """
+        return self.request('analyze', path=os.path.abspath(path), functions=functions, check=check)
+    
+    def check(self, path: str, violations: bool = False) -> Dict:
+        """请求检查文件中原始包的合法性"""
+        return self.request('check', path=os.path.abspath(path), violations=violations)
+    
+    def diff(self, old_path: str, new_path: str, unchanged: bool = False) -> Dict:
+        """
+        请求对比两次构建
+        
+        Args:
+            old_path: 基准构建的反汇编文件
+            new_path: 新构建的反汇编文件
+            unchanged: 是否同时返回编码未变的函数
+        
+        Returns:
+            响应字典，逐函数差异在 'functions' 字段（按估算周期变化降序）
+        """
+        return self.request(
+            'diff', old=os.path.abspath(old_path), new=os.path.abspath(new_path), unchanged=unchanged
+        )
+    
+    def close(self):
+        """关闭连接"""
+        self.reader.close()
+        self.sock.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    """客户端入口：发送一条请求，以 JSON 输出响应"""
+    parser = argparse.ArgumentParser(description='VLIW 常驻分析服务客户端')
+    parser.add_argument(
+        'op',
+        choices=['ping', 'analyze', 'check', 'diff', 'stats', 'evict', 'shutdown'],
+        help='请求的操作'
+    )
+    parser.add_argument('path', nargs='?', help='反汇编文件路径（analyze / check / evict；diff 时为新构建）')
+    parser.add_argument(
+        '--socket', '-s',
+        default=SERVER_SOCKET_PATH,
+        help=f'Unix 套接字路径（默认: {SERVER_SOCKET_PATH}）'
+    )
+    parser.add_argument('--functions', action='store_true', help='analyze：返回逐函数记录')
+    parser.add_argument('--check', action='store_true', help='analyze：同时检查包合法性')
+    parser.add_argument('--violations', action='store_true', help='check：返回违例列表')
+    parser.add_argument('--base', help='diff：基准构建的反汇编文件路径')
+    
+    args = parser.parse_args()
+    if args.op in ('analyze', 'check', 'diff') and not args.path:
+        parser.error(f"{args.op} 需要文件路径")
+    if args.op == 'diff' and not args.base:
+        parser.error("diff 需要 --base 指定基准构建")
+    
+    params = {}
+    if args.op == 'diff':
+        params.update(old=os.path.abspath(args.base), new=os.path.abspath(args.path))
+    elif args.path:
+        params['path'] = os.path.abspath(args.path)
+    if args.op == 'analyze':
+        params.update(functions=args.functions, check=args.check)
+    elif args.op == 'check':
+        params['violations'] = args.violations
+    
+    try:
+        with AnalysisClient(args.socket) as client:
+            response = client.request(args.op, **params)
+    except (OSError, RuntimeError) as e:
+        print(f"错误：{e}", file=sys.stderr)
+        return 1
+    
+    print(json.dumps(response, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
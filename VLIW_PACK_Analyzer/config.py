@@ -36,6 +36,25 @@ MULTI_CYCLE_INST = {
     'fclass.s'
 }
 
+# 访存指令（Load / Store）
+LOAD_INST = {'lw', 'lh', 'lb', 'lhu', 'lbu', 'flw'}
+STORE_INST = {'sw', 'sh', 'sb', 'fsw'}
+
+# 乘除法指令
+MULDIV_INST = {'mul', 'mulh', 'mulhsu', 'mulhu', 'div', 'divu', 'rem', 'remu'}
+
+# 浮点除法 / 开方（仅 0 号流水线的 FDiv）
+FDIV_INST = {'fdiv.s', 'fsqrt.s'}
+
+# 浮点 → 整数转换（仅 1 号流水线的 FPU）
+FCVT_TO_INT_INST = {'fcvt.w.s', 'fcvt.wu.s'}
+
+# 整数 → 浮点转换（仅 2 号流水线的 FPU）
+FCVT_TO_FLOAT_INST = {'fcvt.s.w', 'fcvt.s.wu'}
+
+# 写整数寄存器的其他浮点指令（0 号流水线写回 GPR 时只选择 ALU 结果）
+FPU_GPR_INST = {'feq.s', 'flt.s', 'fle.s', 'fclass.s', 'fmv.x.w'}
+
 # 分支/跳转指令
 BRANCH_JUMP_INST = {
     'beq', 'bne', 'blt', 'bge', 'bltu', 'bgeu',
@@ -78,6 +97,137 @@ FLOAT_REG_ALIAS = {
 # 包括：单周期 ALU 指令 + 分支/跳转指令
 ONE_LEVEL_DEPENDENCY_ELIGIBLE = SINGLE_CYCLE_ALU | BRANCH_JUMP_INST
 
+# 包内前递链：不读取包内结果的指令链深为 0，读取包内结果的指令链深为其包内生产者链深的最大值 + 1。
+# 第 L 级前递（链深 L-1 的生产者 → 链深 L 的消费者）允许的 (生产者类型, 消费者类型)，
+# 类型为 Instruction.inst_type，超出列表的级别沿用最后一级。
+# 默认只有一级：单周期 ALU 在 EX1 完成、EX2 前递给单周期 ALU / 分支指令
+FORWARDING_LEVELS = (
+    ({'ALU'}, {'ALU', 'BRANCH'}),
+)
+# 包内前递链的最大深度（0 表示包内不允许写后读）
+FORWARDING_CHAIN_DEPTH = 1
+# 前递链深度对比默认评估的深度
+FORWARDING_DEPTH_SWEEP = (0, 1, 2, 3)
+
+# 寄存器位掩码：x0-x31 占第 0-31 位，f0-f31 占第 32-63 位
+NUM_ARCH_REGS = 64
+FLOAT_REG_BASE = 32
+
 # VLIW 包大小
 VLIW_PACKAGE_SIZE = 8
 
+# 各类指令可发射的槽位（第 i 个槽位固定送入第 i 条流水线）
+# 0: ALU + FDiv + FPU | 1: ALU + FPU(FPToInt) | 2: ALU + FPU(IntToFP)
+# 3-4: ALU + iMul/Div | 5-6: ALU + LSU | 7: ALU + Branch
+SLOT_CLASSES = {
+    'ALU': tuple(range(VLIW_PACKAGE_SIZE)),
+    'FPU': (0, 1, 2),
+    'FPU_GPR': (1, 2),
+    'FCVT_TO_INT': (1,),
+    'FCVT_TO_FLOAT': (2,),
+    'FDIV': (0,),
+    'MULDIV': (3, 4),
+    'LSU': (5, 6),
+    'BRANCH': (7,),
+    'OTHER': tuple(range(VLIW_PACKAGE_SIZE)),
+}
+
+# 并行解析：文件达到该大小才启用进程池，每个进程分配的区间数（用于负载均衡）
+PARALLEL_PARSE_MIN_BYTES = 64 << 20
+PARALLEL_PARSE_CHUNKS_PER_JOB = 4
+
+# 顺序读取（标准输入 / 压缩文件）快速解析时每次读取的块大小
+STREAM_READ_BLOCK_SIZE = 4 << 20
+
+# 指令译码缓存容量（按编码共享译码结果，LRU 淘汰）
+DECODE_CACHE_SIZE = 65536
+
+# 每个机器描述的槽位分配缓存容量（按包内约束缓存搜索结果，LRU 淘汰）
+SLOT_ASSIGNMENT_CACHE_SIZE = 16384
+
+# 常驻分析服务：默认套接字路径、程序缓存与逐函数结果缓存的内存上限
+SERVER_SOCKET_PATH = '/tmp/vliw-analyzer.sock'
+SERVER_CACHE_BYTES = 512 << 20
+SERVER_FUNCTION_CACHE_BYTES = 64 << 20
+
+# 缓存内存估算：每条已解析指令、每条逐函数结果约占用的字节数
+SERVER_INSTRUCTION_BYTES = 320
+SERVER_FUNCTION_BYTES = 2048
+
+# 静态停顿估算：生产者所在包与使用其结果的包至少相隔的包数（相邻包为 1）
+# ALU 结果在 EX2 前递，下一个包即可使用；load / 乘除法 / 浮点结果在 WB 前递，
+# 生产者处于 EX1 / EX2 时 Hazard 阻塞 ID 中的相关包，需相隔 3 个包
+RESULT_LATENCY = {
+    'ALU': 1,
+    'BRANCH': 1,
+    'LOAD': 3,
+    'MULDIV': 3,
+    'FPU': 3,
+    'OTHER': 1,
+}
+
+# 迭代型除法器的估算额外阻塞周期（实际周期数与操作数有关，取典型值）
+ITERATIVE_EXTRA_CYCLES = {
+    'div': 16, 'divu': 16, 'rem': 16, 'remu': 16,
+    'fdiv.s': 24, 'fsqrt.s': 24,
+}
+
+# 旁路（前递）拓扑，对应 Backend/Bypass/Forward.scala：
+# 级 -> (可前递的生产者流水线, 可接收的消费者流水线)，生产者处于该级时，
+# 其结果可前递给处于 EX1 的消费者。EX2 / EX3 只有 1-7 号流水线的 ALU 结果可前递，
+# WB 级全部流水线可前递；EX1 为同一包内的一层依赖前递，任意槽位之间均可
+BYPASS_PATHS = {
+    'EX1': (tuple(range(VLIW_PACKAGE_SIZE)), tuple(range(VLIW_PACKAGE_SIZE))),
+    'EX2': (tuple(range(1, VLIW_PACKAGE_SIZE)), tuple(range(VLIW_PACKAGE_SIZE))),
+    'EX3': (tuple(range(1, VLIW_PACKAGE_SIZE)), tuple(range(VLIW_PACKAGE_SIZE))),
+    'WB': (tuple(range(VLIW_PACKAGE_SIZE)), tuple(range(VLIW_PACKAGE_SIZE))),
+}
+
+# 生产者处于各级时与消费者所在包的包间距（EX1 为同一包）；
+# 没有可用的旁路时，结果写回后由下一个进入 ID 的包从寄存器堆读取
+BYPASS_STAGE_DISTANCE = {'EX1': 0, 'EX2': 1, 'EX3': 2, 'WB': 3}
+REGFILE_DISTANCE = 4
+
+# 重打包等价性检查：并行解释的随机初始状态（lane）数与随机种子
+EQUIVALENCE_LANES = 1024
+EQUIVALENCE_SEED = 0x5eed
+
+# 包级功能模拟器：镜像加载基址与内存大小（对应 Memory.loadFromFile 的 baseAddr），
+# 取到该指令字时结束模拟（Simulator.simEnd），结束时 a0 为 0 表示测试通过
+SIM_BASE_ADDRESS = 0x80000000
+SIM_MEMORY_BYTES = 64 << 20
+SIM_END_WORD = 0x80000000
+
+# 外设：读返回 0、写忽略，向 UART 发送寄存器写入的字节输出到终端（Device.scala）
+SIM_DEVICE_BASE = 0xa0000000
+SIM_DEVICE_BYTES = 0x10000
+SIM_UART_ADDRESS = SIM_DEVICE_BASE + 0x3f8
+
+# 跳转（分支成立 / jal / jalr）的额外周期：EX1 判定、EX2 发出重定向，
+# Hazard 冲刷取指、ID-EX1、EX1-EX2 三级
+TAKEN_BRANCH_PENALTY = 3
+
+# 搜索式重打包：每个基本块的墙钟预算（毫秒），超出预算仍未得到完整调度的块退回贪心结果
+SEARCH_BLOCK_BUDGET_MS = 50
+# 束搜索保留的部分调度数与每个部分调度扩展的候选包数
+SEARCH_BEAM_WIDTH = 4
+SEARCH_BEAM_CANDIDATES = 4
+# 模拟退火的最大步数、初始温度（周期）与随机种子（相同种子、步数不受预算截断时结果可复现）
+SEARCH_ANNEAL_STEPS = 300
+SEARCH_ANNEAL_TEMPERATURE = 2.0
+SEARCH_SEED = 2024
+# 并行搜索时每个进程分配的块组数（用于负载均衡）
+SEARCH_CHUNKS_PER_JOB = 4
+
+# 循环展开 what-if：默认评估的展开倍数，以及不参与重命名分配的寄存器（zero / ra / sp / gp / tp）
+UNROLL_FACTORS = (1, 2, 4, 8)
+UNROLL_RESERVED_REGS = ('x0', 'x1', 'x2', 'x3', 'x4')
+# 报告中列出的循环数（按展开收益从高到低）
+UNROLL_REPORT_LOOPS = 20
+
+# 静态执行频率估算：无法推断迭代次数的循环每层按 STATIC_LOOP_TRIP_COUNT 次计（频率为 10^嵌套深度），
+# 由 addi / 条件分支归纳模式推断的迭代次数超过 STATIC_MAX_TRIP_COUNT 时视为无法推断
+STATIC_LOOP_TRIP_COUNT = 10
+STATIC_MAX_TRIP_COUNT = 1 << 20
+# 报告中列出的最热循环数
+STATIC_PROFILE_REPORT_LOOPS = 10
@@ -2,8 +2,144 @@
 依赖关系分析：分析指令间的数据依赖关系
 """
 
-from typing import List, Dict, Set, Tuple
+from array import array
+from typing import Iterator, List, Dict, Tuple
 from instruction import Instruction, VLIWPackage
+from config import VLIW_PACKAGE_SIZE, NUM_ARCH_REGS
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 为可选依赖，缺失时使用纯 Python 路径
+    np = None
+
+
+# 依赖边类型
+DEP_RAW = 0
+DEP_WAR = 1
+DEP_WAW = 2
+DEP_MEM = 3
+
+DEP_KIND_NAMES = ('RAW', 'WAR', 'WAW', 'MEM')
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """依次产出掩码中置位的位号（即寄存器编号）"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class DependencyGraph:
+    """
+    CSR（压缩稀疏行）形式的依赖图
+    
+    第 i 条指令依赖的边位于 [indptr[i], indptr[i+1]) 区间：
+    - indices[e]：生产者指令索引
+    - kinds[e]：边类型（DEP_RAW / DEP_WAR / DEP_WAW / DEP_MEM）
+    - one_level[e]：该 RAW 边能否在同一包内以一层依赖转发
+    
+    数据保存在紧凑的 array 中，每条边 6 字节、每个节点 8 字节；
+    安装 NumPy 时四个字段以零拷贝的 NumPy 数组形式提供。
+    
+    依赖图用于依赖统计与逐对依赖列表；打包器不读取依赖图，而是按同样的规则
+    在包内直接判断顺序约束（见 OnlinePacker._ordered_before）。
+    """
+    
+    def __init__(self, indptr: array, indices: array, kinds: array, one_level: array):
+        self._indptr = indptr
+        self._indices = indices
+        self._kinds = kinds
+        self._one_level = one_level
+        
+        if np is not None:
+            self.indptr = np.frombuffer(indptr, dtype=np.int64) if len(indptr) else np.zeros(1, np.int64)
+            self.indices = np.frombuffer(indices, dtype=np.int32) if len(indices) else np.zeros(0, np.int32)
+            self.kinds = np.frombuffer(kinds, dtype=np.uint8) if len(kinds) else np.zeros(0, np.uint8)
+            self.one_level = np.frombuffer(one_level, dtype=bool) if len(one_level) else np.zeros(0, bool)
+        else:
+            self.indptr = indptr
+            self.indices = indices
+            self.kinds = kinds
+            self.one_level = one_level
+    
+    @property
+    def num_nodes(self) -> int:
+        return len(self._indptr) - 1
+    
+    @property
+    def num_edges(self) -> int:
+        return len(self._indices)
+    
+    @property
+    def nbytes(self) -> int:
+        """图数据占用的字节数"""
+        return sum(a.itemsize * len(a) for a in (self._indptr, self._indices, self._kinds, self._one_level))
+    
+    def __len__(self) -> int:
+        return self.num_nodes
+    
+    def scalar_view(self) -> Tuple[array, array, array]:
+        """
+        返回 (indices, kinds, one_level) 的 array 形式，
+        供逐条边的 Python 循环使用（比逐个索引 NumPy 数组快得多）
+        """
+        return self._indices, self._kinds, self._one_level
+    
+    def edge_range(self, node: int) -> range:
+        """返回第 node 条指令的边下标区间"""
+        return range(self._indptr[node], self._indptr[node + 1])
+    
+    def predecessors(self, node: int, kind: int = None) -> List[int]:
+        """
+        返回第 node 条指令依赖的指令索引
+        
+        Args:
+            node: 指令索引
+            kind: 只返回该类型的边（可选）
+        """
+        if kind is None:
+            return self._indices[self._indptr[node]:self._indptr[node + 1]].tolist()
+        return [self._indices[e] for e in self.edge_range(node) if self._kinds[e] == kind]
+    
+    def iter_edges(self) -> Iterator[Tuple[int, int]]:
+        """依次产出 (消费者索引, 边下标)"""
+        indptr = self._indptr
+        for node in range(len(indptr) - 1):
+            for edge in range(indptr[node], indptr[node + 1]):
+                yield node, edge
+    
+    def edge_consumers(self):
+        """每条边对应的消费者索引（需要 NumPy）"""
+        return np.repeat(np.arange(self.num_nodes, dtype=np.int32), np.diff(self.indptr))
+    
+    def has_kind(self, kind: int):
+        """
+        标记每条指令是否存在指定类型的依赖边
+        
+        Returns:
+            长度为 num_nodes 的布尔序列
+        """
+        if np is not None:
+            result = np.zeros(self.num_nodes, dtype=bool)
+            result[self.edge_consumers()[self.kinds == kind]] = True
+            return result
+        
+        result = [False] * self.num_nodes
+        for node, edge in self.iter_edges():
+            if self._kinds[edge] == kind:
+                result[node] = True
+        return result
+    
+    def kind_counts(self) -> Dict[str, int]:
+        """按边类型统计边数"""
+        if np is not None:
+            counts = np.bincount(self.kinds, minlength=len(DEP_KIND_NAMES)).tolist()
+        else:
+            counts = [0] * len(DEP_KIND_NAMES)
+            for kind in self._kinds:
+                counts[kind] += 1
+        return dict(zip(DEP_KIND_NAMES, counts))
 
 
 class DependencyAnalyzer:
@@ -23,23 +159,34 @@ class DependencyAnalyzer:
         Returns:
             是否存在 RAW 依赖
         """
-        if not producer.rd:
-            return False
-        
-        # 特殊处理：写入 x0/zero 寄存器无效
-        if producer.rd == 'x0':
-            return False
+        # 写掩码中已去除 x0/zero，一次按位与即可判断
+        return (producer.writes & consumer.reads) != 0
+    
+    def analyze_war_dependency(self, reader: Instruction, writer: Instruction) -> bool:
+        """
+        检查 writer 是否覆盖 reader 读取的寄存器（WAR 依赖）
         
-        # 检查 consumer 的源寄存器是否与 producer 的目标寄存器相同
-        consumer_sources = []
-        if consumer.rs1:
-            consumer_sources.append(consumer.rs1)
-        if consumer.rs2:
-            consumer_sources.append(consumer.rs2)
-        if consumer.rs3:
-            consumer_sources.append(consumer.rs3)
+        Args:
+            reader: 先执行的读指令
+            writer: 后执行的写指令
+            
+        Returns:
+            是否存在 WAR 依赖
+        """
+        return (reader.reads & writer.writes) != 0
+    
+    def analyze_waw_dependency(self, first: Instruction, second: Instruction) -> bool:
+        """
+        检查两条指令是否写同一寄存器（WAW 依赖）
         
-        return producer.rd in consumer_sources
+        Args:
+            first: 先执行的写指令
+            second: 后执行的写指令
+            
+        Returns:
+            是否存在 WAW 依赖
+        """
+        return (first.writes & second.writes) != 0
     
     def can_form_one_level_dependency(self, producer: Instruction, consumer: Instruction) -> bool:
         """
@@ -71,46 +218,87 @@ class DependencyAnalyzer:
         
         return True
     
-    def build_dependency_graph(self, instructions: List[Instruction]) -> Dict[int, Set[int]]:
+    def build_dependency_graph(self, instructions: List[Instruction]) -> 'DependencyGraph':
         """
-        构建依赖图
+        构建依赖图（CSR 表示）
+        
+        按程序顺序单遍扫描，为每个寄存器记录最近一次写入和其后的读取者：
+        - RAW：源寄存器的最近写入者 → 当前指令
+        - WAR：目标寄存器上次写入后的读取者 → 当前指令
+        - WAW：目标寄存器的最近写入者 → 当前指令
+        - MEM：最近一次存储 → 当前访存指令，以及上次存储后的加载 → 当前存储
+          （地址未知，保守排序；后者即内存上的 WAR）
         
         Args:
             instructions: 指令列表
             
         Returns:
-            依赖图字典，key 为指令索引，value 为其依赖的指令索引集合
+            DependencyGraph，边按消费者分组，组内按生产者索引升序
         """
-        dep_graph = {}
+        indptr = array('q', [0])
+        indices = array('i')
+        kinds = array('B')
+        one_level = array('B')
+        
+        last_writer = [-1] * NUM_ARCH_REGS
+        readers = [[] for _ in range(NUM_ARCH_REGS)]
+        last_store = -1
+        loads = []  # 最近一次存储之后的加载
         
         for i, consumer in enumerate(instructions):
             if consumer.is_nop:
-                dep_graph[i] = set()
+                indptr.append(len(indices))
                 continue
             
-            dependencies = set()
+            edges = {}
             
-            # 向前查找依赖（只需要查找最近的写入）
-            for j in range(i - 1, -1, -1):
-                producer = instructions[j]
-                
-                if producer.is_nop:
-                    continue
-                
-                # 检查是否存在 RAW 依赖
-                if self.analyze_raw_dependency(producer, consumer):
-                    dependencies.add(j)
-                    # 找到最近的写入后，对于该寄存器不再继续查找
-                    # 但需要检查其他源寄存器
+            for reg in iter_bits(consumer.reads):
+                j = last_writer[reg]
+                if j >= 0:
+                    edges[(j, DEP_RAW)] = True
+            
+            for reg in iter_bits(consumer.writes):
+                j = last_writer[reg]
+                if j >= 0:
+                    edges[(j, DEP_WAW)] = True
+                for j in readers[reg]:
+                    if j != i:
+                        edges[(j, DEP_WAR)] = True
             
-            dep_graph[i] = dependencies
+            if last_store >= 0 and consumer.inst_type in ('LOAD', 'STORE'):
+                edges[(last_store, DEP_MEM)] = True
+            if consumer.inst_type == 'STORE':
+                for j in loads:
+                    edges[(j, DEP_MEM)] = True
+            
+            for j, kind in sorted(edges):
+                indices.append(j)
+                kinds.append(kind)
+                one_level.append(
+                    kind == DEP_RAW and
+                    instructions[j].is_single_cycle and
+                    consumer.can_one_level_dep
+                )
+            indptr.append(len(indices))
+            
+            # 更新寄存器状态：先登记读取，再登记写入（写入清空读取者）
+            for reg in iter_bits(consumer.reads):
+                readers[reg].append(i)
+            for reg in iter_bits(consumer.writes):
+                last_writer[reg] = i
+                readers[reg] = []
+            if consumer.inst_type == 'STORE':
+                last_store = i
+                loads = []
+            elif consumer.inst_type == 'LOAD':
+                loads.append(i)
         
-        return dep_graph
+        return DependencyGraph(indptr, indices, kinds, one_level)
     
     def find_one_level_dependency_pairs(
         self,
         instructions: List[Instruction],
-        dep_graph: Dict[int, Set[int]]
+        dep_graph: 'DependencyGraph'
     ) -> List[Tuple[int, int]]:
         """
         找出所有可以形成一层依赖的指令对
@@ -122,26 +310,24 @@ class DependencyAnalyzer:
         Returns:
             一层依赖对列表 [(producer_idx, consumer_idx), ...]
         """
-        one_level_pairs = []
+        if np is not None:
+            selected = np.flatnonzero(dep_graph.one_level)
+            producers = dep_graph.indices[selected]
+            consumers = dep_graph.edge_consumers()[selected]
+            return list(zip(producers.tolist(), consumers.tolist()))
         
-        for consumer_idx, producer_indices in dep_graph.items():
-            consumer = instructions[consumer_idx]
-            
-            if consumer.is_nop:
-                continue
-            
-            for producer_idx in producer_indices:
-                producer = instructions[producer_idx]
-                
-                if self.can_form_one_level_dependency(producer, consumer):
-                    one_level_pairs.append((producer_idx, consumer_idx))
+        indices, _, one_level = dep_graph.scalar_view()
+        one_level_pairs = []
+        for consumer_idx, edge in dep_graph.iter_edges():
+            if one_level[edge]:
+                one_level_pairs.append((indices[edge], consumer_idx))
         
         return one_level_pairs
     
     def analyze_dependency_statistics(
         self,
         instructions: List[Instruction],
-        dep_graph: Dict[int, Set[int]]
+        dep_graph: 'DependencyGraph'
     ) -> Dict:
         """
         分析依赖关系统计
@@ -159,18 +345,12 @@ class DependencyAnalyzer:
         # 统计单周期 ALU 指令
         single_cycle_count = sum(1 for inst in valid_instructions if inst.is_single_cycle)
         
-        # 统计无依赖和有依赖的指令
-        independent_count = 0
-        dependent_count = 0
-        
-        for i, inst in enumerate(instructions):
-            if inst.is_nop:
-                continue
-            
-            if len(dep_graph.get(i, set())) == 0:
-                independent_count += 1
-            else:
-                dependent_count += 1
+        # 统计无依赖和有依赖（存在 RAW 依赖）的指令
+        has_raw = dep_graph.has_kind(DEP_RAW)
+        dependent_count = sum(
+            1 for i, inst in enumerate(instructions) if not inst.is_nop and has_raw[i]
+        )
+        independent_count = total_valid - dependent_count
         
         # 找出一层依赖对
         one_level_pairs = self.find_one_level_dependency_pairs(instructions, dep_graph)
@@ -183,4 +363,140 @@ class DependencyAnalyzer:
             'one_level_pairs': len(one_level_pairs),
             'one_level_pair_list': one_level_pairs
         }
+    
+    def bundle_register_matrix(self, packages: List[VLIWPackage]):
+        """
+        构建 (包数 × 8) 的寄存器读/写掩码矩阵，空槽位与填充指令的掩码为 0
+        
+        Args:
+            packages: VLIW 包列表
+            
+        Returns:
+            (reads, writes, producer_ok, consumer_ok)：
+            安装 NumPy 时为 uint64 / bool 数组，否则为嵌套列表。
+            producer_ok / consumer_ok 标记该槽位能否作为一层依赖的生产者 / 消费者
+        """
+        reads = []
+        writes = []
+        producer_ok = []
+        consumer_ok = []
+        
+        for pkg in packages:
+            row_reads = [0] * VLIW_PACKAGE_SIZE
+            row_writes = [0] * VLIW_PACKAGE_SIZE
+            row_producer = [False] * VLIW_PACKAGE_SIZE
+            row_consumer = [False] * VLIW_PACKAGE_SIZE
+            for slot, inst in enumerate(pkg.instructions):
+                if inst.is_nop:
+                    continue
+                row_reads[slot] = inst.reads
+                row_writes[slot] = inst.writes
+                row_producer[slot] = inst.is_single_cycle
+                row_consumer[slot] = inst.can_one_level_dep
+            reads.append(row_reads)
+            writes.append(row_writes)
+            producer_ok.append(row_producer)
+            consumer_ok.append(row_consumer)
+        
+        if np is None:
+            return reads, writes, producer_ok, consumer_ok
+        
+        shape = (len(packages), VLIW_PACKAGE_SIZE)
+        return (
+            np.array(reads, dtype=np.uint64).reshape(shape),
+            np.array(writes, dtype=np.uint64).reshape(shape),
+            np.array(producer_ok, dtype=bool).reshape(shape),
+            np.array(consumer_ok, dtype=bool).reshape(shape)
+        )
+    
+    def find_bundle_conflicts(self, packages: List[VLIWPackage]) -> List[bool]:
+        """
+        检查每个包内部是否存在冲突：
+        - 槽位靠前的指令写、靠后的指令读同一寄存器，且不能形成一层依赖
+        - 两条指令写同一寄存器
+        
+        安装 NumPy 时对所有包的 28 个槽位对做整列按位与，一次完成。
+        
+        Args:
+            packages: VLIW 包列表
+            
+        Returns:
+            每个包是否存在冲突
+        """
+        reads, writes, producer_ok, consumer_ok = self.bundle_register_matrix(packages)
+        
+        if np is not None:
+            conflict = np.zeros(len(packages), dtype=bool)
+            for i in range(VLIW_PACKAGE_SIZE):
+                for j in range(i + 1, VLIW_PACKAGE_SIZE):
+                    raw = (writes[:, i] & reads[:, j]) != 0
+                    forwardable = producer_ok[:, i] & consumer_ok[:, j]
+                    waw = (writes[:, i] & writes[:, j]) != 0
+                    conflict |= (raw & ~forwardable) | waw
+            return conflict.tolist()
+        
+        result = []
+        for row_reads, row_writes, row_producer, row_consumer in zip(reads, writes, producer_ok, consumer_ok):
+            found = False
+            for i in range(VLIW_PACKAGE_SIZE):
+                if not row_writes[i]:
+                    continue
+                for j in range(i + 1, VLIW_PACKAGE_SIZE):
+                    if row_writes[i] & row_reads[j] and not (row_producer[i] and row_consumer[j]):
+                        found = True
+                    elif row_writes[i] & row_writes[j]:
+                        found = True
+                    if found:
+                        break
+                if found:
+                    break
+            result.append(found)
+        return result
 
+
+class OnlineDependencyCounter:
+    """
+    流式依赖统计：逐条输入有效指令，只保留各寄存器的最近写入者，
+    结果与 DependencyAnalyzer.analyze_dependency_statistics 相同（不含逐对列表）
+    """
+    
+    def __init__(self):
+        self.position = 0  # 已输入的有效指令数（即下一条指令的编号）
+        self.last_writer = [-1] * NUM_ARCH_REGS
+        self.written = 0  # 已有写入者的寄存器
+        self.single_cycle_written = 0  # 最近写入者为单周期 ALU 的寄存器
+        self.single_cycle_count = 0
+        self.dependent_count = 0
+        self.one_level_pairs = 0
+    
+    def push(self, inst: Instruction):
+        """按程序顺序输入一条指令（填充指令被忽略）"""
+        if inst.is_nop:
+            return
+        
+        if inst.reads & self.written:
+            self.dependent_count += 1
+        if inst.can_one_level_dep:
+            # 多个源寄存器来自同一生产者时只构成一条依赖边
+            producers = {self.last_writer[reg] for reg in iter_bits(inst.reads & self.single_cycle_written)}
+            self.one_level_pairs += len(producers)
+        
+        for reg in iter_bits(inst.writes):
+            self.last_writer[reg] = self.position
+        self.written |= inst.writes
+        if inst.is_single_cycle:
+            self.single_cycle_count += 1
+            self.single_cycle_written |= inst.writes
+        else:
+            self.single_cycle_written &= ~inst.writes
+        self.position += 1
+    
+    def statistics(self) -> Dict:
+        """当前的依赖统计"""
+        return {
+            'total_valid_instructions': self.position,
+            'single_cycle_count': self.single_cycle_count,
+            'independent_count': self.position - self.dependent_count,
+            'dependent_count': self.dependent_count,
+            'one_level_pairs': self.one_level_pairs
+        }
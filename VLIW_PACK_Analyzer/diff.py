@@ -0,0 +1,314 @@
+"""
+构建间差异对比：按函数对齐两次构建，输出包数、密度、估算停顿与一层依赖合并的变化
+"""
+
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+from parser import DisassemblyParser, STDIN_PATH, split_functions
+from instruction import VLIWPackage
+from packer import VLIWPacker
+from timing import StallEstimator
+from statistics import StatsAccumulator
+from cache import LRUCache
+from encoding import control_target
+from config import SERVER_FUNCTION_CACHE_BYTES, SERVER_FUNCTION_BYTES
+
+# 逐函数对比的指标（density 为比值，其余为计数）
+DIFF_METRICS = ('packages', 'valid', 'padding', 'density', 'stalls', 'cycles', 'merged_pairs')
+
+# 与地址相关的指令：编码摘要只取助记符与寄存器，使整体移动的函数摘要不变
+PC_RELATIVE_TYPES = {'BRANCH'}
+PC_RELATIVE_MNEMONICS = {'auipc'}
+
+
+def encoding_digest(packages: List[VLIWPackage]) -> str:
+    """
+    与位置无关的函数编码摘要，用于对齐改名的函数，也是逐函数指标的缓存键
+    
+    目标在函数内的分支 / 跳转保留指令字（PC 相对偏移不随函数移动而变化，且决定了
+    重打包时基本块的划分）；目标在函数外的跳转、jalr 与 auipc 只取助记符与寄存器。
+    
+    Args:
+        packages: 函数的包列表
+    
+    Returns:
+        十六进制摘要字符串
+    """
+    start = packages[0].start_address if packages else 0
+    end = packages[-1].start_address + 4 * len(packages[-1].instructions) if packages else 0
+    digest = hashlib.sha1()
+    for pkg in packages:
+        for inst in pkg.instructions:
+            if inst.inst_type in PC_RELATIVE_TYPES or inst.mnemonic in PC_RELATIVE_MNEMONICS:
+                target = control_target(int(inst.hex_code, 16), inst.address)
+                local = target is not None and start <= target < end
+                text = inst.hex_code if local else f"{inst.mnemonic} {inst.rd} {inst.rs1} {inst.rs2}"
+                digest.update(f"{text}\n".encode('utf-8'))
+            else:
+                digest.update(inst.hex_code.encode('ascii'))
+                digest.update(b'\n')
+        digest.update(b'|')
+    return digest.hexdigest()
+
+
+class BuildProfiler:
+    """
+    逐函数计算对比指标，按位置无关的编码摘要缓存，两次构建中未变化（包括整体移动、
+    改名）的函数只计算一次
+    
+    函数单独计算（入口处无未完成的生产者、重打包从空包开始），
+    因此指标只取决于函数自身，与其在程序中的位置无关。
+    """
+    
+    def __init__(self, cache: LRUCache = None):
+        """
+        Args:
+            cache: 逐函数指标缓存（可与分析服务的逐函数结果缓存共用）
+        """
+        self.cache = cache if cache is not None else LRUCache(SERVER_FUNCTION_CACHE_BYTES)
+        self.estimator = StallEstimator()
+        self.packer = VLIWPacker()
+    
+    def profile(self, packages: List[VLIWPackage], symbols: List[Tuple[int, str]]) -> List[Dict]:
+        """
+        计算程序中每个函数的指标
+        
+        Args:
+            packages: 原始 VLIW 包列表
+            symbols: 符号表
+        
+        Returns:
+            [{'function', 'address', 'encoding', 'metrics'}]，按地址顺序
+        """
+        profiles = []
+        for name, function_packages in split_functions(packages, symbols):
+            encoding = encoding_digest(function_packages)
+            key = ('profile', encoding)
+            metrics = self.cache.get(key)
+            if metrics is None:
+                metrics = self.function_metrics(function_packages)
+                self.cache.put(key, metrics, SERVER_FUNCTION_BYTES)
+            profiles.append({
+                'function': name,
+                'address': f"0x{function_packages[0].start_address:08x}",
+                'encoding': encoding,
+                'metrics': metrics
+            })
+        return profiles
+    
+    def profile_file(self, filepath: str, fast_parse: bool = False) -> List[Dict]:
+        """解析反汇编文件并计算每个函数的指标"""
+        return self.profile(*_parse_file((filepath, fast_parse)))
+    
+    def function_metrics(self, packages: List[VLIWPackage]) -> Dict:
+        """
+        计算单个函数的指标
+        
+        Args:
+            packages: 函数的包列表
+        
+        Returns:
+            指标字典（DIFF_METRICS 及 instructions、repacked_packages）
+        """
+        counts = StatsAccumulator(packages)
+        timing = self.estimator.estimate(packages)
+        
+        repacked, repack_stats = self.packer.repack_with_one_level_dependency(packages)
+        
+        return {
+            'packages': counts.packages,
+            'instructions': counts.instructions,
+            'valid': counts.valid,
+            'padding': counts.instructions - counts.valid,
+            'density': counts.original_stats()['avg_valid_per_package'],
+            'stalls': timing['stalls'],
+            'cycles': timing['cycles'],
+            'merged_pairs': repack_stats['merged_pairs'],
+            'repacked_packages': len(repacked)
+        }
+
+
+def _parse_file(task: Tuple[str, bool]) -> Tuple[List[VLIWPackage], List[Tuple[int, str]]]:
+    """解析一个反汇编文件（也是进程池任务），返回 (包列表, 符号表)"""
+    filepath, fast_parse = task
+    parser = DisassemblyParser()
+    packages = parser.parse_file(filepath, fast=fast_parse)
+    return packages, list(parser.symbols)
+
+
+def total_metrics(profiles: List[Dict]) -> Dict:
+    """汇总全部函数的指标"""
+    totals = dict.fromkeys(DIFF_METRICS, 0)
+    for profile in profiles:
+        for field in DIFF_METRICS:
+            if field != 'density':
+                totals[field] += profile['metrics'][field]
+    totals['density'] = totals['valid'] / totals['packages'] if totals['packages'] else 0
+    return totals
+
+
+def metric_delta(old: Dict, new: Dict) -> Dict:
+    """new - old，缺失的一侧按 0 计"""
+    return {
+        field: (new[field] if new else 0) - (old[field] if old else 0)
+        for field in DIFF_METRICS
+    }
+
+
+def _by_name(profiles: List[Dict]) -> Dict[str, Dict]:
+    """函数名 -> 函数指标，重名函数依次加 '#2'、'#3' 后缀"""
+    named = {}
+    for profile in profiles:
+        name = profile['function']
+        suffix = 1
+        while name in named:
+            suffix += 1
+            name = f"{profile['function']}#{suffix}"
+        named[name] = profile
+    return named
+
+
+def diff_profiles(
+    old_profiles: List[Dict],
+    new_profiles: List[Dict],
+    old_file: str = '',
+    new_file: str = '',
+    include_unchanged: bool = False
+) -> Dict:
+    """
+    对齐两次构建的函数并计算差异
+    
+    先按函数名对齐；其余函数按位置无关的编码摘要对齐（视为改名），
+    仍未对齐的为新增 / 删除的函数。
+    
+    Args:
+        old_profiles: 基准构建的逐函数指标（BuildProfiler.profile 的返回值）
+        new_profiles: 新构建的逐函数指标
+        old_file: 基准构建文件名
+        new_file: 新构建文件名
+        include_unchanged: 是否输出编码完全相同的函数
+    
+    Returns:
+        {'old_file', 'new_file', 'status_counts', 'totals', 'functions'}，
+        functions 按 |Δcycles|、|Δpackages|、|Δpadding| 降序排列
+    """
+    old_named = _by_name(old_profiles)
+    new_named = _by_name(new_profiles)
+    rows = []
+    
+    def add_row(name, old_name, status, old, new):
+        rows.append({
+            'function': name,
+            'old_function': old_name,
+            'status': status,
+            'old': old['metrics'] if old else None,
+            'new': new['metrics'] if new else None,
+            'delta': metric_delta(old['metrics'] if old else None, new['metrics'] if new else None)
+        })
+    
+    for name, new in new_named.items():
+        old = old_named.get(name)
+        if old is not None:
+            status = 'unchanged' if old['encoding'] == new['encoding'] else 'changed'
+            add_row(name, name, status, old, new)
+    
+    # 按编码摘要对齐改名的函数
+    unmatched_old = {}
+    for name, old in old_named.items():
+        if name not in new_named:
+            unmatched_old.setdefault(old['encoding'], []).append(name)
+    for name, new in new_named.items():
+        if name in old_named:
+            continue
+        candidates = unmatched_old.get(new['encoding'])
+        if candidates:
+            old_name = candidates.pop(0)
+            add_row(name, old_name, 'renamed', old_named[old_name], new)
+        else:
+            add_row(name, None, 'added', None, new)
+    for names in unmatched_old.values():
+        for old_name in names:
+            add_row(old_name, old_name, 'removed', old_named[old_name], None)
+    
+    status_counts = {status: 0 for status in ('changed', 'renamed', 'added', 'removed', 'unchanged')}
+    for row in rows:
+        status_counts[row['status']] += 1
+    if not include_unchanged:
+        rows = [row for row in rows if row['status'] != 'unchanged']
+    
+    rows.sort(key=lambda row: (
+        -abs(row['delta']['cycles']),
+        -abs(row['delta']['packages']),
+        -abs(row['delta']['padding']),
+        row['function']
+    ))
+    
+    old_totals = total_metrics(old_profiles)
+    new_totals = total_metrics(new_profiles)
+    return {
+        'old_file': old_file,
+        'new_file': new_file,
+        'status_counts': status_counts,
+        'totals': {'old': old_totals, 'new': new_totals, 'delta': metric_delta(old_totals, new_totals)},
+        'functions': rows
+    }
+
+
+def diff_files(
+    old_path: str,
+    new_path: str,
+    fast_parse: bool = False,
+    parallel: bool = True,
+    profiler: BuildProfiler = None
+) -> Dict:
+    """
+    对比两个反汇编文件
+    
+    两侧的解析相互独立，多核时在两个进程中同时进行；逐函数指标在本进程中
+    通过同一个 BuildProfiler 计算，两侧相同的函数只计算一次。
+    
+    Args:
+        old_path: 基准构建的反汇编文件
+        new_path: 新构建的反汇编文件
+        fast_parse: 使用快速解析模式
+        parallel: 多核时并行解析两侧
+        profiler: 逐函数指标计算器（默认新建；可传入以跨多次对比复用缓存）
+    
+    Returns:
+        diff_profiles 的返回值
+    """
+    tasks = [(old_path, fast_parse), (new_path, fast_parse)]
+    use_pool = (
+        parallel and (os.cpu_count() or 1) > 1
+        and STDIN_PATH not in (old_path, new_path)
+    )
+    if use_pool:
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            old_build, new_build = pool.map(_parse_file, tasks)
+    else:
+        old_build, new_build = map(_parse_file, tasks)
+    
+    profiler = profiler if profiler is not None else BuildProfiler()
+    old_profiles = profiler.profile(*old_build)
+    new_profiles = profiler.profile(*new_build)
+    
+    return diff_profiles(
+        old_profiles, new_profiles,
+        os.path.basename(old_path), os.path.basename(new_path)
+    )
+
+
+def diff_record(row: Dict) -> Dict:
+    """生成一条函数差异的输出记录（delta_* 为扁平字段，便于 CSV 输出）"""
+    record = {
+        'function': row['function'],
+        'old_function': row['old_function'],
+        'status': row['status']
+    }
+    for field in DIFF_METRICS:
+        record[f'delta_{field}'] = row['delta'][field]
+    record['old'] = row['old']
+    record['new'] = row['new']
+    return record
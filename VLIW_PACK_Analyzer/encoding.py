@@ -0,0 +1,268 @@
+"""
+RV32 指令编码工具：字段提取与 PC 相对立即数的解码/重编码
+"""
+
+# 主操作码
+OPCODE_BRANCH = 0x63
+OPCODE_JAL = 0x6f
+OPCODE_JALR = 0x67
+OPCODE_AUIPC = 0x17
+
+# 编码后的 NOP（addi x0, x0, 0）
+NOP_WORD = 0x00000013
+
+# PC 相对立即数的取值范围
+B_IMM_MIN, B_IMM_MAX = -(1 << 12), (1 << 12) - 2
+J_IMM_MIN, J_IMM_MAX = -(1 << 20), (1 << 20) - 2
+
+
+def opcode(word: int) -> int:
+    """提取主操作码 [6:0]"""
+    return word & 0x7f
+
+
+def sign_extend(value: int, bits: int) -> int:
+    """将 bits 位的补码值符号扩展为 Python 整数"""
+    sign = 1 << (bits - 1)
+    return (value & (sign - 1)) - (value & sign)
+
+
+def decode_b_imm(word: int) -> int:
+    """解码 B 型（条件分支）立即数"""
+    imm = (((word >> 31) & 0x1) << 12) | \
+          (((word >> 7) & 0x1) << 11) | \
+          (((word >> 25) & 0x3f) << 5) | \
+          (((word >> 8) & 0xf) << 1)
+    return sign_extend(imm, 13)
+
+
+def encode_b_imm(word: int, imm: int) -> int:
+    """将 B 型立即数写回指令字，其余字段保持不变"""
+    if imm & 1 or not B_IMM_MIN <= imm <= B_IMM_MAX:
+        raise ValueError(f"B 型立即数超出范围: {imm}")
+    imm &= 0x1fff
+    word &= 0x01fff07f
+    word |= ((imm >> 12) & 0x1) << 31
+    word |= ((imm >> 5) & 0x3f) << 25
+    word |= ((imm >> 1) & 0xf) << 8
+    word |= ((imm >> 11) & 0x1) << 7
+    return word
+
+
+def decode_j_imm(word: int) -> int:
+    """解码 J 型（jal）立即数"""
+    imm = (((word >> 31) & 0x1) << 20) | \
+          (((word >> 12) & 0xff) << 12) | \
+          (((word >> 20) & 0x1) << 11) | \
+          (((word >> 21) & 0x3ff) << 1)
+    return sign_extend(imm, 21)
+
+
+def encode_j_imm(word: int, imm: int) -> int:
+    """将 J 型立即数写回指令字，其余字段保持不变"""
+    if imm & 1 or not J_IMM_MIN <= imm <= J_IMM_MAX:
+        raise ValueError(f"J 型立即数超出范围: {imm}")
+    imm &= 0x1fffff
+    word &= 0x00000fff
+    word |= ((imm >> 20) & 0x1) << 31
+    word |= ((imm >> 1) & 0x3ff) << 21
+    word |= ((imm >> 11) & 0x1) << 20
+    word |= ((imm >> 12) & 0xff) << 12
+    return word
+
+
+def control_target(word: int, address: int):
+    """条件分支 / jal 的目标地址（其他指令与 jalr 返回 None）"""
+    if opcode(word) == OPCODE_BRANCH:
+        return address + decode_b_imm(word)
+    if opcode(word) == OPCODE_JAL:
+        return address + decode_j_imm(word)
+    return None
+
+
+# ABI 寄存器名（与 objdump 输出一致）
+INT_REG_NAMES = (
+    'zero', 'ra', 'sp', 'gp', 'tp', 't0', 't1', 't2',
+    's0', 's1', 'a0', 'a1', 'a2', 'a3', 'a4', 'a5',
+    'a6', 'a7', 's2', 's3', 's4', 's5', 's6', 's7',
+    's8', 's9', 's10', 's11', 't3', 't4', 't5', 't6'
+)
+FLOAT_REG_NAMES = (
+    'ft0', 'ft1', 'ft2', 'ft3', 'ft4', 'ft5', 'ft6', 'ft7',
+    'fs0', 'fs1', 'fa0', 'fa1', 'fa2', 'fa3', 'fa4', 'fa5',
+    'fa6', 'fa7', 'fs2', 'fs3', 'fs4', 'fs5', 'fs6', 'fs7',
+    'fs8', 'fs9', 'fs10', 'fs11', 'ft8', 'ft9', 'ft10', 'ft11'
+)
+
+# 浮点舍入模式（dyn 不输出）
+ROUNDING_MODES = ('rne', 'rtz', 'rdn', 'rup', 'rmm', None, None, 'dyn')
+
+LOAD_MNEMONICS = {0: 'lb', 1: 'lh', 2: 'lw', 4: 'lbu', 5: 'lhu'}
+STORE_MNEMONICS = {0: 'sb', 1: 'sh', 2: 'sw'}
+BRANCH_MNEMONICS = {0: 'beq', 1: 'bne', 4: 'blt', 5: 'bge', 6: 'bltu', 7: 'bgeu'}
+OP_MNEMONICS = {
+    0x00: ('add', 'sll', 'slt', 'sltu', 'xor', 'srl', 'or', 'and'),
+    0x01: ('mul', 'mulh', 'mulhsu', 'mulhu', 'div', 'divu', 'rem', 'remu'),
+    0x20: ('sub', None, None, None, None, 'sra', None, None),
+}
+OP_IMM_MNEMONICS = ('addi', 'slli', 'slti', 'sltiu', 'xori', 'srli', 'ori', 'andi')
+FMA_MNEMONICS = {0x43: 'fmadd.s', 0x47: 'fmsub.s', 0x4b: 'fnmsub.s', 0x4f: 'fnmadd.s'}
+FP_ARITH_MNEMONICS = {0x00: 'fadd.s', 0x04: 'fsub.s', 0x08: 'fmul.s', 0x0c: 'fdiv.s'}
+CSR_MNEMONICS = {1: 'csrrw', 2: 'csrrs', 3: 'csrrc', 5: 'csrrwi', 6: 'csrrsi', 7: 'csrrci'}
+SYSTEM_WORDS = {0x00000073: 'ecall', 0x00100073: 'ebreak', 0x30200073: 'mret', 0x10500073: 'wfi'}
+
+
+def _with_rm(operands: str, rm: int) -> str:
+    """非 dyn 舍入模式附加在操作数末尾（与 objdump 一致）"""
+    name = ROUNDING_MODES[rm]
+    return operands if name == 'dyn' else f"{operands},{name}"
+
+
+def _fence_set(bits: int) -> str:
+    return ''.join(c for c, b in zip('iorw', (8, 4, 2, 1)) if bits & b)
+
+
+def disassemble(word: int, address: int = 0):
+    """
+    将 RV32IMF 指令字反汇编为 objdump 风格的 (助记符, 操作数)
+    
+    与 objdump 一样优先输出常见伪指令（nop / li / mv / j / ret / bnez 等），
+    使按指令字分析与按反汇编文本分析得到相同的结果；CSR 指令输出规范形式。
+    无法识别的指令字输出为 ('.word', '0x........')。
+    
+    Args:
+        word: 32 位指令字
+        address: 指令地址（用于计算分支/跳转目标）
+    
+    Returns:
+        (助记符, 操作数)
+    """
+    op = opcode(word)
+    rd = (word >> 7) & 0x1f
+    funct3 = (word >> 12) & 0x7
+    rs1 = (word >> 15) & 0x1f
+    rs2 = (word >> 20) & 0x1f
+    funct7 = word >> 25
+    i_imm = sign_extend(word >> 20, 12)
+    x = INT_REG_NAMES
+    f = FLOAT_REG_NAMES
+    
+    if op == 0x37:
+        return 'lui', f"{x[rd]},0x{word >> 12:x}"
+    if op == OPCODE_AUIPC:
+        return 'auipc', f"{x[rd]},0x{word >> 12:x}"
+    
+    if op == OPCODE_JAL:
+        target = (address + decode_j_imm(word)) & 0xffffffff
+        if rd == 0:
+            return 'j', f"{target:x}"
+        if rd == 1:
+            return 'jal', f"{target:x}"
+        return 'jal', f"{x[rd]},{target:x}"
+    
+    if op == OPCODE_JALR and funct3 == 0:
+        base = f"{i_imm}({x[rs1]})" if i_imm else x[rs1]
+        if rd == 0:
+            return ('ret', '') if rs1 == 1 and i_imm == 0 else ('jr', base)
+        if rd == 1:
+            return 'jalr', base
+        return 'jalr', f"{x[rd]},{i_imm}({x[rs1]})"
+    
+    if op == OPCODE_BRANCH and funct3 in BRANCH_MNEMONICS:
+        target = f"{(address + decode_b_imm(word)) & 0xffffffff:x}"
+        mnemonic = BRANCH_MNEMONICS[funct3]
+        if rs1 == 0 and mnemonic in ('blt', 'bge'):
+            return {'blt': 'bgtz', 'bge': 'blez'}[mnemonic], f"{x[rs2]},{target}"
+        if rs2 == 0 and mnemonic in ('beq', 'bne', 'blt', 'bge'):
+            return {'beq': 'beqz', 'bne': 'bnez', 'blt': 'bltz', 'bge': 'bgez'}[mnemonic], f"{x[rs1]},{target}"
+        return mnemonic, f"{x[rs1]},{x[rs2]},{target}"
+    
+    if op == 0x03 and funct3 in LOAD_MNEMONICS:
+        return LOAD_MNEMONICS[funct3], f"{x[rd]},{i_imm}({x[rs1]})"
+    if op == 0x23 and funct3 in STORE_MNEMONICS:
+        s_imm = sign_extend(((word >> 25) << 5) | ((word >> 7) & 0x1f), 12)
+        return STORE_MNEMONICS[funct3], f"{x[rs2]},{s_imm}({x[rs1]})"
+    
+    if op == 0x13:
+        mnemonic = OP_IMM_MNEMONICS[funct3]
+        if funct3 in (1, 5):
+            if funct7 not in (0x00, 0x20) or (funct3 == 1 and funct7):
+                return '.word', f"0x{word:08x}"
+            if funct7 == 0x20:
+                mnemonic = 'srai'
+            return mnemonic, f"{x[rd]},{x[rs1]},{rs2}"
+        if mnemonic == 'addi':
+            if word == NOP_WORD:
+                return 'nop', ''
+            if rs1 == 0:
+                return 'li', f"{x[rd]},{i_imm}"
+            if i_imm == 0:
+                return 'mv', f"{x[rd]},{x[rs1]}"
+        if mnemonic == 'sltiu' and i_imm == 1:
+            return 'seqz', f"{x[rd]},{x[rs1]}"
+        if mnemonic == 'xori' and i_imm == -1:
+            return 'not', f"{x[rd]},{x[rs1]}"
+        return mnemonic, f"{x[rd]},{x[rs1]},{i_imm}"
+    
+    if op == 0x33 and funct7 in OP_MNEMONICS and OP_MNEMONICS[funct7][funct3]:
+        mnemonic = OP_MNEMONICS[funct7][funct3]
+        if mnemonic == 'sub' and rs1 == 0:
+            return 'neg', f"{x[rd]},{x[rs2]}"
+        if mnemonic == 'sltu' and rs1 == 0:
+            return 'snez', f"{x[rd]},{x[rs2]}"
+        if mnemonic == 'slt' and rs2 == 0:
+            return 'sltz', f"{x[rd]},{x[rs1]}"
+        if mnemonic == 'slt' and rs1 == 0:
+            return 'sgtz', f"{x[rd]},{x[rs2]}"
+        return mnemonic, f"{x[rd]},{x[rs1]},{x[rs2]}"
+    
+    if op == 0x0f:
+        if funct3 == 1:
+            return 'fence.i', ''
+        pred, succ = (word >> 24) & 0xf, (word >> 20) & 0xf
+        if pred == succ == 0xf:
+            return 'fence', ''
+        return 'fence', f"{_fence_set(pred)},{_fence_set(succ)}"
+    
+    if op == 0x73:
+        if word in SYSTEM_WORDS:
+            return SYSTEM_WORDS[word], ''
+        if funct3 in CSR_MNEMONICS:
+            source = str(rs1) if funct3 >= 5 else x[rs1]
+            return CSR_MNEMONICS[funct3], f"{x[rd]},0x{word >> 20:x},{source}"
+    
+    if op == 0x07 and funct3 == 2:
+        return 'flw', f"{f[rd]},{i_imm}({x[rs1]})"
+    if op == 0x27 and funct3 == 2:
+        s_imm = sign_extend(((word >> 25) << 5) | ((word >> 7) & 0x1f), 12)
+        return 'fsw', f"{f[rs2]},{s_imm}({x[rs1]})"
+    
+    # 保留的舍入模式编码（5、6）为非法指令
+    if op in FMA_MNEMONICS and (funct7 & 0x3) == 0 and ROUNDING_MODES[funct3]:
+        rs3 = word >> 27
+        return FMA_MNEMONICS[op], _with_rm(f"{f[rd]},{f[rs1]},{f[rs2]},{f[rs3]}", funct3)
+    
+    if op == 0x53:
+        rm_ok = ROUNDING_MODES[funct3] is not None
+        if funct7 in FP_ARITH_MNEMONICS and rm_ok:
+            return FP_ARITH_MNEMONICS[funct7], _with_rm(f"{f[rd]},{f[rs1]},{f[rs2]}", funct3)
+        if funct7 == 0x2c and rs2 == 0 and rm_ok:
+            return 'fsqrt.s', _with_rm(f"{f[rd]},{f[rs1]}", funct3)
+        if funct7 == 0x10 and funct3 <= 2:
+            if rs1 == rs2:
+                return ('fmv.s', 'fneg.s', 'fabs.s')[funct3], f"{f[rd]},{f[rs1]}"
+            return ('fsgnj.s', 'fsgnjn.s', 'fsgnjx.s')[funct3], f"{f[rd]},{f[rs1]},{f[rs2]}"
+        if funct7 == 0x14 and funct3 <= 1:
+            return ('fmin.s', 'fmax.s')[funct3], f"{f[rd]},{f[rs1]},{f[rs2]}"
+        if funct7 == 0x60 and rs2 <= 1 and rm_ok:
+            return ('fcvt.w.s', 'fcvt.wu.s')[rs2], _with_rm(f"{x[rd]},{f[rs1]}", funct3)
+        if funct7 == 0x68 and rs2 <= 1 and rm_ok:
+            return ('fcvt.s.w', 'fcvt.s.wu')[rs2], _with_rm(f"{f[rd]},{x[rs1]}", funct3)
+        if funct7 == 0x70 and rs2 == 0 and funct3 <= 1:
+            return ('fmv.x.w', 'fclass.s')[funct3], f"{x[rd]},{f[rs1]}"
+        if funct7 == 0x78 and rs2 == 0 and funct3 == 0:
+            return 'fmv.w.x', f"{f[rd]},{x[rs1]}"
+        if funct7 == 0x50 and funct3 <= 2:
+            return ('fle.s', 'flt.s', 'feq.s')[funct3], f"{x[rd]},{f[rs1]},{f[rs2]}"
+    
+    return '.word', f"0x{word:08x}"
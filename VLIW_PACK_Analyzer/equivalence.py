@@ -0,0 +1,691 @@
+"""
+重打包等价性检查：在大量随机初始状态上分别按程序顺序与按包执行每个基本块，比较执行结果
+"""
+
+import bisect
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from instruction import Instruction, VLIWPackage
+from packer import ForwardingModel
+from machine import MachineDescription, default_machine
+from encoding import (
+    OPCODE_BRANCH, OPCODE_JAL, OPCODE_JALR, OPCODE_AUIPC, INT_REG_NAMES, FLOAT_REG_NAMES,
+    opcode, sign_extend, control_target
+)
+from config import EQUIVALENCE_LANES, EQUIVALENCE_SEED, DECODE_CACHE_SIZE
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 为可选依赖，等价性检查需要它按 lane 向量化执行
+    np = None
+
+
+# 浮点寄存器的编号偏移（与 Instruction.reads / writes 的位布局一致）
+FLOAT_BASE = 32
+
+# 初始内存内容：每个字节由地址散列得到
+MEMORY_HASH = 0x9e3779b97f4a7c15
+BYTE_OFFSETS = np.arange(4, dtype=np.uint32) if np is not None else None
+
+
+def register_name(reg: int) -> str:
+    """寄存器编号 -> ABI 名"""
+    return FLOAT_REG_NAMES[reg - FLOAT_BASE] if reg >= FLOAT_BASE else INT_REG_NAMES[reg]
+
+
+class Operation:
+    """
+    一条指令的语义
+    
+    compute(state, values, pc) 按 lane 计算结果：values 为各源寄存器的值，
+    访存与分支条件通过 state 完成；返回写入 dest 的值（dest 为 None 时忽略）。
+    """
+    
+    __slots__ = ('dest', 'sources', 'compute')
+    
+    def __init__(self, dest: Optional[int], sources: Tuple[int, ...], compute: Callable):
+        self.dest = dest or None  # 写 x0 的结果丢弃
+        self.sources = sources
+        self.compute = compute
+
+
+def _u32(value: int):
+    return np.uint32(value & 0xffffffff)
+
+
+def _signed(value):
+    return value.view(np.int32)
+
+
+def _float(value):
+    return value.view(np.float32)
+
+
+def _bits(value):
+    return value.astype(np.float32).view(np.uint32)
+
+
+def _flag(condition):
+    return condition.astype(np.uint32)
+
+
+def _shift(value):
+    """寄存器给出的移位量（低 5 位）"""
+    return value & np.uint32(31)
+
+
+def _arith_shift(a, amount):
+    return (_signed(a) >> amount.astype(np.int32)).astype(np.uint32)
+
+
+def _mulh(a, b):
+    return ((_signed(a).astype(np.int64) * _signed(b).astype(np.int64)) >> 32).astype(np.uint32)
+
+
+def _mulhsu(a, b):
+    return ((_signed(a).astype(np.int64) * b.astype(np.int64)) >> 32).astype(np.uint32)
+
+
+def _mulhu(a, b):
+    return ((a.astype(np.uint64) * b.astype(np.uint64)) >> np.uint64(32)).astype(np.uint32)
+
+
+def _divide(a, b, remainder: bool):
+    """有符号除法 / 取余：向零舍入，除数为 0 时商为 -1、余数为被除数"""
+    a = _signed(a).astype(np.int64)
+    b = _signed(b).astype(np.int64)
+    zero = b == 0
+    divisor = np.where(zero, 1, b)
+    quotient = np.abs(a) // np.abs(divisor) * (np.sign(a) * np.sign(divisor))
+    if remainder:
+        return np.where(zero, a, a - quotient * divisor).astype(np.uint32)
+    return np.where(zero, -1, quotient).astype(np.uint32)
+
+
+def _divide_unsigned(a, b, remainder: bool):
+    zero = b == 0
+    divisor = np.where(zero, np.uint32(1), b)
+    if remainder:
+        return np.where(zero, a, a % divisor)
+    return np.where(zero, np.uint32(0xffffffff), a // divisor)
+
+
+# 浮点转整数的舍入模式 rm -> 取整函数（dyn 按 rne 处理）
+ROUNDING = {
+    0: np.rint,
+    1: np.trunc,
+    2: np.floor,
+    3: np.ceil,
+    4: lambda x: np.sign(x) * np.floor(np.abs(x) + 0.5),
+    7: np.rint,
+} if np is not None else {}
+
+
+def _float_to_int(a, rm: int, unsigned: bool):
+    """fcvt.w[u].s：按舍入模式取整后饱和，NaN 视为正无穷"""
+    x = ROUNDING[rm](_float(a).astype(np.float64))
+    low, high = (0, 0xffffffff) if unsigned else (-(1 << 31), (1 << 31) - 1)
+    x = np.where(np.isnan(x), high, np.clip(x, low, high))
+    return x.astype(np.int64).astype(np.uint32)
+
+
+def _fclass(a):
+    """fclass.s：负无穷 .. 正无穷依次为位 0-7，sNaN 为位 8，qNaN 为位 9"""
+    exponent = (a >> np.uint32(23)) & np.uint32(0xff)
+    fraction = a & np.uint32(0x7fffff)
+    category = np.select(
+        [exponent == 0xff, exponent != 0, fraction != 0],
+        [0, 1, 2],
+        3
+    )
+    index = np.where(a >> np.uint32(31) != 0, category, 7 - category)
+    nan = (exponent == 0xff) & (fraction != 0)
+    index = np.where(nan, 8 + (fraction >> np.uint32(22)).astype(np.int64), index)
+    return (np.uint32(1) << index.astype(np.uint32)).astype(np.uint32)
+
+
+def _fused(op: int):
+    """fmadd / fmsub / fnmsub / fnmadd：以双精度计算乘加后舍入到单精度"""
+    product_sign = -1.0 if op in (0x4b, 0x4f) else 1.0
+    addend_sign = -1.0 if op in (0x47, 0x4f) else 1.0
+    
+    def compute(state, v, pc):
+        a, b, c = (_float(x).astype(np.float64) for x in v)
+        return _bits(product_sign * a * b + addend_sign * c)
+    return compute
+
+
+ALU_OPS = {
+    ('add', 0x00): lambda a, b: a + b,
+    ('sll', 0x00): lambda a, b: a << _shift(b),
+    ('slt', 0x00): lambda a, b: _flag(_signed(a) < _signed(b)),
+    ('sltu', 0x00): lambda a, b: _flag(a < b),
+    ('xor', 0x00): lambda a, b: a ^ b,
+    ('srl', 0x00): lambda a, b: a >> _shift(b),
+    ('or', 0x00): lambda a, b: a | b,
+    ('and', 0x00): lambda a, b: a & b,
+    ('sub', 0x20): lambda a, b: a - b,
+    ('sra', 0x20): lambda a, b: _arith_shift(a, _shift(b)),
+    ('mul', 0x01): lambda a, b: a * b,
+    ('mulh', 0x01): _mulh,
+    ('mulhsu', 0x01): _mulhsu,
+    ('mulhu', 0x01): _mulhu,
+    ('div', 0x01): lambda a, b: _divide(a, b, False),
+    ('divu', 0x01): lambda a, b: _divide_unsigned(a, b, False),
+    ('rem', 0x01): lambda a, b: _divide(a, b, True),
+    ('remu', 0x01): lambda a, b: _divide_unsigned(a, b, True),
+}
+OP_NAMES = {
+    0x00: ('add', 'sll', 'slt', 'sltu', 'xor', 'srl', 'or', 'and'),
+    0x01: ('mul', 'mulh', 'mulhsu', 'mulhu', 'div', 'divu', 'rem', 'remu'),
+    0x20: ('sub', None, None, None, None, 'sra', None, None),
+}
+
+BRANCH_CONDITIONS = {
+    0: lambda a, b: a == b,
+    1: lambda a, b: a != b,
+    4: lambda a, b: _signed(a) < _signed(b),
+    5: lambda a, b: _signed(a) >= _signed(b),
+    6: lambda a, b: a < b,
+    7: lambda a, b: a >= b,
+}
+
+FP_ARITH = {
+    0x00: lambda a, b: a + b,
+    0x04: lambda a, b: a - b,
+    0x08: lambda a, b: a * b,
+    0x0c: lambda a, b: a / b,
+}
+
+SIGN_BIT = 0x80000000
+
+
+def _binary(rd: int, rs1: int, rs2: int, fn: Callable) -> Operation:
+    return Operation(rd, (rs1, rs2), lambda state, v, pc: fn(v[0], v[1]))
+
+
+def _float_binary(rd: int, rs1: int, rs2: int, fn: Callable) -> Operation:
+    return Operation(
+        rd + FLOAT_BASE, (rs1 + FLOAT_BASE, rs2 + FLOAT_BASE),
+        lambda state, v, pc: fn(v[0], v[1])
+    )
+
+
+def _load(rd: int, rs1: int, imm: int, size: int, signed: bool) -> Operation:
+    offset = _u32(imm)
+    sign = np.uint32(1 << (8 * size - 1)) if signed and size < 4 else None
+    
+    def compute(state, v, pc):
+        value = state.load(v[0] + offset, size)
+        return (value ^ sign) - sign if sign is not None else value
+    return Operation(rd, (rs1,), compute)
+
+
+def _store(rs1: int, rs2: int, imm: int, size: int) -> Operation:
+    offset = _u32(imm)
+    
+    def compute(state, v, pc):
+        state.store(v[0] + offset, v[1], size)
+    return Operation(None, (rs1, rs2), compute)
+
+
+def _link(state, pc: int):
+    return state.constant(pc + 4)
+
+
+@lru_cache(maxsize=DECODE_CACHE_SIZE)
+def compile_instruction(word: int) -> Optional[Operation]:
+    """
+    将 RV32IMF 指令字翻译为按 lane 执行的语义
+    
+    Args:
+        word: 32 位指令字
+    
+    Returns:
+        Operation，不支持的指令（CSR、fence、系统指令等）返回 None
+    """
+    op = opcode(word)
+    rd = (word >> 7) & 0x1f
+    funct3 = (word >> 12) & 0x7
+    rs1 = (word >> 15) & 0x1f
+    rs2 = (word >> 20) & 0x1f
+    funct7 = word >> 25
+    i_imm = sign_extend(word >> 20, 12)
+    s_imm = sign_extend(((word >> 25) << 5) | ((word >> 7) & 0x1f), 12)
+    
+    if op == 0x37:
+        return Operation(rd, (), lambda state, v, pc: state.constant(word & 0xfffff000))
+    if op == OPCODE_AUIPC:
+        return Operation(rd, (), lambda state, v, pc: state.constant(pc + (word & 0xfffff000)))
+    
+    if op == OPCODE_JAL:
+        return Operation(rd, (), lambda state, v, pc: _link(state, pc))
+    if op == OPCODE_JALR and funct3 == 0:
+        offset = _u32(i_imm)
+        
+        def jump(state, v, pc):
+            state.observe(pc, (v[0] + offset) & np.uint32(0xfffffffe))
+            return _link(state, pc)
+        return Operation(rd, (rs1,), jump)
+    
+    if op == OPCODE_BRANCH and funct3 in BRANCH_CONDITIONS:
+        condition = BRANCH_CONDITIONS[funct3]
+        return Operation(None, (rs1, rs2), lambda state, v, pc: state.observe(pc, _flag(condition(v[0], v[1]))))
+    
+    if op == 0x03 and funct3 in (0, 1, 2, 4, 5):
+        return _load(rd, rs1, i_imm, 1 << (funct3 & 3), funct3 < 4)
+    if op == 0x23 and funct3 in (0, 1, 2):
+        return _store(rs1, rs2, s_imm, 1 << funct3)
+    if op == 0x07 and funct3 == 2:
+        return _load(rd + FLOAT_BASE, rs1, i_imm, 4, False)
+    if op == 0x27 and funct3 == 2:
+        return _store(rs1, rs2 + FLOAT_BASE, s_imm, 4)
+    
+    if op == 0x13:
+        imm = _u32(i_imm)
+        shamt = np.uint32(rs2)
+        if funct3 == 1 and funct7 == 0:
+            return Operation(rd, (rs1,), lambda state, v, pc: v[0] << shamt)
+        if funct3 == 5 and funct7 in (0x00, 0x20):
+            if funct7:
+                return Operation(rd, (rs1,), lambda state, v, pc: (_signed(v[0]) >> np.int32(rs2)).view(np.uint32))
+            return Operation(rd, (rs1,), lambda state, v, pc: v[0] >> shamt)
+        if funct3 in (1, 5):
+            return None
+        fn = ALU_OPS[(OP_NAMES[0x00][funct3], 0x00)]
+        return Operation(rd, (rs1,), lambda state, v, pc: fn(v[0], imm))
+    
+    if op == 0x33 and funct7 in OP_NAMES and OP_NAMES[funct7][funct3]:
+        return _binary(rd, rs1, rs2, ALU_OPS[(OP_NAMES[funct7][funct3], funct7)])
+    
+    if op in (0x43, 0x47, 0x4b, 0x4f) and (funct7 & 0x3) == 0 and funct3 in ROUNDING:
+        rs3 = word >> 27
+        sources = (rs1 + FLOAT_BASE, rs2 + FLOAT_BASE, rs3 + FLOAT_BASE)
+        return Operation(rd + FLOAT_BASE, sources, _fused(op))
+    
+    if op != 0x53:
+        return None
+    rounding_ok = funct3 in ROUNDING
+    if funct7 in FP_ARITH and rounding_ok:
+        fn = FP_ARITH[funct7]
+        return _float_binary(rd, rs1, rs2, lambda a, b: fn(_float(a), _float(b)).view(np.uint32))
+    if funct7 == 0x2c and rs2 == 0 and rounding_ok:
+        return Operation(rd + FLOAT_BASE, (rs1 + FLOAT_BASE,), lambda state, v, pc: np.sqrt(_float(v[0])).view(np.uint32))
+    if funct7 == 0x10 and funct3 <= 2:
+        sign = np.uint32(SIGN_BIT)
+        magnitude = np.uint32(~SIGN_BIT & 0xffffffff)
+        fn = (
+            lambda a, b: (a & magnitude) | (b & sign),
+            lambda a, b: (a & magnitude) | (~b & sign),
+            lambda a, b: a ^ (b & sign),
+        )[funct3]
+        return _float_binary(rd, rs1, rs2, fn)
+    if funct7 == 0x14 and funct3 <= 1:
+        fn = (np.fmin, np.fmax)[funct3]
+        return _float_binary(rd, rs1, rs2, lambda a, b: fn(_float(a), _float(b)).view(np.uint32))
+    if funct7 == 0x60 and rs2 <= 1 and rounding_ok:
+        return Operation(rd, (rs1 + FLOAT_BASE,), lambda state, v, pc: _float_to_int(v[0], funct3, rs2 == 1))
+    if funct7 == 0x68 and rs2 <= 1 and rounding_ok:
+        if rs2:
+            return Operation(rd + FLOAT_BASE, (rs1,), lambda state, v, pc: _bits(v[0]))
+        return Operation(rd + FLOAT_BASE, (rs1,), lambda state, v, pc: _bits(_signed(v[0])))
+    if funct7 == 0x70 and rs2 == 0 and funct3 <= 1:
+        if funct3:
+            return Operation(rd, (rs1 + FLOAT_BASE,), lambda state, v, pc: _fclass(v[0]))
+        return Operation(rd, (rs1 + FLOAT_BASE,), lambda state, v, pc: v[0])
+    if funct7 == 0x78 and rs2 == 0 and funct3 == 0:
+        return Operation(rd + FLOAT_BASE, (rs1,), lambda state, v, pc: v[0])
+    if funct7 == 0x50 and funct3 <= 2:
+        fn = (np.less_equal, np.less, np.equal)[funct3]
+        return Operation(
+            rd, (rs1 + FLOAT_BASE, rs2 + FLOAT_BASE),
+            lambda state, v, pc: _flag(fn(_float(v[0]), _float(v[1])))
+        )
+    return None
+
+
+class LaneState:
+    """
+    一次执行的机器状态：所有 lane 共享的初始寄存器、被写入的寄存器、
+    按执行顺序记录的存储，以及分支条件 / 间接跳转目标等可观察结果
+    """
+    
+    def __init__(self, registers, seed: int):
+        """
+        Args:
+            registers: 初始寄存器 (64, lanes) uint32 数组（不会被修改）
+            seed: 初始内存内容的散列种子
+        """
+        self.initial = registers
+        self.lanes = registers.shape[1]
+        self.seed = np.uint64(seed)
+        self.registers = {}
+        self.stores = []
+        self.observed = {}
+    
+    def read(self, reg: int):
+        value = self.registers.get(reg)
+        return self.initial[reg] if value is None else value
+    
+    def write(self, reg: int, value):
+        self.registers[reg] = value
+    
+    def constant(self, value: int):
+        return np.full(self.lanes, value & 0xffffffff, dtype=np.uint32)
+    
+    def observe(self, pc: int, value):
+        self.observed[pc] = value
+    
+    def memory_bytes(self, addresses):
+        """
+        读取任意形状的字节地址数组（最后一维为 lane）：初始内容为地址散列，
+        之后按执行顺序叠加已执行的存储
+        """
+        data = ((addresses.astype(np.uint64) * np.uint64(MEMORY_HASH) + self.seed) >> np.uint64(56)).astype(np.uint32)
+        for store_address, store_value, store_size in self.stores:
+            offset = addresses - store_address
+            data = np.where(
+                offset < store_size,
+                (store_value >> ((offset & np.uint32(3)) << np.uint32(3))) & np.uint32(0xff),
+                data
+            )
+        return data
+    
+    def load(self, address, size: int):
+        """读取 size 字节（小端，零扩展）"""
+        if size == 1:
+            return self.memory_bytes(address)
+        offsets = BYTE_OFFSETS[:size, None]
+        data = self.memory_bytes(address + offsets) << (offsets << np.uint32(3))
+        return np.bitwise_or.reduce(data, axis=0)
+    
+    def store(self, address, value, size: int):
+        if size < 4:
+            value = value & np.uint32((1 << (8 * size)) - 1)
+        self.stores.append((address, value, size))
+
+
+class EquivalenceChecker:
+    """
+    重打包等价性检查器
+    
+    将原始代码按控制流划分为基本块（入口、分支目标、控制转移指令之后各开始一个块），
+    每个块在大量随机初始状态（lane）上并行执行两次：
+    - 按程序顺序逐条执行
+    - 按重打包结果逐包执行：包内按槽位顺序，指令在包开始时读取寄存器，
+      包内更早槽位的结果只有在前递链模型与机器描述允许时（与重打包的规则相同）
+      才前递给后面的槽位，否则读到旧值；写回在包结束时按槽位顺序提交，访存按槽位顺序执行
+    比较两次执行后的寄存器、写入的内存与分支条件，任一 lane 不同即为不等价。
+    """
+    
+    def __init__(
+        self,
+        lanes: int = EQUIVALENCE_LANES,
+        seed: int = EQUIVALENCE_SEED,
+        model: ForwardingModel = None,
+        machine: MachineDescription = None
+    ):
+        """
+        Args:
+            lanes: 并行执行的随机初始状态数
+            seed: 随机种子（相同种子的检查结果可复现）
+            model: 包内前递链模型（默认与 VLIWPacker 相同）
+            machine: 机器描述（默认 default_machine()）
+        """
+        if np is None:
+            raise RuntimeError("等价性检查需要 NumPy（pip install numpy）")
+        if lanes < 1:
+            raise ValueError(f"lane 数必须为正数: {lanes}")
+        self.lanes = lanes
+        self.seed = seed
+        self.model = model if model is not None else ForwardingModel()
+        self.machine = machine if machine is not None else default_machine()
+        self.registers = self._initial_registers()
+    
+    def _initial_registers(self):
+        """
+        随机初始寄存器：前 1/4 的 lane 整数寄存器取 0-15 的小值（使访存地址容易重叠、
+        分支条件两种结果都出现），前 1/2 的 lane 浮点寄存器取正态分布的普通浮点数，
+        其余为均匀随机的 32 位值
+        """
+        rng = np.random.default_rng(self.seed)
+        registers = rng.integers(0, 1 << 32, size=(2 * FLOAT_BASE, self.lanes), dtype=np.uint32)
+        small = self.lanes // 4
+        half = self.lanes // 2
+        registers[:FLOAT_BASE, :small] = rng.integers(0, 16, size=(FLOAT_BASE, small), dtype=np.uint32)
+        registers[FLOAT_BASE:, :half] = (rng.standard_normal((FLOAT_BASE, half)) * 100).astype(np.float32).view(np.uint32)
+        registers[0] = 0
+        registers.setflags(write=False)
+        return registers
+    
+    def check(
+        self,
+        original_packages: List[VLIWPackage],
+        optimized_packages: List[VLIWPackage],
+        stop_at_first: bool = False
+    ) -> Dict:
+        """
+        检查重打包结果与原始代码逐块等价
+        
+        Args:
+            original_packages: 原始 VLIW 包列表
+            optimized_packages: 重打包后的包列表（slots 为 None 时第 i 条指令位于槽位 i）
+            stop_at_first: 发现第一个不等价的块后停止
+        
+        Returns:
+            {'lanes', 'blocks', 'checked_blocks', 'skipped_blocks', 'straddling_bundles',
+             'divergent_blocks', 'equivalent', 'first_divergence'}；
+            skipped_blocks 为含不支持指令（CSR、fence 等）而未检查的块，
+            straddling_bundles 为包含多个基本块指令的包；这样的包改变了控制流
+            （分支成立时后面块的指令也已执行，或跳转目标不在包首），涉及的块都计为不等价
+        """
+        blocks = split_blocks(original_packages)
+        block_of = {inst.address: index for index, block in enumerate(blocks) for inst in block}
+        schedules = [[] for _ in blocks]
+        straddling = 0
+        straddles = {}  # 块序号 -> 跨块包造成的差异
+        for pkg in optimized_packages:
+            parts = {}
+            for slot, inst in enumerate(pkg.slotted()):
+                if inst is None or inst.is_nop:
+                    continue
+                index = block_of.get(inst.address)
+                if index is None:
+                    raise ValueError(f"重打包结果中的指令 0x{inst.address:08x} 不在原始代码中")
+                parts.setdefault(index, []).append((slot, inst))
+            if len(parts) > 1:
+                straddling += 1
+                for index in parts:
+                    straddles.setdefault(index, self._straddle(blocks[index], pkg, parts))
+            for index, bundle in parts.items():
+                schedules[index].append(bundle)
+        
+        result = {
+            'lanes': self.lanes,
+            'blocks': len(blocks),
+            'checked_blocks': 0,
+            'skipped_blocks': 0,
+            'straddling_bundles': straddling,
+            'divergent_blocks': 0,
+            'equivalent': True,
+            'first_divergence': None
+        }
+        with np.errstate(all='ignore'):
+            for index, (block, schedule) in enumerate(zip(blocks, schedules)):
+                divergence = straddles.get(index) or self.check_block(block, schedule)
+                if divergence == 'skipped':
+                    result['skipped_blocks'] += 1
+                    continue
+                result['checked_blocks'] += 1
+                if divergence is not None:
+                    result['divergent_blocks'] += 1
+                    result['equivalent'] = False
+                    if result['first_divergence'] is None:
+                        result['first_divergence'] = divergence
+                    if stop_at_first:
+                        break
+        return result
+    
+    def _straddle(self, block: Sequence[Instruction], pkg: VLIWPackage, parts: Dict) -> Dict:
+        """
+        跨基本块的包对 block 造成的差异
+        
+        程序顺序在后的指令位于控制转移指令之前的槽位时（分支成立也会执行）记为 control，
+        位置为该分支的地址；否则记为 straddle，位置为包的起始地址。所有 lane 都受影响。
+        """
+        items = [item for bundle in parts.values() for item in bundle]
+        kind, location = 'straddle', pkg.start_address
+        for slot, inst in items:
+            if inst.inst_type == 'BRANCH' and any(
+                other_slot < slot and other.address > inst.address for other_slot, other in items
+            ):
+                kind, location = 'control', inst.address
+                break
+        return {
+            'block': f"0x{block[0].address:08x}",
+            'instructions': len(block),
+            'kind': kind,
+            'location': f"0x{location:08x}",
+            'lanes': self.lanes
+        }
+    
+    def check_block(
+        self,
+        block: Sequence[Instruction],
+        schedule: Sequence[Sequence[Tuple[int, Instruction]]]
+    ):
+        """
+        检查一个基本块
+        
+        Args:
+            block: 块内指令（程序顺序）
+            schedule: 块内指令所在的包，每个包为按槽位升序的 [(槽位, 指令)]
+        
+        Returns:
+            None 表示等价，'skipped' 表示含不支持的指令，否则为第一处差异的描述字典
+        """
+        divergence = {'block': f"0x{block[0].address:08x}", 'instructions': len(block)}
+        scheduled = sorted(inst.address for bundle in schedule for _, inst in bundle)
+        expected = [inst.address for inst in block]
+        if scheduled != expected:
+            missing = sorted(set(expected).symmetric_difference(scheduled)) or [
+                address for address, other in zip(scheduled, expected) if address != other
+            ]
+            divergence.update({'kind': 'schedule', 'location': f"0x{missing[0]:08x}", 'lanes': self.lanes})
+            return divergence
+        
+        operations = {inst.address: compile_instruction(int(inst.hex_code, 16)) for inst in block}
+        if None in operations.values():
+            return 'skipped'
+        
+        sequential = LaneState(self.registers, self.seed)
+        for inst in block:
+            operation = operations[inst.address]
+            result = operation.compute(sequential, [sequential.read(r) for r in operation.sources], inst.address)
+            if operation.dest is not None:
+                sequential.write(operation.dest, result)
+        
+        bundled = LaneState(self.registers, self.seed)
+        for bundle in schedule:
+            self._run_bundle(bundled, bundle, operations)
+        
+        return self._compare(sequential, bundled, divergence)
+    
+    def _run_bundle(self, state: LaneState, bundle: Sequence[Tuple[int, Instruction]], operations: Dict):
+        """按包执行：包开始时读寄存器，包内结果按前递规则前递，包结束时提交写回"""
+        bundle_targets = self.machine.bundle_targets
+        pending = {}  # 寄存器 -> (值, 链深, 可前递的消费者类型, 槽位)
+        for slot, inst in bundle:
+            operation = operations[inst.address]
+            depth = 0
+            values = []
+            for reg in operation.sources:
+                producer = pending.get(reg)
+                if (
+                    producer is not None and inst.inst_type in producer[2]
+                    and bundle_targets[producer[3]] >> slot & 1
+                ):
+                    values.append(producer[0])
+                    depth = max(depth, producer[1] + 1)
+                else:
+                    values.append(state.read(reg))
+            result = operation.compute(state, values, inst.address)
+            if operation.dest is not None:
+                pending[operation.dest] = (result, depth, self.model.targets(depth, inst.inst_type), slot)
+        for reg, (value, _, _, _) in pending.items():
+            state.write(reg, value)
+    
+    def _compare(self, sequential: LaneState, bundled: LaneState, divergence: Dict) -> Optional[Dict]:
+        """比较两次执行的寄存器、写入的内存与可观察结果，返回第一处差异"""
+        candidates = []
+        for reg in sorted(set(sequential.registers) | set(bundled.registers)):
+            candidates.append(('register', register_name(reg), sequential.read(reg), bundled.read(reg)))
+        for pc in sorted(set(sequential.observed) | set(bundled.observed)):
+            candidates.append((
+                'control', f"0x{pc:08x}",
+                sequential.observed.get(pc, sequential.constant(0)),
+                bundled.observed.get(pc, bundled.constant(0))
+            ))
+        if not _same_stores(sequential.stores, bundled.stores):
+            # 两次执行写入的全部字节地址，逐字节比较最终内容
+            addresses = np.concatenate([
+                address + BYTE_OFFSETS[:size, None]
+                for address, _, size in sequential.stores + bundled.stores
+            ])
+            original = sequential.memory_bytes(addresses)
+            repacked = bundled.memory_bytes(addresses)
+            for row in np.flatnonzero((original != repacked).any(axis=1))[:1]:
+                candidates.append(('memory', addresses[row], original[row], repacked[row]))
+        
+        for kind, location, original, repacked in candidates:
+            differs = original != repacked
+            if differs.any():
+                lane = int(np.argmax(differs))
+                if kind == 'memory':
+                    location = f"0x{int(location[lane]):08x}"
+                divergence.update({
+                    'kind': kind,
+                    'location': location,
+                    'lanes': int(differs.sum()),
+                    'lane': lane,
+                    'original': f"0x{int(original[lane]):08x}",
+                    'repacked': f"0x{int(repacked[lane]):08x}"
+                })
+                return divergence
+        return None
+
+
+def _same_stores(first: List, second: List) -> bool:
+    """两次执行的存储序列完全相同（此时最终内存必然相同）"""
+    return len(first) == len(second) and all(
+        a_size == b_size and np.array_equal(a_address, b_address) and np.array_equal(a_value, b_value)
+        for (a_address, a_value, a_size), (b_address, b_value, b_size) in zip(first, second)
+    )
+
+
+def split_blocks(packages: List[VLIWPackage]) -> List[List[Instruction]]:
+    """
+    将有效指令按控制流划分为基本块
+    
+    入口、分支 / 跳转目标（目标为填充指令时取其后第一条有效指令）与控制转移指令之后
+    的指令各开始一个新块。
+    
+    Args:
+        packages: 原始 VLIW 包列表
+    
+    Returns:
+        基本块列表，每块为程序顺序的指令列表
+    """
+    instructions = [inst for pkg in packages for inst in pkg.instructions if not inst.is_nop]
+    addresses = [inst.address for inst in instructions]
+    leaders = {0}
+    for index, inst in enumerate(instructions):
+        if inst.inst_type != 'BRANCH':
+            continue
+        leaders.add(index + 1)
+        target = control_target(int(inst.hex_code, 16), inst.address)
+        if target is not None:
+            leaders.add(bisect.bisect_left(addresses, target))
+    
+    starts = sorted(leader for leader in leaders if leader < len(instructions))
+    return [instructions[start:end] for start, end in zip(starts, starts[1:] + [len(instructions)])]
@@ -2,9 +2,21 @@
 反汇编导出器：输出重排后的反汇编文件
 """
 
-from typing import List
-from instruction import Instruction, VLIWPackage
+import bisect
+import sys
+from array import array
+from typing import Dict, List, Tuple
+from instruction import VLIWPackage
+from equivalence import split_blocks
 from config import VLIW_PACKAGE_SIZE
+from encoding import (
+    OPCODE_BRANCH, OPCODE_JAL, OPCODE_AUIPC, NOP_WORD,
+    opcode, decode_b_imm, encode_b_imm, decode_j_imm, encode_j_imm
+)
+
+
+# 导出时的写缓冲大小（字节），大文件时减少系统调用次数
+EXPORT_BUFFER_SIZE = 1 << 20
 
 
 class DisassemblyExporter:
@@ -20,60 +32,52 @@ class DisassemblyExporter:
         导出重排后的反汇编文件
         
         算法：
-        1. 收集所有原始地址，按顺序排列
-        2. 按优化后的包顺序，将指令填入对应地址槽
-        3. 生成反汇编格式输出（PC 保持原有值）
+        1. 按顺序遍历原始包中的地址
+        2. 同步遍历优化后的包，第 i 个地址槽对应第 i // 8 个优化包的槽位 i % 8
+        3. 逐行写出反汇编格式（PC 保持原有值），空槽位输出 NOP
+        
+        原始地址与优化后的包均按需遍历，输出经大缓冲区直接写入文件，
+        内存占用与程序规模无关。
         
         Args:
             original_packages: 原始 VLIW 包列表（用于获取地址）
             optimized_packages: 优化后的 VLIW 包列表
             output_path: 输出文件路径
         """
-        # 收集所有原始地址
-        original_addresses = []
-        for pkg in original_packages:
-            for inst in pkg.instructions:
-                original_addresses.append(inst.address)
-        
-        # 收集优化后的指令（按包顺序，每包填充到 8 条）
-        reordered_instructions = []
-        for pkg in optimized_packages:
-            # 添加包中的有效指令
-            pkg_instructions = list(pkg.instructions)
-            reordered_instructions.extend(pkg_instructions)
-            # 填充到 8 条（使用 None 标记 NOP）
-            padding_count = VLIW_PACKAGE_SIZE - len(pkg_instructions)
-            reordered_instructions.extend([None] * padding_count)
-        
-        # 生成输出
-        lines = []
-        lines.append("# VLIW 重排后反汇编")
-        lines.append("# 注意：PC 地址保持原始顺序，指令已根据一层依赖优化重排")
-        lines.append(f"# 原始包数：{len(original_packages)}，优化后包数：{len(optimized_packages)}")
-        lines.append("")
-        
-        for i, addr in enumerate(original_addresses):
-            # 每 8 条加包边界注释
-            if i % VLIW_PACKAGE_SIZE == 0:
-                pkg_idx = i // VLIW_PACKAGE_SIZE
-                if pkg_idx < len(optimized_packages):
-                    valid_count = optimized_packages[pkg_idx].valid_count
-                    lines.append(f"\n# === Package {pkg_idx} (有效指令: {valid_count}) ===")
-                else:
-                    lines.append(f"\n# === Package {pkg_idx} (已优化掉) ===")
+        with open(output_path, 'w', encoding='utf-8', buffering=EXPORT_BUFFER_SIZE) as f:
+            f.write("# VLIW 重排后反汇编\n")
+            f.write("# 注意：PC 地址保持原始顺序，指令已根据一层依赖优化重排\n")
+            f.write(f"# 原始包数：{len(original_packages)}，优化后包数：{len(optimized_packages)}\n")
             
-            if i < len(reordered_instructions) and reordered_instructions[i] is not None:
-                inst = reordered_instructions[i]
-                # 格式化输出，与 objdump 格式类似
-                line = f"{addr:08x}: {inst.hex_code}     \t{inst.mnemonic}\t{inst.operands}"
-            else:
-                # NOP 填充
-                line = f"{addr:08x}: 00000013     \tnop"
+            optimized_iter = iter(optimized_packages)
+            optimized_pkg = None
+            layout = None
+            i = 0
             
-            lines.append(line)
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(lines))
+            for pkg in original_packages:
+                for inst in pkg.instructions:
+                    addr = inst.address
+                    slot = i % VLIW_PACKAGE_SIZE
+                    
+                    # 每 8 条加包边界注释
+                    if slot == 0:
+                        pkg_idx = i // VLIW_PACKAGE_SIZE
+                        optimized_pkg = next(optimized_iter, None)
+                        layout = optimized_pkg.slotted() if optimized_pkg is not None else None
+                        if optimized_pkg is not None:
+                            f.write(f"\n\n# === Package {pkg_idx} (有效指令: {optimized_pkg.valid_count}) ===")
+                        else:
+                            f.write(f"\n\n# === Package {pkg_idx} (已优化掉) ===")
+                    
+                    reordered = layout[slot] if layout is not None else None
+                    if reordered is not None:
+                        # 格式化输出，与 objdump 格式类似
+                        f.write(f"\n{addr:08x}: {reordered.hex_code}     \t{reordered.mnemonic}\t{reordered.operands}")
+                    else:
+                        # NOP 填充
+                        f.write(f"\n{addr:08x}: 00000013     \tnop")
+                    
+                    i += 1
         
         return len(optimized_packages)
     
@@ -91,26 +95,223 @@ class DisassemblyExporter:
             output_path: 输出文件路径
             base_address: 起始地址
         """
-        lines = []
-        lines.append("# VLIW 紧凑格式反汇编（仅有效指令）")
-        lines.append(f"# 优化后包数：{len(optimized_packages)}")
-        lines.append("")
+        with open(output_path, 'w', encoding='utf-8', buffering=EXPORT_BUFFER_SIZE) as f:
+            f.write("# VLIW 紧凑格式反汇编（仅有效指令）\n")
+            f.write(f"# 优化后包数：{len(optimized_packages)}\n")
+            
+            current_addr = base_address
+            
+            for pkg_idx, pkg in enumerate(optimized_packages):
+                f.write(f"\n\n# === Package {pkg_idx} (有效指令: {pkg.valid_count}) ===")
+                
+                # 指令位于分配的槽位，空槽位占据地址空间但不输出
+                for inst in pkg.slotted():
+                    if inst is not None and not inst.is_nop:
+                        f.write(f"\n{current_addr:08x}: {inst.hex_code}     \t{inst.mnemonic}\t{inst.operands}")
+                    current_addr += 4
+    
+    def build_address_map(
+        self,
+        original_packages: List[VLIWPackage],
+        optimized_packages: List[VLIWPackage],
+        base_address: int = 0x80000000
+    ) -> Tuple[Dict[int, int], List[int]]:
+        """
+        建立原地址到重排后地址的映射
+        
+        重排后的布局与 export_compact_asm 相同：第 k 个优化包占据
+        base_address + k * 32 起的 8 个字，每条指令位于其分配的槽位
+        （未分配槽位的包中指令依次放在包首）。
         
-        current_addr = base_address
+        包内程序顺序最前的指令映射到包首而不是其槽位：跳到它就是跳到整个包
+        （访存、乘除等指令分配在后面的槽位，但包内其余指令在程序顺序上都在它之后）。
+        其余指令映射到各自的槽位地址，跳向它们的目标确实落在包的中间。
         
+        Args:
+            original_packages: 原始 VLIW 包列表
+            optimized_packages: 优化后的 VLIW 包列表
+            base_address: 重排后程序的起始地址
+            
+        Returns:
+            (原地址 -> 新地址 字典, 原始有效指令地址的升序列表)
+        """
+        address_map = {}
         for pkg_idx, pkg in enumerate(optimized_packages):
-            lines.append(f"\n# === Package {pkg_idx} (有效指令: {pkg.valid_count}) ===")
+            pkg_base = base_address + pkg_idx * VLIW_PACKAGE_SIZE * 4
+            first = min((inst.address for inst in pkg.instructions if not inst.is_nop), default=None)
+            for index, inst in enumerate(pkg.instructions):
+                if inst.address == first:
+                    address_map[inst.address] = pkg_base
+                else:
+                    address_map[inst.address] = pkg_base + pkg.slot_of(index) * 4
+        
+        valid_addresses = sorted(
+            inst.address
+            for pkg in original_packages
+            for inst in pkg.instructions
+            if not inst.is_nop
+        )
+        return address_map, valid_addresses
+    
+    def relocate_target(
+        self,
+        target: int,
+        address_map: Dict[int, int],
+        valid_addresses: List[int]
+    ) -> int:
+        """
+        计算跳转目标的新地址
+        
+        目标为有效指令时直接查表；目标落在被删除的填充指令上时，
+        取其后第一条有效指令的新地址。
+        
+        Returns:
+            新地址，无法解析时返回 None
+        """
+        if target in address_map:
+            return address_map[target]
+        idx = bisect.bisect_left(valid_addresses, target)
+        if idx < len(valid_addresses):
+            return address_map.get(valid_addresses[idx])
+        return None
+    
+    def relocate_words(
+        self,
+        original_packages: List[VLIWPackage],
+        optimized_packages: List[VLIWPackage],
+        base_address: int = 0x80000000,
+        allow_misaligned: bool = False
+    ) -> Tuple[array, Dict]:
+        """
+        生成重排后程序的指令字序列，并重编码 PC 相对的分支/跳转立即数
+        
+        每个优化包输出 8 个字：槽位 i 的指令送往流水线 i，空槽位以 nop 补齐
+        （取指单元固定按 8 字取包），原包中的包前/包后填充不再保留。
+        
+        跳转目标不在包起始位置（跳入包的中间），或一个包含有多个基本块的指令
+        （分支之后的指令与分支同包执行）时，镜像的控制流与原程序不同，默认拒绝导出。
+        
+        Args:
+            original_packages: 原始 VLIW 包列表
+            optimized_packages: 优化后的 VLIW 包列表
+            base_address: 重排后程序的起始地址
+            allow_misaligned: 仍然导出上述镜像（只在统计中计数）
             
-            for inst in pkg.instructions:
-                if not inst.is_nop:
-                    line = f"{current_addr:08x}: {inst.hex_code}     \t{inst.mnemonic}\t{inst.operands}"
-                    lines.append(line)
-                current_addr += 4
+        Returns:
+            (32 位指令字数组, 重定位统计字典)
+        
+        Raises:
+            ValueError: 存在不在包起始位置的跳转目标或跨基本块的包，且未指定 allow_misaligned
+        """
+        address_map, valid_addresses = self.build_address_map(
+            original_packages, optimized_packages, base_address
+        )
+        bundle_bytes = VLIW_PACKAGE_SIZE * 4
+        block_of = {
+            inst.address: index for index, block in enumerate(split_blocks(original_packages)) for inst in block
+        }
+        
+        stats = {
+            'relocated_branches': 0,
+            'relocated_jumps': 0,
+            'out_of_range': 0,
+            'unresolved_targets': 0,
+            'misaligned_targets': 0,
+            'straddling_bundles': sum(
+                1 for pkg in optimized_packages
+                if len({block_of.get(inst.address) for inst in pkg.instructions if not inst.is_nop}) > 1
+            ),
+            'auipc_unrelocated': 0,
+            'removed_padding': sum(len(pkg.instructions) - pkg.valid_count for pkg in original_packages)
+        }
+        
+        words = array('I')
+        for pkg_idx, pkg in enumerate(optimized_packages):
+            pkg_base = base_address + pkg_idx * bundle_bytes
+            for slot, inst in enumerate(pkg.slotted()):
+                if inst is None:
+                    words.append(NOP_WORD)
+                    continue
+                word = int(inst.hex_code, 16)
+                op = opcode(word)
+                
+                if op in (OPCODE_BRANCH, OPCODE_JAL):
+                    new_addr = pkg_base + slot * 4
+                    if op == OPCODE_BRANCH:
+                        target = inst.address + decode_b_imm(word)
+                    else:
+                        target = inst.address + decode_j_imm(word)
+                    new_target = self.relocate_target(target, address_map, valid_addresses)
+                    
+                    if new_target is None:
+                        stats['unresolved_targets'] += 1
+                    else:
+                        if (new_target - base_address) % bundle_bytes != 0:
+                            stats['misaligned_targets'] += 1
+                        try:
+                            if op == OPCODE_BRANCH:
+                                word = encode_b_imm(word, new_target - new_addr)
+                                stats['relocated_branches'] += 1
+                            else:
+                                word = encode_j_imm(word, new_target - new_addr)
+                                stats['relocated_jumps'] += 1
+                        except ValueError:
+                            stats['out_of_range'] += 1
+                
+                elif op == OPCODE_AUIPC:
+                    # auipc 与后续 jalr/load 组合的绝对寻址无法逐条重定位
+                    stats['auipc_unrelocated'] += 1
+                
+                words.append(word)
+        
+        if (stats['misaligned_targets'] or stats['straddling_bundles']) and not allow_misaligned:
+            raise ValueError(
+                f"重排结果的控制流与原程序不同：{stats['misaligned_targets']} 个跳转目标不在包起始位置，"
+                f"{stats['straddling_bundles']} 个包跨越基本块（确需导出时指定 allow_misaligned）"
+            )
+        return words, stats
+    
+    def export_relocated_image(
+        self,
+        original_packages: List[VLIWPackage],
+        optimized_packages: List[VLIWPackage],
+        output_path: str,
+        base_address: int = 0x80000000,
+        image_format: str = 'bin',
+        allow_misaligned: bool = False
+    ) -> Dict:
+        """
+        导出重排并重定位后的内存镜像
+        
+        - bin：小端序平坦二进制，第 0 字节对应 base_address，
+          可由 Memory.loadFromFile(filename, baseAddr) 直接加载
+        - hex：每行一个 32 位字（8 位十六进制），适用于 $readmemh
+        
+        Args:
+            original_packages: 原始 VLIW 包列表
+            optimized_packages: 优化后的 VLIW 包列表
+            output_path: 输出文件路径
+            base_address: 镜像起始地址
+            image_format: 'bin' 或 'hex'
+            allow_misaligned: 控制流与原程序不同时仍然导出（见 relocate_words）
             
-            # 补齐到 8 条的地址空间
-            padding_count = VLIW_PACKAGE_SIZE - len(pkg.instructions)
-            current_addr += padding_count * 4
+        Returns:
+            重定位统计字典
+        """
+        words, stats = self.relocate_words(original_packages, optimized_packages, base_address, allow_misaligned)
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(lines))
-
+        if image_format == 'bin':
+            if sys.byteorder != 'little':
+                words.byteswap()
+            with open(output_path, 'wb') as f:
+                f.write(words.tobytes())
+        elif image_format == 'hex':
+            with open(output_path, 'w', encoding='utf-8', buffering=EXPORT_BUFFER_SIZE) as f:
+                for word in words:
+                    f.write(f"{word:08x}\n")
+        else:
+            raise ValueError(f"不支持的镜像格式: {image_format}")
+        
+        stats['image_words'] = len(words)
+        stats['image_bytes'] = len(words) * 4
+        return stats
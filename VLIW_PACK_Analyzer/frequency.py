@@ -0,0 +1,431 @@
+"""
+静态执行频率估算：由控制流图的回边构建循环嵌套，估算各基本块的执行频率，给出按频率加权的统计
+"""
+
+import bisect
+from typing import Dict, List, Optional, Sequence
+from instruction import VLIWPackage
+from timing import StallEstimator
+from machine import MachineDescription
+from equivalence import split_blocks
+from encoding import OPCODE_BRANCH, OPCODE_JAL, OPCODE_JALR, opcode, sign_extend, decode_b_imm, decode_j_imm
+from config import STATIC_LOOP_TRIP_COUNT, STATIC_MAX_TRIP_COUNT
+
+OPCODE_OP_IMM = 0x13
+
+# 条件分支 funct3
+BRANCH_BEQ, BRANCH_BNE, BRANCH_BLT, BRANCH_BGE, BRANCH_BLTU, BRANCH_BGEU = 0, 1, 4, 5, 6, 7
+
+
+def _load_immediate(word: int) -> Optional[int]:
+    """addi rd, x0, imm（li）的立即数，其他指令返回 None"""
+    if opcode(word) == OPCODE_OP_IMM and (word >> 12) & 0x7 == 0 and (word >> 15) & 0x1f == 0:
+        return sign_extend(word >> 20, 12)
+    return None
+
+
+def _increment(word: int) -> Optional[int]:
+    """addi r, r, imm（r 非 x0）的步长，其他指令返回 None"""
+    rd = (word >> 7) & 0x1f
+    if opcode(word) == OPCODE_OP_IMM and (word >> 12) & 0x7 == 0 and rd and (word >> 15) & 0x1f == rd:
+        return sign_extend(word >> 20, 12)
+    return None
+
+
+def _branch_taken(funct3: int, lhs: int, rhs: int) -> bool:
+    """条件分支是否成立（RV32 比较语义）"""
+    if funct3 in (BRANCH_BLTU, BRANCH_BGEU):
+        lhs &= 0xffffffff
+        rhs &= 0xffffffff
+    else:
+        lhs = sign_extend(lhs & 0xffffffff, 32)
+        rhs = sign_extend(rhs & 0xffffffff, 32)
+    if funct3 in (BRANCH_BLT, BRANCH_BLTU):
+        return lhs < rhs
+    return lhs >= rhs
+
+
+def trip_count(funct3: int, induction_is_rs1: bool, init: int, step: int, bound: int) -> Optional[int]:
+    """
+    回跳分支以归纳变量为操作数时的迭代次数
+    
+    归纳变量在每次迭代的分支之前更新一次，第 n 次迭代末尾的值为 init + n * step，
+    分支成立时继续下一次迭代。
+    
+    Args:
+        funct3: 回跳分支的 funct3
+        induction_is_rs1: 归纳变量是否为 rs1（否则为 rs2）
+        init: 归纳变量的初值
+        step: 每次迭代的步长
+        bound: 另一个操作数的值
+    
+    Returns:
+        迭代次数；无法推断、不终止或超过 STATIC_MAX_TRIP_COUNT 时返回 None
+    """
+    if step == 0 or funct3 not in (BRANCH_BNE, BRANCH_BLT, BRANCH_BGE, BRANCH_BLTU, BRANCH_BGEU):
+        return None
+    if funct3 == BRANCH_BNE:
+        distance = bound - init
+        if distance % step or distance // step < 1:
+            return None
+        trips = distance // step
+        return trips if trips <= STATIC_MAX_TRIP_COUNT else None
+    
+    def taken(n: int) -> bool:
+        value = init + n * step
+        return _branch_taken(funct3, value, bound) if induction_is_rs1 else _branch_taken(funct3, bound, value)
+    
+    # 线性归纳变量的比较结果随迭代单调变化：二分查找第一次不成立的迭代
+    if taken(STATIC_MAX_TRIP_COUNT):
+        return None
+    low, high = 1, STATIC_MAX_TRIP_COUNT
+    while low < high:
+        middle = (low + high) // 2
+        if taken(middle):
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+class StaticProfile:
+    """
+    静态执行频率（无需 trace 或模拟器运行）
+    
+    控制流图以基本块为节点，边为顺序执行、条件分支与 j 跳转；函数调用视为顺序执行，
+    各函数入口频率为 1（不做过程间传播）。回边为指向其支配节点的边，同一循环头的
+    回边合并为一个自然循环。每个循环的迭代次数由 addi / 条件分支归纳模式推断
+    （初值与另一个比较操作数须由进入循环前的 li 给出），推断失败时取 STATIC_LOOP_TRIP_COUNT，
+    基本块频率为包含它的各层循环的迭代次数之积。
+    """
+    
+    def __init__(self, packages: List[VLIWPackage], default_trip_count: int = STATIC_LOOP_TRIP_COUNT):
+        """
+        Args:
+            packages: 原始 VLIW 包列表
+            default_trip_count: 无法推断迭代次数的循环每层的迭代次数
+        """
+        self.default_trip_count = default_trip_count
+        self.blocks = split_blocks(packages)
+        self.starts = [block[0].address for block in self.blocks]
+        self.successors = [self._successors(k) for k in range(len(self.blocks))]
+        self.predecessors = [[] for _ in self.blocks]
+        for block, targets in enumerate(self.successors):
+            for target in targets:
+                self.predecessors[target].append(block)
+        self.idom = self._immediate_dominators()
+        self.loops = self._find_loops()
+        
+        self.block_frequency = [1] * len(self.blocks)
+        self.block_depth = [0] * len(self.blocks)
+        for loop in self.loops:
+            for block in loop['body']:
+                self.block_frequency[block] *= loop['trip_count']
+                self.block_depth[block] += 1
+        for loop in self.loops:
+            loop['depth'] = self.block_depth[loop['header']]
+            loop['frequency'] = self.block_frequency[loop['header']]
+    
+    def block_of(self, address: int) -> int:
+        """地址所在的基本块（填充指令归入其前面的块）"""
+        return max(bisect.bisect_right(self.starts, address) - 1, 0)
+    
+    def frequency_of(self, address: int) -> int:
+        """地址所在基本块的估算执行频率"""
+        return self.block_frequency[self.block_of(address)] if self.blocks else 1
+    
+    def package_frequency(self, pkg: VLIWPackage) -> int:
+        """
+        包的估算执行次数
+        
+        重打包与搜索的包不跨越基本块，包内各有效指令的频率相同；其他布局中包内任一
+        有效指令执行时都要取这个包，取各有效指令频率的最大值。
+        """
+        frequencies = [self.frequency_of(inst.address) for inst in pkg.instructions if not inst.is_nop]
+        return max(frequencies) if frequencies else self.frequency_of(pkg.start_address)
+    
+    def _target_block(self, address: int) -> Optional[int]:
+        """跳转目标所在的块（目标为填充指令时取其后第一个块）"""
+        index = bisect.bisect_left(self.starts, address)
+        return index if index < len(self.blocks) else None
+    
+    def _successors(self, index: int) -> List[int]:
+        """基本块的后继"""
+        last = self.blocks[index][-1]
+        fallthrough = [index + 1] if index + 1 < len(self.blocks) else []
+        if last.inst_type != 'BRANCH':
+            return fallthrough
+        word = int(last.hex_code, 16)
+        op = opcode(word)
+        rd = (word >> 7) & 0x1f
+        if op == OPCODE_BRANCH:
+            target = self._target_block(last.address + decode_b_imm(word))
+            return sorted(set(fallthrough + ([target] if target is not None else [])))
+        if op == OPCODE_JAL and rd == 0:
+            target = self._target_block(last.address + decode_j_imm(word))
+            return [target] if target is not None else []
+        if op == OPCODE_JALR and rd == 0:
+            return []
+        # 函数调用返回后顺序执行
+        return fallthrough
+    
+    def _immediate_dominators(self) -> List[Optional[int]]:
+        """
+        直接支配节点（Cooper-Harvey-Kennedy 迭代算法）
+        
+        没有前驱的块（程序入口与各函数入口）挂在一个虚拟根节点下；虚拟根节点编号为块数，
+        入口块的直接支配节点为虚拟根节点，不可达的块为 None。
+        """
+        count = len(self.blocks)
+        roots = [k for k in range(count) if k == 0 or not self.predecessors[k]]
+        
+        # 从虚拟根节点出发的逆后序
+        order = []
+        visited = [False] * count
+        for root in roots:
+            if visited[root]:
+                continue
+            visited[root] = True
+            stack = [(root, iter(self.successors[root]))]
+            while stack:
+                node, children = stack[-1]
+                for child in children:
+                    if not visited[child]:
+                        visited[child] = True
+                        stack.append((child, iter(self.successors[child])))
+                        break
+                else:
+                    order.append(node)
+                    stack.pop()
+        order.reverse()
+        rank = [count] * (count + 1)
+        rank[count] = -1
+        for position, node in enumerate(order):
+            rank[node] = position
+        
+        idom = [None] * (count + 1)
+        idom[count] = count
+        for root in roots:
+            idom[root] = count
+        
+        def intersect(a: int, b: int) -> int:
+            while a != b:
+                while rank[a] > rank[b]:
+                    a = idom[a]
+                while rank[b] > rank[a]:
+                    b = idom[b]
+            return a
+        
+        changed = True
+        while changed:
+            changed = False
+            for node in order:
+                if idom[node] == count:
+                    continue
+                new = None
+                for pred in self.predecessors[node]:
+                    if idom[pred] is not None:
+                        new = pred if new is None else intersect(pred, new)
+                if new is not None and idom[node] != new:
+                    idom[node] = new
+                    changed = True
+        return idom[:count]
+    
+    def dominates(self, a: int, b: int) -> bool:
+        """块 a 是否支配块 b"""
+        count = len(self.blocks)
+        while b is not None and b != count:
+            if b == a:
+                return True
+            b = self.idom[b]
+        return False
+    
+    def _find_loops(self) -> List[Dict]:
+        """由回边构建自然循环（同一循环头的回边合并），按循环头地址排序"""
+        latches = {}
+        for block, targets in enumerate(self.successors):
+            for target in targets:
+                if self.dominates(target, block):
+                    latches.setdefault(target, []).append(block)
+        
+        loops = []
+        for header in sorted(latches):
+            body = {header}
+            stack = [latch for latch in latches[header] if latch != header]
+            body.update(stack)
+            while stack:
+                for pred in self.predecessors[stack.pop()]:
+                    if pred not in body:
+                        body.add(pred)
+                        stack.append(pred)
+            trips = self._infer_trip_count(header, latches[header], body)
+            loops.append({
+                'header': header,
+                'address': f"0x{self.starts[header]:08x}",
+                'blocks': len(body),
+                'instructions': sum(len(self.blocks[block]) for block in body),
+                'trip_count': trips if trips is not None else self.default_trip_count,
+                'inferred': trips is not None,
+                'body': sorted(body)
+            })
+        return loops
+    
+    def _constant_before(self, block: int, reg: int) -> Optional[int]:
+        """
+        进入 block 之前寄存器 reg 的常量值
+        
+        从 block 末尾向前查找最后一次写入，本块没有写入时沿唯一前驱继续查找；
+        只识别 li（addi rd, x0, imm）。
+        """
+        if reg == 0:
+            return 0
+        visited = set()
+        while block not in visited:
+            visited.add(block)
+            for inst in reversed(self.blocks[block]):
+                if inst.writes >> reg & 1:
+                    return _load_immediate(int(inst.hex_code, 16))
+            if len(self.predecessors[block]) != 1:
+                return None
+            block = self.predecessors[block][0]
+        return None
+    
+    def _infer_trip_count(self, header: int, latches: Sequence[int], body: set) -> Optional[int]:
+        """
+        由归纳模式推断循环的迭代次数
+        
+        要求只有一个回边、回边来自跳回循环头的条件分支；分支的一个操作数只由循环头或
+        回边所在块中的一条 addi r, r, step 更新，另一个操作数在循环内不变；两者在进入
+        循环前的值均为常量。
+        """
+        if len(latches) != 1:
+            return None
+        latch = latches[0]
+        branch = self.blocks[latch][-1]
+        word = int(branch.hex_code, 16)
+        if opcode(word) != OPCODE_BRANCH or self._target_block(branch.address + decode_b_imm(word)) != header:
+            return None
+        outside = [pred for pred in self.predecessors[header] if pred not in body]
+        if len(outside) != 1:
+            return None
+        
+        writers = {}
+        for block in body:
+            for inst in self.blocks[block]:
+                mask = inst.writes
+                while mask:
+                    low = mask & -mask
+                    writers.setdefault(low.bit_length() - 1, []).append((block, inst))
+                    mask ^= low
+        
+        funct3 = (word >> 12) & 0x7
+        rs1, rs2 = (word >> 15) & 0x1f, (word >> 20) & 0x1f
+        for induction, other, induction_is_rs1 in ((rs1, rs2, True), (rs2, rs1, False)):
+            updates = writers.get(induction, [])
+            if len(updates) != 1 or other in writers or updates[0][0] not in (header, latch):
+                continue
+            step = _increment(int(updates[0][1].hex_code, 16))
+            init = self._constant_before(outside[0], induction)
+            bound = self._constant_before(outside[0], other)
+            if step is not None and init is not None and bound is not None:
+                return trip_count(funct3, induction_is_rs1, init, step, bound)
+        return None
+    
+    def summary(self) -> Dict:
+        """
+        循环嵌套与频率概况
+        
+        Returns:
+            {'blocks', 'loops', 'inferred_loops', 'max_depth', 'max_frequency',
+             'default_trip_count', 'loop_list': 各循环（不含块列表）}
+        """
+        return {
+            'blocks': len(self.blocks),
+            'loops': len(self.loops),
+            'inferred_loops': sum(1 for loop in self.loops if loop['inferred']),
+            'max_depth': max(self.block_depth, default=0),
+            'max_frequency': max(self.block_frequency, default=1),
+            'default_trip_count': self.default_trip_count,
+            'loop_list': [
+                {key: value for key, value in loop.items() if key not in ('header', 'body')}
+                for loop in self.loops
+            ]
+        }
+
+
+def weighted_statistics(
+    packages: Sequence[VLIWPackage],
+    profile: StaticProfile,
+    machine: MachineDescription = None
+) -> Dict:
+    """
+    包序列的静态统计与按执行频率加权的统计
+    
+    停顿按程序顺序逐包估算（同 StallEstimator.estimate），每个包的包数、停顿与周期乘以
+    包的估算执行次数；有效指令按各自所在基本块的频率计，不随打包方式变化。
+    
+    Args:
+        packages: VLIW 包列表
+        profile: 静态执行频率
+        machine: 机器描述
+    
+    Returns:
+        {'static': ..., 'weighted': ...}，各为 {'packages', 'valid', 'stalls', 'cycles',
+        'average_valid_per_package'}
+    """
+    timeline = StallEstimator(machine=machine).timeline()
+    static = {'packages': 0, 'valid': 0, 'stalls': 0, 'cycles': 0}
+    weighted = dict(static)
+    for pkg in packages:
+        cycle = timeline.cycle
+        stalls = timeline.data_stalls + timeline.divide_stalls
+        timeline.add_package(pkg)
+        stalls = timeline.data_stalls + timeline.divide_stalls - stalls
+        cycles = timeline.cycle - cycle
+        weight = profile.package_frequency(pkg)
+        static['packages'] += 1
+        static['valid'] += pkg.valid_count
+        static['stalls'] += stalls
+        static['cycles'] += cycles
+        weighted['packages'] += weight
+        weighted['valid'] += sum(profile.frequency_of(inst.address) for inst in pkg.instructions if not inst.is_nop)
+        weighted['stalls'] += weight * stalls
+        weighted['cycles'] += weight * cycles
+    
+    for totals in (static, weighted):
+        totals['average_valid_per_package'] = totals['valid'] / totals['packages'] if totals['packages'] else 0
+    return {'static': static, 'weighted': weighted}
+
+
+def compare_weighted(
+    layouts: Dict[str, Sequence[VLIWPackage]],
+    profile: StaticProfile,
+    machine: MachineDescription = None,
+    baseline: str = 'original'
+) -> Dict:
+    """
+    对比多个包布局的静态与加权统计
+    
+    Args:
+        layouts: 布局名 -> 包列表（须包含 baseline）
+        profile: 静态执行频率
+        machine: 机器描述
+        baseline: 计算减少比例的基准布局
+    
+    Returns:
+        布局名 -> weighted_statistics 的结果；非基准布局的 static / weighted 另含相对基准的
+        package_reduction_percentage 与 cycle_gain_percentage
+    """
+    results = {name: weighted_statistics(packages, profile, machine) for name, packages in layouts.items()}
+    for name, result in results.items():
+        if name == baseline:
+            continue
+        for kind, totals in result.items():
+            base = results[baseline][kind]
+            totals['package_reduction_percentage'] = (
+                (base['packages'] - totals['packages']) / base['packages'] * 100 if base['packages'] else 0
+            )
+            totals['cycle_gain_percentage'] = (
+                (base['cycles'] - totals['cycles']) / base['cycles'] * 100 if base['cycles'] else 0
+            )
+    return results
@@ -0,0 +1,286 @@
+"""
+指令 Cache 模拟：评估原始布局与重排/压缩布局的 I-Cache 缺失
+"""
+
+from typing import Dict, List, Sequence, Tuple
+from instruction import VLIWPackage
+from config import VLIW_PACKAGE_SIZE
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 为可选依赖，缺失时使用纯 Python 路径
+    np = None
+
+
+class ICacheSimulator:
+    """组相联、LRU 替换的指令 Cache 模拟器"""
+    
+    def __init__(
+        self,
+        size_bytes: int = 8192,
+        line_bytes: int = 64,
+        associativity: int = 2,
+        miss_penalty: int = 10
+    ):
+        """
+        Args:
+            size_bytes: Cache 容量（字节）
+            line_bytes: Cache 行大小（字节）
+            associativity: 相联度（1 为直接映射）
+            miss_penalty: 每次缺失的停顿周期数
+        """
+        if size_bytes % (line_bytes * associativity) != 0:
+            raise ValueError("Cache 容量必须是 行大小 × 相联度 的整数倍")
+        self.size_bytes = size_bytes
+        self.line_bytes = line_bytes
+        self.associativity = associativity
+        self.miss_penalty = miss_penalty
+        self.num_sets = size_bytes // (line_bytes * associativity)
+    
+    def expand_lines(self, fetches: Sequence[Tuple[int, int]]) -> List[int]:
+        """
+        将 (字节地址, 字节数) 形式的取指序列展开为 Cache 行号序列
+        
+        Args:
+            fetches: 每次取包的 (起始字节地址, 包字节数)
+        
+        Returns:
+            依次访问的 Cache 行号
+        """
+        lines = []
+        for addr, size in fetches:
+            if size <= 0:
+                continue
+            lines.extend(range(addr // self.line_bytes, (addr + size - 1) // self.line_bytes + 1))
+        return lines
+    
+    def simulate(self, fetches: Sequence[Tuple[int, int]]) -> Dict:
+        """
+        逐次模拟取指序列（纯 Python 路径）
+        
+        Args:
+            fetches: 每次取包的 (起始字节地址, 包字节数)
+        
+        Returns:
+            统计字典
+        """
+        lines = self.expand_lines(fetches)
+        sets = [[] for _ in range(self.num_sets)]
+        misses = 0
+        prev_line = -1
+        
+        for line in lines:
+            # 连续访问同一行必然命中，且不改变 LRU 顺序
+            if line == prev_line:
+                continue
+            prev_line = line
+            
+            ways = sets[line % self.num_sets]
+            tag = line // self.num_sets
+            if tag in ways:
+                ways.remove(tag)
+            else:
+                misses += 1
+                if len(ways) >= self.associativity:
+                    ways.pop(0)
+            ways.append(tag)
+        
+        return self._make_stats(len(lines), misses)
+    
+    def simulate_fast(self, fetches: Sequence[Tuple[int, int]]) -> Dict:
+        """
+        向量化重放长取指序列（需要 NumPy，缺失时退回 simulate）
+        
+        1. 向量化展开取指范围并去除连续重复行（必然命中）
+        2. 按组号稳定排序，组内访问顺序保持不变
+        3. 直接映射：组内 tag 与前一次访问不同即缺失，完全向量化；
+           组相联：逐组运行 LRU，每组只处理属于自己的访问
+        
+        Args:
+            fetches: 每次取包的 (起始字节地址, 包字节数)
+        
+        Returns:
+            统计字典（与 simulate 结果一致）
+        """
+        if np is None:
+            return self.simulate(fetches)
+        
+        fetch_array = np.asarray(fetches, dtype=np.int64).reshape(-1, 2)
+        fetch_array = fetch_array[fetch_array[:, 1] > 0]
+        if len(fetch_array) == 0:
+            return self._make_stats(0, 0)
+        
+        first = fetch_array[:, 0] // self.line_bytes
+        last = (fetch_array[:, 0] + fetch_array[:, 1] - 1) // self.line_bytes
+        counts = last - first + 1
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        lines = np.repeat(first, counts) + offsets
+        total_accesses = len(lines)
+        
+        keep = np.ones(len(lines), dtype=bool)
+        keep[1:] = lines[1:] != lines[:-1]
+        lines = lines[keep]
+        
+        set_idx = lines % self.num_sets
+        tags = lines // self.num_sets
+        order = np.argsort(set_idx, kind='stable')
+        sorted_sets = set_idx[order]
+        sorted_tags = tags[order]
+        
+        if self.associativity == 1:
+            miss = np.ones(len(sorted_tags), dtype=bool)
+            same_set = sorted_sets[1:] == sorted_sets[:-1]
+            miss[1:] = ~same_set | (sorted_tags[1:] != sorted_tags[:-1])
+            return self._make_stats(total_accesses, int(miss.sum()))
+        
+        misses = 0
+        boundaries = np.flatnonzero(np.diff(sorted_sets)) + 1
+        for group in np.split(sorted_tags, boundaries):
+            ways = []
+            for tag in group.tolist():
+                if tag in ways:
+                    ways.remove(tag)
+                else:
+                    misses += 1
+                    if len(ways) >= self.associativity:
+                        ways.pop(0)
+                ways.append(tag)
+        
+        return self._make_stats(total_accesses, misses)
+    
+    def _make_stats(self, accesses: int, misses: int) -> Dict:
+        return {
+            'accesses': accesses,
+            'misses': misses,
+            'miss_rate': misses / accesses * 100 if accesses > 0 else 0,
+            'miss_cycles': misses * self.miss_penalty
+        }
+
+
+def package_layout(
+    packages: List[VLIWPackage],
+    base_address: int = None,
+    encoding_model=None
+) -> Dict[int, Tuple[int, int]]:
+    """
+    计算包在内存中的布局
+    
+    Args:
+        packages: VLIW 包列表（按布局顺序）
+        base_address: 连续排布的起始地址；为 None 时沿用包的原始地址
+        encoding_model: BundleEncodingModel（可选），给定时按编码后大小连续排布
+    
+    Returns:
+        {包起始地址: (布局字节地址, 包字节数)}
+    """
+    layout = {}
+    offset = base_address if base_address is not None else (
+        packages[0].start_address if packages else 0
+    )
+    
+    for pkg in packages:
+        size = encoding_model.encoded_size(pkg) if encoding_model else VLIW_PACKAGE_SIZE * 4
+        if base_address is None and encoding_model is None:
+            layout[pkg.start_address] = (pkg.start_address, size)
+        else:
+            layout[pkg.start_address] = (offset, size)
+            offset += size
+    
+    return layout
+
+
+def trace_to_fetches(
+    trace: Sequence[int],
+    original_packages: List[VLIWPackage],
+    packages: List[VLIWPackage],
+    layout: Dict[int, Tuple[int, int]]
+) -> List[Tuple[int, int]]:
+    """
+    将原始布局下的取包 PC 序列映射为目标布局下的取指序列
+    
+    原始包中的指令分布到若干目标包中；执行一次原始包，
+    即按顺序取一次包含其指令的每个目标包。
+    
+    Args:
+        trace: 原始布局下依次执行的包起始 PC
+        original_packages: 原始 VLIW 包列表
+        packages: 目标布局的包列表
+        layout: 目标布局（package_layout 的返回值）
+    
+    Returns:
+        (字节地址, 字节数) 取指序列
+    """
+    owner = {}
+    for pkg in packages:
+        for inst in pkg.instructions:
+            owner[inst.address] = pkg.start_address
+    
+    expansion = {}
+    for pkg in original_packages:
+        targets = []
+        for inst in pkg.instructions:
+            target = owner.get(inst.address)
+            if target is not None and target not in targets:
+                targets.append(target)
+        expansion[pkg.start_address] = [layout[t] for t in targets]
+    
+    fetches = []
+    for pc in trace:
+        fetches.extend(expansion.get(pc, ()))
+    return fetches
+
+
+def load_trace(filepath: str) -> List[int]:
+    """
+    读取取包 PC 序列文件（每行一个十六进制 PC，忽略空行和 # 注释）
+    """
+    trace = []
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                trace.append(int(line, 16))
+    return trace
+
+
+def compare_layouts(
+    simulator: ICacheSimulator,
+    original_packages: List[VLIWPackage],
+    optimized_packages: List[VLIWPackage],
+    trace: Sequence[int] = None,
+    encoding_model=None,
+    base_address: int = 0x80000000
+) -> Dict:
+    """
+    对比原始布局与重排（及可选的压缩）布局的 I-Cache 表现
+    
+    Args:
+        simulator: I-Cache 模拟器
+        original_packages: 原始 VLIW 包列表
+        optimized_packages: 优化后的 VLIW 包列表
+        trace: 原始布局下的取包 PC 序列（可选），缺省时按静态布局顺序各取一次
+        encoding_model: BundleEncodingModel（可选），给定时额外评估压缩布局
+        base_address: 重排布局的起始地址
+    
+    Returns:
+        {布局名: 统计字典}
+    """
+    layouts = [
+        ('original', original_packages, package_layout(original_packages)),
+        ('repacked', optimized_packages, package_layout(optimized_packages, base_address)),
+    ]
+    if encoding_model is not None:
+        layouts.append(('original_compact', original_packages,
+                        package_layout(original_packages, base_address, encoding_model)))
+        layouts.append(('repacked_compact', optimized_packages,
+                        package_layout(optimized_packages, base_address, encoding_model)))
+    
+    results = {}
+    for name, packages, layout in layouts:
+        if trace is None:
+            fetches = [layout[pkg.start_address] for pkg in packages]
+        else:
+            fetches = trace_to_fetches(trace, original_packages, packages, layout)
+        results[name] = simulator.simulate_fast(fetches)
+    
+    return results
@@ -2,34 +2,84 @@
 指令类定义：表示单条 RISC-V 指令和 VLIW 包
 """
 
-from typing import List, Optional
+from functools import lru_cache
+from typing import List, Optional, Tuple
 from config import SINGLE_CYCLE_ALU, MULTI_CYCLE_INST, BRANCH_JUMP_INST, PADDING_INST
 from config import INT_REG_ALIAS, FLOAT_REG_ALIAS, ONE_LEVEL_DEPENDENCY_ELIGIBLE
+from config import DECODE_CACHE_SIZE, LOAD_INST, STORE_INST, MULDIV_INST, FLOAT_REG_BASE
 
 
-class Instruction:
-    """表示单条 RISC-V 指令"""
+def register_index(reg: Optional[str]) -> Optional[int]:
+    """
+    将标准化后的寄存器名转换为位掩码中的位置
     
-    def __init__(self, address: int, hex_code: str, mnemonic: str, operands: str):
-        self.address = address
-        self.hex_code = hex_code.strip()
-        self.mnemonic = mnemonic.strip()
-        self.operands = operands.strip()
+    Args:
+        reg: 标准化寄存器名（x0-x31 / f0-f31）
         
-        # 寄存器字段
-        self.rd: Optional[str] = None
-        self.rs1: Optional[str] = None
-        self.rs2: Optional[str] = None
-        self.rs3: Optional[str] = None
+    Returns:
+        x 寄存器返回 0-31，f 寄存器返回 32-63，非寄存器（立即数、标号等）返回 None
+    """
+    if not reg or len(reg) < 2 or reg[0] not in 'xf' or not reg[1:].isdigit():
+        return None
+    num = int(reg[1:])
+    if num >= 32:
+        return None
+    return num if reg[0] == 'x' else FLOAT_REG_BASE + num
+
+
+def register_mask(*regs: Optional[str]) -> int:
+    """将若干寄存器名合并为 64 位掩码（忽略非寄存器操作数）"""
+    mask = 0
+    for reg in regs:
+        idx = register_index(reg)
+        if idx is not None:
+            mask |= 1 << idx
+    return mask
+
+
+class DecodedInstruction:
+    """
+    指令译码结果：类型、属性标志与寄存器字段
+    
+    同一编码（hex_code, mnemonic, operands）的所有出现共享同一个实例，
+    创建后不可修改。
+    """
+    
+    __slots__ = (
+        'hex_code', 'mnemonic', 'operands',
+        'rd', 'rs1', 'rs2', 'rs3', 'reads', 'writes',
+        'is_nop', 'is_single_cycle', 'can_one_level_dep', 'inst_type'
+    )
+    
+    def __init__(self, hex_code: str, mnemonic: str, operands: str):
+        init = object.__setattr__
+        init(self, 'hex_code', hex_code)
+        init(self, 'mnemonic', mnemonic)
+        init(self, 'operands', operands)
         
         # 指令属性
-        self.is_nop = self._check_is_nop()
-        self.is_single_cycle = self._check_is_single_cycle()
-        self.can_one_level_dep = self._check_can_one_level_dependency()
-        self.inst_type = self._determine_type()
+        init(self, 'is_nop', self._check_is_nop())
+        init(self, 'is_single_cycle', self._check_is_single_cycle())
+        init(self, 'can_one_level_dep', self._check_can_one_level_dependency())
+        init(self, 'inst_type', self._determine_type())
         
         # 解析操作数，提取寄存器
-        self._parse_operands()
+        rd, rs1, rs2, rs3 = self._parse_operands()
+        init(self, 'rd', rd)
+        init(self, 'rs1', rs1)
+        init(self, 'rs2', rs2)
+        init(self, 'rs3', rs3)
+        
+        # 读/写寄存器位掩码，写 x0 无效
+        init(self, 'reads', register_mask(rs1, rs2, rs3))
+        init(self, 'writes', register_mask(rd) & ~1)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("DecodedInstruction 为共享的不可变对象")
+    
+    def __reduce__(self):
+        # 反序列化时同样经过译码缓存
+        return (decode_instruction, (self.hex_code, self.mnemonic, self.operands))
     
     def _check_is_nop(self) -> bool:
         """检查是否为填充指令"""
@@ -61,11 +111,11 @@ class Instruction:
         if self.mnemonic in SINGLE_CYCLE_ALU:
             return 'ALU'
         if self.mnemonic in MULTI_CYCLE_INST:
-            if self.mnemonic.startswith('l') or self.mnemonic.startswith('fl'):
+            if self.mnemonic in LOAD_INST:
                 return 'LOAD'
-            elif self.mnemonic.startswith('s') or self.mnemonic.startswith('fs'):
+            elif self.mnemonic in STORE_INST:
                 return 'STORE'
-            elif self.mnemonic in ['mul', 'mulh', 'mulhsu', 'mulhu', 'div', 'divu', 'rem', 'remu']:
+            elif self.mnemonic in MULDIV_INST:
                 return 'MULDIV'
             else:
                 return 'FPU'
@@ -87,10 +137,12 @@ class Instruction:
             return FLOAT_REG_ALIAS[reg]
         return reg
     
-    def _parse_operands(self):
-        """解析操作数，提取寄存器"""
+    def _parse_operands(self) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
+        """解析操作数，提取寄存器，返回 (rd, rs1, rs2, rs3)"""
+        rd = rs1 = rs2 = rs3 = None
+        
         if not self.operands or self.is_nop:
-            return
+            return rd, rs1, rs2, rs3
         
         # 分割操作数
         parts = [p.strip() for p in self.operands.split(',')]
@@ -99,65 +151,130 @@ class Instruction:
         if self.inst_type == 'ALU':
             # 大多数 ALU 指令格式：rd, rs1, rs2/imm
             if len(parts) >= 1:
-                self.rd = self._normalize_register(parts[0])
+                rd = self._normalize_register(parts[0])
             if len(parts) >= 2:
-                self.rs1 = self._normalize_register(parts[1])
+                rs1 = self._normalize_register(parts[1])
             if len(parts) >= 3:
                 # 可能是寄存器或立即数
                 if not parts[2].lstrip('-').isdigit() and not parts[2].startswith('0x'):
-                    self.rs2 = self._normalize_register(parts[2])
+                    rs2 = self._normalize_register(parts[2])
         
         elif self.inst_type == 'LOAD':
             # Load 格式：rd, offset(rs1)
             if len(parts) >= 1:
-                self.rd = self._normalize_register(parts[0])
+                rd = self._normalize_register(parts[0])
             if len(parts) >= 2:
                 # 提取 offset(rs1) 中的 rs1
                 if '(' in parts[1]:
                     base_reg = parts[1].split('(')[1].rstrip(')')
-                    self.rs1 = self._normalize_register(base_reg)
+                    rs1 = self._normalize_register(base_reg)
         
         elif self.inst_type == 'STORE':
             # Store 格式：rs2, offset(rs1)
             if len(parts) >= 1:
-                self.rs2 = self._normalize_register(parts[0])
+                rs2 = self._normalize_register(parts[0])
             if len(parts) >= 2:
                 if '(' in parts[1]:
                     base_reg = parts[1].split('(')[1].rstrip(')')
-                    self.rs1 = self._normalize_register(base_reg)
+                    rs1 = self._normalize_register(base_reg)
         
         elif self.inst_type == 'BRANCH':
             # Branch 格式：rs1, rs2, target 或 rd, target
             if self.mnemonic in ['jal', 'jalr', 'call']:
                 if len(parts) >= 1:
-                    self.rd = self._normalize_register(parts[0])
+                    rd = self._normalize_register(parts[0])
                 if len(parts) >= 2 and self.mnemonic == 'jalr':
                     if '(' in parts[1]:
                         base_reg = parts[1].split('(')[1].rstrip(')')
-                        self.rs1 = self._normalize_register(base_reg)
+                        rs1 = self._normalize_register(base_reg)
                     else:
-                        self.rs1 = self._normalize_register(parts[1])
+                        rs1 = self._normalize_register(parts[1])
             elif self.mnemonic in ['ret', 'jr']:
                 # ret 隐式使用 ra
                 if self.mnemonic == 'ret':
-                    self.rs1 = 'x1'  # ra
+                    rs1 = 'x1'  # ra
             else:
                 # beq, bne, blt, bge, bltu, bgeu
                 if len(parts) >= 1:
-                    self.rs1 = self._normalize_register(parts[0])
+                    rs1 = self._normalize_register(parts[0])
                 if len(parts) >= 2:
-                    self.rs2 = self._normalize_register(parts[1])
+                    rs2 = self._normalize_register(parts[1])
         
         elif self.inst_type in ['FPU', 'MULDIV']:
             # 通用格式：rd, rs1, rs2[, rs3]
             if len(parts) >= 1:
-                self.rd = self._normalize_register(parts[0])
+                rd = self._normalize_register(parts[0])
             if len(parts) >= 2:
-                self.rs1 = self._normalize_register(parts[1])
+                rs1 = self._normalize_register(parts[1])
             if len(parts) >= 3:
-                self.rs2 = self._normalize_register(parts[2])
+                rs2 = self._normalize_register(parts[2])
             if len(parts) >= 4:
-                self.rs3 = self._normalize_register(parts[3])
+                rs3 = self._normalize_register(parts[3])
+        
+        return rd, rs1, rs2, rs3
+
+
+@lru_cache(maxsize=DECODE_CACHE_SIZE)
+def decode_instruction(hex_code: str, mnemonic: str, operands: str) -> DecodedInstruction:
+    """
+    译码缓存：相同编码只译码一次，返回共享的 DecodedInstruction
+    
+    Args:
+        hex_code: 十六进制编码（已去除首尾空白）
+        mnemonic: 助记符（已去除首尾空白）
+        operands: 操作数（已去除首尾空白）
+        
+    Returns:
+        共享的译码结果
+    """
+    return DecodedInstruction(hex_code, mnemonic, operands)
+
+
+def _decoded_field(name: str) -> property:
+    """生成转发到共享译码结果的只读属性"""
+    return property(lambda self: getattr(self.decoded, name))
+
+
+class Instruction:
+    """
+    表示单条 RISC-V 指令
+    
+    每次出现只保存地址，类型、标志与寄存器字段均来自共享的译码结果。
+    """
+    
+    __slots__ = ('address', 'decoded')
+    
+    def __init__(self, address: int, hex_code: str, mnemonic: str, operands: str):
+        self.address = address
+        self.decoded = decode_instruction(hex_code.strip(), mnemonic.strip(), operands.strip())
+    
+    @classmethod
+    def from_decoded(cls, address: int, decoded: DecodedInstruction) -> 'Instruction':
+        """用已有的译码结果创建指令（跳过译码缓存查找）"""
+        inst = object.__new__(cls)
+        inst.address = address
+        inst.decoded = decoded
+        return inst
+    
+    hex_code = _decoded_field('hex_code')
+    mnemonic = _decoded_field('mnemonic')
+    operands = _decoded_field('operands')
+    
+    # 寄存器字段
+    rd = _decoded_field('rd')
+    rs1 = _decoded_field('rs1')
+    rs2 = _decoded_field('rs2')
+    rs3 = _decoded_field('rs3')
+    
+    # 读/写寄存器位掩码（x0-x31 为第 0-31 位，f0-f31 为第 32-63 位）
+    reads = _decoded_field('reads')
+    writes = _decoded_field('writes')
+    
+    # 指令属性
+    is_nop = _decoded_field('is_nop')
+    is_single_cycle = _decoded_field('is_single_cycle')
+    can_one_level_dep = _decoded_field('can_one_level_dep')
+    inst_type = _decoded_field('inst_type')
     
     def __repr__(self):
         return f"Inst(0x{self.address:08x}: {self.mnemonic} {self.operands})"
@@ -169,22 +286,37 @@ class VLIWPackage:
     def __init__(self, start_address: int):
         self.start_address = start_address
         self.instructions: List[Instruction] = []
+        self.slots: Optional[List[int]] = None  # 重打包分配的槽位（None 表示第 i 条指令位于槽位 i）
+        self._valid_count = 0
     
     def add_instruction(self, inst: Instruction):
-        """添加指令到包中"""
+        """添加指令到包中（指令只能通过该方法添加，以维护有效指令计数）"""
         if len(self.instructions) < 8:
             self.instructions.append(inst)
+            if not inst.is_nop:
+                self._valid_count += 1
     
     @property
     def valid_count(self) -> int:
         """有效指令数量（非填充指令）"""
-        return sum(1 for inst in self.instructions if not inst.is_nop)
+        return self._valid_count
     
     @property
     def is_full(self) -> bool:
         """包是否已满"""
         return len(self.instructions) >= 8
     
+    def slot_of(self, index: int) -> int:
+        """第 index 条指令所在的槽位"""
+        return self.slots[index] if self.slots is not None else index
+    
+    def slotted(self) -> List[Optional[Instruction]]:
+        """按槽位排列的 8 条指令，空槽位为 None"""
+        layout = [None] * 8
+        for index, inst in enumerate(self.instructions):
+            layout[self.slot_of(index)] = inst
+        return layout
+    
     def get_padding_stats(self):
         """获取填充指令统计"""
         if not self.instructions:
@@ -0,0 +1,382 @@
+"""
+机器描述：各流水线（槽位）可执行的指令类别与旁路（前递）拓扑
+"""
+
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from instruction import Instruction
+from config import (
+    VLIW_PACKAGE_SIZE, SLOT_CLASSES, RESULT_LATENCY, BYPASS_PATHS,
+    BYPASS_STAGE_DISTANCE, REGFILE_DISTANCE, SLOT_ASSIGNMENT_CACHE_SIZE,
+    FDIV_INST, FCVT_TO_INT_INST, FCVT_TO_FLOAT_INST, FPU_GPR_INST
+)
+
+BYPASS_STAGES = tuple(BYPASS_STAGE_DISTANCE)
+
+# 同一包内前递（一层依赖）使用的旁路级
+IN_BUNDLE_STAGE = 'EX1'
+
+ALL_SLOTS = (1 << VLIW_PACKAGE_SIZE) - 1
+
+
+def slot_class(inst: Instruction) -> str:
+    """
+    确定指令需要的槽位类别（见 config.SLOT_CLASSES）
+    
+    Args:
+        inst: 指令对象
+    
+    Returns:
+        槽位类别名
+    """
+    if inst.inst_type == 'ALU':
+        return 'ALU'
+    if inst.inst_type in ('LOAD', 'STORE'):
+        return 'LSU'
+    if inst.inst_type == 'MULDIV':
+        return 'MULDIV'
+    if inst.inst_type == 'BRANCH':
+        return 'BRANCH'
+    if inst.inst_type == 'FPU':
+        if inst.mnemonic in FDIV_INST:
+            return 'FDIV'
+        if inst.mnemonic in FCVT_TO_INT_INST:
+            return 'FCVT_TO_INT'
+        if inst.mnemonic in FCVT_TO_FLOAT_INST:
+            return 'FCVT_TO_FLOAT'
+        if inst.mnemonic in FPU_GPR_INST:
+            return 'FPU_GPR'
+        return 'FPU'
+    return 'OTHER'
+
+
+def expand_bypass(paths: Dict[str, Tuple[Iterable[int], Iterable[int]]]) -> Set[Tuple[int, int, str]]:
+    """
+    将 {级: (生产者槽位, 消费者槽位)} 展开为 (生产者槽位, 消费者槽位, 级) 集合
+    
+    Args:
+        paths: 旁路拓扑（格式同 config.BYPASS_PATHS）
+    
+    Returns:
+        旁路路径集合
+    """
+    return {
+        (producer, consumer, stage)
+        for stage, (producers, consumers) in paths.items()
+        for producer in producers
+        for consumer in consumers
+    }
+
+
+def _parse_slots(text: str) -> List[int]:
+    """解析槽位列表：逗号分隔的编号或范围（如 '0,3-4'），'*' 表示全部槽位"""
+    if text == '*':
+        return list(range(VLIW_PACKAGE_SIZE))
+    slots = []
+    for part in text.split(','):
+        if '-' in part:
+            first, last = part.split('-', 1)
+            slots.extend(range(int(first), int(last) + 1))
+        else:
+            slots.append(int(part))
+    return slots
+
+
+def parse_bypass_spec(spec: str) -> Set[Tuple[int, int, str]]:
+    """
+    解析旁路路径描述 'STAGE:PRODUCERS:CONSUMERS'
+    
+    槽位为逗号分隔的编号或范围，'*' 表示全部槽位，例如：
+    'EX2:0:*'（0 号流水线在 EX2 级前递给全部流水线）、'EX1:*:7'（包内前递给分支流水线）
+    
+    Args:
+        spec: 旁路路径描述
+    
+    Returns:
+        旁路路径集合
+    """
+    try:
+        stage, producers, consumers = spec.split(':')
+        paths = expand_bypass({stage.upper(): (_parse_slots(producers), _parse_slots(consumers))})
+    except ValueError:
+        raise ValueError(f"无效的旁路路径描述: {spec}（格式为 STAGE:PRODUCERS:CONSUMERS）")
+    MachineDescription.validate(paths)
+    return paths
+
+
+def _format_slots(slots: Sequence[int]) -> str:
+    """槽位列表的紧凑形式（_parse_slots 的逆过程）"""
+    if len(slots) == VLIW_PACKAGE_SIZE:
+        return '*'
+    parts = []
+    first = previous = slots[0]
+    for slot in list(slots[1:]) + [None]:
+        if slot is not None and slot == previous + 1:
+            previous = slot
+            continue
+        parts.append(str(first) if first == previous else f"{first}-{previous}")
+        first = previous = slot
+    return ','.join(parts)
+
+
+def format_paths(paths: Iterable[Tuple[int, int, str]]) -> List[str]:
+    """
+    旁路路径的紧凑可读形式，格式同 parse_bypass_spec
+    
+    同一级中消费者集合相同的生产者合并为一项，例如 64 条 WB 路径输出为 'WB:*:*'。
+    
+    Args:
+        paths: 旁路路径集合
+    
+    Returns:
+        'STAGE:PRODUCERS:CONSUMERS' 列表，按级排序
+    """
+    consumers = {}
+    for producer, consumer, stage in paths:
+        consumers.setdefault((stage, producer), []).append(consumer)
+    groups = {}
+    for (stage, producer), slots in consumers.items():
+        groups.setdefault((stage, tuple(sorted(slots))), []).append(producer)
+    return [
+        f"{stage}:{_format_slots(sorted(producers))}:{_format_slots(slots)}"
+        for (stage, slots), producers in sorted(
+            groups.items(), key=lambda item: (BYPASS_STAGES.index(item[0][0]), min(item[1]))
+        )
+    ]
+
+
+class MachineDescription:
+    """
+    Zircon 的机器描述：槽位能力与旁路矩阵
+    
+    旁路矩阵以 (生产者槽位, 消费者槽位, 级) 为键：生产者处于该级时，其结果
+    可以前递给处于 EX1 的消费者，两者相隔 BYPASS_STAGE_DISTANCE[级] 个包；
+    EX1 级表示同一包内的前递。指令结果在生产者到达 RESULT_LATENCY 对应的包间距
+    之后才能前递，之后由最近的可用旁路级送出，都不可用时从寄存器堆读取。
+    
+    重打包的槽位分配与停顿估算共用同一个机器描述，因此增删旁路路径的
+    what-if 会同时反映在包数与估算周期上。
+    """
+    
+    def __init__(
+        self,
+        paths: Iterable[Tuple[int, int, str]] = None,
+        slot_classes: Dict[str, Tuple[int, ...]] = None,
+        latency: Dict[str, int] = None
+    ):
+        """
+        Args:
+            paths: 旁路路径集合（默认由 config.BYPASS_PATHS 展开）
+            slot_classes: 槽位类别 -> 可用槽位（默认 config.SLOT_CLASSES）
+            latency: 指令类型 -> 结果可用所需的包间距（默认 config.RESULT_LATENCY）
+        """
+        self.paths = frozenset(expand_bypass(BYPASS_PATHS) if paths is None else paths)
+        self.validate(self.paths)
+        self.slot_classes = SLOT_CLASSES if slot_classes is None else slot_classes
+        self.latency = RESULT_LATENCY if latency is None else latency
+        
+        self._class_masks = {
+            name: sum(1 << slot for slot in slots) for name, slots in self.slot_classes.items()
+        }
+        self._inst_masks = {}  # 助记符 -> 可用槽位掩码
+        self._distances = {}  # 指令类型 -> [生产者槽位][消费者槽位] 包间距
+        self._assignments = OrderedDict()  # 包内约束 -> 槽位分配（LRU，最多 SLOT_ASSIGNMENT_CACHE_SIZE 项）
+        
+        # 每个生产者槽位可在包内前递到的消费者槽位掩码
+        self.bundle_targets = [0] * VLIW_PACKAGE_SIZE
+        for producer, consumer, stage in self.paths:
+            if stage == IN_BUNDLE_STAGE:
+                self.bundle_targets[producer] |= 1 << consumer
+    
+    @staticmethod
+    def validate(paths: Iterable[Tuple[int, int, str]]):
+        """检查旁路路径的级与槽位编号，非法时抛出 ValueError"""
+        for producer, consumer, stage in paths:
+            if stage not in BYPASS_STAGE_DISTANCE:
+                raise ValueError(f"未知的旁路级: {stage}（可选 {', '.join(BYPASS_STAGES)}）")
+            for slot in (producer, consumer):
+                if not 0 <= slot < VLIW_PACKAGE_SIZE:
+                    raise ValueError(f"槽位编号超出范围: {slot}")
+    
+    def with_paths(
+        self,
+        add: Iterable[Tuple[int, int, str]] = (),
+        drop: Iterable[Tuple[int, int, str]] = ()
+    ) -> 'MachineDescription':
+        """
+        增删旁路路径后的新机器描述（其余参数不变）
+        
+        Args:
+            add: 增加的路径
+            drop: 删除的路径
+        
+        Returns:
+            新的 MachineDescription
+        """
+        return MachineDescription((self.paths - set(drop)) | set(add), self.slot_classes, self.latency)
+    
+    def slot_mask(self, inst: Instruction) -> int:
+        """指令可用槽位的位掩码"""
+        # 指令类型由助记符决定（填充指令不参与打包），按助记符缓存
+        mask = self._inst_masks.get(inst.mnemonic)
+        if mask is None:
+            mask = self._inst_masks[inst.mnemonic] = self._class_masks.get(slot_class(inst), ALL_SLOTS)
+        return mask
+    
+    def distance_table(self, producer_type: str) -> List[List[int]]:
+        """
+        某类生产者的结果到各消费者槽位所需的包间距
+        
+        Args:
+            producer_type: 生产者的指令类型
+        
+        Returns:
+            [生产者槽位][消费者槽位] -> 包间距（不含迭代型除法器的额外阻塞）
+        """
+        table = self._distances.get(producer_type)
+        if table is None:
+            ready = self.latency.get(producer_type, 1)
+            stages = sorted(
+                (distance, stage) for stage, distance in BYPASS_STAGE_DISTANCE.items()
+                if stage != IN_BUNDLE_STAGE and distance >= ready
+            )
+            table = [[REGFILE_DISTANCE] * VLIW_PACKAGE_SIZE for _ in range(VLIW_PACKAGE_SIZE)]
+            for producer in range(VLIW_PACKAGE_SIZE):
+                for consumer in range(VLIW_PACKAGE_SIZE):
+                    for distance, stage in stages:
+                        if (producer, consumer, stage) in self.paths:
+                            table[producer][consumer] = distance
+                            break
+            self._distances[producer_type] = table
+        return table
+    
+    def assign_slots(
+        self,
+        entries: Tuple[Tuple[int, int, int], ...],
+        hint: Tuple[int, ...] = None
+    ) -> Optional[Tuple[int, ...]]:
+        """
+        为包内指令分配互不相同的槽位
+        
+        约束：槽位在指令的可用槽位掩码内；有依赖关系（RAW / WAR / WAW / 访存顺序）
+        的指令对保持程序顺序（先执行的位于低槽位）；包内 RAW 的生产者槽位到
+        消费者槽位之间存在 EX1 级旁路。
+        
+        先尝试在 hint（前面各指令已有的分配）上直接为最后一条指令找空槽位；
+        否则按依赖顺序收紧每条指令的槽位上下界、检查各类槽位容量后回溯搜索，
+        相同的约束只搜索一次（最近使用的 SLOT_ASSIGNMENT_CACHE_SIZE 种约束的结果保留在缓存中）。
+        
+        Args:
+            entries: 按程序顺序每条指令的
+                     (可用槽位掩码, 须位于其前的包内指令掩码, 包内 RAW 生产者掩码)
+            hint: entries[:-1] 的一个合法分配（可选）
+        
+        Returns:
+            各指令的槽位；无法分配时返回 None
+        """
+        if hint is not None:
+            slot = self._free_slot(entries[-1], hint)
+            if slot is not None:
+                return hint + (slot,)
+        
+        if entries in self._assignments:
+            self._assignments.move_to_end(entries)
+            return self._assignments[entries]
+        
+        masks = self._bounded_masks(entries)
+        result = None
+        if masks is not None and self._has_capacity(masks):
+            slots = [0] * len(entries)
+            
+            def place(k: int, used: int) -> bool:
+                if k == len(entries):
+                    return True
+                candidates = self._candidates(entries[k], slots, masks[k] & ~used)
+                while candidates:
+                    low = candidates & -candidates
+                    slots[k] = low.bit_length() - 1
+                    if place(k + 1, used | low):
+                        return True
+                    candidates ^= low
+                return False
+            
+            if place(0, 0):
+                result = tuple(slots)
+        
+        self._assignments[entries] = result
+        if len(self._assignments) > SLOT_ASSIGNMENT_CACHE_SIZE:
+            self._assignments.popitem(last=False)
+        return result
+    
+    def _candidates(self, entry: Tuple[int, int, int], slots: Sequence[int], candidates: int) -> int:
+        """在前面各指令的槽位确定后，筛选满足顺序与包内旁路约束的候选槽位"""
+        _, before, producers = entry
+        while before:
+            low = before & -before
+            # 只能使用比前序指令更高的槽位
+            candidates &= ~((2 << slots[low.bit_length() - 1]) - 1)
+            before ^= low
+        while producers:
+            low = producers & -producers
+            candidates &= self.bundle_targets[slots[low.bit_length() - 1]]
+            producers ^= low
+        return candidates
+    
+    def _free_slot(self, entry: Tuple[int, int, int], slots: Tuple[int, ...]) -> Optional[int]:
+        """保持已有分配不变，为新指令选最低的可用槽位（没有则为 None）"""
+        used = 0
+        for slot in slots:
+            used |= 1 << slot
+        candidates = self._candidates(entry, slots, entry[0] & ~used)
+        if not candidates:
+            return None
+        return (candidates & -candidates).bit_length() - 1
+    
+    def _bounded_masks(self, entries: Tuple[Tuple[int, int, int], ...]) -> Optional[List[int]]:
+        """
+        按顺序约束收紧每条指令的可用槽位：不低于所有前序指令的最低可用槽位 + 1、
+        不高于所有后继指令的最高可用槽位 - 1。某条指令没有可用槽位时返回 None
+        """
+        masks = [entry[0] for entry in entries]
+        for k, (_, before, _) in enumerate(entries):
+            while before:
+                low = before & -before
+                lowest = masks[low.bit_length() - 1] & -masks[low.bit_length() - 1]
+                masks[k] &= ~((lowest << 1) - 1)
+                before ^= low
+            if not masks[k]:
+                return None
+        for k in range(len(entries) - 1, -1, -1):
+            highest = 1 << (masks[k].bit_length() - 1)
+            before = entries[k][1]
+            while before:
+                low = before & -before
+                masks[low.bit_length() - 1] &= highest - 1
+                before ^= low
+            if not masks[k]:
+                return None
+        return masks
+    
+    def _has_capacity(self, masks: List[int]) -> bool:
+        """Hall 条件：任意几种可用槽位集合上的指令数不超过这些集合并集的槽位数"""
+        counts = {}
+        for mask in masks:
+            counts[mask] = counts.get(mask, 0) + 1
+        distinct = list(counts)
+        for subset in range(1, 1 << len(distinct)):
+            union = 0
+            total = 0
+            for i, mask in enumerate(distinct):
+                if subset >> i & 1:
+                    union |= mask
+                    total += counts[mask]
+            if total > bin(union).count('1'):
+                return False
+        return True
+
+
+@lru_cache(maxsize=None)
+def default_machine() -> MachineDescription:
+    """按 config 构建的默认机器描述（共享实例，复用其槽位分配与包间距缓存）"""
+    return MachineDescription()
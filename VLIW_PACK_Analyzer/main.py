@@ -9,12 +9,148 @@ VLIW 反汇编分析工具 - 命令行入口
     python main.py ../VLIW_PACK/FFT/build/FFT-riscv32.txt
     python main.py FFT-riscv32.txt --output report.txt
     python main.py FFT-riscv32.txt --verbose
+    python main.py FFT-riscv32.txt --format ndjson --output result.ndjson
+    python main.py FFT-riscv32.txt --check
+    python main.py FFT-riscv32.txt --chain-depths
+    python main.py FFT-riscv32.txt --drop-bypass WB:*:*
+    python main.py FFT-riscv32.txt --verify
+    python main.py FFT-riscv32.txt --search 200 --jobs 0
+    python main.py FFT-riscv32.txt --strategies greedy,search
+    python main.py FFT-riscv32.txt --unroll 2,4
+    python main.py FFT-riscv32.txt --static-profile
+    python main.py new/FFT-riscv32.txt --diff old/FFT-riscv32.txt
+    python main.py FFT-riscv32.txt.xz
+    python main.py huge-riscv32.txt.xz --stream --format json
+    riscv32-unknown-elf-objdump -d prog | python main.py -
 """
 
 import sys
 import argparse
+import json
 import os
 from analyzer import VLIWAnalyzer
+from parser import STDIN_PATH
+from record_writer import create_record_writer
+from statistics import StatisticsCollector
+from diff import diff_files, diff_record
+from machine import parse_bypass_spec
+from strategies import PACKING_STRATEGIES, parse_strategies
+from config import FORWARDING_DEPTH_SWEEP, EQUIVALENCE_LANES, SEARCH_BLOCK_BUDGET_MS, UNROLL_FACTORS
+
+
+def run_optional_analyses(analyzer: VLIWAnalyzer, args):
+    """运行命令行选项启用的附加分析（结果并入报告与汇总记录）"""
+    # 流式分析时前递链深度对比已在分析过程中完成
+    if args.chain_depths is not None and not args.stream:
+        analyzer.compare_forwarding_depths(args.chain_depths)
+    
+    if args.drop_bypass or args.add_bypass:
+        analyzer.compare_bypass(
+            add=set().union(*args.add_bypass),
+            drop=set().union(*args.drop_bypass)
+        )
+    
+    if args.verify is not None:
+        analyzer.verify_equivalence(args.verify)
+    
+    if args.search is not None:
+        analyzer.search_repack(args.search, jobs=args.jobs)
+    
+    if args.strategies:
+        analyzer.compare_strategies(args.strategies, measure_memory=args.strategy_memory)
+    
+    if args.unroll is not None:
+        analyzer.estimate_unrolling(args.unroll)
+    
+    # 在其他重打包之后运行，使搜索式重打包的结果一并加权
+    if args.static_profile:
+        analyzer.estimate_static_profile()
+    
+    if args.bundle_encoding:
+        analyzer.analyze_bundle_encoding(args.bundle_encoding, fetch_block_bytes=args.fetch_block)
+    
+    if args.icache:
+        size_bytes, line_bytes, associativity = (int(x, 0) for x in args.icache.split(','))
+        analyzer.simulate_icache(
+            size_bytes, line_bytes, associativity,
+            miss_penalty=args.miss_penalty,
+            trace_path=args.icache_trace,
+            encoding_scheme=args.bundle_encoding
+        )
+
+
+def run_check(analyzer: VLIWAnalyzer, args) -> int:
+    """
+    包合法性检查模式：只解析并检查原始包，存在违例时返回 1
+    """
+    if args.format in ('ndjson', 'csv'):
+        out = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+        try:
+            record_writer = create_record_writer(args.format, out)
+            analyzer.check_legality(record_writer=record_writer)
+            record_writer.write_summary({
+                'file': analyzer.filename,
+                'legality': analyzer.all_stats['legality']
+            })
+        finally:
+            if args.output:
+                out.close()
+    else:
+        violations = analyzer.check_legality()
+        if args.format == 'json':
+            report = json.dumps({
+                'file': analyzer.filename,
+                'legality': analyzer.all_stats['legality'],
+                'violations': [analyzer.violation_record(v) for v in violations]
+            }, ensure_ascii=False, indent=2)
+        else:
+            report = analyzer.stats_collector.generate_legality_report(
+                analyzer.all_stats['legality'], violations
+            )
+        
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(report)
+        else:
+            print(report)
+    
+    return 0 if analyzer.all_stats['legality']['legal'] else 1
+
+
+def run_diff(args) -> int:
+    """
+    构建对比模式：以 --diff 指定的文件为基准，输出输入文件中各函数的变化
+    """
+    diff = diff_files(args.diff, args.input_file, fast_parse=args.fast_parse)
+    
+    if args.format in ('ndjson', 'csv'):
+        out = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+        try:
+            record_writer = create_record_writer(args.format, out)
+            for row in diff['functions']:
+                record_writer.write_diff(diff_record(row))
+            record_writer.write_summary({
+                'old_file': diff['old_file'],
+                'new_file': diff['new_file'],
+                'status_counts': diff['status_counts'],
+                'totals': diff['totals']
+            })
+        finally:
+            if args.output:
+                out.close()
+        return 0
+    
+    if args.format == 'json':
+        report = json.dumps(diff, ensure_ascii=False, indent=2)
+    else:
+        report = StatisticsCollector().generate_diff_report(diff)
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(report)
+    else:
+        print(report)
+    return 0
 
 
 def main():
@@ -27,12 +163,25 @@ def main():
   python main.py ../VLIW_PACK/FFT/build/FFT-riscv32.txt
   python main.py FFT-riscv32.txt --output report.txt
   python main.py FFT-riscv32.txt --verbose
+  python main.py FFT-riscv32.txt --format ndjson --output result.ndjson
+  python main.py FFT-riscv32.txt --check
+  python main.py FFT-riscv32.txt --chain-depths
+  python main.py FFT-riscv32.txt --drop-bypass WB:*:*
+  python main.py FFT-riscv32.txt --verify
+  python main.py FFT-riscv32.txt --search 200 --jobs 0
+  python main.py FFT-riscv32.txt --strategies greedy,search
+  python main.py FFT-riscv32.txt --unroll 2,4
+  python main.py FFT-riscv32.txt --static-profile
+  python main.py new/FFT-riscv32.txt --diff old/FFT-riscv32.txt
+  python main.py FFT-riscv32.txt.xz
+  python main.py huge-riscv32.txt.xz --stream --format json
+  riscv32-unknown-elf-objdump -d prog | python main.py -
         """
     )
     
     parser.add_argument(
         'input_file',
-        help='反汇编文件路径'
+        help="反汇编文件路径（'-' 读取标准输入；.gz / .bz2 / .xz 自动解压）"
     )
     
     parser.add_argument(
@@ -41,6 +190,13 @@ def main():
         default=None
     )
     
+    parser.add_argument(
+        '--format', '-f',
+        help='报告格式：text 为文本报告，json 为汇总 JSON，ndjson/csv 为逐包/逐函数流式记录（默认：text）',
+        choices=['text', 'json', 'ndjson', 'csv'],
+        default='text'
+    )
+    
     parser.add_argument(
         '--verbose', '-v',
         help='显示详细输出（包括指令类型分布）',
@@ -53,31 +209,263 @@ def main():
         default=None
     )
     
+    parser.add_argument(
+        '--bundle-encoding',
+        help='评估变长包编码方案下的代码大小与取指带宽',
+        choices=['stop_bit', 'length_header', 'slot_mask'],
+        default=None
+    )
+    
+    parser.add_argument(
+        '--fetch-block',
+        help='取指块大小（字节，默认：32）',
+        type=int,
+        default=32
+    )
+    
+    parser.add_argument(
+        '--icache',
+        help='模拟 I-Cache，格式：容量,行大小,相联度（字节），如 8192,64,2',
+        default=None
+    )
+    
+    parser.add_argument(
+        '--icache-trace',
+        help='I-Cache 模拟使用的取包 PC 序列文件（每行一个十六进制 PC，默认按静态布局）',
+        default=None
+    )
+    
+    parser.add_argument(
+        '--miss-penalty',
+        help='I-Cache 每次缺失的停顿周期数（默认：10）',
+        type=int,
+        default=10
+    )
+    
+    parser.add_argument(
+        '--export-image',
+        help='导出重排并重定位后的内存镜像路径（.hex 为文本格式，其余为小端二进制）',
+        default=None
+    )
+    
+    parser.add_argument(
+        '--image-base',
+        help='重定位镜像的起始地址（默认：0x80000000）',
+        type=lambda x: int(x, 0),
+        default=0x80000000
+    )
+    
+    parser.add_argument(
+        '--allow-misaligned',
+        help='跳转目标不在包起始位置或包跨越基本块时仍然导出镜像（默认拒绝导出）',
+        action='store_true'
+    )
+    
+    parser.add_argument(
+        '--jobs', '-j',
+        help='并行解析大文件与 --search 并行搜索的进程数（默认：1 串行；0 表示使用全部 CPU）',
+        type=int,
+        default=1
+    )
+    
+    parser.add_argument(
+        '--fast-parse',
+        help='使用 mmap + 字节正则的快速解析模式（结果与默认解析一致；解析约快 1.9 倍，端到端约 1.2 倍）',
+        action='store_true'
+    )
+    
+    parser.add_argument(
+        '--check',
+        help='检查原始包的合法性（包内依赖、写冲突、槽位类别），存在违例时退出码为 1',
+        action='store_true'
+    )
+    
+    parser.add_argument(
+        '--diff',
+        metavar='BASE',
+        help='与基准构建 BASE 的反汇编对比，按函数输出包数、密度、估算停顿与一层依赖合并的变化',
+        default=None
+    )
+    
+    parser.add_argument(
+        '--chain-depths',
+        metavar='DEPTHS',
+        help='对比不同最大包内前递链深度下的包数与估算周期，逗号分隔（不带参数时为 0,1,2,3）',
+        type=lambda x: [int(d) for d in x.split(',')],
+        nargs='?',
+        const=list(FORWARDING_DEPTH_SWEEP),
+        default=None
+    )
+    
+    parser.add_argument(
+        '--drop-bypass',
+        metavar='STAGE:PRODUCERS:CONSUMERS',
+        help="旁路拓扑 what-if：删除旁路路径后对比包数与估算周期，槽位为编号、范围或 '*'（可重复）",
+        type=parse_bypass_spec,
+        action='append',
+        default=[]
+    )
+    
+    parser.add_argument(
+        '--add-bypass',
+        metavar='STAGE:PRODUCERS:CONSUMERS',
+        help='旁路拓扑 what-if：增加旁路路径，如 EX2:0:*（可重复，可与 --drop-bypass 组合）',
+        type=parse_bypass_spec,
+        action='append',
+        default=[]
+    )
+    
+    parser.add_argument(
+        '--verify',
+        metavar='LANES',
+        help=f'在随机初始状态上逐基本块检查重打包结果与原始代码等价，不等价时退出码为 1（需要 NumPy，默认 {EQUIVALENCE_LANES} 组状态）',
+        type=int,
+        nargs='?',
+        const=EQUIVALENCE_LANES,
+        default=None
+    )
+    
+    parser.add_argument(
+        '--search',
+        metavar='MS',
+        help=f'逐基本块以束搜索与模拟退火重打包，与逐块贪心打包对比（每块预算 MS 毫秒，默认 {SEARCH_BLOCK_BUDGET_MS}；超出预算退回贪心，可用 --jobs 并行）',
+        type=float,
+        nargs='?',
+        const=SEARCH_BLOCK_BUDGET_MS,
+        default=None
+    )
+    
+    parser.add_argument(
+        '--strategies',
+        metavar='NAMES',
+        help=f"在同一份解析结果上并行运行多个打包策略，对比包数、估算周期与用时，逗号分隔（不带参数时为全部：{','.join(PACKING_STRATEGIES)}）",
+        type=parse_strategies,
+        nargs='?',
+        const=list(PACKING_STRATEGIES),
+        default=None
+    )
+    
+    parser.add_argument(
+        '--strategy-memory',
+        help='对比打包策略时另运行一次各策略，测量内存峰值（使策略用时加倍）',
+        action='store_true'
+    )
+    
+    parser.add_argument(
+        '--unroll',
+        metavar='FACTORS',
+        help=f"循环展开 what-if：虚拟展开最内层循环并重命名局部寄存器后重新打包，给出每次原始迭代的包数，逗号分隔（不带参数时为 {','.join(str(n) for n in UNROLL_FACTORS)}）",
+        type=lambda x: [int(n) for n in x.split(',')],
+        nargs='?',
+        const=list(UNROLL_FACTORS),
+        default=None
+    )
+    
+    parser.add_argument(
+        '--static-profile',
+        help='由控制流图的循环嵌套静态估算各基本块的执行频率（10^深度，或由 addi / 分支归纳模式推断的迭代次数），给出按频率加权的密度、包数减少与停顿',
+        action='store_true'
+    )
+    
+    parser.add_argument(
+        '--stream',
+        help='流式分析：边解析边统计与重打包，内存占用与输入大小无关（不支持导出与附加分析）',
+        action='store_true'
+    )
+    
     args = parser.parse_args()
+    if args.stream:
+        conflicts = [
+            option for option, value in (
+                ('--check', args.check), ('--diff', args.diff),
+                ('--export-asm', args.export_asm), ('--export-image', args.export_image),
+                ('--icache', args.icache), ('--bundle-encoding', args.bundle_encoding),
+                ('--drop-bypass', args.drop_bypass), ('--add-bypass', args.add_bypass),
+                ('--verify', args.verify is not None), ('--search', args.search is not None),
+                ('--strategies', args.strategies), ('--unroll', args.unroll is not None),
+                ('--static-profile', args.static_profile)
+            ) if value
+        ]
+        if conflicts:
+            parser.error(f"--stream 不能与 {' / '.join(conflicts)} 同时使用")
     
-    # 检查输入文件是否存在
-    if not os.path.exists(args.input_file):
-        print(f"错误：文件不存在: {args.input_file}", file=sys.stderr)
-        return 1
+    # 检查输入文件是否存在（'-' 为标准输入）
+    for path in (args.input_file, args.diff):
+        if path is not None and path != STDIN_PATH and not os.path.exists(path):
+            print(f"错误：文件不存在: {path}", file=sys.stderr)
+            return 1
     
     try:
+        if args.diff:
+            return run_diff(args)
+        
+        # 机器可读格式输出到标准输出时，进度信息改走标准错误
+        machine_readable = args.format != 'text'
+        log_file = sys.stderr if machine_readable and not args.output else sys.stdout
+        
         # 创建分析器
-        analyzer = VLIWAnalyzer(args.input_file)
+        analyzer = VLIWAnalyzer(
+            args.input_file,
+            log_file=log_file,
+            parse_jobs=args.jobs,
+            fast_parse=args.fast_parse
+        )
         
-        # 运行分析
-        analyzer.run_full_analysis()
+        if args.check:
+            return run_check(analyzer, args)
         
-        # 生成报告
-        if args.output:
-            analyzer.save_report(args.output, verbose=args.verbose)
+        if args.format in ('ndjson', 'csv'):
+            # 流式输出：分析过程中逐条写出记录
+            out = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+            try:
+                record_writer = create_record_writer(args.format, out)
+                if args.stream:
+                    analyzer.run_streaming_analysis(args.chain_depths, record_writer=record_writer)
+                else:
+                    analyzer.run_full_analysis(record_writer=record_writer)
+                run_optional_analyses(analyzer, args)
+                record_writer.write_summary(analyzer.summary_record())
+            finally:
+                if args.output:
+                    out.close()
         else:
-            report = analyzer.generate_report(verbose=args.verbose)
-            print(report)
+            # 运行分析
+            if args.stream:
+                analyzer.run_streaming_analysis(args.chain_depths)
+            else:
+                analyzer.run_full_analysis()
+            run_optional_analyses(analyzer, args)
+            
+            if args.format == 'json':
+                report = json.dumps(analyzer.summary_record(), ensure_ascii=False, indent=2)
+                if args.output:
+                    with open(args.output, 'w', encoding='utf-8') as f:
+                        f.write(report)
+                else:
+                    print(report)
+            # 生成报告
+            elif args.output:
+                analyzer.save_report(args.output, verbose=args.verbose)
+            else:
+                report = analyzer.generate_report(verbose=args.verbose)
+                print(report)
         
         # 导出重排后的反汇编
         if args.export_asm:
             analyzer.export_reordered_asm(args.export_asm)
         
+        # 导出重定位镜像
+        if args.export_image:
+            try:
+                analyzer.export_relocated_image(
+                    args.export_image, base_address=args.image_base, allow_misaligned=args.allow_misaligned
+                )
+            except ValueError as e:
+                print(f"错误：{e}", file=sys.stderr)
+                return 1
+        
+        if args.verify is not None and not analyzer.all_stats['equivalence']['equivalent']:
+            return 1
         return 0
     
     except Exception as e:
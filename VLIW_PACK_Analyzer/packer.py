@@ -1,30 +1,373 @@
 """
-VLIW 重打包算法：允许一层依赖的贪心打包
+VLIW 重打包算法：允许包内前递链的贪心打包
 """
 
-from typing import List, Dict, Set
+import heapq
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 from instruction import Instruction, VLIWPackage
-from dependency import DependencyAnalyzer
-from config import VLIW_PACKAGE_SIZE
+from encoding import control_target
+from timing import StallEstimator
+from machine import MachineDescription, default_machine, format_paths
+from config import (
+    NUM_ARCH_REGS, FORWARDING_LEVELS, FORWARDING_CHAIN_DEPTH, FORWARDING_DEPTH_SWEEP
+)
+
+NO_TARGETS = frozenset()
+
+# 访存类别：同一包内的两条访存指令只要有一条是存储，就保持程序顺序
+MEMORY_LOAD = 1
+MEMORY_STORE = 2
+MEMORY_ACCESS = {'LOAD': MEMORY_LOAD, 'STORE': MEMORY_STORE}
+
+
+class ForwardingModel:
+    """
+    包内前递链模型
+    
+    包内每条指令有一个链深：不读取包内结果的指令为 0，否则为其包内生产者链深的
+    最大值 + 1。第 L 级前递（链深 L-1 → L）只允许 levels[L-1] 中的生产者 / 消费者
+    类型，链深不能超过 max_depth。默认模型（深度 1）即一层依赖。
+    """
+    
+    def __init__(self, max_depth: int = FORWARDING_CHAIN_DEPTH, levels: Sequence = FORWARDING_LEVELS):
+        """
+        Args:
+            max_depth: 包内前递链的最大深度（0 表示包内不允许写后读）
+            levels: 每级允许的 (生产者类型集合, 消费者类型集合)，超出的级别沿用最后一级
+        """
+        if max_depth < 0:
+            raise ValueError(f"前递链深度不能为负数: {max_depth}")
+        if max_depth and not levels:
+            raise ValueError("前递链深度大于 0 时至少需要一级前递规则")
+        self.max_depth = max_depth
+        self.levels = [
+            (frozenset(producers), frozenset(consumers))
+            for producers, consumers in levels
+        ]
+    
+    def targets(self, depth: int, producer_type: str) -> frozenset:
+        """
+        链深为 depth 的生产者可以在包内前递给的消费者类型
+        
+        Args:
+            depth: 生产者的链深
+            producer_type: 生产者的指令类型
+        
+        Returns:
+            消费者类型集合（不能前递时为空）
+        """
+        if depth >= self.max_depth:
+            return NO_TARGETS
+        producers, consumers = self.levels[min(depth, len(self.levels) - 1)]
+        return consumers if producer_type in producers else NO_TARGETS
+
+
+class OnlinePacker:
+    """
+    流式的包内前递链贪心打包：逐条输入有效指令，包不会再变化时立即输出
+    
+    贪心打包中当前包始终是程序顺序上的连续区间，指令能否加入只取决于
+    其源寄存器的最近写入者是否在当前包内，以及这些写入者的链深与类型。
+    因此只需保留当前未封闭的包（至多 8 条指令）与逐寄存器的写入者状态，
+    内存占用与输入规模无关：
+    
+    - open_writes：最近写入者位于当前包内的寄存器
+    - depth[r] / targets[r]：寄存器 r 包内写入者的链深与可前递的消费者类型，
+      每条 RAW 边 O(1) 判断
+    - entries / slots：包内指令的槽位约束与当前的槽位分配（见 MachineDescription.assign_slots），
+      指令只有在加入后仍能分配到合法槽位时才能加入
+    
+    包不跨越基本块：控制转移指令加入后当前包即封闭（程序顺序在后的指令不能与分支同包，
+    否则分支成立时它们也会执行），分支 / 跳转目标总是开始一个新包。向前的目标在输入
+    分支时记录；向后的目标需要预先通过 block_starts 给出（见 branch_targets）。
+    """
+    
+    def __init__(
+        self,
+        model: ForwardingModel = None,
+        machine: MachineDescription = None,
+        block_starts: Iterable[int] = ()
+    ):
+        """
+        Args:
+            model: 包内前递链模型（默认一层依赖）
+            machine: 机器描述（槽位能力与包内旁路，默认 default_machine()）
+            block_starts: 必须开始新包的地址（分支 / 跳转目标，目标为填充指令时对其后
+                          第一条有效指令生效）
+        """
+        self.model = model or ForwardingModel()
+        self.machine = machine or default_machine()
+        self.current = None  # 当前未封闭的包
+        self.open_writes = 0
+        self.depth = [0] * NUM_ARCH_REGS
+        self.targets = [NO_TARGETS] * NUM_ARCH_REGS
+        self.writer = [0] * NUM_ARCH_REGS  # 寄存器包内写入者在包中的序号
+        self.members = []  # 包内指令的 (读掩码, 写掩码, 访存类别)
+        self.entries = ()
+        self.slots = ()
+        self.sealed = False  # 当前包以控制转移指令结束，不能再加入指令
+        self.block_starts = list(block_starts)
+        heapq.heapify(self.block_starts)
+        self.merged_pairs = 0  # 读取包内结果而合并到同一包的指令数
+        self.emitted = 0  # 已输出的包数
+    
+    def push(self, inst: Instruction) -> Optional[VLIWPackage]:
+        """
+        输入一条有效指令
+        
+        Args:
+            inst: 有效（非填充）指令，按程序顺序输入
+        
+        Returns:
+            因本条指令而确定的包（没有则为 None）
+        """
+        finished = None
+        reads = inst.reads
+        writes = inst.writes
+        inst_type = inst.inst_type
+        pending = reads & self.open_writes
+        memory = MEMORY_ACCESS.get(inst_type, 0)
+        slot_mask = self.machine.slot_mask(inst)
+        
+        # 分支目标开始新的基本块
+        starts_block = False
+        while self.block_starts and self.block_starts[0] <= inst.address:
+            heapq.heappop(self.block_starts)
+            starts_block = True
+        
+        # RAW 依赖在当前包内：每个包内生产者都能前递给本指令时才能加入，
+        # 本指令的链深为生产者链深的最大值 + 1
+        depth = 0
+        producers = 0
+        while pending:
+            low = pending & -pending
+            reg = low.bit_length() - 1
+            if inst_type not in self.targets[reg]:
+                depth = -1
+                break
+            depth = max(depth, self.depth[reg] + 1)
+            producers |= 1 << self.writer[reg]
+            pending ^= low
+        
+        # 加入后整个包仍须能分配到合法槽位
+        slots = None
+        if self.current is not None and depth >= 0 and not self.sealed and not starts_block:
+            entry = (slot_mask, self._ordered_before(reads, writes, memory), producers)
+            slots = self.machine.assign_slots(self.entries + (entry,), self.slots)
+        
+        if slots is None:
+            finished = self._close()
+            self.current = VLIWPackage(inst.address)
+            entry = (slot_mask, 0, 0)
+            slots = self.machine.assign_slots((entry,))
+            if slots is None:
+                raise ValueError(f"指令 {inst.mnemonic} 没有可用的槽位")
+            depth = 0
+        elif depth:
+            self.merged_pairs += 1
+        
+        self.entries += (entry,)
+        self.slots = slots
+        index = len(self.members)
+        self.members.append((reads, writes, memory))
+        self.current.add_instruction(inst)
+        if writes:
+            self.open_writes |= writes
+            targets = self.model.targets(depth, inst_type)
+            mask = writes
+            while mask:
+                low = mask & -mask
+                reg = low.bit_length() - 1
+                self.depth[reg] = depth
+                self.targets[reg] = targets
+                self.writer[reg] = index
+                mask ^= low
+        
+        # 满包不会再变化，立即输出（新开的包只有一条指令，不会与上面的封闭同时发生）；
+        # 控制转移指令所在的包不再加入指令，在下一条指令到来或输入结束时输出
+        if inst_type == 'BRANCH':
+            self.sealed = True
+            target = control_target(int(inst.hex_code, 16), inst.address)
+            if target is not None and target > inst.address:
+                heapq.heappush(self.block_starts, target)
+        if self.current.is_full:
+            finished = self._close()
+        
+        if finished is not None:
+            self.emitted += 1
+        return finished
+    
+    def _ordered_before(self, reads: int, writes: int, memory: int) -> int:
+        """包内与新指令存在 RAW / WAR / WAW 或访存顺序依赖、须位于其前的指令掩码"""
+        touched = reads | writes
+        before = 0
+        for index, (other_reads, other_writes, other_memory) in enumerate(self.members):
+            if (
+                other_writes & touched or other_reads & writes
+                or (memory and other_memory and (memory | other_memory) & MEMORY_STORE)
+            ):
+                before |= 1 << index
+        return before
+    
+    def _close(self) -> Optional[VLIWPackage]:
+        """封闭当前包（记录其槽位分配），返回该包（没有则为 None）"""
+        finished = self.current
+        if finished is not None:
+            finished.slots = list(self.slots)
+        self.current = None
+        self.open_writes = 0
+        self.members = []
+        self.entries = ()
+        self.slots = ()
+        self.sealed = False
+        return finished
+    
+    def flush(self) -> Optional[VLIWPackage]:
+        """输入结束：输出最后一个未封闭的包（没有则为 None）"""
+        finished = self._close()
+        if finished is not None:
+            self.emitted += 1
+        return finished
+    
+    def feed(self, instructions: Iterable[Instruction]) -> Iterator[VLIWPackage]:
+        """
+        依次输入指令（跳过填充指令），产出确定的包，输入结束后产出最后一个包
+        
+        Args:
+            instructions: 按程序顺序的指令（可以是解析器的惰性迭代器）
+        
+        Returns:
+            VLIW 包迭代器
+        """
+        for inst in instructions:
+            if inst.is_nop:
+                continue
+            finished = self.push(inst)
+            if finished is not None:
+                yield finished
+        finished = self.flush()
+        if finished is not None:
+            yield finished
+
+
+def branch_targets(instructions: Iterable[Instruction]) -> List[int]:
+    """
+    条件分支与 jal 的目标地址（供 OnlinePacker 的 block_starts 使用）
+    
+    Args:
+        instructions: 指令序列
+    
+    Returns:
+        目标地址列表
+    """
+    targets = []
+    for inst in instructions:
+        if inst.inst_type == 'BRANCH':
+            target = control_target(int(inst.hex_code, 16), inst.address)
+            if target is not None:
+                targets.append(target)
+    return targets
+
+
+class ForwardingDepthSweep:
+    """
+    前递链深度对比：一次输入，同时按多个最大链深重打包并估算周期
+    
+    每个深度各有一个 OnlinePacker 与一份逐包停顿估算状态，包确定后立即计入，
+    因此与 OnlinePacker 一样可以在流式分析中使用。
+    """
+    
+    def __init__(
+        self,
+        depths: Sequence[int] = FORWARDING_DEPTH_SWEEP,
+        levels: Sequence = FORWARDING_LEVELS,
+        estimator: StallEstimator = None,
+        block_starts: Sequence[int] = ()
+    ):
+        """
+        Args:
+            depths: 要对比的最大链深
+            levels: 每级前递规则（见 ForwardingModel）
+            estimator: 停顿估算器（默认 StallEstimator()），重打包使用同一机器描述
+            block_starts: 必须开始新包的地址（见 OnlinePacker）
+        """
+        estimator = estimator or StallEstimator()
+        self.depths = sorted(set(depths))
+        self.packers = [
+            OnlinePacker(ForwardingModel(depth, levels), estimator.machine, block_starts) for depth in self.depths
+        ]
+        self.timelines = [estimator.timeline() for _ in self.depths]
+    
+    def push(self, inst: Instruction):
+        """输入一条有效指令"""
+        for packer, timeline in zip(self.packers, self.timelines):
+            finished = packer.push(inst)
+            if finished is not None:
+                timeline.add_package(finished)
+    
+    def flush(self):
+        """输入结束：计入各深度最后一个未封闭的包"""
+        for packer, timeline in zip(self.packers, self.timelines):
+            finished = packer.flush()
+            if finished is not None:
+                timeline.add_package(finished)
+    
+    def results(self, original_packages: int, original_cycles: int) -> List[Dict]:
+        """
+        各深度相对原始包的包数与周期收益
+        
+        Args:
+            original_packages: 原始包数
+            original_cycles: 原始包序列的估算周期
+        
+        Returns:
+            按深度升序的 [{'depth', 'packages', 'package_reduction', 'reduction_percentage',
+            'merged_pairs', 'cycles', 'stalls', 'cycle_gain', 'cycle_gain_percentage'}]
+        """
+        rows = []
+        for depth, packer, timeline in zip(self.depths, self.packers, self.timelines):
+            timing = timeline.result()
+            reduction = original_packages - packer.emitted
+            cycle_gain = original_cycles - timing['cycles']
+            rows.append({
+                'depth': depth,
+                'packages': packer.emitted,
+                'package_reduction': reduction,
+                'reduction_percentage': reduction / original_packages * 100 if original_packages else 0,
+                'merged_pairs': packer.merged_pairs,
+                'cycles': timing['cycles'],
+                'stalls': timing['stalls'],
+                'cycle_gain': cycle_gain,
+                'cycle_gain_percentage': cycle_gain / original_cycles * 100 if original_cycles else 0
+            })
+        return rows
 
 
 class VLIWPacker:
     """VLIW 指令重打包优化"""
     
-    def __init__(self):
-        self.dep_analyzer = DependencyAnalyzer()
+    def __init__(self, model: ForwardingModel = None, machine: MachineDescription = None):
+        """
+        Args:
+            model: 包内前递链模型（默认一层依赖）
+            machine: 机器描述（槽位能力与旁路，默认 default_machine()）
+        """
+        self.model = model or ForwardingModel()
+        self.machine = machine or default_machine()
     
     def repack_with_one_level_dependency(
         self,
         original_packages: List[VLIWPackage]
-    ) -> tuple[List[VLIWPackage], Dict]:
+    ) -> Tuple[List[VLIWPackage], Dict]:
         """
-        允许一层依赖的重打包
+        允许包内前递链（默认一层依赖）的重打包
         
-        算法流程：
-        1. 提取所有有效指令（非填充）
-        2. 构建依赖图
-        3. 贪心打包：尽量填满每个包，允许一层依赖
+        按程序顺序贪心打包：尽量填满每个包，包内的 RAW 依赖必须能按前递链模型前递
+        （默认：生产者为单周期 ALU，消费者可参与一层依赖，且生产者本身不读取包内结果），
+        并且包内指令能按机器描述分配到合法槽位（见 MachineDescription.assign_slots），
+        分配结果记录在优化包的 slots 中。WAR / WAW / MEM 依赖不阻止打包，只要求相关指令
+        保持程序顺序的槽位先后：包内后面的槽位写回优先级更高，同包写同一寄存器时
+        结果与程序顺序一致。
         
         Args:
             original_packages: 原始 VLIW 包列表
@@ -32,117 +375,83 @@ class VLIWPacker:
         Returns:
             (优化后的包列表, 统计信息字典)
         """
-        # 1. 提取所有有效指令
-        valid_instructions = []
-        for pkg in original_packages:
-            for inst in pkg.instructions:
-                if not inst.is_nop:
-                    valid_instructions.append(inst)
-        
-        if not valid_instructions:
-            return [], {'merged_pairs': 0}
-        
-        # 2. 构建依赖图
-        dep_graph = self.dep_analyzer.build_dependency_graph(valid_instructions)
-        
-        # 3. 贪心打包
-        optimized_packages = []
-        current_package = VLIWPackage(valid_instructions[0].address if valid_instructions else 0)
-        current_package_indices = []  # 当前包中的指令索引
-        merged_pairs_count = 0
-        
-        for i, inst in enumerate(valid_instructions):
-            # 检查是否可以加入当前包
-            can_add = self._can_add_to_package(
-                i, inst, dep_graph, set(range(i)), current_package_indices, valid_instructions
-            )
-            
-            if can_add and not current_package.is_full:
-                # 加入当前包
-                current_package.add_instruction(inst)
-                current_package_indices.append(i)
-                
-                # 检查是否形成了一层依赖
-                for dep_idx in dep_graph.get(i, set()):
-                    if dep_idx in current_package_indices:
-                        producer = valid_instructions[dep_idx]
-                        if self.dep_analyzer.can_form_one_level_dependency(producer, inst):
-                            merged_pairs_count += 1
-                            break
-            else:
-                # 当前包已满或不能加入，创建新包
-                if current_package.instructions:
-                    optimized_packages.append(current_package)
-                current_package = VLIWPackage(inst.address)
-                current_package_indices = [i]
-                current_package.add_instruction(inst)
-        
-        # 添加最后一个包
-        if current_package.instructions:
-            optimized_packages.append(current_package)
-        
-        stats = {
-            'merged_pairs': merged_pairs_count
-        }
-        
-        return optimized_packages, stats
+        instructions = [inst for pkg in original_packages for inst in pkg.instructions]
+        packer = OnlinePacker(self.model, self.machine, branch_targets(instructions))
+        optimized_packages = list(packer.feed(instructions))
+        return optimized_packages, {'merged_pairs': packer.merged_pairs}
     
-    def _can_add_to_package(
+    def compare_forwarding_depths(
         self,
-        inst_idx: int,
-        inst: Instruction,
-        dep_graph: Dict[int, Set[int]],
-        packed_indices: Set[int],
-        current_package_indices: List[int],
-        all_instructions: List[Instruction]
-    ) -> bool:
-        """
-        检查指令是否可以加入当前包
-        
-        条件：
-        1. 无依赖 → 可加入
-        2. 依赖已在前面的包中（已打包） → 可加入
-        3. 依赖在当前包中且形成一层依赖 → 可加入
-        4. 否则 → 不可加入
+        original_packages: List[VLIWPackage],
+        depths: Sequence[int] = FORWARDING_DEPTH_SWEEP
+    ) -> Dict:
+        """
+        对比不同最大前递链深度下的包数与估算周期
         
         Args:
-            inst_idx: 指令索引
-            inst: 指令对象
-            dep_graph: 依赖图
-            packed_indices: 已打包的指令索引集合
-            current_package_indices: 当前包中的指令索引列表
-            all_instructions: 所有指令列表
+            original_packages: 原始 VLIW 包列表
+            depths: 要对比的最大链深
             
         Returns:
-            是否可以加入
+            {'original_packages', 'original_cycles', 'depths': ForwardingDepthSweep.results()}
+        """
+        instructions = [inst for pkg in original_packages for inst in pkg.instructions if not inst.is_nop]
+        estimator = StallEstimator(machine=self.machine)
+        sweep = ForwardingDepthSweep(depths, self.model.levels, estimator, branch_targets(instructions))
+        for inst in instructions:
+            sweep.push(inst)
+        sweep.flush()
+        
+        original_cycles = estimator.estimate(original_packages)['cycles']
+        return {
+            'original_packages': len(original_packages),
+            'original_cycles': original_cycles,
+            'depths': sweep.results(len(original_packages), original_cycles)
+        }
+    
+    def compare_bypass(
+        self,
+        original_packages: List[VLIWPackage],
+        machine: MachineDescription
+    ) -> Dict:
         """
-        dependencies = dep_graph.get(inst_idx, set())
+        对比当前机器描述与修改旁路拓扑后的机器描述下的包数与估算周期
         
-        # 情况 1：无依赖
-        if not dependencies:
-            return True
+        两种机器描述下分别重打包（槽位分配不同）并估算原始代码与重打包代码的周期。
         
-        # 检查每个依赖
-        for dep_idx in dependencies:
-            # 情况 2：依赖已在前面的包中
-            if dep_idx in packed_indices and dep_idx not in current_package_indices:
-                continue
-            
-            # 情况 3：依赖在当前包中
-            if dep_idx in current_package_indices:
-                producer = all_instructions[dep_idx]
-                # 检查是否形成一层依赖
-                if self.dep_analyzer.can_form_one_level_dependency(producer, inst):
-                    continue
-                else:
-                    # 依赖在当前包但不是一层依赖，不能加入
-                    return False
+        Args:
+            original_packages: 原始 VLIW 包列表
+            machine: 修改旁路路径后的机器描述（通常由 self.machine.with_paths 得到）
             
-            # 依赖还未打包，不能加入
-            if dep_idx not in packed_indices:
-                return False
+        Returns:
+            {'added': 增加的路径, 'dropped': 删除的路径（格式见 format_paths）,
+             'baseline', 'modified', 'delta'}，
+            baseline / modified 为 {'original_cycles', 'original_stalls', 'packages',
+            'merged_pairs', 'cycles', 'stalls'}，delta 为 modified - baseline
+        """
+        def evaluate(target: MachineDescription) -> Dict:
+            estimator = StallEstimator(machine=target)
+            original = estimator.estimate(original_packages)
+            repacked, stats = VLIWPacker(self.model, target).repack_with_one_level_dependency(original_packages)
+            timing = estimator.estimate(repacked)
+            return {
+                'original_cycles': original['cycles'],
+                'original_stalls': original['stalls'],
+                'packages': len(repacked),
+                'merged_pairs': stats['merged_pairs'],
+                'cycles': timing['cycles'],
+                'stalls': timing['stalls']
+            }
         
-        return True
+        baseline = evaluate(self.machine)
+        modified = evaluate(machine)
+        return {
+            'added': format_paths(machine.paths - self.machine.paths),
+            'dropped': format_paths(self.machine.paths - machine.paths),
+            'baseline': baseline,
+            'modified': modified,
+            'delta': {key: modified[key] - baseline[key] for key in baseline}
+        }
     
     def calculate_package_reduction(
         self,
@@ -2,10 +2,70 @@
 反汇编文件解析器：解析 objdump 格式的 RISC-V 反汇编文件
 """
 
+import bz2
+import gzip
+import io
+import lzma
+import mmap
+import os
 import re
-from typing import List
-from instruction import Instruction, VLIWPackage
-from config import VLIW_PACKAGE_SIZE
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, Iterable, Iterator, List, Optional, Tuple
+from instruction import Instruction, VLIWPackage, decode_instruction
+from config import VLIW_PACKAGE_SIZE, PARALLEL_PARSE_MIN_BYTES, PARALLEL_PARSE_CHUNKS_PER_JOB
+from config import STREAM_READ_BLOCK_SIZE
+
+# 一条指令行解析出的原始字段：(地址, 编码, 助记符, 操作数)
+InstructionFields = Tuple[int, str, str, str]
+
+# 快速解析模式：一次 finditer 扫描整个字节缓冲区，同时匹配指令行与函数标记行
+# 分组：1 地址 / 2 指令行地址之后的全部内容（编码 助记符 操作数）/ 3 函数名
+FAST_LINE_PATTERN = re.compile(
+    rb'^[ \t]*([0-9a-fA-F]+)(?:'
+    rb':[ \t]+([0-9a-fA-F]+[ \t]+[^ \t\r\n][^\r\n]*)'
+    rb'|[ \t]+<([^\r\n]+)>:[ \t]*\r?$)',
+    re.MULTILINE
+)
+
+
+# 标准输入的路径写法
+STDIN_PATH = '-'
+
+# 按扩展名透明解压的输入格式
+COMPRESSED_OPENERS = {
+    '.gz': gzip.open,
+    '.bz2': bz2.open,
+    '.xz': lzma.open,
+    '.lzma': lzma.open,
+}
+
+
+def is_stream_input(filepath: str) -> bool:
+    """是否为只能顺序读取的输入（标准输入或压缩文件）"""
+    return filepath == STDIN_PATH or os.path.splitext(filepath)[1].lower() in COMPRESSED_OPENERS
+
+
+def open_binary_input(filepath: str) -> IO[bytes]:
+    """
+    以二进制流打开输入：'-' 为标准输入，.gz / .bz2 / .xz 边读边解压
+    
+    Args:
+        filepath: 输入路径
+        
+    Returns:
+        二进制输入流（标准输入不会被关闭）
+    """
+    if filepath == STDIN_PATH:
+        return open(sys.stdin.fileno(), 'rb', closefd=False)
+    opener = COMPRESSED_OPENERS.get(os.path.splitext(filepath)[1].lower(), open)
+    return opener(filepath, 'rb')
+
+
+def open_text_input(filepath: str) -> IO[str]:
+    """以 UTF-8 文本流打开输入（通用换行，与直接打开文件一致）"""
+    return io.TextIOWrapper(open_binary_input(filepath), encoding='utf-8')
 
 
 class DisassemblyParser:
@@ -19,29 +79,149 @@ class DisassemblyParser:
             r'^([0-9a-f]+):\s+([0-9a-f]+)\s+(.+)$',
             re.IGNORECASE
         )
+        # 函数标记行正则表达式
+        # 格式：80000000 <_start>:
+        self.label_pattern = re.compile(r'^([0-9a-f]+)\s+<(.+)>:$', re.IGNORECASE)
+        
+        # 最近一次解析得到的函数符号表 [(起始地址, 函数名), ...]
+        self.symbols: List[Tuple[int, str]] = []
     
-    def parse_file(self, filepath: str) -> List[VLIWPackage]:
+    def parse_file(self, filepath: str, jobs: int = 1, fast: bool = False) -> List[VLIWPackage]:
         """
         解析整个文件，返回 VLIW 包列表
         
         Args:
-            filepath: 反汇编文件路径
+            filepath: 反汇编文件路径；'-' 表示标准输入，
+                      .gz / .bz2 / .xz 文件边读边解压（均按流式串行解析）
+            jobs: 并行解析的进程数（1 为串行；0 表示使用全部 CPU）。
+                  文件小于 PARALLEL_PARSE_MIN_BYTES 时始终串行解析
+            fast: 使用 mmap + 字节正则的快速解析模式
             
         Returns:
             VLIW 包列表
         """
-        instructions = []
+        if jobs == 0:
+            jobs = os.cpu_count() or 1
         
-        with open(filepath, 'r', encoding='utf-8') as f:
-            for line in f:
-                inst = self.parse_instruction(line)
-                if inst:
-                    instructions.append(inst)
+        if is_stream_input(filepath):
+            if fast:
+                with open_binary_input(filepath) as f:
+                    return self._parse_stream_fast(f)
+            else:
+                with open_text_input(filepath) as f:
+                    instructions = list(self.iter_instructions(f))
+        elif jobs > 1 and os.path.getsize(filepath) >= PARALLEL_PARSE_MIN_BYTES:
+            # 包边界直接在各区间的紧凑结果上划分，不经过指令列表
+            return self._parse_parallel(filepath, jobs, fast)
+        elif fast:
+            return self._parse_mmap(filepath)
+        else:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                instructions = list(self.iter_instructions(f))
         
         # 识别 VLIW 包边界
         packages = self.identify_packages(instructions)
         return packages
     
+    def iter_instructions(self, lines: Iterable[str]) -> Iterator[Instruction]:
+        """
+        逐行解析，依次产出指令（函数标记行记录到符号表）
+        
+        Args:
+            lines: 反汇编文本行
+            
+        Returns:
+            Instruction 迭代器
+        """
+        self.symbols = []
+        for line in lines:
+            fields = self.parse_fields(line)
+            if fields:
+                yield Instruction(*fields)
+            else:
+                self.parse_label(line)
+    
+    def _parse_mmap(self, filepath: str) -> List[VLIWPackage]:
+        """
+        快速解析：mmap 整个文件，用 FAST_LINE_PATTERN 一次扫描全部行
+        
+        扫描结果保持为紧凑数组，直接在其上划分包边界；指令对象在第一次访问时才创建。
+        
+        Args:
+            filepath: 反汇编文件路径
+            
+        Returns:
+            VLIW 包列表
+        """
+        self.symbols = []
+        with open(filepath, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                block, self.symbols = scan_buffer(buffer)
+        return build_packages([block])
+    
+    def _parse_stream_fast(self, stream: IO[bytes]) -> List[VLIWPackage]:
+        """
+        快速解析顺序读取的二进制流：按块读取，在最后一个换行处截断，
+        用 FAST_LINE_PATTERN 扫描每个整行块
+        
+        Args:
+            stream: 二进制输入流
+            
+        Returns:
+            VLIW 包列表
+        """
+        blocks = []
+        self.symbols = []
+        pending = b''
+        
+        while True:
+            data = stream.read(STREAM_READ_BLOCK_SIZE)
+            if not data:
+                break
+            data = pending + data
+            cut = data.rfind(b'\n') + 1
+            pending = data[cut:]
+            block, symbols = scan_buffer(data[:cut])
+            blocks.append(block)
+            self.symbols.extend(symbols)
+        
+        if pending:
+            block, symbols = scan_buffer(pending)
+            blocks.append(block)
+            self.symbols.extend(symbols)
+        
+        return build_packages(blocks)
+    
+    def _parse_parallel(self, filepath: str, jobs: int, fast: bool = False) -> List[VLIWPackage]:
+        """
+        按换行对齐的字节区间切分文件，在进程池中并行解析各区间，
+        再按文件顺序划分包（与串行解析结果完全一致）
+        
+        父进程只按各区间的指令数与填充标记划分包边界，不逐条创建指令对象；
+        每个区间的指令在其中某个包第一次访问 instructions 时才整块创建。
+        
+        Args:
+            filepath: 反汇编文件路径
+            jobs: 进程数
+            fast: 各区间使用字节正则快速扫描
+            
+        Returns:
+            VLIW 包列表
+        """
+        ranges = split_line_ranges(filepath, jobs * PARALLEL_PARSE_CHUNKS_PER_JOB)
+        self.symbols = []
+        
+        def blocks(pool):
+            tasks = [(filepath, start, end, fast) for start, end in ranges]
+            for addresses, keys, key_ids, nops, symbols in pool.map(_parse_chunk, tasks):
+                self.symbols.extend(symbols)
+                yield InstructionBlock(addresses, keys, key_ids, nops)
+        
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            return build_packages(blocks(pool))
+    
     def parse_instruction(self, line: str) -> Instruction:
         """
         解析单行指令
@@ -52,6 +232,19 @@ class DisassemblyParser:
         Returns:
             Instruction 对象，如果不是指令行则返回 None
         """
+        fields = self.parse_fields(line)
+        return Instruction(*fields) if fields else None
+    
+    def parse_fields(self, line: str) -> Optional[InstructionFields]:
+        """
+        解析单行指令的原始字段（不创建 Instruction 对象）
+        
+        Args:
+            line: 反汇编文件中的一行
+            
+        Returns:
+            (地址, 编码, 助记符, 操作数)，如果不是指令行则返回 None
+        """
         line = line.strip()
         
         # 跳过空行和注释
@@ -84,7 +277,48 @@ class DisassemblyParser:
         mnemonic = parts[0]
         operands = parts[1] if len(parts) > 1 else ''
         
-        return Instruction(address, hex_code, mnemonic, operands)
+        return address, hex_code, mnemonic, operands
+    
+    def parse_label(self, line: str) -> Tuple[int, str]:
+        """
+        解析函数标记行，并记录到符号表
+        
+        Args:
+            line: 反汇编文件中的一行
+            
+        Returns:
+            (起始地址, 函数名)，如果不是函数标记行则返回 None
+        """
+        match = self.label_pattern.match(line.strip())
+        if not match:
+            return None
+        
+        symbol = (int(match.group(1), 16), match.group(2))
+        self.symbols.append(symbol)
+        return symbol
+    
+    def iter_packages(self, lines: Iterable[str]) -> Iterator[VLIWPackage]:
+        """
+        逐行解析，每满 8 条指令立即产出一个包（与 identify_packages 的划分一致）
+        
+        产出一个包时，其起始地址之前的函数标记行都已记录到符号表。
+        
+        Args:
+            lines: 反汇编文本行
+            
+        Returns:
+            VLIWPackage 迭代器（最后一个包可能不满）
+        """
+        pkg = None
+        for inst in self.iter_instructions(lines):
+            if pkg is None:
+                pkg = VLIWPackage(inst.address)
+            pkg.add_instruction(inst)
+            if pkg.is_full:
+                yield pkg
+                pkg = None
+        if pkg is not None:
+            yield pkg
     
     def identify_packages(self, instructions: List[Instruction]) -> List[VLIWPackage]:
         """
@@ -126,3 +360,263 @@ class DisassemblyParser:
         """
         return inst.is_nop
 
+
+class InstructionBlock:
+    """
+    一个解析区间的紧凑结果：地址数组 + 去重后的指令键表 + 每条指令的键索引与填充标记
+    
+    Instruction 对象在第一次访问 instructions 时才整块创建。
+    """
+    
+    __slots__ = ('addresses', 'keys', 'key_ids', 'nops', '_instructions')
+    
+    def __init__(self, addresses: array, keys: List[Tuple[str, str, str]], key_ids: array, nops: bytes):
+        self.addresses = addresses
+        self.keys = keys
+        self.key_ids = key_ids
+        self.nops = nops
+        self._instructions: Optional[List[Instruction]] = None
+    
+    def __len__(self) -> int:
+        return len(self.addresses)
+    
+    @property
+    def instructions(self) -> List[Instruction]:
+        """区间内的全部指令（首次访问时创建）"""
+        if self._instructions is None:
+            # 每个不同的编码只查一次译码缓存
+            decoded = [decode_instruction(*key) for key in self.keys]
+            self._instructions = list(map(
+                Instruction.from_decoded, self.addresses, map(decoded.__getitem__, self.key_ids)
+            ))
+        return self._instructions
+
+
+class BlockPackage(VLIWPackage):
+    """
+    由 InstructionBlock 切片得到的包：起始地址与有效指令数在划分时确定，
+    instructions 在第一次访问时才从所在区间取出，之后与普通 VLIWPackage 完全相同
+    """
+    
+    def __init__(self, start_address: int, pieces: List[Tuple[InstructionBlock, int, int]], valid_count: int):
+        self.start_address = start_address
+        self.slots = None
+        self._valid_count = valid_count
+        self._pieces = pieces  # [(区间, 起始下标, 结束下标)]，包可能跨越相邻区间
+    
+    def __getattr__(self, name):
+        # 只有尚未取出的 instructions 会走到这里
+        if name != 'instructions' or '_pieces' not in self.__dict__:
+            raise AttributeError(name)
+        instructions = []
+        for block, lo, hi in self.__dict__.pop('_pieces'):
+            instructions.extend(block.instructions[lo:hi])
+        self.instructions = instructions
+        return instructions
+
+
+def build_packages(blocks: Iterable[InstructionBlock]) -> List[VLIWPackage]:
+    """
+    按文件顺序在各区间的紧凑结果上划分包边界（每 8 条指令一包，与 identify_packages 一致）
+    
+    Args:
+        blocks: 按文件顺序排列的 InstructionBlock
+        
+    Returns:
+        VLIW 包列表（最后一个包可能不满）
+    """
+    packages = []
+    pieces = []
+    count = 0
+    valid = 0
+    start_address = None
+    
+    for block in blocks:
+        size = len(block)
+        lo = 0
+        while lo < size:
+            hi = min(lo + VLIW_PACKAGE_SIZE - count, size)
+            if start_address is None:
+                start_address = block.addresses[lo]
+            pieces.append((block, lo, hi))
+            count += hi - lo
+            valid += hi - lo - block.nops.count(1, lo, hi)
+            lo = hi
+            if count == VLIW_PACKAGE_SIZE:
+                packages.append(BlockPackage(start_address, pieces, valid))
+                pieces = []
+                count = 0
+                valid = 0
+                start_address = None
+    
+    if pieces:
+        packages.append(BlockPackage(start_address, pieces, valid))
+    
+    return packages
+
+
+def split_line_ranges(filepath: str, count: int) -> List[Tuple[int, int]]:
+    """
+    将文件切分为约 count 个字节区间，每个区间的起止位置都对齐到行首
+    
+    Args:
+        filepath: 文件路径
+        count: 期望的区间数
+        
+    Returns:
+        [(起始偏移, 结束偏移), ...]，按文件顺序排列且首尾相接
+    """
+    size = os.path.getsize(filepath)
+    bounds = [0]
+    
+    with open(filepath, 'rb') as f:
+        for k in range(1, count):
+            target = size * k // count
+            if target <= bounds[-1]:
+                continue
+            f.seek(target - 1)
+            f.readline()  # 跳到下一行行首（target 恰为行首时不移动）
+            offset = f.tell()
+            if offset >= size:
+                break
+            if offset > bounds[-1]:
+                bounds.append(offset)
+    
+    bounds.append(size)
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1) if bounds[i] < bounds[i + 1]]
+
+
+def _parse_chunk(task: Tuple[str, int, int, bool]):
+    """
+    进程池任务：解析文件的一个字节区间
+    
+    结果以紧凑形式返回：地址数组 + 去重后的 (编码, 助记符, 操作数) 表 + 每条指令的表索引，
+    重复出现的指令只传输一次字符串。
+    
+    Args:
+        task: (文件路径, 起始偏移, 结束偏移, 是否使用字节正则快速扫描)
+        
+    Returns:
+        (addresses, keys, key_ids, nops, symbols)，nops 为每条指令是否为填充指令（0 / 1）的字节串
+    """
+    filepath, start, end, fast = task
+    with open(filepath, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    
+    addresses = array('Q')
+    key_ids = array('I')
+    nops = bytearray()
+    keys = []
+    key_index = {}
+    key_nops = bytearray()
+    
+    if fast:
+        block, symbols = scan_buffer(data)
+        return block.addresses, block.keys, block.key_ids, block.nops, symbols
+    
+    text = data.decode('utf-8')
+    parser = DisassemblyParser()
+    
+    # 与文本模式打开文件一致：通用换行
+    for line in io.StringIO(text, newline=None):
+        fields = parser.parse_fields(line)
+        if fields is None:
+            parser.parse_label(line)
+            continue
+        key = (fields[1].strip(), fields[2].strip(), fields[3].strip())
+        key_id = key_index.get(key)
+        if key_id is None:
+            key_id = key_index[key] = len(keys)
+            keys.append(key)
+            key_nops.append(decode_instruction(*key).is_nop)
+        addresses.append(fields[0])
+        key_ids.append(key_id)
+        nops.append(key_nops[key_id])
+    
+    return addresses, keys, key_ids, bytes(nops), parser.symbols
+
+
+def split_instruction_text(rest: bytes) -> Tuple[str, str, str]:
+    """
+    将 FAST_LINE_PATTERN 第 2 组（编码 助记符 操作数）拆分并解码为字符串
+    
+    Args:
+        rest: 指令行中地址之后的字节串
+        
+    Returns:
+        (编码, 助记符, 操作数)，与 parse_fields 的结果一致
+    """
+    parts = rest.split(None, 2)
+    operands = parts[2].rstrip().decode('utf-8') if len(parts) > 2 else ''
+    return parts[0].decode('ascii'), parts[1].decode('utf-8'), operands
+
+
+def scan_buffer(buffer) -> Tuple[InstructionBlock, List[Tuple[int, str]]]:
+    """
+    用 FAST_LINE_PATTERN 扫描整个字节缓冲区（bytes / mmap），结果保持为紧凑数组
+    
+    每种不同的指令文本只拆分、解码一次并查一次译码缓存，
+    之后相同的指令只需解析地址。
+    
+    Args:
+        buffer: 反汇编文本的字节缓冲区（须以完整行结束）
+        
+    Returns:
+        (InstructionBlock, 函数符号表)
+    """
+    addresses = array('Q')
+    key_ids = array('I')
+    nops = bytearray()
+    keys = []
+    key_index = {}
+    key_nops = bytearray()
+    symbols = []
+    
+    for match in FAST_LINE_PATTERN.finditer(buffer):
+        address, rest, name = match.group(1, 2, 3)
+        if rest is None:
+            symbols.append((int(address, 16), name.decode('utf-8')))
+            continue
+        key_id = key_index.get(rest)
+        if key_id is None:
+            key_id = key_index[rest] = len(keys)
+            keys.append(split_instruction_text(rest))
+            key_nops.append(decode_instruction(*keys[key_id]).is_nop)
+        addresses.append(int(address, 16))
+        key_ids.append(key_id)
+        nops.append(key_nops[key_id])
+    
+    return InstructionBlock(addresses, keys, key_ids, bytes(nops)), symbols
+
+
+def split_functions(
+    packages: List[VLIWPackage],
+    symbols: List[Tuple[int, str]]
+) -> List[Tuple[str, List[VLIWPackage]]]:
+    """
+    按函数划分包列表：包归属于其起始地址所在的函数
+    
+    Args:
+        packages: VLIW 包列表（按地址顺序）
+        symbols: 符号表 [(起始地址, 函数名)]（按地址顺序）
+    
+    Returns:
+        [(函数名, 该函数的包列表)]，第一个符号之前的包归入函数名为 '' 的分组
+    """
+    functions = []
+    symbol_idx = -1
+    
+    for pkg in packages:
+        # 推进到包起始地址所属的函数
+        next_idx = symbol_idx
+        while next_idx + 1 < len(symbols) and symbols[next_idx + 1][0] <= pkg.start_address:
+            next_idx += 1
+        
+        if not functions or next_idx != symbol_idx:
+            symbol_idx = next_idx
+            name = symbols[symbol_idx][1] if symbol_idx >= 0 else ''
+            functions.append((name, []))
+        functions[-1][1].append(pkg)
+    
+    return functions
@@ -0,0 +1,119 @@
+"""
+流式结果输出：按包/按函数逐条输出机器可读记录（NDJSON / CSV）
+"""
+
+import csv
+import json
+from abc import ABC, abstractmethod
+from typing import Dict, IO
+
+
+class RecordWriter(ABC):
+    """流式记录输出基类，记录写出后即不再保留在内存中"""
+    
+    def __init__(self, stream: IO[str]):
+        """
+        Args:
+            stream: 已打开的文本输出流
+        """
+        self.stream = stream
+        self.record_count = 0
+    
+    def write_package(self, record: Dict):
+        """输出一条包记录"""
+        self._write('package', record)
+    
+    def write_function(self, record: Dict):
+        """输出一条函数记录"""
+        self._write('function', record)
+    
+    def write_violation(self, record: Dict):
+        """输出一条包合法性违例记录"""
+        self._write('violation', record)
+    
+    def write_diff(self, record: Dict):
+        """输出一条函数差异记录（构建对比）"""
+        self._write('diff', record)
+    
+    def write_summary(self, record: Dict):
+        """输出汇总记录（在所有包/函数记录之后）"""
+        self._write('summary', record)
+        self.stream.flush()
+    
+    @abstractmethod
+    def _write(self, kind: str, record: Dict):
+        """按输出格式写出一条 kind 类型的记录"""
+
+
+class NDJSONRecordWriter(RecordWriter):
+    """每行一个 JSON 对象"""
+    
+    def _write(self, kind: str, record: Dict):
+        data = {'record': kind}
+        data.update(record)
+        self.stream.write(json.dumps(data, ensure_ascii=False))
+        self.stream.write('\n')
+        self.record_count += 1
+
+
+class CSVRecordWriter(RecordWriter):
+    """
+    CSV 输出：包/函数/违例/差异记录使用固定列，汇总记录展开为 key/value 行
+    """
+    
+    FIELDS = [
+        'record', 'function', 'index', 'address', 'packages', 'instructions',
+        'valid', 'padding', 'leading', 'trailing', 'middle', 'removable_padding',
+        'avg_valid_per_package', 'bundle', 'slot', 'reason', 'detail', 'key', 'value',
+        'status', 'old_function', 'delta_packages', 'delta_valid', 'delta_padding',
+        'delta_density', 'delta_stalls', 'delta_cycles', 'delta_merged_pairs'
+    ]
+    
+    def __init__(self, stream: IO[str]):
+        super().__init__(stream)
+        self.writer = csv.DictWriter(stream, fieldnames=self.FIELDS, extrasaction='ignore')
+        self.writer.writeheader()
+    
+    def _write(self, kind: str, record: Dict):
+        if kind == 'summary':
+            for key, value in self._flatten(record):
+                self.writer.writerow({'record': kind, 'key': key, 'value': value})
+                self.record_count += 1
+            return
+        
+        row = {'record': kind}
+        row.update(record)
+        self.writer.writerow(row)
+        self.record_count += 1
+    
+    def _flatten(self, record: Dict, prefix: str = ''):
+        """将嵌套字典展开为 (a.b.c, value) 序列"""
+        for key, value in record.items():
+            name = f"{prefix}{key}"
+            if isinstance(value, dict):
+                yield from self._flatten(value, name + '.')
+            else:
+                yield name, value
+
+
+# 支持的流式输出格式
+RECORD_WRITERS = {
+    'ndjson': NDJSONRecordWriter,
+    'csv': CSVRecordWriter,
+}
+
+
+def create_record_writer(fmt: str, stream: IO[str]) -> RecordWriter:
+    """
+    根据格式名创建记录输出器
+    
+    Args:
+        fmt: 'ndjson' 或 'csv'
+        stream: 输出流
+    
+    Returns:
+        RecordWriter 实例
+    """
+    if fmt not in RECORD_WRITERS:
+        raise ValueError(f"不支持的输出格式: {fmt}")
+    return RECORD_WRITERS[fmt](stream)
@@ -0,0 +1,537 @@
+"""
+搜索式重打包：逐基本块以束搜索与模拟退火探索指令到包的分配，在时间预算内改进贪心打包
+"""
+
+import heapq
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from instruction import Instruction, VLIWPackage
+from packer import ForwardingModel, OnlinePacker, MEMORY_ACCESS, MEMORY_LOAD, MEMORY_STORE
+from timing import StallEstimator
+from machine import MachineDescription, default_machine
+from equivalence import split_blocks
+from config import (
+    VLIW_PACKAGE_SIZE, ITERATIVE_EXTRA_CYCLES, SEARCH_BLOCK_BUDGET_MS, SEARCH_BEAM_WIDTH,
+    SEARCH_BEAM_CANDIDATES, SEARCH_ANNEAL_STEPS, SEARCH_ANNEAL_TEMPERATURE, SEARCH_SEED,
+    SEARCH_CHUNKS_PER_JOB
+)
+
+# 一个包：按槽位升序的 (槽位, 块内指令序号)；一个调度：按执行顺序的包列表
+Bundle = Tuple[Tuple[int, int], ...]
+
+# 退火每步把一条指令在优先级顺序中移动的最大距离
+ANNEAL_WINDOW = VLIW_PACKAGE_SIZE
+
+
+def _bit_indices(mask: int) -> Iterator[int]:
+    """掩码中置位的下标（从低到高）"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class BlockProblem:
+    """
+    一个基本块的打包问题：块内指令的顺序约束，以及按优先级顺序逐包填充的解码器
+    
+    before[i] 为须不晚于指令 i 执行的块内指令掩码（RAW / WAR / WAW 与涉及存储的访存对，
+    只记录直接约束，间接约束经传递自然成立）：它们必须位于更早的包，或同一包内更低的
+    槽位。其他类型（CSR、fence 等）的指令与前后所有指令保持顺序，控制转移指令位于块内
+    所有指令之后。raw[i] 为 i 所读寄存器在块内的最近写入者，与 i 同包时须能按前递链
+    模型与包内旁路前递（与 OnlinePacker 的规则相同）。
+    """
+    
+    def __init__(
+        self,
+        instructions: Sequence[Instruction],
+        model: ForwardingModel,
+        machine: MachineDescription,
+        iterative_cycles: Dict[str, int] = None
+    ):
+        """
+        Args:
+            instructions: 块内有效指令（程序顺序）
+            model: 包内前递链模型
+            machine: 机器描述
+            iterative_cycles: 助记符 -> 额外阻塞周期（默认 ITERATIVE_EXTRA_CYCLES）
+        """
+        self.instructions = list(instructions)
+        self.model = model
+        self.machine = machine
+        self.estimator = StallEstimator(iterative_cycles=iterative_cycles, machine=machine)
+        self.types = [inst.inst_type for inst in self.instructions]
+        self.slot_masks = [machine.slot_mask(inst) for inst in self.instructions]
+        self.index = {inst.address: i for i, inst in enumerate(self.instructions)}
+        
+        count = len(self.instructions)
+        self.before = [0] * count
+        self.raw = [0] * count
+        self.successors = [[] for _ in range(count)]
+        last_writer = {}
+        readers = {}  # 寄存器 -> 最近一次写入之后读取它的指令掩码
+        last_store = None
+        loads = 0  # 最近一次存储之后的读取指令掩码
+        barrier = None
+        earlier = 0
+        for i, inst in enumerate(self.instructions):
+            raw = 0
+            for reg in _bit_indices(inst.reads):
+                if reg in last_writer:
+                    raw |= 1 << last_writer[reg]
+            before = raw
+            for reg in _bit_indices(inst.writes):
+                if reg in last_writer:
+                    before |= 1 << last_writer[reg]
+                before |= readers.get(reg, 0)
+            memory = MEMORY_ACCESS.get(inst.inst_type, 0)
+            if memory and last_store is not None:
+                before |= 1 << last_store
+            if memory == MEMORY_STORE:
+                before |= loads
+            if barrier is not None:
+                before |= 1 << barrier
+            if inst.inst_type in ('OTHER', 'BRANCH'):
+                before = earlier
+                barrier = i
+            self.before[i] = before
+            self.raw[i] = raw
+            for j in _bit_indices(before):
+                self.successors[j].append(i)
+            
+            for reg in _bit_indices(inst.reads):
+                readers[reg] = readers.get(reg, 0) | 1 << i
+            for reg in _bit_indices(inst.writes):
+                last_writer[reg] = i
+                readers[reg] = 0
+            if memory == MEMORY_LOAD:
+                loads |= 1 << i
+            elif memory == MEMORY_STORE:
+                last_store = i
+                loads = 0
+            earlier |= 1 << i
+        
+        self.roots = [i for i in range(count) if not self.before[i]]
+        
+        # 关键路径高度：沿 RAW 边累加生产者的结果延迟，作为默认优先级
+        latency = machine.latency
+        height = [0] * count
+        for i in range(count - 1, -1, -1):
+            own = latency.get(self.types[i], 1)
+            height[i] = max(
+                [height[s] + (own if self.raw[s] >> i & 1 else 0) for s in self.successors[i]],
+                default=own
+            )
+        self.height = height
+        self.priority = sorted(range(count), key=lambda i: (-height[i], i))
+    
+    @property
+    def size(self) -> int:
+        """块内指令数"""
+        return len(self.instructions)
+    
+    @staticmethod
+    def rank_of(order: Sequence[int]) -> List[int]:
+        """优先级顺序 -> 每条指令的名次（越小越先尝试）"""
+        rank = [0] * len(order)
+        for position, i in enumerate(order):
+            rank[i] = position
+        return rank
+    
+    def fill(self, rank: Sequence[int], done: int, ready: Iterable[int]) -> Bundle:
+        """
+        按名次构造下一个包
+        
+        依次尝试可执行的指令（before 都已在之前的包或本包中），满足包内前递与槽位分配
+        （MachineDescription.assign_slots）时加入；加入的指令使其后继变为可尝试。
+        不能加入的指令在本包中不再尝试：包内指令只增不减，约束不会变得更宽松。
+        
+        Args:
+            rank: 每条指令的名次
+            done: 已位于之前各包的指令掩码
+            ready: 之前各包之外、依赖都已满足的指令
+        
+        Returns:
+            新包（至少含一条指令）
+        """
+        heap = [(rank[i], i) for i in ready]
+        heapq.heapify(heap)
+        members = []
+        position = {}  # 指令 -> 在 members 中的序号
+        depth = {}
+        entries = ()
+        slots = ()
+        placed = done
+        while heap and len(members) < VLIW_PACKAGE_SIZE:
+            _, i = heapq.heappop(heap)
+            inst_type = self.types[i]
+            chain = 0
+            producers = 0
+            for j in _bit_indices(self.raw[i] & ~done):
+                if inst_type not in self.model.targets(depth[j], self.types[j]):
+                    chain = -1
+                    break
+                chain = max(chain, depth[j] + 1)
+                producers |= 1 << position[j]
+            if chain < 0:
+                continue
+            ordered = 0
+            for j in _bit_indices(self.before[i] & ~done):
+                ordered |= 1 << position[j]
+            entry = (self.slot_masks[i], ordered, producers)
+            assigned = self.machine.assign_slots(entries + (entry,), slots)
+            if assigned is None:
+                continue
+            
+            position[i] = len(members)
+            members.append(i)
+            depth[i] = chain
+            entries += (entry,)
+            slots = assigned
+            placed |= 1 << i
+            for s in self.successors[i]:
+                if not self.before[s] & ~placed:
+                    heapq.heappush(heap, (rank[s], s))
+        return tuple(sorted(zip(slots, members)))
+    
+    def advance(self, bundle: Bundle, done: int, ready: set) -> int:
+        """把包内指令移入已完成集合，更新可执行指令集合（原地），返回新的 done"""
+        for _, i in bundle:
+            done |= 1 << i
+            ready.discard(i)
+        for _, i in bundle:
+            for s in self.successors[i]:
+                if not done >> s & 1 and not self.before[s] & ~done:
+                    ready.add(s)
+        return done
+    
+    def decode(self, rank: Sequence[int]) -> List[Bundle]:
+        """按名次逐包填充，得到完整调度"""
+        done = 0
+        ready = set(self.roots)
+        schedule = []
+        while ready:
+            bundle = self.fill(rank, done, ready)
+            done = self.advance(bundle, done, ready)
+            schedule.append(bundle)
+        return schedule
+    
+    def package(self, bundle: Bundle) -> VLIWPackage:
+        """由包构造 VLIWPackage（指令按槽位排列并记录 slots）"""
+        return build_package(self.instructions, bundle)
+    
+    def cost(self, schedule: Sequence[Bundle]) -> Tuple[int, int]:
+        """调度从空流水线开始执行的 (估算周期, 包数)"""
+        timeline = self.estimator.timeline()
+        for bundle in schedule:
+            timeline.add_package(self.package(bundle))
+        return timeline.cycle, timeline.bundles
+    
+    def schedule_of(self, packages: Sequence[VLIWPackage]) -> List[Bundle]:
+        """把本块指令组成的包（如贪心打包的结果）转换为调度"""
+        return [
+            tuple(sorted((pkg.slot_of(k), self.index[inst.address]) for k, inst in enumerate(pkg.instructions)))
+            for pkg in packages
+        ]
+    
+    def beam_search(
+        self,
+        width: int,
+        candidates: int,
+        rng: random.Random,
+        deadline: float
+    ) -> Optional[List[Bundle]]:
+        """
+        逐包的束搜索
+        
+        每个部分调度以关键路径顺序、程序顺序与若干随机扰动的关键路径顺序各填充一个
+        候选包，按 (已用周期 + 剩余指令至少需要的包数, 包数) 保留最好的 width 个部分调度；
+        完成相同指令集合的部分调度只保留最好的一个。
+        
+        Args:
+            width: 束宽
+            candidates: 每个部分调度扩展的候选包数
+            rng: 随机数发生器
+            deadline: 截止时间（time.perf_counter()）
+        
+        Returns:
+            最好的完整调度；超出截止时间时返回 None
+        """
+        base = [self.rank_of(self.priority), list(range(self.size))]
+        timeline = self.estimator.timeline()
+        states = [(timeline, 0, set(self.roots), [])]
+        while any(ready for _, _, ready, _ in states):
+            if time.perf_counter() > deadline:
+                return None
+            ranks = base[:candidates]
+            for _ in range(candidates - len(ranks)):
+                order = sorted(range(self.size), key=lambda i: -self.height[i] - rng.random() * 2)
+                ranks.append(self.rank_of(order))
+            
+            expanded = {}
+            for state in states:
+                timeline, done, ready, schedule = state
+                if not ready:
+                    self._keep(expanded, state)
+                    continue
+                seen = set()
+                for rank in ranks:
+                    bundle = self.fill(rank, done, ready)
+                    if bundle in seen:
+                        continue
+                    seen.add(bundle)
+                    following = timeline.copy()
+                    following.add_package(self.package(bundle))
+                    remaining = set(ready)
+                    following_done = self.advance(bundle, done, remaining)
+                    self._keep(expanded, (following, following_done, remaining, schedule + [bundle]))
+            states = sorted(expanded.values(), key=self._estimate)[:width]
+        return min(states, key=self._estimate)[3]
+    
+    def _keep(self, expanded: Dict, state: Tuple):
+        """记录部分调度 (timeline, done, ready, schedule)（已有完成相同指令集合的更好调度时丢弃）"""
+        current = expanded.get(state[1])
+        if current is None or self._estimate(state) < self._estimate(current):
+            expanded[state[1]] = state
+    
+    def _estimate(self, state: Tuple) -> Tuple[int, int]:
+        """部分调度的 (周期下界, 包数下界)"""
+        timeline, done, _, _ = state
+        left = -(-(self.size - bin(done).count('1')) // VLIW_PACKAGE_SIZE)
+        return timeline.cycle + left, timeline.bundles + left
+    
+    def anneal(
+        self,
+        schedule: Sequence[Bundle],
+        steps: int,
+        temperature: float,
+        rng: random.Random,
+        deadline: float
+    ) -> Tuple[List[Bundle], Tuple[int, int]]:
+        """
+        在优先级顺序上做模拟退火
+        
+        从 schedule 按包、槽位展开的顺序出发，每步把一条指令在顺序中移动至多
+        ANNEAL_WINDOW 个位置后重新解码；周期变差 delta 时以 exp(-delta / T) 的概率接受，
+        T 随步数从 temperature 线性降到 0。
+        
+        Args:
+            schedule: 初始调度
+            steps: 最大步数
+            temperature: 初始温度（周期）
+            rng: 随机数发生器
+            deadline: 截止时间（time.perf_counter()）
+        
+        Returns:
+            (找到的最好调度, 其 (周期, 包数))
+        """
+        order = [i for bundle in schedule for _, i in bundle]
+        current = self.cost(schedule)
+        best = (list(schedule), current)
+        if self.size < 2:
+            return best
+        for step in range(steps):
+            if time.perf_counter() > deadline:
+                break
+            source = rng.randrange(self.size)
+            target = min(self.size - 1, max(0, source + rng.randint(-ANNEAL_WINDOW, ANNEAL_WINDOW)))
+            if source == target:
+                continue
+            candidate = order[:]
+            candidate.insert(target, candidate.pop(source))
+            decoded = self.decode(self.rank_of(candidate))
+            cost = self.cost(decoded)
+            delta = cost[0] - current[0]
+            heat = temperature * (1 - step / steps)
+            if cost <= current or (delta > 0 and heat > 0 and rng.random() < math.exp(-delta / heat)):
+                order = candidate
+                current = cost
+                if cost < best[1]:
+                    best = (decoded, cost)
+        return best
+
+
+def build_package(instructions: Sequence[Instruction], bundle: Bundle) -> VLIWPackage:
+    """
+    由包构造 VLIWPackage
+    
+    Args:
+        instructions: 块内指令
+        bundle: 按槽位升序的 (槽位, 指令序号)
+    
+    Returns:
+        指令按槽位排列、记录了 slots 的包（起始地址为包内最小的指令地址）
+    """
+    pkg = VLIWPackage(min(instructions[i].address for _, i in bundle))
+    for _, i in bundle:
+        pkg.add_instruction(instructions[i])
+    pkg.slots = [slot for slot, _ in bundle]
+    return pkg
+
+
+def search_block(
+    instructions: Sequence[Instruction],
+    settings: Dict,
+    seed: int
+) -> Dict:
+    """
+    在预算内搜索一个基本块的调度
+    
+    先按程序顺序贪心打包作为基准：已达到下界（没有数据相关停顿、包数为 ceil(n / 8)）
+    的块不搜索。否则先做束搜索，再以其结果为起点做模拟退火；预算用完时束搜索仍未
+    得到完整调度的块退回贪心结果。
+    
+    Args:
+        instructions: 块内有效指令（程序顺序）
+        settings: SearchPacker 的搜索参数（见 SearchPacker.settings）
+        seed: 本块的随机种子
+    
+    Returns:
+        {'greedy': 贪心调度, 'schedule': 更好的搜索调度（没有则为 None），
+         'method': 'beam' / 'anneal' / None, 'searched', 'fallback'}
+    """
+    start = time.perf_counter()
+    deadline = start + settings['budget_ms'] / 1000
+    problem = BlockProblem(instructions, settings['model'], settings['machine'], settings['iterative_cycles'])
+    greedy = problem.schedule_of(list(OnlinePacker(settings['model'], settings['machine']).feed(instructions)))
+    result = {'greedy': greedy, 'schedule': None, 'method': None, 'searched': False, 'fallback': False}
+    
+    timeline = problem.estimator.timeline()
+    for bundle in greedy:
+        timeline.add_package(problem.package(bundle))
+    if not timeline.data_stalls and len(greedy) == -(-problem.size // VLIW_PACKAGE_SIZE):
+        return result
+    
+    result['searched'] = True
+    rng = random.Random(seed)
+    baseline = (timeline.cycle, timeline.bundles)
+    found = problem.beam_search(settings['beam_width'], settings['beam_candidates'], rng, deadline)
+    if found is None:
+        result['fallback'] = True
+        return result
+    
+    best = (found, problem.cost(found), 'beam')
+    schedule, cost = problem.anneal(found, settings['anneal_steps'], settings['temperature'], rng, deadline)
+    if cost < best[1]:
+        best = (schedule, cost, 'anneal')
+    if best[1] < baseline:
+        result['schedule'], _, result['method'] = best
+    return result
+
+
+def _search_chunk(task: Tuple[List[Tuple[int, List[Instruction]]], Dict]) -> List[Dict]:
+    """进程池任务：依次搜索一组 (块序号, 块内指令)"""
+    blocks, settings = task
+    return [search_block(block, settings, settings['seed'] + index) for index, block in blocks]
+
+
+class SearchPacker:
+    """
+    逐基本块的搜索式重打包
+    
+    包不跨越基本块（分支目标始终位于包首），因此各块可以独立搜索并在多个进程中
+    并行。每块的结果与同一块按程序顺序贪心打包的结果比较，只在估算周期
+    （相同时为包数）更少时采用。
+    """
+    
+    def __init__(
+        self,
+        model: ForwardingModel = None,
+        machine: MachineDescription = None,
+        budget_ms: float = SEARCH_BLOCK_BUDGET_MS,
+        beam_width: int = SEARCH_BEAM_WIDTH,
+        beam_candidates: int = SEARCH_BEAM_CANDIDATES,
+        anneal_steps: int = SEARCH_ANNEAL_STEPS,
+        temperature: float = SEARCH_ANNEAL_TEMPERATURE,
+        jobs: int = 1,
+        seed: int = SEARCH_SEED
+    ):
+        """
+        Args:
+            model: 包内前递链模型（默认一层依赖）
+            machine: 机器描述（默认 default_machine()）
+            budget_ms: 每个基本块的墙钟预算（毫秒）
+            beam_width: 束宽
+            beam_candidates: 每个部分调度扩展的候选包数（至少 1）
+            anneal_steps: 模拟退火的最大步数（0 表示只做束搜索）
+            temperature: 模拟退火的初始温度（周期）
+            jobs: 并行搜索的进程数（1 为串行；0 表示使用全部 CPU）
+            seed: 随机种子（第 k 个块使用 seed + k）
+        """
+        if budget_ms < 0:
+            raise ValueError(f"搜索预算不能为负数: {budget_ms}")
+        if beam_width < 1 or beam_candidates < 1:
+            raise ValueError(f"束宽与候选包数必须为正数: {beam_width}, {beam_candidates}")
+        self.model = model or ForwardingModel()
+        self.machine = machine or default_machine()
+        self.jobs = (os.cpu_count() or 1) if jobs == 0 else jobs
+        self.settings = {
+            'model': self.model,
+            'machine': self.machine,
+            'iterative_cycles': ITERATIVE_EXTRA_CYCLES,
+            'budget_ms': budget_ms,
+            'beam_width': beam_width,
+            'beam_candidates': beam_candidates,
+            'anneal_steps': anneal_steps,
+            'temperature': temperature,
+            'seed': seed
+        }
+    
+    def repack(self, original_packages: List[VLIWPackage]) -> Tuple[List[VLIWPackage], Dict]:
+        """
+        逐块搜索重打包
+        
+        Args:
+            original_packages: 原始 VLIW 包列表
+        
+        Returns:
+            (重打包后的包列表, 统计信息字典)；统计信息中 greedy / search 为逐块贪心与
+            搜索结果在整个程序上的 {'packages', 'cycles'}，by_method 为各方法改进的块数
+        """
+        start = time.perf_counter()
+        blocks = split_blocks(original_packages)
+        indexed = list(enumerate(blocks))
+        if self.jobs > 1 and len(blocks) > 1:
+            size = -(-len(blocks) // (self.jobs * SEARCH_CHUNKS_PER_JOB))
+            tasks = [(indexed[k:k + size], self.settings) for k in range(0, len(indexed), size)]
+            with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+                results = [result for chunk in pool.map(_search_chunk, tasks) for result in chunk]
+        else:
+            results = _search_chunk((indexed, self.settings))
+        
+        greedy_packages = []
+        packages = []
+        stats = {
+            'blocks': len(blocks),
+            'searched_blocks': 0,
+            'improved_blocks': 0,
+            'fallback_blocks': 0,
+            'by_method': {'beam': 0, 'anneal': 0}
+        }
+        for block, result in zip(blocks, results):
+            greedy_packages.extend(build_package(block, bundle) for bundle in result['greedy'])
+            packages.extend(build_package(block, bundle) for bundle in result['schedule'] or result['greedy'])
+            stats['searched_blocks'] += result['searched']
+            stats['fallback_blocks'] += result['fallback']
+            if result['method'] is not None:
+                stats['improved_blocks'] += 1
+                stats['by_method'][result['method']] += 1
+        
+        estimator = StallEstimator(machine=self.machine)
+        greedy_cycles = estimator.estimate(greedy_packages)['cycles']
+        cycles = estimator.estimate(packages)['cycles']
+        stats.update({
+            'greedy': {'packages': len(greedy_packages), 'cycles': greedy_cycles},
+            'search': {'packages': len(packages), 'cycles': cycles},
+            'package_gain': len(greedy_packages) - len(packages),
+            'cycle_gain': greedy_cycles - cycles,
+            'cycle_gain_percentage': (greedy_cycles - cycles) / greedy_cycles * 100 if greedy_cycles else 0,
+            'budget_ms': self.settings['budget_ms'],
+            'jobs': self.jobs,
+            'elapsed_seconds': time.perf_counter() - start
+        })
+        return packages, stats
@@ -0,0 +1,558 @@
+"""
+常驻分析服务：在本地 Unix 套接字上以 JSON 行协议提供分析，
+常驻内存保留已解析的程序与逐函数分析结果，程序变更时只重新分析变化的函数
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from typing import Dict, List, Tuple
+from parser import DisassemblyParser, STDIN_PATH, split_functions
+from cache import LRUCache, function_digest, instruction_key
+from instruction import Instruction, VLIWPackage
+from dependency import DependencyAnalyzer
+from packer import OnlinePacker, branch_targets
+from checker import BundleLegalityChecker
+from analyzer import function_record, violation_record
+from statistics import StatsAccumulator
+from diff import BuildProfiler, diff_profiles, diff_record
+from config import SERVER_SOCKET_PATH, SERVER_CACHE_BYTES
+from config import SERVER_FUNCTION_CACHE_BYTES, SERVER_INSTRUCTION_BYTES, SERVER_FUNCTION_BYTES
+
+# 逐函数结果中 StatsAccumulator 之外可直接相加的计数字段
+FUNCTION_COUNTERS = ('dependent', 'one_level_pairs', 'closed_bundles', 'merged_pairs')
+
+# 请求字段的类型（字段可以省略）
+REQUEST_FIELDS = {
+    'path': str,
+    'old': str,
+    'new': str,
+    'check': bool,
+    'functions': bool,
+    'violations': bool,
+    'unchanged': bool,
+}
+
+
+def file_digest(filepath: str) -> bytes:
+    """文件内容摘要"""
+    digest = hashlib.sha1()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.digest()
+
+
+class PipelineState:
+    """
+    分析在函数边界处携带的跨函数状态
+    
+    - writers：每个寄存器最近一次写入的指令（按程序顺序），
+      决定后续指令的 RAW 依赖是否存在、能否构成一层依赖
+    - open_bundle：贪心重打包中尚未封闭的当前包的指令
+    
+    函数的分析结果只取决于函数内容与该状态，两者都相同时可直接复用。
+    """
+    
+    __slots__ = ('writers', 'open_bundle', 'digest')
+    
+    def __init__(self, writers: Tuple[Instruction, ...] = (), open_bundle: Tuple[Instruction, ...] = ()):
+        self.writers = tuple(writers)
+        self.open_bundle = tuple(open_bundle)
+        
+        digest = hashlib.sha1()
+        for inst in self.writers:
+            digest.update(instruction_key(inst))
+        digest.update(b'|')
+        for inst in self.open_bundle:
+            digest.update(instruction_key(inst))
+        self.digest = digest.digest()
+
+
+class IncrementalAnalyzer:
+    """
+    按函数增量计算与 VLIWAnalyzer.run_full_analysis 相同的汇总统计
+    
+    每个函数以 (函数内容摘要, 入口状态摘要) 为键缓存其计数与出口状态。
+    依赖与重打包统计按 "入口状态指令 + 函数有效指令" 计算，再减去入口状态
+    指令自身的贡献：最近写者与未封闭包完整决定了后续指令的依赖边与贪心打包行为，
+    因此逐函数结果相加与整体分析完全一致。
+    """
+    
+    def __init__(self, cache: LRUCache):
+        """
+        Args:
+            cache: 逐函数结果缓存
+        """
+        self.cache = cache
+        self.dep_analyzer = DependencyAnalyzer()
+    
+    def analyze(self, packages: List[VLIWPackage], symbols: List[Tuple[int, str]]) -> Dict:
+        """
+        增量分析整个程序
+        
+        Args:
+            packages: 原始 VLIW 包列表
+            symbols: 符号表
+        
+        Returns:
+            {'stats': 与 all_stats 结构相同的统计, 'functions': 函数记录列表,
+             'reused': 复用的函数数, 'analyzed': 重新分析的函数数}
+        """
+        state = PipelineState()
+        accumulator = StatsAccumulator()
+        totals = dict.fromkeys(FUNCTION_COUNTERS, 0)
+        functions = []
+        reused = 0
+        analyzed = 0
+        
+        for name, function_packages in split_functions(packages, symbols):
+            key = (function_digest(function_packages), state.digest)
+            cached = self.cache.get(key)
+            if cached is None:
+                cached = self._analyze_function(function_packages, state)
+                self.cache.put(key, cached, SERVER_FUNCTION_BYTES)
+                analyzed += 1
+            else:
+                reused += 1
+            function_accumulator, counts, state = cached
+            
+            accumulator.merge(function_accumulator)
+            for field in FUNCTION_COUNTERS:
+                totals[field] += counts[field]
+            
+            record = function_record({
+                'function': name,
+                'address': f"0x{function_packages[0].start_address:08x}",
+                'packages': function_accumulator.packages,
+                'instructions': function_accumulator.instructions,
+                'valid': function_accumulator.valid,
+                'leading': function_accumulator.leading,
+                'trailing': function_accumulator.trailing,
+                'middle': function_accumulator.middle
+            })
+            record['dependent'] = counts['dependent']
+            record['one_level_pairs'] = counts['one_level_pairs']
+            record['merged_pairs'] = counts['merged_pairs']
+            functions.append(record)
+        
+        optimized_count = totals['closed_bundles'] + (1 if state.open_bundle else 0)
+        return {
+            'stats': self._finalize(accumulator, totals, optimized_count),
+            'functions': functions,
+            'reused': reused,
+            'analyzed': analyzed
+        }
+    
+    def _analyze_function(self, packages: List[VLIWPackage], state: PipelineState):
+        """
+        分析单个函数
+        
+        Args:
+            packages: 函数的包列表
+            state: 函数入口处的跨函数状态
+        
+        Returns:
+            (统计累加器, 依赖与重打包计数, 出口状态)
+        """
+        accumulator = StatsAccumulator(packages)
+        counts = dict.fromkeys(FUNCTION_COUNTERS, 0)
+        valid = [inst for pkg in packages for inst in pkg.instructions if not inst.is_nop]
+        if not valid:
+            return accumulator, counts, state
+        
+        # 依赖统计：入口处的最近写者提供跨函数的 RAW 边
+        writers = list(state.writers)
+        with_function = self._dependency_counts(writers + valid)
+        prefix_only = self._dependency_counts(writers)
+        counts['dependent'] = with_function[0] - prefix_only[0]
+        counts['one_level_pairs'] = with_function[1] - prefix_only[1]
+        
+        # 重打包：从入口处未封闭的包继续贪心打包
+        open_bundle = list(state.open_bundle)
+        bundles, merged = self._repack(open_bundle + valid)
+        counts['closed_bundles'] = len(bundles) - 1
+        counts['merged_pairs'] = merged - (self._repack(open_bundle)[1] if open_bundle else 0)
+        
+        # 出口状态：从后向前保留仍是某个寄存器最近写者的指令
+        exit_writers = []
+        covered = 0
+        for inst in reversed(writers + valid):
+            if inst.writes & ~covered:
+                exit_writers.append(inst)
+                covered |= inst.writes
+        exit_writers.reverse()
+        
+        return accumulator, counts, PipelineState(exit_writers, bundles[-1].instructions)
+    
+    def _dependency_counts(self, instructions: List[Instruction]) -> Tuple[int, int]:
+        """返回 (存在 RAW 依赖的指令数, 一层依赖对数)"""
+        if not instructions:
+            return 0, 0
+        dep_graph = self.dep_analyzer.build_dependency_graph(instructions)
+        stats = self.dep_analyzer.analyze_dependency_statistics(instructions, dep_graph)
+        return stats['dependent_count'], stats['one_level_pairs']
+    
+    def _repack(self, instructions: List[Instruction]) -> Tuple[List[VLIWPackage], int]:
+        """对有效指令序列运行贪心重打包，返回 (包列表, 合并的一层依赖对数)"""
+        packer = OnlinePacker(block_starts=branch_targets(instructions))
+        bundles = list(packer.feed(instructions))
+        return bundles, packer.merged_pairs
+    
+    def _finalize(self, accumulator: StatsAccumulator, totals: Dict, optimized_count: int) -> Dict:
+        """由合并的累加器与依赖 / 重打包计数生成与 all_stats 相同结构的统计字典"""
+        packing = accumulator.packing_stats(optimized_count)
+        packing['merged_pairs'] = totals['merged_pairs']
+        return {
+            'original': accumulator.original_stats(),
+            'padding': accumulator.padding_stats(),
+            'types': accumulator.type_stats(),
+            'dependency': {
+                'total_valid_instructions': accumulator.valid,
+                'single_cycle_count': accumulator.single_cycle,
+                'independent_count': accumulator.valid - totals['dependent'],
+                'dependent_count': totals['dependent'],
+                'one_level_pairs': totals['one_level_pairs']
+            },
+            'packing': packing
+        }
+
+
+class AnalysisService:
+    """
+    分析服务的请求处理逻辑（与传输层无关）
+    
+    请求为 JSON 对象，'op' 字段选择操作：
+    - ping：检查服务是否存活
+    - analyze：分析文件，返回汇总统计（可选逐函数记录与合法性检查）
+    - check：检查文件中原始包的合法性（可选返回违例列表）
+    - diff：对比基准构建 old 与新构建 new 的逐函数指标
+    - stats：返回缓存统计
+    - evict：从缓存中删除指定文件（缺省时清空全部缓存）
+    - shutdown：停止服务
+    
+    响应为 JSON 对象，'ok' 表示是否成功，失败时 'error' 给出原因。
+    """
+    
+    def __init__(
+        self,
+        cache_bytes: int = SERVER_CACHE_BYTES,
+        function_cache_bytes: int = SERVER_FUNCTION_CACHE_BYTES,
+        fast_parse: bool = True
+    ):
+        """
+        Args:
+            cache_bytes: 已解析程序缓存的内存上限（字节）
+            function_cache_bytes: 逐函数结果缓存的内存上限（字节）
+            fast_parse: 使用 mmap + 字节正则的快速解析模式
+        """
+        self.programs = LRUCache(cache_bytes)
+        self.functions = LRUCache(function_cache_bytes)
+        self.paths = {}  # 文件路径 -> 最近一次请求时的内容摘要
+        self.fast_parse = fast_parse
+        self.parser = DisassemblyParser()
+        self.incremental = IncrementalAnalyzer(self.functions)
+        self.checker = BundleLegalityChecker(self.incremental.dep_analyzer)
+        self.profiler = BuildProfiler(self.functions)
+        self.lock = threading.Lock()
+        self.shutdown_requested = False
+        self.started = time.time()
+        self.requests = 0
+    
+    def handle(self, request: Dict) -> Dict:
+        """
+        处理一条请求
+        
+        Args:
+            request: 请求字典
+        
+        Returns:
+            响应字典
+        """
+        handlers = {
+            'ping': self._ping,
+            'analyze': self._analyze,
+            'check': self._check,
+            'diff': self._diff,
+            'stats': self._stats,
+            'evict': self._evict,
+            'shutdown': self._shutdown,
+        }
+        op = request.get('op') if isinstance(request, dict) else None
+        if not isinstance(op, str) or op not in handlers:
+            return {'ok': False, 'error': f"不支持的操作: {op}"}
+        for field, expected in REQUEST_FIELDS.items():
+            value = request.get(field)
+            if value is not None and not isinstance(value, expected):
+                return {'ok': False, 'error': f"字段 {field} 应为 {expected.__name__}: {value!r}"}
+        
+        start = time.perf_counter()
+        with self.lock:
+            self.requests += 1
+            try:
+                response = handlers[op](request)
+            except (OSError, ValueError, KeyError) as e:
+                return {'ok': False, 'error': str(e)}
+            except Exception as e:
+                # 未预期的异常同样作为错误响应返回，不终止连接线程
+                return {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+        
+        response['ok'] = True
+        response['elapsed_ms'] = (time.perf_counter() - start) * 1000
+        return response
+    
+    def load_program(self, path: str) -> Tuple[Dict, bool]:
+        """
+        取得文件对应的程序缓存条目，文件未变化时直接复用
+        
+        Args:
+            path: 反汇编文件路径
+        
+        Returns:
+            (程序条目, 是否命中缓存)
+        """
+        if not path or path == STDIN_PATH:
+            raise ValueError("分析服务需要文件路径（不支持标准输入）")
+        # 按内容摘要而不是修改时间判断文件是否变化：
+        # 同一时间戳内重新生成的等长文件也能被正确识别
+        path = os.path.abspath(path)
+        digest = file_digest(path)
+        self.paths[path] = digest
+        
+        program = self.programs.get(digest)
+        if program is not None:
+            return program, True
+        
+        packages = self.parser.parse_file(path, fast=self.fast_parse)
+        symbols = list(self.parser.symbols)
+        result = self.incremental.analyze(packages, symbols)
+        program = {
+            'file': os.path.basename(path),
+            'packages': packages,
+            'symbols': symbols,
+            'stats': result['stats'],
+            'functions': result['functions'],
+            'functions_reused': result['reused'],
+            'functions_analyzed': result['analyzed'],
+            'violations': None,
+            'legality': None,
+            'profiles': None
+        }
+        instructions = sum(len(pkg.instructions) for pkg in packages)
+        self.programs.put(digest, program, instructions * SERVER_INSTRUCTION_BYTES)
+        return program, False
+    
+    def _legality(self, program: Dict):
+        """按需检查程序的合法性（结果随程序一起缓存）"""
+        if program['violations'] is None:
+            program['violations'] = self.checker.check(program['packages'])
+            program['legality'] = self.checker.summarize(program['packages'], program['violations'])
+    
+    def _profiles(self, program: Dict) -> List[Dict]:
+        """按需计算程序的逐函数对比指标（结果随程序一起缓存）"""
+        if program['profiles'] is None:
+            program['profiles'] = self.profiler.profile(program['packages'], program['symbols'])
+        return program['profiles']
+    
+    def _ping(self, request: Dict) -> Dict:
+        return {'pid': os.getpid()}
+    
+    def _analyze(self, request: Dict) -> Dict:
+        program, hit = self.load_program(request.get('path'))
+        summary = {'file': program['file']}
+        summary.update(program['stats'])
+        if request.get('check'):
+            self._legality(program)
+            summary['legality'] = program['legality']
+        
+        response = {
+            'summary': summary,
+            'cache': {
+                'program': 'hit' if hit else 'miss',
+                'functions_reused': program['functions_reused'],
+                'functions_analyzed': program['functions_analyzed']
+            }
+        }
+        if request.get('functions'):
+            response['functions'] = program['functions']
+        return response
+    
+    def _check(self, request: Dict) -> Dict:
+        program, hit = self.load_program(request.get('path'))
+        self._legality(program)
+        response = {
+            'file': program['file'],
+            'legality': program['legality'],
+            'cache': {'program': 'hit' if hit else 'miss'}
+        }
+        if request.get('violations'):
+            response['violations'] = [violation_record(v) for v in program['violations']]
+        return response
+    
+    def _diff(self, request: Dict) -> Dict:
+        old_program, old_hit = self.load_program(request.get('old'))
+        new_program, new_hit = self.load_program(request.get('new'))
+        diff = diff_profiles(
+            self._profiles(old_program), self._profiles(new_program),
+            old_program['file'], new_program['file'],
+            include_unchanged=bool(request.get('unchanged'))
+        )
+        diff['functions'] = [diff_record(row) for row in diff['functions']]
+        diff['cache'] = {
+            'old': 'hit' if old_hit else 'miss',
+            'new': 'hit' if new_hit else 'miss'
+        }
+        return diff
+    
+    def _stats(self, request: Dict) -> Dict:
+        return {
+            'uptime_s': time.time() - self.started,
+            'requests': self.requests,
+            'programs': self.programs.stats(),
+            'functions': self.functions.stats()
+        }
+    
+    def _evict(self, request: Dict) -> Dict:
+        path = request.get('path')
+        if path is None:
+            evicted = len(self.programs.entries)
+            self.programs.clear()
+            self.functions.clear()
+            self.paths.clear()
+            return {'evicted': evicted}
+        
+        digest = self.paths.pop(os.path.abspath(path), None)
+        evicted = digest is not None and self.programs.pop(digest) is not None
+        return {'evicted': int(evicted)}
+    
+    def _shutdown(self, request: Dict) -> Dict:
+        self.shutdown_requested = True
+        return {}
+
+
+class AnalysisRequestHandler(socketserver.StreamRequestHandler):
+    """逐行读取 JSON 请求并逐行写回响应，一个连接可发送多条请求"""
+    
+    def handle(self):
+        service = self.server.service
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                response = {'ok': False, 'error': f"请求不是合法的 JSON: {e}"}
+            else:
+                response = service.handle(request)
+            
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.wfile.write(b'\n')
+            self.wfile.flush()
+            
+            if service.shutdown_requested:
+                # shutdown() 会等待 serve_forever 退出，需在其他线程中调用
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+
+class AnalysisServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix 套接字分析服务（每个连接一个线程，分析请求由服务锁串行执行）"""
+    
+    daemon_threads = True
+    
+    def __init__(self, socket_path: str, service: AnalysisService):
+        """
+        Args:
+            socket_path: Unix 套接字路径（已存在但无服务监听的套接字文件会被替换）
+            service: 请求处理逻辑
+        """
+        if os.path.exists(socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(socket_path)
+            except OSError:
+                os.unlink(socket_path)
+            else:
+                raise OSError(f"分析服务已在运行: {socket_path}")
+            finally:
+                probe.close()
+        
+        self.socket_path = socket_path
+        self.service = service
+        super().__init__(socket_path, AnalysisRequestHandler)
+    
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def main():
+    """服务入口"""
+    parser = argparse.ArgumentParser(
+        description='VLIW 常驻分析服务：在 Unix 套接字上提供 JSON 行协议的分析请求',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例:
+  # 启动服务（前台运行，Ctrl-C 或 shutdown 请求停止）
+  python server.py --socket /tmp/vliw-analyzer.sock --cache-mb 1024
+  
+  # 使用客户端请求分析
+  python client.py analyze FFT-riscv32.txt --socket /tmp/vliw-analyzer.sock
+        """
+    )
+    parser.add_argument(
+        '--socket', '-s',
+        default=SERVER_SOCKET_PATH,
+        help=f'Unix 套接字路径（默认: {SERVER_SOCKET_PATH}）'
+    )
+    parser.add_argument(
+        '--cache-mb',
+        type=int,
+        default=SERVER_CACHE_BYTES >> 20,
+        help=f'已解析程序缓存的内存上限，单位 MB（默认: {SERVER_CACHE_BYTES >> 20}）'
+    )
+    parser.add_argument(
+        '--function-cache-mb',
+        type=int,
+        default=SERVER_FUNCTION_CACHE_BYTES >> 20,
+        help=f'逐函数结果缓存的内存上限，单位 MB（默认: {SERVER_FUNCTION_CACHE_BYTES >> 20}）'
+    )
+    parser.add_argument(
+        '--no-fast-parse',
+        action='store_true',
+        help='使用逐行解析代替 mmap + 字节正则的快速解析'
+    )
+    
+    args = parser.parse_args()
+    service = AnalysisService(
+        cache_bytes=args.cache_mb << 20,
+        function_cache_bytes=args.function_cache_mb << 20,
+        fast_parse=not args.no_fast_parse
+    )
+    
+    try:
+        server = AnalysisServer(args.socket, service)
+    except OSError as e:
+        print(f"错误：{e}", file=sys.stderr)
+        return 1
+    
+    print(f"分析服务已启动: {args.socket} (pid {os.getpid()})", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    print("分析服务已停止", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
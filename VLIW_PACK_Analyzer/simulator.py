@@ -0,0 +1,1036 @@
+#!/usr/bin/env python3
+"""
+包级功能模拟器：加载平坦镜像或 ELF，按 8 槽位的包执行 RV32IMF 程序，
+统计执行周期与各包的执行次数，用于快速的 what-if 评估
+"""
+
+import sys
+import argparse
+import json
+import math
+import struct
+from array import array
+from typing import Dict, List, Optional, Tuple
+from instruction import Instruction, VLIWPackage
+from timing import StallEstimator
+from encoding import (
+    OPCODE_BRANCH, OPCODE_JAL, OPCODE_JALR, OPCODE_AUIPC, BRANCH_MNEMONICS, LOAD_MNEMONICS,
+    STORE_MNEMONICS, OP_IMM_MNEMONICS, OP_MNEMONICS, FMA_MNEMONICS, FP_ARITH_MNEMONICS,
+    CSR_MNEMONICS, ROUNDING_MODES, opcode, sign_extend, decode_b_imm, decode_j_imm, disassemble
+)
+from config import (
+    VLIW_PACKAGE_SIZE, SIM_BASE_ADDRESS, SIM_MEMORY_BYTES, SIM_END_WORD, SIM_DEVICE_BASE,
+    SIM_DEVICE_BYTES, SIM_UART_ADDRESS, TAKEN_BRANCH_PENALTY
+)
+
+WORD = struct.Struct('<I')
+HALF = struct.Struct('<H')
+SIGNED_HALF = struct.Struct('<h')
+FLOAT = struct.Struct('<f')
+
+MASK = 0xffffffff
+SIGN_BIT = 0x80000000
+CANONICAL_NAN = 0x7fc00000
+
+# 整数寄存器堆多出的一项：写 x0 的结果写到这里，x0 始终为 0
+SINK = 32
+
+BUNDLE_BYTES = 4 * VLIW_PACKAGE_SIZE
+
+# 全部操作；译码表给出操作编号，执行时按编号索引处理函数数组
+OPERATIONS = (
+    'nop', 'lui', 'auipc', 'jal', 'jalr',
+    'beq', 'bne', 'blt', 'bge', 'bltu', 'bgeu',
+    'lb', 'lh', 'lw', 'lbu', 'lhu', 'sb', 'sh', 'sw',
+    'addi', 'slti', 'sltiu', 'xori', 'ori', 'andi', 'slli', 'srli', 'srai',
+    'add', 'sub', 'sll', 'slt', 'sltu', 'xor', 'srl', 'sra', 'or', 'and',
+    'mul', 'mulh', 'mulhsu', 'mulhu', 'div', 'divu', 'rem', 'remu',
+    'csrrw', 'csrrs', 'csrrc', 'csrrwi', 'csrrsi', 'csrrci',
+    'flw', 'fsw', 'fmadd.s', 'fmsub.s', 'fnmsub.s', 'fnmadd.s',
+    'fadd.s', 'fsub.s', 'fmul.s', 'fdiv.s', 'fsqrt.s', 'fsgnj.s', 'fsgnjn.s', 'fsgnjx.s',
+    'fmin.s', 'fmax.s', 'fcvt.w.s', 'fcvt.wu.s', 'fmv.x.w', 'fclass.s',
+    'feq.s', 'flt.s', 'fle.s', 'fcvt.s.w', 'fcvt.s.wu', 'fmv.w.x',
+)
+OP_ID = {name: index for index, name in enumerate(OPERATIONS)}
+NOP_ID = OP_ID['nop']
+
+# 控制转移：处理函数返回跳转目标（不跳转时返回 None），包内其后的槽位不执行
+CONTROL_OPS = frozenset(OP_ID[name] for name in ('jal', 'jalr') + tuple(BRANCH_MNEMONICS.values()))
+
+# 目的寄存器为浮点寄存器的操作（其余操作的 rd 为整数寄存器，x0 映射到 SINK）
+FLOAT_DEST = frozenset((
+    'flw', 'fmadd.s', 'fmsub.s', 'fnmsub.s', 'fnmadd.s', 'fadd.s', 'fsub.s', 'fmul.s', 'fdiv.s',
+    'fsqrt.s', 'fsgnj.s', 'fsgnjn.s', 'fsgnjx.s', 'fmin.s', 'fmax.s', 'fcvt.s.w', 'fcvt.s.wu', 'fmv.w.x'
+))
+
+# 只写整数寄存器、没有其他副作用的操作：目的寄存器为 x0 时在译码时删除
+PURE_INT = frozenset(OPERATIONS[OP_ID['addi']:OP_ID['remu'] + 1]) | {
+    'lui', 'auipc', 'fcvt.w.s', 'fcvt.wu.s', 'fmv.x.w', 'fclass.s', 'feq.s', 'flt.s', 'fle.s'
+}
+
+# ELF：32 位小端 RISC-V 可执行文件的文件头与程序头
+ELF_MAGIC = b'\x7fELF'
+ELF_HEADER = struct.Struct('<16sHHIIIIIHHHHHH')
+ELF_PROGRAM_HEADER = struct.Struct('<8I')
+EM_RISCV = 0xf3
+PT_LOAD = 1
+
+
+def decode_word(word: int) -> Optional[Tuple[int, int, int, int, int]]:
+    """
+    将 RV32IMF 指令字译码为 (操作编号, rd, rs1, rs2, imm)
+    
+    整数目的寄存器 x0 映射为 SINK；fmadd 等四操作数指令的 rs3 放在 imm，
+    fcvt.w[u].s 的舍入模式放在 imm，CSR 指令的 CSR 编号放在 imm。
+    fence 与写 x0 的纯运算译码为 nop。
+    
+    Args:
+        word: 32 位指令字
+    
+    Returns:
+        译码结果，不支持的指令（ecall、非法编码等）返回 None
+    """
+    op = opcode(word)
+    rd = (word >> 7) & 0x1f
+    funct3 = (word >> 12) & 0x7
+    rs1 = (word >> 15) & 0x1f
+    rs2 = (word >> 20) & 0x1f
+    funct7 = word >> 25
+    i_imm = sign_extend(word >> 20, 12)
+    name = None
+    imm = 0
+    
+    if op == 0x37:
+        name, imm = 'lui', word & 0xfffff000
+    elif op == OPCODE_AUIPC:
+        name, imm = 'auipc', word & 0xfffff000
+    elif op == OPCODE_JAL:
+        name, imm = 'jal', decode_j_imm(word)
+    elif op == OPCODE_JALR and funct3 == 0:
+        name, imm = 'jalr', i_imm
+    elif op == OPCODE_BRANCH and funct3 in BRANCH_MNEMONICS:
+        name, imm = BRANCH_MNEMONICS[funct3], decode_b_imm(word)
+    elif op == 0x03 and funct3 in LOAD_MNEMONICS:
+        name, imm = LOAD_MNEMONICS[funct3], i_imm
+    elif op == 0x23 and funct3 in STORE_MNEMONICS:
+        name, imm = STORE_MNEMONICS[funct3], sign_extend((funct7 << 5) | rd, 12)
+    elif op == 0x07 and funct3 == 2:
+        name, imm = 'flw', i_imm
+    elif op == 0x27 and funct3 == 2:
+        name, imm = 'fsw', sign_extend((funct7 << 5) | rd, 12)
+    elif op == 0x13:
+        if funct3 == 1 and funct7 == 0:
+            name, imm = 'slli', rs2
+        elif funct3 == 5 and funct7 in (0x00, 0x20):
+            name, imm = ('srai' if funct7 else 'srli'), rs2
+        elif funct3 not in (1, 5):
+            name, imm = OP_IMM_MNEMONICS[funct3], i_imm
+    elif op == 0x33 and funct7 in OP_MNEMONICS:
+        name = OP_MNEMONICS[funct7][funct3]
+    elif op == 0x0f:
+        name = 'nop'
+    elif op == 0x73 and funct3 in CSR_MNEMONICS:
+        name, imm = CSR_MNEMONICS[funct3], word >> 20
+    elif op in FMA_MNEMONICS and (funct7 & 0x3) == 0 and ROUNDING_MODES[funct3]:
+        name, imm = FMA_MNEMONICS[op], word >> 27
+    elif op == 0x53:
+        rm_ok = ROUNDING_MODES[funct3] is not None
+        if funct7 in FP_ARITH_MNEMONICS and rm_ok:
+            name = FP_ARITH_MNEMONICS[funct7]
+        elif funct7 == 0x2c and rs2 == 0 and rm_ok:
+            name = 'fsqrt.s'
+        elif funct7 == 0x10 and funct3 <= 2:
+            name = ('fsgnj.s', 'fsgnjn.s', 'fsgnjx.s')[funct3]
+        elif funct7 == 0x14 and funct3 <= 1:
+            name = ('fmin.s', 'fmax.s')[funct3]
+        elif funct7 == 0x60 and rs2 <= 1 and rm_ok:
+            # 动态舍入（dyn）按 fcsr 的复位值 rne 处理
+            name, imm = ('fcvt.w.s', 'fcvt.wu.s')[rs2], funct3 if funct3 != 7 else 0
+        elif funct7 == 0x68 and rs2 <= 1 and rm_ok:
+            name = ('fcvt.s.w', 'fcvt.s.wu')[rs2]
+        elif funct7 == 0x70 and rs2 == 0 and funct3 <= 1:
+            name = ('fmv.x.w', 'fclass.s')[funct3]
+        elif funct7 == 0x78 and rs2 == 0 and funct3 == 0:
+            name = 'fmv.w.x'
+        elif funct7 == 0x50 and funct3 <= 2:
+            name = ('fle.s', 'flt.s', 'feq.s')[funct3]
+    
+    if name is None:
+        return None
+    if rd == 0 and name in PURE_INT:
+        name = 'nop'
+    if name == 'nop':
+        return NOP_ID, 0, 0, 0, 0
+    if rd == 0 and name not in FLOAT_DEST:
+        rd = SINK
+    return OP_ID[name], rd, rs1, rs2, imm
+
+
+def _to_float(bits: int) -> float:
+    return FLOAT.unpack(WORD.pack(bits))[0]
+
+
+def _to_bits(value: float) -> int:
+    """按就近舍入转换为单精度位模式：溢出为无穷，NaN 为规范 NaN"""
+    if value != value:
+        return CANONICAL_NAN
+    try:
+        return WORD.unpack(FLOAT.pack(value))[0]
+    except OverflowError:
+        return 0xff800000 if value < 0 else 0x7f800000
+
+
+def _divide_float(a: float, b: float) -> float:
+    if b == 0.0:
+        if a == 0.0 or a != a:
+            return math.nan
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+# 浮点转整数的舍入模式 rm -> 取整函数
+ROUND_TO_INT = {
+    0: round,
+    1: math.trunc,
+    2: math.floor,
+    3: math.ceil,
+    4: lambda v: math.floor(v + 0.5) if v >= 0 else -math.floor(0.5 - v),
+}
+
+
+def _float_to_int(value: float, rm: int, low: int, high: int) -> int:
+    """fcvt.w[u].s：按舍入模式取整后饱和，NaN 视为正无穷"""
+    if value != value or value > high + 1:
+        return high & MASK
+    if value < low - 1:
+        return low & MASK
+    return min(max(ROUND_TO_INT[rm](value), low), high) & MASK
+
+
+def _fclass(bits: int) -> int:
+    """fclass.s：负无穷 .. 正无穷依次为位 0-7，sNaN 为位 8，qNaN 为位 9"""
+    exponent = (bits >> 23) & 0xff
+    fraction = bits & 0x7fffff
+    if exponent == 0xff and fraction:
+        return 1 << (9 if fraction >> 22 else 8)
+    if exponent == 0xff:
+        category = 0
+    elif exponent:
+        category = 1
+    else:
+        category = 2 if fraction else 3
+    return 1 << (category if bits >> 31 else 7 - category)
+
+
+def _min_max(a_bits: int, b_bits: int, want_min: bool) -> int:
+    """fmin.s / fmax.s：一个操作数为 NaN 时返回另一个，-0 小于 +0"""
+    a = _to_float(a_bits)
+    b = _to_float(b_bits)
+    if a != a:
+        return b_bits if b == b else CANONICAL_NAN
+    if b != b:
+        return a_bits
+    if a == b:
+        return a_bits | b_bits if want_min else a_bits & b_bits
+    return a_bits if (a < b) == want_min else b_bits
+
+
+def load_image(path: str, base_address: int = SIM_BASE_ADDRESS) -> Tuple[List[Tuple[int, bytes]], int]:
+    """
+    读取程序镜像
+    
+    - ELF：32 位小端 RISC-V 可执行文件，按程序头加载各 PT_LOAD 段（memsz 超出 filesz 的部分填 0），
+      入口地址为 e_entry
+    - .hex：每行一个 32 位字（与 --export-image hex 相同），从 base_address 开始
+    - 其他：小端序平坦二进制，第 0 字节对应 base_address（与 Memory.loadFromFile 相同）
+    
+    Args:
+        path: 镜像文件路径
+        base_address: 平坦镜像的加载地址
+    
+    Returns:
+        ([(加载地址, 内容), ...], 入口地址)
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:4] == ELF_MAGIC:
+        return _load_elf(data, path)
+    if path.endswith('.hex'):
+        words = array('I', (
+            int(line, 16) for line in data.decode('utf-8').splitlines()
+            if line.strip() and not line.lstrip().startswith('#')
+        ))
+        if sys.byteorder != 'little':
+            words.byteswap()
+        data = words.tobytes()
+    return [(base_address, data)], base_address
+
+
+def _load_elf(data: bytes, path: str) -> Tuple[List[Tuple[int, bytes]], int]:
+    """解析 ELF 的程序头，返回各加载段与入口地址"""
+    if len(data) < ELF_HEADER.size:
+        raise ValueError(f"ELF 文件头不完整: {path}")
+    ident, _, machine, _, entry, phoff, _, _, _, phentsize, phnum, _, _, _ = ELF_HEADER.unpack_from(data)
+    if ident[4] != 1 or ident[5] != 1 or machine != EM_RISCV:
+        raise ValueError(f"只支持 32 位小端 RISC-V ELF: {path}")
+    segments = []
+    for index in range(phnum):
+        p_type, offset, vaddr, _, filesz, memsz, _, _ = ELF_PROGRAM_HEADER.unpack_from(data, phoff + index * phentsize)
+        if p_type == PT_LOAD and memsz:
+            segments.append((vaddr, data[offset:offset + filesz] + bytes(memsz - filesz)))
+    return segments, entry
+
+
+class BundleSimulator:
+    """
+    RV32IMF 包级功能模拟器
+    
+    与 Zircon 的取指方式相同，每次从 PC 起取 8 个连续的字作为一个包（PC 不要求对齐），
+    包内按槽位顺序执行（包内前面槽位的结果前递给后面的槽位，合法的重打包结果与
+    按槽位顺序执行等价，见 equivalence.py）；第一个成立的跳转之后的槽位不执行，
+    没有跳转时下一个包从 PC + 32 开始。取到 SIM_END_WORD 时结束模拟，之前的槽位正常执行。
+    
+    执行路径按两级预计算加速：
+    - 译码表：指令字 -> (操作编号, rd, rs1, rs2, imm)，加载镜像时对全部字预先译码
+    - 包缓存：包起始 PC -> 按跳转指令切分的操作段，每个操作已按编号取出处理函数，
+      同时保存对应的 VLIWPackage，供停顿模型（默认 StallEstimator）逐包估算周期
+    指令字在第一次执行时写入包缓存，不支持自修改代码。
+    """
+    
+    def __init__(
+        self,
+        base_address: int = SIM_BASE_ADDRESS,
+        memory_bytes: int = SIM_MEMORY_BYTES,
+        timing: StallEstimator = None,
+        branch_penalty: int = TAKEN_BRANCH_PENALTY,
+        estimate_cycles: bool = True
+    ):
+        """
+        Args:
+            base_address: 内存起始地址
+            memory_bytes: 内存大小（字节）
+            timing: 停顿模型（提供 timeline()，逐包 add_package / add_bubble，默认 StallEstimator()）
+            branch_penalty: 每次跳转的额外周期
+            estimate_cycles: 为 False 时只做功能模拟，不估算周期
+        """
+        if memory_bytes < BUNDLE_BYTES:
+            raise ValueError(f"内存大小过小: {memory_bytes}")
+        self.base_address = base_address
+        self.memory = bytearray(memory_bytes)
+        if estimate_cycles and timing is None:
+            timing = StallEstimator()
+        self.timing = timing if estimate_cycles else None
+        self.branch_penalty = branch_penalty
+        
+        self.x = [0] * (SINK + 1)
+        self.f = [0] * 32
+        self.csr: Dict[int, int] = {}
+        self.pc = base_address
+        self.console = bytearray()  # UART 输出
+        
+        self.decode_table: Dict[int, Optional[Tuple[int, int, int, int, int]]] = {}
+        self.bundles: Dict[int, list] = {}  # PC -> [操作段, 是否结束, 执行次数]
+        self.dispatch = self._build_dispatch()
+    
+    def load(self, segments: List[Tuple[int, bytes]], entry: int):
+        """
+        写入程序段并设置入口
+        
+        Args:
+            segments: [(加载地址, 内容), ...]（见 load_image）
+            entry: 入口地址
+        """
+        for address, data in segments:
+            offset = address - self.base_address
+            if offset < 0 or offset + len(data) > len(self.memory):
+                raise ValueError(f"程序段 0x{address:08x} (+{len(data)} 字节) 超出模拟内存范围")
+            self.memory[offset:offset + len(data)] = data
+            # 预先译码段内全部字（数据段的字也一并译码，不支持的编码记为 None）
+            words = array('I', data[:len(data) & ~3])
+            if sys.byteorder != 'little':
+                words.byteswap()
+            for word in set(words).difference(self.decode_table):
+                self.decode_table[word] = decode_word(word)
+        self.pc = entry
+        self.bundles.clear()
+    
+    def load_file(self, path: str):
+        """加载镜像文件（格式见 load_image）"""
+        self.load(*load_image(path, self.base_address))
+    
+    def _device_load(self, offset: int, size: int, pc: int) -> int:
+        """内存范围以外的读：外设返回 0，其余地址报错"""
+        address = (offset + self.base_address) & MASK
+        if SIM_DEVICE_BASE <= address < SIM_DEVICE_BASE + SIM_DEVICE_BYTES:
+            return 0
+        raise RuntimeError(f"读地址越界: 0x{address:08x}（{size} 字节，pc 0x{pc:08x}）")
+    
+    def _device_store(self, offset: int, value: int, size: int, pc: int):
+        """内存范围以外的写：UART 输出低字节，其余外设忽略，其余地址报错"""
+        address = (offset + self.base_address) & MASK
+        if address == SIM_UART_ADDRESS:
+            self.console.append(value & 0xff)
+        elif not SIM_DEVICE_BASE <= address < SIM_DEVICE_BASE + SIM_DEVICE_BYTES:
+            raise RuntimeError(f"写地址越界: 0x{address:08x}（{size} 字节，pc 0x{pc:08x}）")
+    
+    def _build_dispatch(self) -> list:
+        """
+        构建按操作编号索引的处理函数数组
+        
+        处理函数签名为 (rd, rs1, rs2, imm, pc)，直接读写寄存器列表与内存；
+        控制转移返回跳转目标，其余返回 None。
+        """
+        x = self.x
+        f = self.f
+        csr = self.csr
+        data = self.memory
+        base = self.base_address
+        byte_limit = len(data)
+        half_limit = byte_limit - 1
+        word_limit = byte_limit - 3
+        read_word = WORD.unpack_from
+        write_word = WORD.pack_into
+        read_half = HALF.unpack_from
+        read_signed_half = SIGNED_HALF.unpack_from
+        write_half = HALF.pack_into
+        device_load = self._device_load
+        device_store = self._device_store
+        to_float = _to_float
+        to_bits = _to_bits
+        
+        def nop(rd, rs1, rs2, imm, pc):
+            pass
+        
+        def lui(rd, rs1, rs2, imm, pc):
+            x[rd] = imm
+        
+        def auipc(rd, rs1, rs2, imm, pc):
+            x[rd] = (pc + imm) & MASK
+        
+        def jal(rd, rs1, rs2, imm, pc):
+            x[rd] = (pc + 4) & MASK
+            return (pc + imm) & MASK
+        
+        def jalr(rd, rs1, rs2, imm, pc):
+            target = (x[rs1] + imm) & 0xfffffffe
+            x[rd] = (pc + 4) & MASK
+            return target
+        
+        def beq(rd, rs1, rs2, imm, pc):
+            if x[rs1] == x[rs2]:
+                return (pc + imm) & MASK
+        
+        def bne(rd, rs1, rs2, imm, pc):
+            if x[rs1] != x[rs2]:
+                return (pc + imm) & MASK
+        
+        def blt(rd, rs1, rs2, imm, pc):
+            if (x[rs1] ^ SIGN_BIT) < (x[rs2] ^ SIGN_BIT):
+                return (pc + imm) & MASK
+        
+        def bge(rd, rs1, rs2, imm, pc):
+            if (x[rs1] ^ SIGN_BIT) >= (x[rs2] ^ SIGN_BIT):
+                return (pc + imm) & MASK
+        
+        def bltu(rd, rs1, rs2, imm, pc):
+            if x[rs1] < x[rs2]:
+                return (pc + imm) & MASK
+        
+        def bgeu(rd, rs1, rs2, imm, pc):
+            if x[rs1] >= x[rs2]:
+                return (pc + imm) & MASK
+        
+        # 访存：偏移按 32 位回绕，低于基址的地址回绕为很大的偏移，统一走越界路径
+        def lb(rd, rs1, rs2, imm, pc):
+            offset = (x[rs1] + imm - base) & MASK
+            value = data[offset] if offset < byte_limit else device_load(offset, 1, pc)
+            x[rd] = ((value ^ 0x80) - 0x80) & MASK
+        
+        def lh(rd, rs1, rs2, imm, pc):
+            offset = (x[rs1] + imm - base) & MASK
+            if offset < half_limit:
+                x[rd] = read_signed_half(data, offset)[0] & MASK
+            else:
+                x[rd] = device_load(offset, 2, pc)
+        
+        def lw(rd, rs1, rs2, imm, pc):
+            offset = (x[rs1] + imm - base) & MASK
+            x[rd] = read_word(data, offset)[0] if offset < word_limit else device_load(offset, 4, pc)
+        
+        def lbu(rd, rs1, rs2, imm, pc):
+            offset = (x[rs1] + imm - base) & MASK
+            x[rd] = data[offset] if offset < byte_limit else device_load(offset, 1, pc)
+        
+        def lhu(rd, rs1, rs2, imm, pc):
+            offset = (x[rs1] + imm - base) & MASK
+            x[rd] = read_half(data, offset)[0] if offset < half_limit else device_load(offset, 2, pc)
+        
+        def sb(rd, rs1, rs2, imm, pc):
+            offset = (x[rs1] + imm - base) & MASK
+            if offset < byte_limit:
+                data[offset] = x[rs2] & 0xff
+            else:
+                device_store(offset, x[rs2], 1, pc)
+        
+        def sh(rd, rs1, rs2, imm, pc):
+            offset = (x[rs1] + imm - base) & MASK
+            if offset < half_limit:
+                write_half(data, offset, x[rs2] & 0xffff)
+            else:
+                device_store(offset, x[rs2], 2, pc)
+        
+        def sw(rd, rs1, rs2, imm, pc):
+            offset = (x[rs1] + imm - base) & MASK
+            if offset < word_limit:
+                write_word(data, offset, x[rs2])
+            else:
+                device_store(offset, x[rs2], 4, pc)
+        
+        def addi(rd, rs1, rs2, imm, pc):
+            x[rd] = (x[rs1] + imm) & MASK
+        
+        def slti(rd, rs1, rs2, imm, pc):
+            x[rd] = 1 if (x[rs1] ^ SIGN_BIT) < ((imm & MASK) ^ SIGN_BIT) else 0
+        
+        def sltiu(rd, rs1, rs2, imm, pc):
+            x[rd] = 1 if x[rs1] < (imm & MASK) else 0
+        
+        def xori(rd, rs1, rs2, imm, pc):
+            x[rd] = (x[rs1] ^ imm) & MASK
+        
+        def ori(rd, rs1, rs2, imm, pc):
+            x[rd] = (x[rs1] | imm) & MASK
+        
+        def andi(rd, rs1, rs2, imm, pc):
+            x[rd] = x[rs1] & imm & MASK
+        
+        def slli(rd, rs1, rs2, imm, pc):
+            x[rd] = (x[rs1] << imm) & MASK
+        
+        def srli(rd, rs1, rs2, imm, pc):
+            x[rd] = x[rs1] >> imm
+        
+        def srai(rd, rs1, rs2, imm, pc):
+            value = x[rs1]
+            x[rd] = ((value ^ SIGN_BIT) - SIGN_BIT >> imm) & MASK
+        
+        def add(rd, rs1, rs2, imm, pc):
+            x[rd] = (x[rs1] + x[rs2]) & MASK
+        
+        def sub(rd, rs1, rs2, imm, pc):
+            x[rd] = (x[rs1] - x[rs2]) & MASK
+        
+        def sll(rd, rs1, rs2, imm, pc):
+            x[rd] = (x[rs1] << (x[rs2] & 31)) & MASK
+        
+        def slt(rd, rs1, rs2, imm, pc):
+            x[rd] = 1 if (x[rs1] ^ SIGN_BIT) < (x[rs2] ^ SIGN_BIT) else 0
+        
+        def sltu(rd, rs1, rs2, imm, pc):
+            x[rd] = 1 if x[rs1] < x[rs2] else 0
+        
+        def xor(rd, rs1, rs2, imm, pc):
+            x[rd] = x[rs1] ^ x[rs2]
+        
+        def srl(rd, rs1, rs2, imm, pc):
+            x[rd] = x[rs1] >> (x[rs2] & 31)
+        
+        def sra(rd, rs1, rs2, imm, pc):
+            x[rd] = ((x[rs1] ^ SIGN_BIT) - SIGN_BIT >> (x[rs2] & 31)) & MASK
+        
+        def or_(rd, rs1, rs2, imm, pc):
+            x[rd] = x[rs1] | x[rs2]
+        
+        def and_(rd, rs1, rs2, imm, pc):
+            x[rd] = x[rs1] & x[rs2]
+        
+        def mul(rd, rs1, rs2, imm, pc):
+            x[rd] = (x[rs1] * x[rs2]) & MASK
+        
+        def mulh(rd, rs1, rs2, imm, pc):
+            x[rd] = (((x[rs1] ^ SIGN_BIT) - SIGN_BIT) * ((x[rs2] ^ SIGN_BIT) - SIGN_BIT) >> 32) & MASK
+        
+        def mulhsu(rd, rs1, rs2, imm, pc):
+            x[rd] = (((x[rs1] ^ SIGN_BIT) - SIGN_BIT) * x[rs2] >> 32) & MASK
+        
+        def mulhu(rd, rs1, rs2, imm, pc):
+            x[rd] = x[rs1] * x[rs2] >> 32
+        
+        def _quotient(a, b):
+            """有符号除法：向零舍入"""
+            a = (a ^ SIGN_BIT) - SIGN_BIT
+            b = (b ^ SIGN_BIT) - SIGN_BIT
+            quotient = abs(a) // abs(b)
+            return (-quotient if (a < 0) != (b < 0) else quotient), a, b
+        
+        # 除数为 0 时商为全 1、余数为被除数；溢出（-2^31 / -1）的结果由 32 位截断自然得到
+        def div(rd, rs1, rs2, imm, pc):
+            if x[rs2] == 0:
+                x[rd] = MASK
+            else:
+                x[rd] = _quotient(x[rs1], x[rs2])[0] & MASK
+        
+        def divu(rd, rs1, rs2, imm, pc):
+            x[rd] = x[rs1] // x[rs2] if x[rs2] else MASK
+        
+        def rem(rd, rs1, rs2, imm, pc):
+            if x[rs2] == 0:
+                x[rd] = x[rs1]
+            else:
+                quotient, a, b = _quotient(x[rs1], x[rs2])
+                x[rd] = (a - quotient * b) & MASK
+        
+        def remu(rd, rs1, rs2, imm, pc):
+            x[rd] = x[rs1] % x[rs2] if x[rs2] else x[rs1]
+        
+        # CSR：只保存写入的值（fflags 等不随浮点运算更新）；rs1 字段为 x0 / 立即数 0 的置位 / 清零不写 CSR
+        def csrrw(rd, rs1, rs2, imm, pc):
+            value = x[rs1]
+            x[rd] = csr.get(imm, 0)
+            csr[imm] = value
+        
+        def csrrs(rd, rs1, rs2, imm, pc):
+            value = x[rs1]
+            old = x[rd] = csr.get(imm, 0)
+            if rs1:
+                csr[imm] = old | value
+        
+        def csrrc(rd, rs1, rs2, imm, pc):
+            value = x[rs1]
+            old = x[rd] = csr.get(imm, 0)
+            if rs1:
+                csr[imm] = old & ~value & MASK
+        
+        def csrrwi(rd, rs1, rs2, imm, pc):
+            x[rd] = csr.get(imm, 0)
+            csr[imm] = rs1
+        
+        def csrrsi(rd, rs1, rs2, imm, pc):
+            old = x[rd] = csr.get(imm, 0)
+            if rs1:
+                csr[imm] = old | rs1
+        
+        def csrrci(rd, rs1, rs2, imm, pc):
+            old = x[rd] = csr.get(imm, 0)
+            if rs1:
+                csr[imm] = old & ~rs1 & MASK
+        
+        def flw(rd, rs1, rs2, imm, pc):
+            offset = (x[rs1] + imm - base) & MASK
+            f[rd] = read_word(data, offset)[0] if offset < word_limit else device_load(offset, 4, pc)
+        
+        def fsw(rd, rs1, rs2, imm, pc):
+            offset = (x[rs1] + imm - base) & MASK
+            if offset < word_limit:
+                write_word(data, offset, f[rs2])
+            else:
+                device_store(offset, f[rs2], 4, pc)
+        
+        # 乘加以双精度计算（单精度乘积在双精度下精确）后舍入到单精度
+        def fmadd(rd, rs1, rs2, imm, pc):
+            f[rd] = to_bits(to_float(f[rs1]) * to_float(f[rs2]) + to_float(f[imm]))
+        
+        def fmsub(rd, rs1, rs2, imm, pc):
+            f[rd] = to_bits(to_float(f[rs1]) * to_float(f[rs2]) - to_float(f[imm]))
+        
+        def fnmsub(rd, rs1, rs2, imm, pc):
+            f[rd] = to_bits(to_float(f[imm]) - to_float(f[rs1]) * to_float(f[rs2]))
+        
+        def fnmadd(rd, rs1, rs2, imm, pc):
+            f[rd] = to_bits(-(to_float(f[rs1]) * to_float(f[rs2])) - to_float(f[imm]))
+        
+        def fadd(rd, rs1, rs2, imm, pc):
+            f[rd] = to_bits(to_float(f[rs1]) + to_float(f[rs2]))
+        
+        def fsub(rd, rs1, rs2, imm, pc):
+            f[rd] = to_bits(to_float(f[rs1]) - to_float(f[rs2]))
+        
+        def fmul(rd, rs1, rs2, imm, pc):
+            f[rd] = to_bits(to_float(f[rs1]) * to_float(f[rs2]))
+        
+        def fdiv(rd, rs1, rs2, imm, pc):
+            f[rd] = to_bits(_divide_float(to_float(f[rs1]), to_float(f[rs2])))
+        
+        def fsqrt(rd, rs1, rs2, imm, pc):
+            value = to_float(f[rs1])
+            f[rd] = to_bits(math.sqrt(value) if value >= 0 else math.nan)
+        
+        def fsgnj(rd, rs1, rs2, imm, pc):
+            f[rd] = (f[rs1] & ~SIGN_BIT) | (f[rs2] & SIGN_BIT)
+        
+        def fsgnjn(rd, rs1, rs2, imm, pc):
+            f[rd] = (f[rs1] & ~SIGN_BIT) | (~f[rs2] & SIGN_BIT)
+        
+        def fsgnjx(rd, rs1, rs2, imm, pc):
+            f[rd] = f[rs1] ^ (f[rs2] & SIGN_BIT)
+        
+        def fmin(rd, rs1, rs2, imm, pc):
+            f[rd] = _min_max(f[rs1], f[rs2], True)
+        
+        def fmax(rd, rs1, rs2, imm, pc):
+            f[rd] = _min_max(f[rs1], f[rs2], False)
+        
+        def fcvt_w(rd, rs1, rs2, imm, pc):
+            x[rd] = _float_to_int(to_float(f[rs1]), imm, -(1 << 31), (1 << 31) - 1)
+        
+        def fcvt_wu(rd, rs1, rs2, imm, pc):
+            x[rd] = _float_to_int(to_float(f[rs1]), imm, 0, MASK)
+        
+        def fmv_x(rd, rs1, rs2, imm, pc):
+            x[rd] = f[rs1]
+        
+        def fclass(rd, rs1, rs2, imm, pc):
+            x[rd] = _fclass(f[rs1])
+        
+        def feq(rd, rs1, rs2, imm, pc):
+            x[rd] = 1 if to_float(f[rs1]) == to_float(f[rs2]) else 0
+        
+        def flt(rd, rs1, rs2, imm, pc):
+            x[rd] = 1 if to_float(f[rs1]) < to_float(f[rs2]) else 0
+        
+        def fle(rd, rs1, rs2, imm, pc):
+            x[rd] = 1 if to_float(f[rs1]) <= to_float(f[rs2]) else 0
+        
+        def fcvt_s_w(rd, rs1, rs2, imm, pc):
+            f[rd] = to_bits(float((x[rs1] ^ SIGN_BIT) - SIGN_BIT))
+        
+        def fcvt_s_wu(rd, rs1, rs2, imm, pc):
+            f[rd] = to_bits(float(x[rs1]))
+        
+        def fmv_w(rd, rs1, rs2, imm, pc):
+            f[rd] = x[rs1]
+        
+        handlers = {
+            'nop': nop, 'lui': lui, 'auipc': auipc, 'jal': jal, 'jalr': jalr,
+            'beq': beq, 'bne': bne, 'blt': blt, 'bge': bge, 'bltu': bltu, 'bgeu': bgeu,
+            'lb': lb, 'lh': lh, 'lw': lw, 'lbu': lbu, 'lhu': lhu, 'sb': sb, 'sh': sh, 'sw': sw,
+            'addi': addi, 'slti': slti, 'sltiu': sltiu, 'xori': xori, 'ori': ori, 'andi': andi,
+            'slli': slli, 'srli': srli, 'srai': srai,
+            'add': add, 'sub': sub, 'sll': sll, 'slt': slt, 'sltu': sltu, 'xor': xor,
+            'srl': srl, 'sra': sra, 'or': or_, 'and': and_,
+            'mul': mul, 'mulh': mulh, 'mulhsu': mulhsu, 'mulhu': mulhu,
+            'div': div, 'divu': divu, 'rem': rem, 'remu': remu,
+            'csrrw': csrrw, 'csrrs': csrrs, 'csrrc': csrrc, 'csrrwi': csrrwi, 'csrrsi': csrrsi, 'csrrci': csrrci,
+            'flw': flw, 'fsw': fsw, 'fmadd.s': fmadd, 'fmsub.s': fmsub, 'fnmsub.s': fnmsub, 'fnmadd.s': fnmadd,
+            'fadd.s': fadd, 'fsub.s': fsub, 'fmul.s': fmul, 'fdiv.s': fdiv, 'fsqrt.s': fsqrt,
+            'fsgnj.s': fsgnj, 'fsgnjn.s': fsgnjn, 'fsgnjx.s': fsgnjx, 'fmin.s': fmin, 'fmax.s': fmax,
+            'fcvt.w.s': fcvt_w, 'fcvt.wu.s': fcvt_wu, 'fmv.x.w': fmv_x, 'fclass.s': fclass,
+            'feq.s': feq, 'flt.s': flt, 'fle.s': fle, 'fcvt.s.w': fcvt_s_w, 'fcvt.s.wu': fcvt_s_wu,
+            'fmv.w.x': fmv_w,
+        }
+        return [handlers[name] for name in OPERATIONS]
+    
+    def _fetch(self, address: int) -> int:
+        offset = (address - self.base_address) & MASK
+        if offset >= len(self.memory) - 3:
+            raise RuntimeError(f"取指地址越界: 0x{address:08x}")
+        return WORD.unpack_from(self.memory, offset)[0]
+    
+    def _build_bundle(self, pc: int) -> list:
+        """
+        取出并预处理从 pc 开始的包
+        
+        Returns:
+            [操作段, 是否结束, 执行次数]：操作段为 [(操作列表, 累计有效指令数, VLIWPackage)]，
+            每段在控制转移指令处结束，最后一段为最后一条控制转移之后的槽位（可能为空）；
+            是否结束表示包内含 SIM_END_WORD（其后的槽位不执行）
+        """
+        segments = []
+        ops = []
+        pkg = VLIWPackage(pc)
+        executed = 0
+        ends = False
+        for slot in range(VLIW_PACKAGE_SIZE):
+            address = (pc + 4 * slot) & MASK
+            word = self._fetch(address)
+            if word == SIM_END_WORD:
+                ends = True
+                break
+            if word in self.decode_table:
+                decoded = self.decode_table[word]
+            else:
+                decoded = self.decode_table[word] = decode_word(word)
+            if decoded is None:
+                raise RuntimeError(f"不支持的指令: 0x{word:08x}（地址 0x{address:08x}）")
+            
+            op_id, rd, rs1, rs2, imm = decoded
+            if self.timing is not None:
+                pkg.add_instruction(Instruction(address, f"{word:08x}", *disassemble(word, address)))
+            if op_id == NOP_ID:
+                continue
+            ops.append((self.dispatch[op_id], rd, rs1, rs2, imm, address))
+            executed += 1
+            if op_id in CONTROL_OPS:
+                segments.append((ops, executed, pkg))
+                ops = []
+                pkg = self._copy_package(pkg)
+        segments.append((ops, executed, pkg))
+        return [segments, ends, 0]
+    
+    @staticmethod
+    def _copy_package(pkg: VLIWPackage) -> VLIWPackage:
+        copy = VLIWPackage(pkg.start_address)
+        for inst in pkg.instructions:
+            copy.add_instruction(inst)
+        return copy
+    
+    def run(
+        self,
+        fast_forward: Optional[int] = None,
+        max_instructions: Optional[int] = None,
+        trace: Optional[List[int]] = None
+    ) -> Dict:
+        """
+        从当前 PC 执行到程序结束或达到指令数上限
+        
+        Args:
+            fast_forward: 快进目标 PC：先只做功能模拟（不计周期与执行次数）直到某个包从该 PC 开始
+            max_instructions: 计入统计的最多有效指令数（按整包检查，可能略微超出）
+            trace: 给定时按执行顺序追加每个包的起始 PC（可用作 --icache-trace 的取包序列）
+        
+        Returns:
+            {'entry', 'pc', 'ended', 'a0', 'passed', 'fast_forward', 'instructions', 'bundles',
+             'taken_branches', 'data_stalls', 'divide_stalls', 'branch_stalls', 'stalls', 'cycles',
+             'ipc', 'bundle_counts', 'console'}；
+            ended 表示取到了结束标记，bundle_counts 为 包起始 PC -> 执行次数，
+            不估算周期时周期相关的值为 None
+        """
+        entry = self.pc
+        skipped = None
+        if fast_forward is not None:
+            ended, instructions, bundles, _ = self._execute(fast_forward, None, None, None)
+            skipped = {
+                'pc': f"0x{fast_forward:08x}",
+                'reached': self.pc == fast_forward and not ended,
+                'instructions': instructions,
+                'bundles': bundles
+            }
+            if ended:
+                return self._result(entry, True, skipped, 0, 0, 0, None)
+        
+        for bundle in self.bundles.values():
+            bundle[2] = 0
+        timeline = self.timing.timeline() if self.timing is not None else None
+        ended, instructions, bundles, taken = self._execute(None, max_instructions, timeline, trace)
+        return self._result(entry, ended, skipped, instructions, bundles, taken, timeline)
+    
+    def _execute(self, stop_pc, max_instructions, timeline, trace) -> Tuple[bool, int, int, int]:
+        """
+        模拟主循环
+        
+        stop_pc 为 None 时统计各包执行次数，否则为快进：在到达 stop_pc 时停止且不计数。
+        
+        Returns:
+            (是否取到结束标记, 有效指令数, 包数, 跳转次数)
+        """
+        cache = self.bundles
+        build = self._build_bundle
+        limit = max_instructions if max_instructions is not None else sys.maxsize
+        counting = stop_pc is None
+        penalty = self.branch_penalty
+        pc = self.pc
+        instructions = 0
+        bundles = 0
+        taken = 0
+        ended = False
+        
+        while instructions < limit:
+            if pc == stop_pc:
+                break
+            bundle = cache.get(pc)
+            if bundle is None:
+                bundle = cache[pc] = build(pc)
+            
+            target = None
+            for ops, executed, pkg in bundle[0]:
+                for handler, rd, rs1, rs2, imm, address in ops:
+                    target = handler(rd, rs1, rs2, imm, address)
+                if target is not None:
+                    break
+            
+            instructions += executed
+            bundles += 1
+            if counting:
+                bundle[2] += 1
+            if timeline is not None:
+                timeline.add_package(pkg)
+            if trace is not None:
+                trace.append(pc)
+            if target is not None:
+                taken += 1
+                if timeline is not None:
+                    timeline.add_bubble(penalty)
+                pc = target
+            elif bundle[1]:
+                ended = True
+                break
+            else:
+                pc = (pc + BUNDLE_BYTES) & MASK
+        
+        self.pc = pc
+        return ended, instructions, bundles, taken
+    
+    def _result(self, entry, ended, skipped, instructions, bundles, taken, timeline) -> Dict:
+        """汇总模拟结果"""
+        a0 = self.x[10]
+        result = {
+            'entry': f"0x{entry:08x}",
+            'pc': f"0x{self.pc:08x}",
+            'ended': ended,
+            'a0': a0,
+            'passed': ended and a0 == 0,
+            'fast_forward': skipped,
+            'instructions': instructions,
+            'bundles': bundles,
+            'taken_branches': taken,
+            'data_stalls': None,
+            'divide_stalls': None,
+            'branch_stalls': None,
+            'stalls': None,
+            'cycles': None,
+            'ipc': None,
+            'bundle_counts': {pc: bundle[2] for pc, bundle in self.bundles.items() if bundle[2]},
+            'console': self.console.decode('utf-8', 'replace')
+        }
+        if timeline is not None:
+            timing = timeline.result()
+            branch_stalls = taken * self.branch_penalty
+            result.update({
+                'data_stalls': timing['data_stalls'],
+                'divide_stalls': timing['divide_stalls'],
+                'branch_stalls': branch_stalls,
+                'stalls': timing['stalls'] + branch_stalls,
+                'cycles': timing['cycles'],
+                'ipc': round(instructions / timing['cycles'], 4) if timing['cycles'] else 0.0
+            })
+        return result
+
+
+def format_result(result: Dict) -> List[str]:
+    """模拟结果的文本摘要"""
+    lines = [
+        f"入口: {result['entry']}  结束 PC: {result['pc']}",
+        f"结束: {'是' if result['ended'] else '否（达到指令数上限）'}  a0 = {result['a0']}  "
+        f"{'通过' if result['passed'] else '未通过'}",
+    ]
+    skipped = result['fast_forward']
+    if skipped is not None:
+        state = '已到达' if skipped['reached'] else '未到达'
+        lines.append(f"快进到 {skipped['pc']}（{state}）: {skipped['instructions']} 条指令, {skipped['bundles']} 个包")
+    lines.append(
+        f"有效指令: {result['instructions']}  包: {result['bundles']}  跳转: {result['taken_branches']}  "
+        f"执行过的包地址: {len(result['bundle_counts'])}"
+    )
+    if result['cycles'] is not None:
+        lines.append(
+            f"周期: {result['cycles']}  IPC: {result['ipc']}  停顿: {result['stalls']}"
+            f"（数据 {result['data_stalls']}, 除法器 {result['divide_stalls']}, 跳转 {result['branch_stalls']}）"
+        )
+    return lines
+
+
+def main():
+    """模拟器入口"""
+    parser = argparse.ArgumentParser(
+        description='VLIW 包级功能模拟器：执行平坦镜像 / ELF，统计周期与各包执行次数',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例:
+  # 模拟重排后导出的镜像
+  python simulator.py reordered.bin
+  
+  # 快进到 0x80001000 后统计前 1000 万条指令，输出各包执行次数与取包序列
+  python simulator.py program.elf --fast-forward 0x80001000 --max-instructions 10000000 \\
+      --counts counts.txt --trace fetch.trace
+        """
+    )
+    parser.add_argument('image', help='程序镜像（ELF、.hex 或平坦二进制）')
+    parser.add_argument(
+        '--base',
+        type=lambda text: int(text, 0),
+        default=SIM_BASE_ADDRESS,
+        help=f'内存起始地址与平坦镜像的加载地址（默认: 0x{SIM_BASE_ADDRESS:08x}）'
+    )
+    parser.add_argument(
+        '--memory-mb',
+        type=int,
+        default=SIM_MEMORY_BYTES >> 20,
+        help=f'模拟内存大小，单位 MB（默认: {SIM_MEMORY_BYTES >> 20}）'
+    )
+    parser.add_argument(
+        '--fast-forward',
+        type=lambda text: int(text, 16),
+        metavar='PC',
+        help='快进到该 PC（十六进制）后再开始统计'
+    )
+    parser.add_argument(
+        '--max-instructions',
+        type=int,
+        help='统计的最多有效指令数'
+    )
+    parser.add_argument(
+        '--branch-penalty',
+        type=int,
+        default=TAKEN_BRANCH_PENALTY,
+        help=f'每次跳转的额外周期（默认: {TAKEN_BRANCH_PENALTY}）'
+    )
+    parser.add_argument(
+        '--no-timing',
+        action='store_true',
+        help='只做功能模拟，不估算周期'
+    )
+    parser.add_argument(
+        '--counts',
+        metavar='FILE',
+        help='输出各包执行次数（每行 "包地址 次数"）'
+    )
+    parser.add_argument(
+        '--trace',
+        metavar='FILE',
+        help='输出取包 PC 序列（可用于 main.py --icache-trace）'
+    )
+    parser.add_argument(
+        '--format',
+        choices=['text', 'json'],
+        default='text',
+        help='结果输出格式（默认: text）'
+    )
+    
+    args = parser.parse_args()
+    simulator = BundleSimulator(
+        base_address=args.base,
+        memory_bytes=args.memory_mb << 20,
+        branch_penalty=args.branch_penalty,
+        estimate_cycles=not args.no_timing
+    )
+    trace = [] if args.trace else None
+    try:
+        simulator.load_file(args.image)
+        result = simulator.run(args.fast_forward, args.max_instructions, trace)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"错误：{e}", file=sys.stderr)
+        return 1
+    
+    counts = sorted(result['bundle_counts'].items())
+    if args.counts:
+        with open(args.counts, 'w', encoding='utf-8') as f:
+            for pc, count in counts:
+                f.write(f"{pc:08x} {count}\n")
+    if args.trace:
+        with open(args.trace, 'w', encoding='utf-8') as f:
+            for pc in trace:
+                f.write(f"{pc:08x}\n")
+    
+    if args.format == 'json':
+        result['bundle_counts'] = {f"0x{pc:08x}": count for pc, count in counts}
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        if result['console']:
+            print(result['console'], end='' if result['console'].endswith('\n') else '\n')
+        for line in format_result(result):
+            print(line)
+    return 1 if result['ended'] and not result['passed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,8 +2,204 @@
 统计与报告生成：收集和生成分析报告
 """
 
-from typing import List, Dict
+from typing import Dict, Iterable, List
 from instruction import VLIWPackage
+from config import UNROLL_REPORT_LOOPS, STATIC_PROFILE_REPORT_LOOPS
+
+# StatsAccumulator 中可直接相加的计数字段
+ACCUMULATOR_COUNTERS = (
+    'packages', 'instructions', 'valid', 'nop', 'feq_zero',
+    'leading', 'trailing', 'middle', 'single_cycle'
+)
+
+
+def packing_comparison(
+    original_count: int,
+    original_valid: int,
+    optimized_count: int,
+    optimized_valid: int
+) -> Dict:
+    """
+    由包数与有效指令数计算重打包对比统计
+    
+    Args:
+        original_count: 原始包数
+        original_valid: 原始有效指令数
+        optimized_count: 重打包后的包数
+        optimized_valid: 重打包后的有效指令数
+    
+    Returns:
+        对比统计字典
+    """
+    package_reduction = original_count - optimized_count
+    reduction_percentage = (package_reduction / original_count * 100) if original_count > 0 else 0
+    
+    # 计算平均每包有效指令数
+    original_avg = original_valid / original_count if original_count > 0 else 0
+    optimized_avg = optimized_valid / optimized_count if optimized_count > 0 else 0
+    
+    # 计算指令密度提升
+    density_improvement = ((optimized_avg - original_avg) / original_avg * 100) if original_avg > 0 else 0
+    
+    return {
+        'original_package_count': original_count,
+        'optimized_package_count': optimized_count,
+        'package_reduction': package_reduction,
+        'reduction_percentage': reduction_percentage,
+        'original_valid_instructions': original_valid,
+        'optimized_valid_instructions': optimized_valid,
+        'original_avg_density': original_avg,
+        'optimized_avg_density': optimized_avg,
+        'density_improvement': density_improvement
+    }
+
+
+class StatsAccumulator:
+    """
+    单遍统计累加器：逐包累加原始包、填充与指令类型统计所需的全部计数
+    
+    各块 / 函数 / 文件的累加器可以合并（merge），合并结果与对全部包
+    累加一遍完全相同，并行解析与批量分析无需再次遍历包即可得到总计。
+    """
+    
+    __slots__ = ACCUMULATOR_COUNTERS + ('type_counts',)
+    
+    def __init__(self, packages: Iterable[VLIWPackage] = ()):
+        """
+        Args:
+            packages: 初始累加的包（可选）
+        """
+        for field in ACCUMULATOR_COUNTERS:
+            setattr(self, field, 0)
+        self.type_counts: Dict[str, int] = {}
+        self.add_packages(packages)
+    
+    def add_package(self, pkg: VLIWPackage):
+        """累加一个包（只遍历包内指令一次）"""
+        instructions = pkg.instructions
+        size = len(instructions)
+        type_counts = self.type_counts
+        first = -1
+        last = -1
+        valid = 0
+        
+        for slot, inst in enumerate(instructions):
+            decoded = inst.decoded
+            if decoded.is_nop:
+                if decoded.hex_code == '00000013' or decoded.mnemonic == 'nop':
+                    self.nop += 1
+                elif decoded.hex_code == 'a0002053':
+                    self.feq_zero += 1
+            else:
+                valid += 1
+                if first < 0:
+                    first = slot
+                last = slot
+                type_counts[decoded.inst_type] = type_counts.get(decoded.inst_type, 0) + 1
+                if decoded.is_single_cycle:
+                    self.single_cycle += 1
+        
+        if valid:
+            leading = first
+            trailing = size - 1 - last
+        else:
+            # 与 VLIWPackage.get_padding_stats 一致：全填充包的包前、包后均计全部指令
+            leading = trailing = size
+        
+        self.packages += 1
+        self.instructions += size
+        self.valid += valid
+        self.leading += leading
+        self.trailing += trailing
+        self.middle += size - valid - leading - trailing
+    
+    def add_packages(self, packages: Iterable[VLIWPackage]):
+        """依次累加多个包"""
+        for pkg in packages:
+            self.add_package(pkg)
+    
+    def merge(self, other: 'StatsAccumulator') -> 'StatsAccumulator':
+        """
+        将另一个累加器的计数并入本累加器
+        
+        Args:
+            other: 另一段包的累加器
+        
+        Returns:
+            self（便于链式合并）
+        """
+        for field in ACCUMULATOR_COUNTERS:
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+        for inst_type, count in other.type_counts.items():
+            self.type_counts[inst_type] = self.type_counts.get(inst_type, 0) + count
+        return self
+    
+    def __getstate__(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+    
+    def __setstate__(self, state):
+        for field, value in state.items():
+            setattr(self, field, value)
+    
+    def original_stats(self) -> Dict:
+        """原始包统计（与 StatisticsCollector.analyze_original_packages 相同）"""
+        avg_valid_per_package = self.valid / self.packages if self.packages > 0 else 0
+        return {
+            'total_packages': self.packages,
+            'total_instructions': self.instructions,
+            'valid_instructions': self.valid,
+            'padding_instructions': self.instructions - self.valid,
+            'nop_count': self.nop,
+            'feq_zero_count': self.feq_zero,
+            'avg_valid_per_package': avg_valid_per_package,
+            'valid_percentage': (self.valid / self.instructions * 100) if self.instructions > 0 else 0
+        }
+    
+    def padding_stats(self) -> Dict:
+        """填充指令统计（与 StatisticsCollector.analyze_padding_instructions 相同）"""
+        removable_padding = self.leading + self.trailing
+        original_size = self.instructions * 4
+        optimized_size = (self.instructions - removable_padding) * 4
+        size_reduction = original_size - optimized_size
+        return {
+            'leading_padding': self.leading,
+            'trailing_padding': self.trailing,
+            'middle_padding': self.middle,
+            'total_padding': removable_padding + self.middle,
+            'removable_padding': removable_padding,
+            'original_size_bytes': original_size,
+            'optimized_size_bytes': optimized_size,
+            'size_reduction_bytes': size_reduction,
+            'reduction_percentage': (size_reduction / original_size * 100) if original_size > 0 else 0
+        }
+    
+    def type_stats(self) -> Dict:
+        """指令类型分布（与 StatisticsCollector.analyze_instruction_types 相同）"""
+        return {
+            'total_valid_instructions': self.valid,
+            'type_distribution': {
+                inst_type: {
+                    'count': count,
+                    'percentage': (count / self.valid * 100) if self.valid > 0 else 0
+                }
+                for inst_type, count in self.type_counts.items()
+            }
+        }
+    
+    def packing_stats(self, optimized_count: int, optimized_valid: int = None) -> Dict:
+        """
+        与重打包结果对比（与 StatisticsCollector.compare_packing_results 相同）
+        
+        Args:
+            optimized_count: 重打包后的包数
+            optimized_valid: 重打包后的有效指令数（默认与原始相同）
+        
+        Returns:
+            对比统计字典
+        """
+        if optimized_valid is None:
+            optimized_valid = self.valid
+        return packing_comparison(self.packages, self.valid, optimized_count, optimized_valid)
 
 
 class StatisticsCollector:
@@ -19,35 +215,7 @@ class StatisticsCollector:
         Returns:
             统计字典
         """
-        total_packages = len(packages)
-        total_instructions = sum(len(pkg.instructions) for pkg in packages)
-        valid_instructions = sum(pkg.valid_count for pkg in packages)
-        padding_instructions = total_instructions - valid_instructions
-        
-        # 统计不同类型的填充指令
-        nop_count = 0
-        feq_zero_count = 0
-        
-        for pkg in packages:
-            for inst in pkg.instructions:
-                if inst.is_nop:
-                    if inst.hex_code == '00000013' or inst.mnemonic == 'nop':
-                        nop_count += 1
-                    elif inst.hex_code == 'a0002053':
-                        feq_zero_count += 1
-        
-        avg_valid_per_package = valid_instructions / total_packages if total_packages > 0 else 0
-        
-        return {
-            'total_packages': total_packages,
-            'total_instructions': total_instructions,
-            'valid_instructions': valid_instructions,
-            'padding_instructions': padding_instructions,
-            'nop_count': nop_count,
-            'feq_zero_count': feq_zero_count,
-            'avg_valid_per_package': avg_valid_per_package,
-            'valid_percentage': (valid_instructions / total_instructions * 100) if total_instructions > 0 else 0
-        }
+        return StatsAccumulator(packages).original_stats()
     
     def analyze_padding_instructions(self, packages: List[VLIWPackage]) -> Dict:
         """
@@ -59,37 +227,7 @@ class StatisticsCollector:
         Returns:
             填充指令统计字典
         """
-        leading_total = 0
-        trailing_total = 0
-        middle_total = 0
-        
-        for pkg in packages:
-            stats = pkg.get_padding_stats()
-            leading_total += stats['leading']
-            trailing_total += stats['trailing']
-            middle_total += stats['middle']
-        
-        total_padding = leading_total + trailing_total + middle_total
-        removable_padding = leading_total + trailing_total
-        
-        # 计算程序大小（每条指令 4 字节）
-        total_instructions = sum(len(pkg.instructions) for pkg in packages)
-        original_size = total_instructions * 4
-        optimized_size = (total_instructions - removable_padding) * 4
-        size_reduction = original_size - optimized_size
-        reduction_percentage = (size_reduction / original_size * 100) if original_size > 0 else 0
-        
-        return {
-            'leading_padding': leading_total,
-            'trailing_padding': trailing_total,
-            'middle_padding': middle_total,
-            'total_padding': total_padding,
-            'removable_padding': removable_padding,
-            'original_size_bytes': original_size,
-            'optimized_size_bytes': optimized_size,
-            'size_reduction_bytes': size_reduction,
-            'reduction_percentage': reduction_percentage
-        }
+        return StatsAccumulator(packages).padding_stats()
     
     def compare_packing_results(
         self,
@@ -106,33 +244,12 @@ class StatisticsCollector:
         Returns:
             对比统计字典
         """
-        original_count = len(original_packages)
-        optimized_count = len(optimized_packages)
-        package_reduction = original_count - optimized_count
-        reduction_percentage = (package_reduction / original_count * 100) if original_count > 0 else 0
-        
-        # 计算有效指令数（应该相同）
-        original_valid = sum(pkg.valid_count for pkg in original_packages)
-        optimized_valid = sum(pkg.valid_count for pkg in optimized_packages)
-        
-        # 计算平均每包有效指令数
-        original_avg = original_valid / original_count if original_count > 0 else 0
-        optimized_avg = optimized_valid / optimized_count if optimized_count > 0 else 0
-        
-        # 计算指令密度提升
-        density_improvement = ((optimized_avg - original_avg) / original_avg * 100) if original_avg > 0 else 0
-        
-        return {
-            'original_package_count': original_count,
-            'optimized_package_count': optimized_count,
-            'package_reduction': package_reduction,
-            'reduction_percentage': reduction_percentage,
-            'original_valid_instructions': original_valid,
-            'optimized_valid_instructions': optimized_valid,
-            'original_avg_density': original_avg,
-            'optimized_avg_density': optimized_avg,
-            'density_improvement': density_improvement
-        }
+        return packing_comparison(
+            len(original_packages),
+            sum(pkg.valid_count for pkg in original_packages),
+            len(optimized_packages),
+            sum(pkg.valid_count for pkg in optimized_packages)
+        )
     
     def analyze_instruction_types(self, packages: List[VLIWPackage]) -> Dict:
         """
@@ -144,29 +261,7 @@ class StatisticsCollector:
         Returns:
             指令类型统计字典
         """
-        type_counts = {}
-        total_valid = 0
-        
-        for pkg in packages:
-            for inst in pkg.instructions:
-                if not inst.is_nop:
-                    total_valid += 1
-                    inst_type = inst.inst_type
-                    type_counts[inst_type] = type_counts.get(inst_type, 0) + 1
-        
-        # 计算百分比
-        type_percentages = {}
-        for inst_type, count in type_counts.items():
-            percentage = (count / total_valid * 100) if total_valid > 0 else 0
-            type_percentages[inst_type] = {
-                'count': count,
-                'percentage': percentage
-            }
-        
-        return {
-            'total_valid_instructions': total_valid,
-            'type_distribution': type_percentages
-        }
+        return StatsAccumulator(packages).type_stats()
     
     def generate_report(
         self,
@@ -174,7 +269,16 @@ class StatisticsCollector:
         padding_stats: Dict,
         type_stats: Dict = None,
         packing_stats: Dict = None,
-        dependency_stats: Dict = None
+        dependency_stats: Dict = None,
+        encoding_stats: Dict = None,
+        icache_stats: Dict = None,
+        forwarding_stats: Dict = None,
+        bypass_stats: Dict = None,
+        equivalence_stats: Dict = None,
+        search_stats: Dict = None,
+        strategy_stats: Dict = None,
+        unroll_stats: Dict = None,
+        profile_stats: Dict = None
     ) -> str:
         """
         生成可读的分析报告
@@ -185,6 +289,15 @@ class StatisticsCollector:
             type_stats: 指令类型统计（可选）
             packing_stats: 重打包对比统计（可选）
             dependency_stats: 依赖关系统计（可选）
+            encoding_stats: 变长包编码评估（可选）
+            icache_stats: I-Cache 模拟结果（可选）
+            forwarding_stats: 前递链深度对比（可选）
+            bypass_stats: 旁路拓扑假设分析（可选）
+            equivalence_stats: 重打包等价性检查（可选）
+            search_stats: 搜索式重打包（可选）
+            strategy_stats: 打包策略对比（可选）
+            unroll_stats: 循环展开假设分析（可选）
+            profile_stats: 静态执行频率加权统计（可选）
             
         Returns:
             格式化的报告字符串
@@ -250,9 +363,316 @@ class StatisticsCollector:
             lines.append(f"有依赖指令：{dependency_stats.get('dependent_count', 0)} 条")
             lines.append("")
         
+        # 前递链深度对比
+        if forwarding_stats:
+            lines.append("--- 包内前递链深度对比 ---")
+            lines.append(
+                f"原始包数：{forwarding_stats['original_packages']}，"
+                f"估算周期：{forwarding_stats['original_cycles']}"
+            )
+            # 中文表头每个字占两列，宽度按显示宽度扣除
+            lines.append(f"{'深度':<4}{'包数':>6}{'包数减少':>12}{'估算周期':>6}{'周期收益':>12}{'合并':>6}")
+            for row in forwarding_stats['depths']:
+                depth = f"{row['depth']}{'*' if row['depth'] == forwarding_stats['chain_depth'] else ''}"
+                lines.append(
+                    f"{depth:<6}{row['packages']:>8}"
+                    f"{row['package_reduction']:>8} ({row['reduction_percentage']:>4.1f}%)"
+                    f"{row['cycles']:>10}"
+                    f"{row['cycle_gain']:>8} ({row['cycle_gain_percentage']:>4.1f}%)"
+                    f"{row['merged_pairs']:>8}"
+                )
+            lines.append("* 为当前重打包使用的最大链深；深度 0 表示包内不允许写后读")
+            lines.append("")
+        
+        # 旁路拓扑假设分析
+        if bypass_stats:
+            lines.append("--- 旁路拓扑假设分析 ---")
+            lines.append(f"删除路径：{', '.join(bypass_stats['dropped']) or '无'}")
+            lines.append(f"增加路径：{', '.join(bypass_stats['added']) or '无'}")
+            lines.append(f"{'':<18}{'当前拓扑':>8}{'修改后':>9}{'变化':>10}")
+            for key, label in (
+                ('original_cycles', '原始代码周期'), ('original_stalls', '原始代码停顿'),
+                ('packages', '重打包包数'), ('cycles', '重打包周期'), ('stalls', '重打包停顿')
+            ):
+                # 中文标签每个字占两列，宽度按显示宽度扣除
+                lines.append(
+                    f"{label:<{18 - len(label)}}{bypass_stats['baseline'][key]:>12}"
+                    f"{bypass_stats['modified'][key]:>12}{bypass_stats['delta'][key]:>+12}"
+                )
+            lines.append("")
+        
+        # 变长包编码评估
+        if encoding_stats:
+            baseline = encoding_stats['baseline']
+            original = encoding_stats['original']
+            optimized = encoding_stats['optimized']
+            lines.append(f"--- 变长包编码评估 ({encoding_stats['scheme']}) ---")
+            lines.append(f"取指块大小：{encoding_stats['fetch_block_bytes']} 字节")
+            lines.append(f"固定 8 字格式代码大小：{baseline['code_size_bytes']} 字节")
+            lines.append(f"原始代码编码后大小：{original['code_size_bytes']} 字节 (缩减 {encoding_stats['original_size_reduction']:.1f}%)")
+            lines.append(f"重排代码编码后大小：{optimized['code_size_bytes']} 字节 (缩减 {encoding_stats['optimized_size_reduction']:.1f}%)")
+            lines.append(f"每执行包取指字节：固定 {baseline['fetch_bytes_per_bundle']:.1f} / 原始 {original['fetch_bytes_per_bundle']:.1f} / 重排 {optimized['fetch_bytes_per_bundle']:.1f}")
+            lines.append(f"总取指字节：固定 {baseline['fetch_bytes']} / 原始 {original['fetch_bytes']} ({encoding_stats['original_fetch_reduction']:.1f}%) / 重排 {optimized['fetch_bytes']} ({encoding_stats['optimized_fetch_reduction']:.1f}%)")
+            lines.append("")
+        
+        # I-Cache 模拟
+        if icache_stats:
+            lines.append("--- I-Cache 模拟 ---")
+            lines.append(
+                f"配置：{icache_stats['size_bytes']} 字节，行 {icache_stats['line_bytes']} 字节，"
+                f"{icache_stats['associativity']} 路组相联，缺失代价 {icache_stats['miss_penalty']} 周期"
+                f"（{'执行轨迹' if icache_stats['source'] == 'trace' else '静态布局'}）"
+            )
+            layout_names = {
+                'original': '原始布局',
+                'repacked': '重排布局',
+                'original_compact': '原始压缩布局',
+                'repacked_compact': '重排压缩布局'
+            }
+            for name, info in icache_stats['layouts'].items():
+                lines.append(
+                    f"{layout_names.get(name, name)}：访问 {info['accesses']} 次，缺失 {info['misses']} 次 "
+                    f"({info['miss_rate']:.2f}%)，缺失周期 {info['miss_cycles']}"
+                )
+            lines.append("")
+        
+        # 重打包等价性检查
+        if equivalence_stats:
+            lines.append("--- 重打包等价性检查 ---")
+            lines.append(
+                f"基本块：{equivalence_stats['blocks']} 个，已检查 {equivalence_stats['checked_blocks']} 个"
+                f"（含不支持指令跳过 {equivalence_stats['skipped_blocks']} 个），"
+                f"每块 {equivalence_stats['lanes']} 组随机初始状态"
+            )
+            lines.append(f"跨基本块的包：{equivalence_stats['straddling_bundles']} 个")
+            if equivalence_stats['equivalent']:
+                lines.append("结果：等价")
+            else:
+                first = equivalence_stats['first_divergence']
+                lines.append(f"结果：{equivalence_stats['divergent_blocks']} 个基本块不等价")
+                lines.append(
+                    f"第一个不等价的块：{first['block']}（{first['instructions']} 条指令），"
+                    f"{first['kind']} {first['location']}，{first['lanes']} 组状态不同"
+                )
+                if 'lane' in first:
+                    lines.append(f"  例：状态 {first['lane']} 原始 {first['original']}，重打包 {first['repacked']}")
+            lines.append("")
+        
+        # 搜索式重打包
+        if search_stats:
+            greedy = search_stats['greedy']
+            search = search_stats['search']
+            lines.append("--- 搜索式重打包 ---")
+            lines.append(
+                f"基本块：{search_stats['blocks']} 个，搜索 {search_stats['searched_blocks']} 个，"
+                f"改进 {search_stats['improved_blocks']} 个（束搜索 {search_stats['by_method']['beam']}，"
+                f"模拟退火 {search_stats['by_method']['anneal']}），"
+                f"超出预算退回贪心 {search_stats['fallback_blocks']} 个"
+            )
+            lines.append(
+                f"每块预算：{search_stats['budget_ms']:g} ms，进程数 {search_stats['jobs']}，"
+                f"用时 {search_stats['elapsed_seconds']:.2f} 秒"
+            )
+            lines.append(f"逐块贪心：{greedy['packages']} 包，估算 {greedy['cycles']} 周期")
+            lines.append(f"搜索结果：{search['packages']} 包，估算 {search['cycles']} 周期")
+            lines.append(
+                f"改进：减少 {search_stats['package_gain']} 包、{search_stats['cycle_gain']} 周期 "
+                f"({search_stats['cycle_gain_percentage']:.1f}%)"
+            )
+            lines.append("")
+        
+        # 打包策略对比
+        if strategy_stats:
+            lines.append("--- 打包策略对比 ---")
+            lines.append(
+                f"原始代码：{strategy_stats['original_packages']} 包，估算 {strategy_stats['original_cycles']} 周期"
+                f"（{'多进程并行' if strategy_stats['parallel'] else '串行'}运行）"
+            )
+            # 中文标签每个字占两列，宽度按显示宽度扣除
+            lines.append(f"{'策略':<10}{'包数':>6}{'周期':>8}{'周期收益':>8}{'用时(s)':>10}{'内存峰值(KB)':>14}")
+            for row in strategy_stats['strategies']:
+                memory = row['peak_memory_bytes']
+                memory = f"{memory / 1024:.1f}" if memory is not None else '-'
+                lines.append(
+                    f"{row['strategy']:<12}{row['packages']:>8}{row['cycles']:>10}"
+                    f"{row['cycle_gain_percentage']:>+11.1f}%{row['seconds']:>12.3f}{memory:>18}"
+                )
+            lines.append("")
+        
+        # 循环展开假设分析
+        if unroll_stats:
+            loops = unroll_stats['loops']
+            lines.append("--- 循环展开假设分析 ---")
+            lines.append(
+                f"最内层循环：{len(loops)} 个，展开倍数 {'/'.join(str(n) for n in unroll_stats['factors'])}，"
+                f"每个展开体计回跳代价 {unroll_stats['branch_penalty']} 周期"
+            )
+            if loops:
+                lines.append("每次原始迭代的包数（* 为空闲寄存器不足、部分局部寄存器未重命名）：")
+                header = f"{'循环':<10}{'函数':<14}{'原始':>6}"
+                header += ''.join(f"{f'N={n}':>8}" for n in unroll_stats['factors'])
+                lines.append(header + f"{'最佳':>4}{'周期/次':>11}{'周期收益':>8}")
+                ranked = sorted(loops, key=lambda loop: -loop['best_gain_percentage'])
+                for loop in ranked[:UNROLL_REPORT_LOOPS]:
+                    best = next(row for row in loop['factors'] if row['factor'] == loop['best_factor'])
+                    line = f"{loop['address']:<12}{loop['function'][:15]:<16}{loop['original_bundles']:>8}"
+                    for row in loop['factors']:
+                        cell = f"{row['bundles_per_iteration']:.2f}{'*' if row['rename_limited'] else ''}"
+                        line += f"{cell:>8}"
+                    cycles = f"{loop['original_cycles_per_iteration']}→{best['cycles_per_iteration']:g}"
+                    lines.append(
+                        line + f"{'N=' + str(loop['best_factor']):>6}{cycles:>14}"
+                        f"{loop['best_gain_percentage']:>+11.1f}%"
+                    )
+                if len(ranked) > UNROLL_REPORT_LOOPS:
+                    lines.append(f"... 其余 {len(ranked) - UNROLL_REPORT_LOOPS} 个循环见汇总记录")
+            lines.append("")
+        
+        # 静态执行频率加权统计
+        if profile_stats:
+            profile = profile_stats['profile']
+            lines.append("--- 静态执行频率加权 ---")
+            lines.append(
+                f"基本块：{profile['blocks']} 个；循环：{profile['loops']} 个，最大嵌套深度 {profile['max_depth']}，"
+                f"{profile['inferred_loops']} 个由归纳模式推断出迭代次数，其余每层按 {profile['default_trip_count']} 次计"
+            )
+            lines.append(f"估算执行频率最高的基本块：{profile['max_frequency']} 次")
+            names = {'original': '原始代码', 'optimized': '重打包', 'search': '搜索式重打包'}
+            for name, layout in profile_stats['layouts'].items():
+                static = layout['static']
+                weighted = layout['weighted']
+                lines.append(
+                    f"{names.get(name, name)}：加权包数 {weighted['packages']}，"
+                    f"平均每包有效指令 {weighted['average_valid_per_package']:.2f}（静态 {static['average_valid_per_package']:.2f}），"
+                    f"加权停顿 {weighted['stalls']} / {weighted['cycles']} 周期"
+                    f"（{weighted['stalls'] / weighted['cycles'] * 100 if weighted['cycles'] else 0:.1f}%，"
+                    f"静态 {static['stalls'] / static['cycles'] * 100 if static['cycles'] else 0:.1f}%）"
+                )
+                if 'package_reduction_percentage' in weighted:
+                    lines.append(
+                        f"  包数量减少：加权 {weighted['package_reduction_percentage']:.1f}%"
+                        f"（静态 {static['package_reduction_percentage']:.1f}%），"
+                        f"周期收益：加权 {weighted['cycle_gain_percentage']:.1f}%"
+                        f"（静态 {static['cycle_gain_percentage']:.1f}%）"
+                    )
+            hottest = sorted(profile['loop_list'], key=lambda loop: -loop['frequency'])[:STATIC_PROFILE_REPORT_LOOPS]
+            if hottest:
+                lines.append("最热的循环：")
+                lines.append(f"{'循环头':<9}{'深度':>4}{'块数':>4}{'迭代次数':>8}{'执行频率':>10}")
+                for loop in hottest:
+                    trips = f"{loop['trip_count']}{'' if loop['inferred'] else '*'}"
+                    lines.append(
+                        f"{loop['address']:<12}{loop['depth']:>6}{loop['blocks']:>6}{trips:>12}{loop['frequency']:>14}"
+                    )
+                lines.append("（* 为未能推断、按默认次数计）")
+            lines.append("")
+        
         lines.append("=" * 60)
         lines.append("分析完成")
         lines.append("=" * 60)
         
         return "\n".join(lines)
+    
+    def generate_legality_report(self, legality_stats: Dict, violations: List[Dict]) -> str:
+        """
+        生成包合法性检查报告
+        
+        Args:
+            legality_stats: 检查汇总（BundleLegalityChecker.summarize 的返回值）
+            violations: 违例列表
+            
+        Returns:
+            格式化的报告字符串
+        """
+        lines = []
+        lines.append("=" * 60)
+        lines.append("VLIW 包合法性检查")
+        lines.append("=" * 60)
+        lines.append("")
+        lines.append(f"检查包数：{legality_stats['checked_packages']}")
+        lines.append(f"违例包数：{legality_stats['illegal_packages']}")
+        lines.append(f"违例总数：{legality_stats['violations']}")
+        for reason, count in legality_stats['by_reason'].items():
+            lines.append(f"  {reason:<8} {count}")
+        lines.append("")
+        
+        if violations:
+            lines.append("--- 违例列表 ---")
+            for v in violations:
+                location = f"槽位 {v['slot']}" if v['slot'] is not None else "整包"
+                lines.append(f"0x{v['address']:08x}  [{v['reason']}]  {location}：{v['detail']}")
+        else:
+            lines.append("所有包均合法")
+        
+        lines.append("")
+        lines.append("=" * 60)
+        return "\n".join(lines)
+    
+    def generate_diff_report(self, diff: Dict, limit: int = None) -> str:
+        """
+        生成构建间差异报告
+        
+        Args:
+            diff: 差异结果（diff.diff_profiles 的返回值）
+            limit: 最多列出的函数数（None 表示全部）
+            
+        Returns:
+            格式化的报告字符串
+        """
+        totals = diff['totals']
+        counts = diff['status_counts']
+        status_names = {
+            'changed': '变化', 'renamed': '改名', 'added': '新增',
+            'removed': '删除', 'unchanged': '未变'
+        }
+        
+        lines = []
+        lines.append("=" * 60)
+        lines.append("VLIW 构建差异对比")
+        lines.append("=" * 60)
+        lines.append("")
+        lines.append(f"基准构建：{diff['old_file']}")
+        lines.append(f"新构建：{diff['new_file']}")
+        lines.append("函数：" + "，".join(
+            f"{status_names[status]} {count}" for status, count in counts.items()
+        ))
+        lines.append("")
+        
+        lines.append("--- 总计 ---")
+        lines.append(f"{'指标':<14}{'基准':>12}{'新构建':>12}{'变化':>12}")
+        for field in ('packages', 'valid', 'padding', 'stalls', 'cycles', 'merged_pairs'):
+            lines.append(
+                f"{field:<14}{totals['old'][field]:>12}{totals['new'][field]:>12}"
+                f"{totals['delta'][field]:>+12}"
+            )
+        lines.append(
+            f"{'density':<14}{totals['old']['density']:>12.2f}{totals['new']['density']:>12.2f}"
+            f"{totals['delta']['density']:>+12.2f}"
+        )
+        lines.append("")
+        
+        rows = diff['functions'] if limit is None else diff['functions'][:limit]
+        if rows:
+            lines.append("--- 函数差异（按估算周期变化排序）---")
+            lines.append(
+                f"{'状态':<6}{'Δ包数':>8}{'Δ密度':>8}{'Δ停顿':>8}{'Δ周期':>8}{'Δ填充':>8}{'Δ合并':>8}  函数"
+            )
+            for row in rows:
+                delta = row['delta']
+                name = row['function'] or '<无符号>'
+                if row['status'] == 'renamed':
+                    name = f"{row['old_function']} -> {name}"
+                lines.append(
+                    f"{status_names[row['status']]:<6}{delta['packages']:>+8}{delta['density']:>+8.2f}"
+                    f"{delta['stalls']:>+8}{delta['cycles']:>+8}{delta['padding']:>+8}"
+                    f"{delta['merged_pairs']:>+8}  {name}"
+                )
+            if len(rows) < len(diff['functions']):
+                lines.append(f"... 其余 {len(diff['functions']) - len(rows)} 个函数未列出")
+        else:
+            lines.append("两次构建的函数编码完全相同")
+        
+        lines.append("")
+        lines.append("=" * 60)
+        return "\n".join(lines)
 
@@ -0,0 +1,252 @@
+"""
+打包策略：统一的策略接口与注册表，在同一份解析结果上并行对比多种打包策略
+"""
+
+import inspect
+import os
+import time
+import tracemalloc
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Sequence, Tuple
+from instruction import VLIWPackage
+from packer import ForwardingModel, VLIWPacker
+from scheduler import SearchPacker
+from timing import StallEstimator
+from machine import MachineDescription, default_machine
+
+
+class PackingStrategy(ABC):
+    """
+    打包策略基类
+    
+    策略由前递链模型与机器描述构造，输入分析器共享的原始包，
+    输出打包结果与策略自己的统计信息。新策略继承本类实现 pack，并用
+    register_strategy 注册后即可在 --strategies 中使用。
+    """
+    
+    description = ''
+    
+    def __init__(self, model: ForwardingModel = None, machine: MachineDescription = None):
+        """
+        Args:
+            model: 包内前递链模型（默认一层依赖）
+            machine: 机器描述（默认 default_machine()）
+        """
+        self.model = model or ForwardingModel()
+        self.machine = machine or default_machine()
+    
+    @abstractmethod
+    def pack(self, original_packages: List[VLIWPackage]) -> Tuple[List[VLIWPackage], Dict]:
+        """
+        打包
+        
+        Args:
+            original_packages: 原始 VLIW 包列表（不得修改）
+        
+        Returns:
+            (打包后的包列表, 统计信息字典)
+        """
+
+
+class OriginalStrategy(PackingStrategy):
+    """保留编译器生成的包（对比的基准）"""
+    
+    description = '编译器生成的原始包'
+    
+    def pack(self, original_packages):
+        return list(original_packages), {}
+
+
+class GreedyStrategy(PackingStrategy):
+    """
+    按程序顺序的包内前递链贪心打包（VLIWPacker.repack_with_one_level_dependency）
+    
+    包不跨越基本块，结果与 SearchPacker 的逐块贪心基准相同，可与 search 直接对比。
+    """
+    
+    description = '按程序顺序的前递链贪心打包（逐基本块）'
+    
+    def pack(self, original_packages):
+        return VLIWPacker(self.model, self.machine).repack_with_one_level_dependency(original_packages)
+
+
+class SearchStrategy(PackingStrategy):
+    """逐基本块的束搜索 / 模拟退火打包（SearchPacker，默认预算，串行）"""
+    
+    description = '逐基本块束搜索与模拟退火'
+    
+    def pack(self, original_packages):
+        return SearchPacker(self.model, self.machine).repack(original_packages)
+
+
+# 已注册的打包策略（名称 -> 策略类）
+PACKING_STRATEGIES = {
+    'original': OriginalStrategy,
+    'greedy': GreedyStrategy,
+    'search': SearchStrategy,
+}
+
+
+def register_strategy(name: str, strategy: type):
+    """
+    注册打包策略
+    
+    Args:
+        name: 策略名（--strategies 中使用）
+        strategy: 实现了 pack 的 PackingStrategy 子类
+    """
+    if not issubclass(strategy, PackingStrategy):
+        raise TypeError(f"打包策略必须继承 PackingStrategy: {strategy!r}")
+    if inspect.isabstract(strategy):
+        raise TypeError(f"打包策略未实现 pack: {strategy!r}")
+    PACKING_STRATEGIES[name] = strategy
+
+
+def create_strategy(
+    name: str,
+    model: ForwardingModel = None,
+    machine: MachineDescription = None
+) -> PackingStrategy:
+    """
+    根据策略名创建打包策略
+    
+    Args:
+        name: 已注册的策略名
+        model: 包内前递链模型
+        machine: 机器描述
+    
+    Returns:
+        PackingStrategy 实例
+    """
+    if name not in PACKING_STRATEGIES:
+        raise ValueError(f"未知的打包策略: {name}（可选 {', '.join(PACKING_STRATEGIES)}）")
+    return PACKING_STRATEGIES[name](model, machine)
+
+
+def parse_strategies(text: str) -> List[str]:
+    """解析逗号分隔的策略名列表（未知名称时抛出 ValueError）"""
+    names = [name.strip() for name in text.split(',') if name.strip()]
+    for name in names:
+        create_strategy(name)
+    return names
+
+
+def run_strategy(
+    name: str,
+    original_packages: List[VLIWPackage],
+    model: ForwardingModel = None,
+    machine: MachineDescription = None,
+    measure_memory: bool = False
+) -> Dict:
+    """
+    运行一个策略并测量结果、用时与（可选的）内存
+    
+    用时为 pack 的墙钟时间。内存为再运行一次 pack 时 tracemalloc 统计的 Python 分配峰值：
+    内存跟踪会显著拖慢分配密集的代码（并使按墙钟预算搜索的策略提前退回），因此不与
+    计时在同一次运行中进行，结果与统计信息取自不跟踪内存的一次。额外的一次运行
+    使策略用时加倍，因此默认不测量。
+    
+    Args:
+        name: 策略名
+        original_packages: 原始 VLIW 包列表
+        model: 包内前递链模型
+        machine: 机器描述
+        measure_memory: 另运行一次 pack 测量内存（否则 peak_memory_bytes 为 None）
+    
+    Returns:
+        {'strategy', 'packages', 'valid', 'cycles', 'stalls', 'seconds', 'peak_memory_bytes', 'stats'}
+    """
+    strategy = create_strategy(name, model, machine)
+    start = time.perf_counter()
+    packages, stats = strategy.pack(original_packages)
+    seconds = time.perf_counter() - start
+    
+    peak = None
+    if measure_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        strategy.pack(original_packages)
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+        tracemalloc.stop()
+    
+    timing = StallEstimator(machine=strategy.machine).estimate(packages)
+    return {
+        'strategy': name,
+        'packages': len(packages),
+        'valid': sum(pkg.valid_count for pkg in packages),
+        'cycles': timing['cycles'],
+        'stalls': timing['stalls'],
+        'seconds': seconds,
+        'peak_memory_bytes': peak,
+        'stats': stats
+    }
+
+
+# 进程池中各策略共享的输入（由 _share_inputs 在进程启动时设置）
+_SHARED_INPUTS = None
+
+
+def _share_inputs(*inputs):
+    """进程池初始化：保存原始包、前递链模型与机器描述，各任务直接使用"""
+    global _SHARED_INPUTS
+    _SHARED_INPUTS = inputs
+
+
+def _run_shared_strategy(task: Tuple[str, bool]) -> Dict:
+    """进程池任务：在共享输入上运行一个策略"""
+    name, measure_memory = task
+    return run_strategy(name, *_SHARED_INPUTS, measure_memory=measure_memory)
+
+
+def compare_strategies(
+    names: Sequence[str],
+    original_packages: List[VLIWPackage],
+    model: ForwardingModel = None,
+    machine: MachineDescription = None,
+    parallel: bool = True,
+    measure_memory: bool = False
+) -> Dict:
+    """
+    在同一份解析结果上对比多个打包策略
+    
+    多核时每个策略在独立的进程中同时运行：原始包在进程启动时传给进程池一次，
+    不重新解析输入；各进程单独测量自己的用时（以及要求时的内存）。
+    
+    Args:
+        names: 策略名
+        original_packages: 原始 VLIW 包列表
+        model: 包内前递链模型
+        machine: 机器描述
+        parallel: 多核时并行运行各策略（否则串行）
+        measure_memory: 测量各策略的内存峰值（每个策略多运行一次，默认不测量）
+    
+    Returns:
+        {'original_packages', 'original_cycles', 'parallel', 'strategies': 按 names 顺序的
+        run_strategy 结果，另含相对原始包的 package_reduction_percentage / cycle_gain_percentage}
+    """
+    machine = machine or default_machine()
+    inputs = (original_packages, model, machine)
+    workers = min(len(names), os.cpu_count() or 1)
+    use_pool = parallel and workers > 1
+    if use_pool:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_share_inputs, initargs=inputs) as pool:
+            rows = list(pool.map(_run_shared_strategy, [(name, measure_memory) for name in names]))
+    else:
+        rows = [run_strategy(name, *inputs, measure_memory=measure_memory) for name in names]
+    
+    original_count = len(original_packages)
+    original_cycles = StallEstimator(machine=machine).estimate(original_packages)['cycles']
+    for row in rows:
+        row['package_reduction_percentage'] = (
+            (original_count - row['packages']) / original_count * 100 if original_count else 0
+        )
+        row['cycle_gain_percentage'] = (
+            (original_cycles - row['cycles']) / original_cycles * 100 if original_cycles else 0
+        )
+    return {
+        'original_packages': original_count,
+        'original_cycles': original_cycles,
+        'parallel': use_pool,
+        'strategies': rows
+    }
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+测试公用的输入构造：反汇编文本、指令、包与指令字
+"""
+
+import sys
+import os
+import random
+import tempfile
+
+# 添加父目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from instruction import Instruction, VLIWPackage
+from encoding import disassemble, encode_b_imm
+
+SAMPLE = """
+prog:     file format elf32-littleriscv
+
+
+Disassembly of section .text:
+
+80000000 <_start>:
+80000000:\t00000413          \tli\ts0,0
+80000004:\t00009117          \tauipc\tsp,0x9
+80000008:\tff810113          \taddi\tsp,sp,-8
+8000000c:\t00000013          \tnop
+80000010:\t00000013          \tnop
+80000014:\t00000013          \tnop
+80000018:\t00000013          \tnop
+8000001c:\t00c0006f          \tj\t80000028 <main>
+80000020:\t00000013          \tnop
+80000024:\ta0002053          \tfeq.s\tzero,ft0,ft0
+
+80000028 <main>:
+80000028:\tff010113          \taddi\tsp,sp,-16
+8000002c:\t00112623          \tsw\tra,12(sp)
+80000030:\t00a00513          \tli\ta0,10
+80000034:\t00150593          \taddi\ta1,a0,1
+80000038:\t02b50633          \tmul\ta2,a0,a1
+8000003c:\t00c686b3          \tadd\ta3,a3,a2
+80000040:\t00000013          \tnop
+80000044:\tfe0518e3          \tbnez\ta0,80000034 <main+0xc>
+"""
+
+# 随机程序使用的指令（不含控制转移）
+POOL = [
+    ('00000413', 'li', 's0,0'),
+    ('ff810113', 'addi', 'sp,sp,-8'),
+    ('00a00513', 'li', 'a0,10'),
+    ('00150593', 'addi', 'a1,a0,1'),
+    ('02b50633', 'mul', 'a2,a0,a1'),
+    ('00c686b3', 'add', 'a3,a3,a2'),
+    ('00d60533', 'add', 'a0,a2,a3'),
+    ('00112623', 'sw', 'ra,12(sp)'),
+    ('00c12583', 'lw', 'a1,12(sp)'),
+    ('00b50633', 'add', 'a2,a0,a1'),
+]
+
+# 0x80000004 处跳到 0x80000008 的 bne（放在第一个包的第 2 条时跳向同一个包）
+BNE = ('00b51463', 'bne', 'a0,a1,0x80000008')
+
+HEADER = ["", "prog:     file format elf32-littleriscv", "", "Disassembly of section .text:"]
+
+
+def make_program(seed: int, functions: int = 6, changed: int = None) -> str:
+    """生成多函数的反汇编文本；changed 指定的函数使用不同的指令序列"""
+    lines = list(HEADER)
+    pc = 0x80000000
+    
+    for fn in range(functions):
+        rng = random.Random(seed * 100 + fn + (1000 if fn == changed else 0))
+        lines.append("")
+        lines.append(f"{pc:08x} <func{fn}>:")
+        for _ in range(rng.randrange(2, 6)):
+            count = rng.randrange(1, 8)
+            for slot in range(8):
+                if slot < count:
+                    hex_code, mnemonic, operands = rng.choice(POOL)
+                    lines.append(f"{pc:8x}:\t{hex_code}          \t{mnemonic}\t{operands}")
+                else:
+                    lines.append(f"{pc:8x}:\t00000013          \tnop")
+                pc += 4
+    
+    return '\n'.join(lines) + '\n'
+
+
+def write_text(text: str) -> str:
+    """写入临时反汇编文件，返回路径（由调用方删除）"""
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+        f.write(text)
+        return f.name
+
+
+def make_instructions(items):
+    """由 [(hex, 助记符, 操作数), ...] 构造连续地址的指令"""
+    return [
+        Instruction(0x80000000 + 4 * i, hex_code, mnemonic, operands)
+        for i, (hex_code, mnemonic, operands) in enumerate(items)
+    ]
+
+
+def make_packages(bundles):
+    """由 [[(hex, 助记符, 操作数), ...], ...] 构造包列表，不足 8 条补 nop"""
+    packages = []
+    address = 0x80000000
+    for bundle in bundles:
+        pkg = VLIWPackage(address)
+        for slot in range(8):
+            hex_code, mnemonic, operands = bundle[slot] if slot < len(bundle) else ('00000013', 'nop', '')
+            pkg.add_instruction(Instruction(address, hex_code, mnemonic, operands))
+            address += 4
+        packages.append(pkg)
+    return packages
+
+
+def write_disassembly(functions) -> str:
+    """由 [(函数名, 包列表)] 生成反汇编文本文件，返回路径"""
+    lines = list(HEADER)
+    for name, packages in functions:
+        lines.append("")
+        lines.append(f"{packages[0].start_address:08x} <{name}>:")
+        for pkg in packages:
+            for inst in pkg.instructions:
+                lines.append(f"{inst.address:8x}:\t{inst.hex_code}          \t{inst.mnemonic}\t{inst.operands}")
+    return write_text('\n'.join(lines) + '\n')
+
+
+def addi(rd: int, rs1: int, imm: int) -> int:
+    """addi 指令字"""
+    return (imm & 0xfff) << 20 | rs1 << 15 | rd << 7 | 0x13
+
+
+def add(rd: int, rs1: int, rs2: int) -> int:
+    """add 指令字"""
+    return rs2 << 20 | rs1 << 15 | rd << 7 | 0x33
+
+
+def branch(funct3: int, rs1: int, rs2: int, offset: int) -> int:
+    """条件分支指令字（offset 为相对分支地址的字节偏移）"""
+    return encode_b_imm(funct3 << 12 | rs1 << 15 | rs2 << 20 | 0x63, offset)
+
+
+def program(bundles):
+    """由每包的指令字列表构造包列表（反汇编文本与指令字一致）"""
+    items = []
+    address = 0x80000000
+    for words in bundles:
+        items.append([(f"{word:08x}",) + disassemble(word, address + 4 * k) for k, word in enumerate(words)])
+        address += 32
+    return make_packages(items)
+
+
+def exit_loop(setup=()):
+    """
+    循环后接出口代码，每包一条指令：
+    
+        loop: add s0,s0,a0; addi a0,a0,1; bne a0,a1,loop; addi s0,s0,100; add a0,s0,zero
+    
+    setup 为循环前一个包中的指令字（可选）
+    """
+    return program([list(setup)] * bool(setup) + [
+        [add(8, 8, 10)],
+        [addi(10, 10, 1)],
+        [branch(1, 10, 11, -0x40)],
+        [addi(8, 8, 100)],
+        [add(10, 8, 0)],
+    ])
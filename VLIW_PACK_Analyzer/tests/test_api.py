@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+测试嵌入式 Python 接口
+"""
+
+import sys
+import os
+import re
+import tempfile
+
+# 添加父目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import api
+from encoding import disassemble
+from analyzer import VLIWAnalyzer
+from builders import SAMPLE
+
+LINE_PATTERN = re.compile(r'([0-9a-f]+):\t([0-9a-f]+)\s+\t(\S+)\t?(.*)$')
+
+
+def sample_words():
+    """SAMPLE 中的 (地址, 指令字, 助记符, 操作数)，操作数去除符号注释"""
+    words = []
+    for line in SAMPLE.splitlines():
+        match = LINE_PATTERN.match(line)
+        if match:
+            operands = re.sub(r' <.*>', '', match.group(4))
+            words.append((int(match.group(1), 16), int(match.group(2), 16), match.group(3), operands))
+    return words
+
+
+def test_disassemble_matches_objdump():
+    """测试指令字反汇编与 objdump 输出一致（含伪指令与分支目标）"""
+    print("测试 1: 指令字反汇编")
+    
+    for address, word, mnemonic, operands in sample_words():
+        assert disassemble(word, address) == (mnemonic, operands), f"{word:08x}"
+    
+    assert disassemble(0x00008067) == ('ret', '')
+    assert disassemble(0xc0001073) == ('csrrw', 'zero,0xc00,zero')
+    assert disassemble(0xffffffff) == ('.word', '0xffffffff')
+    
+    print("  ✓ 反汇编结果与 objdump 一致")
+
+
+def test_analyze_matches_file_analysis():
+    """测试指令字 / 原始字节 / 已解析包三种输入与文件分析结果一致"""
+    print("测试 2: 内存输入分析")
+    
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+        f.write(SAMPLE)
+        path = f.name
+    
+    try:
+        analyzer = VLIWAnalyzer(path, log_file=None)
+        analyzer.run_full_analysis()
+        expected = analyzer.summary_record()
+        del expected['file']
+    finally:
+        os.unlink(path)
+    
+    words = [(address, word) for address, word, _, _ in sample_words()]
+    data = b''.join(word.to_bytes(4, 'little') for _, word in words)
+    
+    for source in (words, api.instructions_from_bytes(data, words[0][0]), analyzer.original_packages):
+        result = api.analyze(source)
+        assert result.summary() == expected
+        assert result.packing.optimized_package_count == len(analyzer.optimized_packages)
+    
+    # 只访问原始统计时不构建依赖图
+    result = api.analyze(data, base_address=words[0][0])
+    assert result.original.valid_instructions == expected['original']['valid_instructions']
+    assert 'dep_graph' not in vars(result)
+    assert result.dependency.one_level_pairs == expected['dependency']['one_level_pairs']
+    assert 'dep_graph' in vars(result)
+    
+    arrays = result.arrays
+    assert len(arrays) == len(result.packages)
+    assert int(arrays.words[0][0]) == words[0][1]
+    assert sum(int(v) for row in arrays.valid for v in row) == expected['original']['valid_instructions']
+    
+    # 重打包结果按槽位排布（槽位不一定连续），空槽位为 0
+    optimized = result.optimized_arrays
+    assert len(optimized) == len(result.optimized_packages)
+    for pkg, row_words, row_valid in zip(result.optimized_packages, optimized.words, optimized.valid):
+        layout = pkg.slotted()
+        for slot in range(8):
+            inst = layout[slot]
+            assert int(row_words[slot]) == (int(inst.hex_code, 16) if inst is not None else 0)
+            assert bool(row_valid[slot]) == (inst is not None and not inst.is_nop)
+    assert any(pkg.slot_of(len(pkg.instructions) - 1) >= len(pkg.instructions) for pkg in result.optimized_packages)
+    
+    print("  ✓ 三种输入的统计与文件分析一致，且按需计算")
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_disassemble_matches_objdump,
+        test_analyze_matches_file_analysis,
+    ]
+    
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ✗ 失败: {e}")
+            failed += 1
+    
+    return 0 if failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
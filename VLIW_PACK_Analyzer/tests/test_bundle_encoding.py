@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+测试变长包编码的代码大小与取指字节估算
+"""
+
+import sys
+import os
+
+# 添加父目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bundle_encoding import BundleEncodingModel
+from instruction import VLIWPackage
+from builders import make_packages, make_instructions
+
+NOP = ('00000013', 'nop', '')
+LI = ('00000413', 'li', 's0,0')
+ADD = ('00c686b3', 'add', 'a3,a3,a2')
+
+# 包前 1 条、包中 1 条、包后 3 条填充，3 条有效指令
+PADDED = [NOP, LI, ADD, NOP, ADD]
+
+
+def test_encoded_size():
+    """测试各方案的单包编码大小（含停止位与包头）"""
+    print("测试 1: 单包编码大小")
+    
+    [pkg] = make_packages([PADDED])
+    sizes = {scheme: BundleEncodingModel(scheme).encoded_size(pkg) for scheme in BundleEncodingModel.SCHEMES}
+    # fixed 8 字；stop_bit 保留 4 条（16 字节）+ 4 位停止位 → 17 → 对齐 20；
+    # length_header 4 条 + 1 字节包头 → 20；slot_mask 3 条 + 1 字节掩码 → 13 → 16
+    assert sizes == {'fixed': 32, 'stop_bit': 20, 'length_header': 20, 'slot_mask': 16}
+    assert BundleEncodingModel('stop_bit', align_bytes=1).encoded_size(pkg) == 17
+    assert BundleEncodingModel('slot_mask', align_bytes=1, header_bits=9).encoded_size(pkg) == 14
+    
+    # 满包：8 条 + 8 位停止位 = 33 字节 → 36
+    [full] = make_packages([[LI] * 8])
+    assert BundleEncodingModel('stop_bit').encoded_size(full) == 36
+    
+    # 重打包分配了槽位：保留槽位 1 到 4（空槽位编码为 nop）
+    slotted = VLIWPackage(0x80000000)
+    for inst in make_instructions([LI, ADD]):
+        slotted.add_instruction(inst)
+    slotted.slots = [1, 4]
+    assert BundleEncodingModel('stop_bit', align_bytes=1).encoded_size(slotted) == 17
+    assert BundleEncodingModel('slot_mask', align_bytes=1).encoded_size(slotted) == 9
+    
+    print("  ✓ 编码大小与手算一致")
+
+
+def test_fetch_bytes():
+    """测试按取指块对齐的取指字节数与取指缓冲复用"""
+    print("测试 2: 取指字节数")
+    
+    model = BundleEncodingModel('stop_bit')
+    assert model.fetch_bytes(0, 32) == 32
+    assert model.fetch_bytes(28, 8) == 64
+    assert model.fetch_bytes(40, 20) == 32
+    assert model.fetch_bytes(5, 0) == 0
+    
+    # 3 个 20 字节的包位于 [0, 20) [20, 40) [40, 60)：
+    # 32 + (64 - 复用 32) + (32 - 复用 32) = 64
+    packages = make_packages([PADDED] * 3)
+    stats = model.analyze(packages)
+    assert stats['code_size_bytes'] == 60 and stats['fetch_bytes'] == 64
+    assert stats['fetch_bytes_per_instruction'] == 64 / 9
+    assert BundleEncodingModel('stop_bit', fetch_buffer=False).analyze(packages)['fetch_bytes'] == 128
+    
+    # 第 2 个包不执行：第 3 个包不能复用第 1 个包的取指块
+    counts = {packages[0].start_address: 10, packages[2].start_address: 5}
+    stats = model.analyze(packages, counts)
+    assert stats['executed_bundles'] == 15 and stats['fetch_bytes'] == 10 * 32 + 5 * 32
+    
+    print("  ✓ 取指字节数与手算一致")
+
+
+def test_compare_schemes():
+    """测试固定格式、压缩原始代码与压缩重排代码的对比"""
+    print("测试 3: 编码方案对比")
+    
+    original = make_packages([PADDED] * 3)
+    # 重排后：满包 36 字节位于 [0, 36)，1 条指令的包 8 字节位于 [36, 44)
+    optimized = make_packages([[LI, ADD, ADD, LI, ADD, ADD, LI, ADD], [ADD]])
+    result = BundleEncodingModel('stop_bit').compare(original, optimized)
+    assert result['baseline']['code_size_bytes'] == 96 and result['baseline']['fetch_bytes'] == 96
+    assert result['original']['code_size_bytes'] == 60 and result['original']['fetch_bytes'] == 64
+    assert result['optimized']['code_size_bytes'] == 44 and result['optimized']['fetch_bytes'] == 64
+    assert result['original_size_reduction'] == 37.5
+    assert abs(result['optimized_size_reduction'] - 52 / 96 * 100) < 1e-9
+    assert abs(result['optimized_fetch_reduction'] - 32 / 96 * 100) < 1e-9
+    
+    # 执行次数按优化包首条指令所在的原始包映射（两组包的地址相同）
+    counts = {original[0].start_address: 4, original[1].start_address: 1}
+    mapped = BundleEncodingModel().derive_exec_counts(original, optimized, counts)
+    assert mapped == {0x80000000: 4, 0x80000020: 1}
+    
+    print(f"  ✓ stop_bit 代码大小减少 {result['optimized_size_reduction']:.1f}%（重排后）")
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_encoded_size,
+        test_fetch_bytes,
+        test_compare_schemes,
+    ]
+    
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ✗ 失败: {e}")
+            failed += 1
+    
+    return 0 if failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
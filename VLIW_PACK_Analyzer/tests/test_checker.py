@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+测试包合法性检查
+"""
+
+import sys
+import os
+
+# 添加父目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from instruction import Instruction, VLIWPackage
+from checker import BundleLegalityChecker
+from packer import ForwardingModel, OnlinePacker
+from machine import default_machine, IN_BUNDLE_STAGE
+
+
+def bundle(start, slots):
+    """按槽位构建包，未给出的槽位填充 nop"""
+    pkg = VLIWPackage(start)
+    for slot in range(8):
+        address = start + slot * 4
+        hex_code, mnemonic, operands = slots.get(slot, ("00000013", "nop", ""))
+        pkg.add_instruction(Instruction(address, hex_code, mnemonic, operands))
+    return pkg
+
+
+def make_packages():
+    return [
+        # 合法：一层依赖 li → addi，乘法在 3 号槽，访存在 5 号槽，分支在 7 号槽
+        bundle(0x80000000, {
+            1: ("00a00513", "li", "a0,10"),
+            2: ("00150593", "addi", "a1,a0,1"),
+            3: ("02c68733", "mul", "a4,a3,a2"),
+            5: ("00412783", "lw", "a5,4(sp)"),
+            7: ("fe0518e3", "bnez", "a0,80000000"),
+        }),
+        # 违例：lw 结果不能包内前递；两条指令写 a1；mul 不在乘除法槽位
+        bundle(0x80000020, {
+            0: ("00412503", "lw", "a0,4(sp)"),
+            2: ("00150593", "addi", "a1,a0,1"),
+            3: ("00000593", "li", "a1,0"),
+            6: ("02c68733", "mul", "a4,a3,a2"),
+        }),
+        # 超额：三条乘法只有两个乘除法槽位
+        bundle(0x80000040, {
+            3: ("02c68733", "mul", "a4,a3,a2"),
+            4: ("02c687b3", "mul", "a5,a3,a2"),
+            5: ("02c68833", "mul", "a6,a3,a2"),
+        }),
+    ]
+
+
+def test_legality_violations():
+    """测试违例地址与原因代码"""
+    print("测试 1: 违例地址与原因代码")
+    
+    checker = BundleLegalityChecker()
+    packages = make_packages()
+    violations = checker.check(packages)
+    found = [(v['address'], v['reason']) for v in violations]
+    
+    assert found == [
+        (0x80000020, 'SLOT'),
+        (0x80000028, 'RAW'),
+        (0x8000002c, 'WAW'),
+        (0x80000038, 'SLOT'),
+        (0x80000040, 'OVERSUB'),
+        (0x80000054, 'SLOT'),
+    ], found
+    
+    summary = checker.summarize(packages, violations)
+    assert summary['illegal_packages'] == 2 and not summary['legal']
+    assert summary['by_reason'] == {'RAW': 1, 'WAW': 1, 'SLOT': 3, 'OVERSUB': 1}
+    
+    print("  ✓ 违例检出正确")
+
+
+def test_legality_without_numpy():
+    """测试纯 Python 路径与 NumPy 路径结果一致"""
+    print("测试 2: 纯 Python 路径")
+    
+    import checker as checker_module
+    
+    checker = BundleLegalityChecker()
+    packages = make_packages()
+    expected = checker.check(packages)
+    
+    saved = checker_module.np
+    checker_module.np = None
+    try:
+        assert checker.check(packages) == expected
+    finally:
+        checker_module.np = saved
+    
+    print("  ✓ 两条路径结果一致")
+
+
+def test_forwarding_chain_depth():
+    """测试包内前递链深度与包内旁路：与重打包使用同一规则"""
+    print("测试 3: 包内前递链深度与旁路")
+    
+    # li a0 → addi a1,a0,1 → addi a2,a1,1：链深 2
+    chain = [bundle(0x80000000, {
+        0: ("00a00513", "li", "a0,10"),
+        1: ("00150593", "addi", "a1,a0,1"),
+        2: ("00158613", "addi", "a2,a1,1"),
+    })]
+    
+    import checker as checker_module
+    saved = checker_module.np
+    try:
+        for numpy in (saved, None):
+            checker_module.np = numpy
+            violations = BundleLegalityChecker().check(chain)
+            assert [(v['address'], v['reason']) for v in violations] == [(0x80000008, 'RAW')], violations
+            assert '超过 1 级' in violations[0]['detail']
+            assert BundleLegalityChecker(model=ForwardingModel(2)).check(chain) == []
+            
+            # 去掉槽位 0 → 1 的包内旁路后，第一级前递也不合法
+            machine = default_machine().with_paths(drop=[(0, 1, IN_BUNDLE_STAGE)])
+            violations = BundleLegalityChecker(model=ForwardingModel(2), machine=machine).check(chain)
+            assert [(v['address'], v['reason']) for v in violations] == [(0x80000004, 'RAW')], violations
+            assert '包内旁路' in violations[0]['detail']
+    finally:
+        checker_module.np = saved
+    
+    # 默认打包器同样把这三条指令拆成两个包
+    instructions = [inst for inst in chain[0].instructions if not inst.is_nop]
+    bundles = list(OnlinePacker().feed(instructions))
+    assert [len(pkg.instructions) for pkg in bundles] == [2, 1]
+    
+    print("  ✓ 链深 2 的包内前递在默认模型下违例，深度 2 模型下合法")
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_legality_violations,
+        test_legality_without_numpy,
+        test_forwarding_chain_depth,
+    ]
+    
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ✗ 失败: {e}")
+            failed += 1
+    
+    return 0 if failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+测试 CSR 依赖图
+"""
+
+import sys
+import os
+
+# 添加父目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from instruction import Instruction
+from dependency import DependencyAnalyzer, DEP_RAW, DEP_WAR, DEP_WAW, DEP_MEM
+
+
+def make_instructions():
+    return [
+        Instruction(0x80000000, "00a00513", "li", "a0,10"),        # 0
+        Instruction(0x80000004, "00150593", "addi", "a1,a0,1"),    # 1
+        Instruction(0x80000008, "02b50633", "mul", "a2,a0,a1"),    # 2
+        Instruction(0x8000000c, "00c12223", "sw", "a2,4(sp)"),     # 3
+        Instruction(0x80000010, "00412503", "lw", "a0,4(sp)"),     # 4
+        Instruction(0x80000014, "00050593", "mv", "a1,a0"),        # 5
+    ]
+
+
+def test_csr_graph_edges():
+    """测试依赖边只指向最近写入者，并区分边类型"""
+    print("测试 1: CSR 依赖图边")
+    
+    graph = DependencyAnalyzer().build_dependency_graph(make_instructions())
+    
+    assert len(graph) == 6
+    assert graph.predecessors(0) == []
+    assert graph.predecessors(1, DEP_RAW) == [0]
+    assert graph.predecessors(2, DEP_RAW) == [0, 1]
+    assert graph.predecessors(4, DEP_MEM) == [3]
+    assert graph.predecessors(4, DEP_WAR) == [1, 2]
+    assert graph.predecessors(4, DEP_WAW) == [0]
+    # a0 由 lw 重新写入后，mv 只依赖最近的 lw
+    assert graph.predecessors(5, DEP_RAW) == [4]
+    assert graph.predecessors(5, DEP_WAW) == [1]
+    assert graph.predecessors(5, DEP_WAR) == [2]
+    
+    one_level = [
+        (graph.indices[e], node) for node, e in graph.iter_edges() if graph.one_level[e]
+    ]
+    assert one_level == [(0, 1)], "只有 li → addi 能形成一层依赖"
+    assert graph.kind_counts() == {'RAW': 5, 'WAR': 3, 'WAW': 2, 'MEM': 1}
+    
+    print("  ✓ 依赖边正确")
+
+
+def test_csr_graph_without_numpy():
+    """测试未安装 NumPy 时统计结果一致"""
+    print("测试 2: 纯 Python 路径")
+    
+    import dependency
+    
+    analyzer = DependencyAnalyzer()
+    instructions = make_instructions()
+    expected = analyzer.analyze_dependency_statistics(
+        instructions, analyzer.build_dependency_graph(instructions)
+    )
+    
+    saved = dependency.np
+    dependency.np = None
+    try:
+        graph = analyzer.build_dependency_graph(instructions)
+        stats = analyzer.analyze_dependency_statistics(instructions, graph)
+        assert graph.kind_counts() == {'RAW': 5, 'WAR': 3, 'WAW': 2, 'MEM': 1}
+    finally:
+        dependency.np = saved
+    
+    assert stats == expected
+    assert stats['dependent_count'] == 4 and stats['one_level_pairs'] == 1
+    
+    print("  ✓ 两条路径结果一致")
+
+
+def test_memory_war_edges():
+    """测试存储依赖其前的加载（内存上的 WAR）与最近一次存储"""
+    print("测试 3: 访存顺序边")
+    
+    instructions = make_instructions() + [
+        Instruction(0x80000018, "00c12423", "sw", "a2,8(sp)"),     # 6
+        Instruction(0x8000001c, "00812683", "lw", "a3,8(sp)"),     # 7
+        Instruction(0x80000020, "00412703", "lw", "a4,4(sp)"),     # 8
+        Instruction(0x80000024, "00b12623", "sw", "a1,12(sp)"),    # 9
+    ]
+    graph = DependencyAnalyzer().build_dependency_graph(instructions)
+    
+    # 第一次存储之后的 lw 排在下一次存储之前
+    assert graph.predecessors(6, DEP_MEM) == [3, 4]
+    assert graph.predecessors(7, DEP_MEM) == [6]
+    assert graph.predecessors(9, DEP_MEM) == [6, 7, 8]
+    assert graph.kind_counts()['MEM'] == 1 + 2 + 1 + 1 + 3
+    
+    print("  ✓ 加载 → 存储的访存边已加入")
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_csr_graph_edges,
+        test_csr_graph_without_numpy,
+        test_memory_war_edges,
+    ]
+    
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ✗ 失败: {e}")
+            failed += 1
+    
+    return 0 if failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
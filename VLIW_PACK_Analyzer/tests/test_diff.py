@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+测试停顿估算与构建间差异对比
+"""
+
+import sys
+import os
+import tempfile
+
+# 添加父目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from timing import StallEstimator
+from diff import BuildProfiler, diff_files
+from server import AnalysisService
+from builders import make_program, make_packages, write_disassembly, exit_loop, addi
+
+
+def test_stall_estimate():
+    """测试 ALU / load 结果的包间距要求与除法器阻塞"""
+    print("测试 1: 停顿估算")
+    
+    estimator = StallEstimator()
+    load = ('00c12583', 'lw', 'a1,12(sp)')
+    alu = ('00150593', 'addi', 'a1,a0,1')
+    use = ('00b50633', 'add', 'a2,a0,a1')
+    other = ('00000413', 'li', 's0,0')
+    
+    # 1-7 号流水线的 ALU 结果在 EX2 前递，下一个包即可使用；
+    # 0 号流水线在 EX2 / EX3 不能前递，需等到 WB
+    assert estimator.estimate(make_packages([[other, alu], [use]]))['stalls'] == 0
+    assert estimator.estimate(make_packages([[alu], [use]]))['data_stalls'] == 2
+    # load 结果需相隔 3 个包：相邻停顿 2 周期，中间隔一个包停顿 1 周期
+    assert estimator.estimate(make_packages([[load], [use]]))['data_stalls'] == 2
+    result = estimator.estimate(make_packages([[load], [other], [use]]))
+    assert result['data_stalls'] == 1 and result['cycles'] == 4
+    assert estimator.estimate(make_packages([[load], [other], [other], [use]]))['stalls'] == 0
+    # 包内的写后读由一层依赖处理
+    assert estimator.estimate(make_packages([[load, use]]))['stalls'] == 0
+    
+    divide = ('02b54633', 'div', 'a2,a0,a1')
+    result = estimator.estimate(make_packages([[divide], [other]]))
+    assert result['divide_stalls'] == 16 and result['data_stalls'] == 0
+    
+    print("  ✓ 停顿符合前递与 Hazard 规则")
+
+
+def test_diff_alignment():
+    """测试按函数名 / 编码摘要对齐函数，服务端结果与命令行一致"""
+    print("测试 2: 构建差异对比")
+    
+    tmpdir = tempfile.mkdtemp()
+    old_path = os.path.join(tmpdir, 'old.txt')
+    new_path = os.path.join(tmpdir, 'new.txt')
+    with open(old_path, 'w') as f:
+        f.write(make_program(7))
+    
+    # 新构建：func0 第一条指令变化，func1 改名，func3 内容变化且改名为 extra，删除 func5
+    text = make_program(7, changed=3)
+    text = text[:text.index(' <func5>:')].rsplit('\n', 1)[0] + '\n'
+    text = text.replace('<func1>', '<func1_v2>').replace('<func3>', '<extra>')
+    lines = text.split('\n')
+    first = lines.index(next(line for line in lines if line.endswith('<func0>:'))) + 1
+    address = lines[first].split(':')[0]
+    lines[first] = f"{address}:\t02a50533          \tmul\ta0,a0,a0"
+    with open(new_path, 'w') as f:
+        f.write('\n'.join(lines))
+    
+    try:
+        diff = diff_files(old_path, new_path, parallel=False)
+        rows = {row['function']: row for row in diff['functions']}
+        assert rows['func0']['status'] == 'changed'
+        assert rows['func1_v2']['status'] == 'renamed' and rows['func1_v2']['old_function'] == 'func1'
+        assert rows['extra']['status'] == 'added'
+        assert rows['func3']['status'] == 'removed' and rows['func5']['status'] == 'removed'
+        assert rows['func5']['delta']['packages'] == -rows['func5']['old']['packages']
+        assert diff['status_counts']['unchanged'] == 2
+        
+        totals = diff['totals']
+        assert totals['delta']['packages'] == sum(row['delta']['packages'] for row in diff['functions'])
+        impacts = [abs(row['delta']['cycles']) for row in diff['functions']]
+        assert impacts == sorted(impacts, reverse=True)
+        
+        assert diff_files(old_path, new_path) == diff
+        response = AnalysisService().handle({'op': 'diff', 'old': old_path, 'new': new_path})
+        assert response['totals'] == totals
+        assert [r['function'] for r in response['functions']] == [r['function'] for r in diff['functions']]
+    finally:
+        os.unlink(old_path)
+        os.unlink(new_path)
+        os.rmdir(tmpdir)
+    
+    print("  ✓ 函数对齐、排序与汇总正确")
+
+
+def test_shared_profile_cache():
+    """测试两侧共用逐函数指标缓存，整体移动的含分支函数只计算一次"""
+    print("测试 3: 共用逐函数缓存")
+    
+    # 新构建在 kernel 之前插入 init：kernel 整体后移 32 字节，bne 的绝对目标随之变化
+    moved = exit_loop(setup=[addi(11, 0, 10)])
+    old_path = write_disassembly([('kernel', exit_loop())])
+    new_path = write_disassembly([('init', moved[:1]), ('kernel', moved[1:])])
+    
+    try:
+        for parallel in (False, True):
+            profiler = BuildProfiler()
+            diff = diff_files(old_path, new_path, parallel=parallel, profiler=profiler)
+            assert diff['status_counts']['unchanged'] == 1 and diff['status_counts']['added'] == 1
+            stats = profiler.cache.stats()
+            assert stats['misses'] == 2 and stats['hits'] == 1 and stats['entries'] == 2
+    finally:
+        os.unlink(old_path)
+        os.unlink(new_path)
+    
+    print("  ✓ 移动后的函数命中缓存，串行与并行结果一致")
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_stall_estimate,
+        test_diff_alignment,
+        test_shared_profile_cache,
+    ]
+    
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ✗ 失败: {e}")
+            failed += 1
+    
+    return 0 if failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
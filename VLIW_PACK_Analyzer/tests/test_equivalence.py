@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+测试重打包等价性检查
+"""
+
+import sys
+import os
+
+# 添加父目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from instruction import VLIWPackage
+from equivalence import EquivalenceChecker, split_blocks, np
+from analyzer import VLIWAnalyzer
+from builders import make_program, make_packages, write_text, exit_loop, BNE
+
+LOAD = ('00c12583', 'lw', 'a1,12(sp)')
+USE = ('00158613', 'addi', 'a2,a1,1')
+STORE = ('00a12623', 'sw', 'a0,12(sp)')
+DEF_A1 = ('00150593', 'addi', 'a1,a0,1')
+
+
+def bundle(instructions, slots):
+    """由指令与槽位构造重打包后的包"""
+    pkg = VLIWPackage(instructions[0].address)
+    for inst in instructions:
+        pkg.add_instruction(inst)
+    pkg.slots = slots
+    return pkg
+
+
+def test_detects_wrong_schedules():
+    """测试错误的包内依赖、访存顺序与写后读顺序能被发现"""
+    print("测试 1: 发现错误的重打包")
+    if np is None:
+        print("  - 未安装 NumPy，跳过")
+        return
+    
+    checker = EquivalenceChecker(lanes=256)
+    
+    def first_divergence(items, bundles):
+        original = make_packages([items])
+        instructions = [inst for inst in original[0].instructions if not inst.is_nop]
+        optimized = [bundle([instructions[i] for i in indices], slots) for indices, slots in bundles]
+        return checker.check(original, optimized)['first_divergence']
+    
+    # load 结果不能在包内前递：同包时 addi 读到旧的 a1
+    divergence = first_divergence([LOAD, USE], [([0, 1], [5, 6])])
+    assert divergence['kind'] == 'register' and divergence['location'] == 'a2'
+    assert first_divergence([LOAD, USE], [([0], [5]), ([1], [0])]) is None
+    
+    # 访存保持程序顺序的槽位先后
+    assert first_divergence([STORE, LOAD], [([0, 1], [5, 6])]) is None
+    assert first_divergence([STORE, LOAD], [([0, 1], [6, 5])])['location'] == 'a1'
+    
+    # WAR：写 a1 的指令放在读 a1 的指令之前时，读到了前递的新值
+    assert first_divergence([USE, DEF_A1], [([0, 1], [0, 1])]) is None
+    assert first_divergence([USE, DEF_A1], [([0, 1], [1, 0])])['location'] == 'a2'
+    
+    # 分支条件读到错误的值
+    divergence = first_divergence([LOAD, BNE], [([0, 1], [5, 7])])
+    assert divergence['kind'] == 'control' and divergence['location'] == '0x80000004'
+    
+    # 分支之后的指令属于新的基本块
+    assert [len(block) for block in split_blocks(make_packages([[DEF_A1, BNE, USE]]))] == [2, 1]
+    
+    print("  ✓ 不等价的包内顺序与前递均被发现")
+
+
+def test_detects_straddling_bundles():
+    """测试跨基本块的包（出口指令放进分支所在的包）被判为不等价"""
+    print("测试 2: 发现跨基本块的包")
+    if np is None:
+        print("  - 未安装 NumPy，跳过")
+        return
+    
+    checker = EquivalenceChecker(lanes=64)
+    original = exit_loop()
+    add_s0, addi_a0, bne, addi_s0, add_a0 = [pkg.instructions[0] for pkg in original]
+    assert checker.check(original, original)['equivalent']
+    
+    # 贪心打包把 addi s0,s0,100 放在 bne 所在包的槽位 0：分支成立时也会执行，
+    # 逐块的数据语义不变，但 a0 = 0、a1 = 10 时出口的 a0 由 145 变为 1045
+    optimized = [
+        bundle([add_s0, addi_a0], [0, 1]),
+        bundle([addi_s0, bne], [0, 7]),
+        bundle([add_a0], [0]),
+    ]
+    result = checker.check(original, optimized)
+    assert result['straddling_bundles'] == 1 and result['divergent_blocks'] == 2
+    assert not result['equivalent']
+    first = result['first_divergence']
+    assert first['kind'] == 'control' and first['block'] == '0x80000000' and first['location'] == '0x80000040'
+    
+    # 出口指令放在分支之后的槽位也跨越了基本块
+    optimized[1] = bundle([bne, addi_s0], [6, 7])
+    result = checker.check(original, optimized)
+    assert not result['equivalent'] and result['first_divergence']['kind'] == 'straddle'
+    
+    print("  ✓ 跨基本块的包计为不等价")
+
+
+def test_repacked_program_is_equivalent():
+    """测试完整分析的重打包结果通过检查"""
+    print("测试 3: 重打包结果等价")
+    if np is None:
+        print("  - 未安装 NumPy，跳过")
+        return
+    
+    path = write_text(make_program(5, functions=6))
+    
+    try:
+        analyzer = VLIWAnalyzer(path, log_file=None)
+        analyzer.run_full_analysis()
+        result = analyzer.verify_equivalence(lanes=128)
+        assert result['equivalent'] and result['checked_blocks'] == result['blocks'] > 0
+        assert analyzer.summary_record()['equivalence'] == result
+    finally:
+        os.unlink(path)
+    
+    print("  ✓ 重打包结果逐基本块等价")
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_detects_wrong_schedules,
+        test_detects_straddling_bundles,
+        test_repacked_program_is_equivalent,
+    ]
+    
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ✗ 失败: {e}")
+            failed += 1
+    
+    return 0 if failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+测试反汇编导出器的流式输出格式
+"""
+
+import sys
+import os
+import tempfile
+
+# 添加父目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from instruction import Instruction, VLIWPackage
+from exporter import DisassemblyExporter
+from encoding import decode_b_imm, decode_j_imm
+from packer import VLIWPacker
+from frequency import BRANCH_BNE
+from builders import addi, branch, program
+
+LW = 10 << 15 | 2 << 12 | 12 << 7 | 0x03  # lw a2,0(a0)
+MUL = 1 << 25 | 11 << 20 | 10 << 15 | 13 << 7 | 0x33  # mul a3,a0,a1
+
+
+def _make_package(start: int, insts) -> VLIWPackage:
+    """按 (hex, mnemonic, operands) 列表构造包，地址从 start 开始连续"""
+    pkg = VLIWPackage(start)
+    for i, (hex_code, mnemonic, operands) in enumerate(insts):
+        pkg.add_instruction(Instruction(start + i * 4, hex_code, mnemonic, operands))
+    return pkg
+
+
+def test_export_reordered_asm_format():
+    """测试重排反汇编逐行输出与原格式逐字节一致"""
+    print("测试 1: 重排反汇编输出格式")
+    
+    original = [
+        _make_package(0x80000000, [('00a00513', 'li', 'a0,10')] + [('00000013', 'nop', '')] * 7),
+        _make_package(0x80000020, [('00150593', 'addi', 'a1,a0,1'), ('00000013', 'nop', '')]),
+    ]
+    optimized = [
+        _make_package(0x80000000, [('00a00513', 'li', 'a0,10'), ('00150593', 'addi', 'a1,a0,1')]),
+    ]
+    
+    expected_lines = [
+        "# VLIW 重排后反汇编",
+        "# 注意：PC 地址保持原始顺序，指令已根据一层依赖优化重排",
+        "# 原始包数：2，优化后包数：1",
+        "",
+        "\n# === Package 0 (有效指令: 2) ===",
+        "80000000: 00a00513     \tli\ta0,10",
+        "80000004: 00150593     \taddi\ta1,a0,1",
+    ]
+    expected_lines += [f"{0x80000008 + i * 4:08x}: 00000013     \tnop" for i in range(6)]
+    expected_lines += [
+        "\n# === Package 1 (已优化掉) ===",
+        "80000020: 00000013     \tnop",
+        "80000024: 00000013     \tnop",
+    ]
+    
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
+        output_path = f.name
+    
+    try:
+        DisassemblyExporter().export_reordered_asm(original, optimized, output_path)
+        with open(output_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        assert content == '\n'.join(expected_lines), "输出应与原格式逐字节一致"
+    finally:
+        os.remove(output_path)
+    
+    print("  ✓ 重排反汇编输出格式正确")
+
+
+def test_relocated_image_reencodes_branches():
+    """测试重定位镜像：跳转立即数按新布局重编码，包尾以 nop 补齐"""
+    print("测试 2: 重定位镜像")
+    
+    # 原始布局：j 跳到第 2 包的 addi；bne 回跳到 addi
+    original = [
+        _make_package(0x80000000, [('0200006f', 'j', '80000020')] + [('00000013', 'nop', '')] * 7),
+        _make_package(0x80000020, [
+            ('00000013', 'nop', ''),
+            ('00150513', 'addi', 'a0,a0,1'),
+            ('feb51ee3', 'bne', 'a0,a1,80000024'),
+        ]),
+    ]
+    optimized = [
+        _make_package(0x80000000, []),
+    ]
+    optimized[0].add_instruction(original[0].instructions[0])
+    optimized[0].add_instruction(original[1].instructions[1])
+    optimized.append(VLIWPackage(0x80000028))
+    optimized[1].add_instruction(original[1].instructions[2])
+    
+    # j 与其后基本块的 addi 同包，且两个目标都落在包中间：默认拒绝导出
+    exporter = DisassemblyExporter()
+    try:
+        exporter.relocate_words(original, optimized, 0x80000000)
+        assert False, "控制流改变时应拒绝导出"
+    except ValueError as e:
+        assert '2 个跳转目标不在包起始位置' in str(e) and '1 个包跨越基本块' in str(e)
+    
+    words, stats = exporter.relocate_words(original, optimized, 0x80000000, allow_misaligned=True)
+    
+    assert len(words) == 16, "每个优化包应输出 8 个字"
+    assert words[2:8].tolist() == [0x00000013] * 6, "包尾应以 nop 补齐"
+    # j 原目标为填充指令 0x80000020，应落到其后第一条有效指令（新地址 0x80000004）
+    assert decode_j_imm(words[0]) == 4
+    # bne 新地址 0x80000020，目标 addi 新地址 0x80000004
+    assert decode_b_imm(words[8]) == 0x80000004 - 0x80000020
+    assert stats['relocated_jumps'] == 1 and stats['relocated_branches'] == 1
+    assert stats['misaligned_targets'] == 2 and stats['straddling_bundles'] == 1
+    assert stats['removed_padding'] == 8
+    
+    print("  ✓ 分支/跳转立即数已按新布局重编码")
+
+
+def test_branch_target_at_bundle_start():
+    """测试以访存 / 乘法指令开始的包：跳转目标映射到包首，而不是该指令的槽位"""
+    print("测试 3: 目标指令不在槽位 0 的包")
+    
+    # 两个循环，循环体的第一条指令分别为 lw（槽位 5/6）与 mul（槽位 3/4）
+    original = program([
+        [addi(10, 0, 0), addi(11, 0, 64)],
+        [LW, addi(10, 10, 4), branch(BRANCH_BNE, 10, 11, -8)],
+        [MUL, addi(11, 11, -4), branch(BRANCH_BNE, 11, 0, -8)],
+    ])
+    optimized, _ = VLIWPacker().repack_with_one_level_dependency(original)
+    loads = [pkg for pkg in optimized if pkg.instructions[0].address == 0x80000020]
+    assert len(loads) == 1 and loads[0].slot_of(0) != 0
+    
+    words, stats = DisassemblyExporter().relocate_words(original, optimized, 0x80000000)
+    assert stats['misaligned_targets'] == 0 and stats['relocated_branches'] == 2
+    for pkg_idx, pkg in enumerate(optimized):
+        for slot, inst in enumerate(pkg.slotted()):
+            if inst is not None and inst.mnemonic == 'bne':
+                # 回跳到本包的包首
+                assert decode_b_imm(words[pkg_idx * 8 + slot]) == -slot * 4
+    
+    print("  ✓ 跳转目标落在包首，默认即可导出")
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_export_reordered_asm_format,
+        test_relocated_image_reencodes_branches,
+        test_branch_target_at_bundle_start,
+    ]
+    
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ✗ 失败: {e}")
+            failed += 1
+    
+    return 0 if failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+测试静态执行频率估算与加权统计
+"""
+
+import sys
+import os
+
+# 添加父目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from frequency import StaticProfile, compare_weighted, trip_count, BRANCH_BNE, BRANCH_BLT, BRANCH_BGE
+from analyzer import VLIWAnalyzer
+from builders import addi, branch, program, write_disassembly
+
+
+LW = 10 << 15 | 2 << 12 | 12 << 7 | 0x03  # lw a2,0(a0)
+
+
+def nested_program(inner_bound_reg=28):
+    """
+    两层循环：外层 t1 = 0..2（blt），内层 t0 = 0..7（bne 跳回自身）
+    
+    inner_bound_reg 为 28（t3，进入内层前 li 8）时可推断内层次数，为 10（a0）时不能
+    """
+    return program([
+        [addi(6, 0, 0), addi(7, 0, 3)],
+        [addi(5, 0, 0), addi(28, 0, 8)],
+        [LW, addi(5, 5, 1), branch(BRANCH_BNE, 5, inner_bound_reg, -8)],
+        [addi(6, 6, 1), branch(BRANCH_BLT, 6, 7, -0x44)],
+        [addi(8, 0, 0)],
+    ])
+
+
+def test_loop_nest_frequency():
+    """测试循环嵌套、迭代次数推断与块频率"""
+    print("测试 1: 循环嵌套与迭代次数推断")
+    
+    assert trip_count(BRANCH_BNE, True, 0, 1, 8) == 8
+    assert trip_count(BRANCH_BNE, True, 0, 3, 8) is None
+    assert trip_count(BRANCH_BLT, True, 0, 4, 10) == 3
+    # bge a0, t0 且 a0 自减：a0 = 10 递减到 t0 = 1
+    assert trip_count(BRANCH_BGE, True, 10, -1, 1) == 10
+    assert trip_count(BRANCH_BLT, True, 0, -1, 10) is None
+    
+    packages = nested_program()
+    profile = StaticProfile(packages)
+    summary = profile.summary()
+    assert summary['loops'] == 2 and summary['inferred_loops'] == 2 and summary['max_depth'] == 2
+    outer, inner = summary['loop_list']
+    assert (outer['address'], outer['trip_count'], outer['depth'], outer['blocks']) == ('0x80000020', 3, 1, 3)
+    assert (inner['address'], inner['trip_count'], inner['depth'], inner['frequency']) == ('0x80000040', 8, 2, 24)
+    assert [profile.package_frequency(pkg) for pkg in packages] == [1, 3, 24, 3, 1]
+    
+    # 内层上界在循环外不是常量时按默认次数计
+    profile = StaticProfile(nested_program(inner_bound_reg=10))
+    inner = profile.summary()['loop_list'][1]
+    assert not inner['inferred'] and inner['trip_count'] == 10 and inner['frequency'] == 30
+    
+    print("  ✓ 外层 3 次、内层 8 次，内层块频率 24；无法推断时按 10 次计")
+
+
+def test_weighted_statistics():
+    """测试加权统计与分析器报告"""
+    print("测试 2: 按频率加权的统计")
+    
+    packages = nested_program()
+    profile = StaticProfile(packages)
+    layouts = compare_weighted({'original': packages, 'hot': packages[2:3]}, profile)
+    static = layouts['original']['static']
+    weighted = layouts['original']['weighted']
+    assert static['packages'] == 5 and static['valid'] == 10
+    assert weighted['packages'] == 1 + 3 + 24 + 3 + 1
+    assert weighted['valid'] == 2 + 3 * 2 + 24 * 3 + 3 * 2 + 1
+    assert weighted['average_valid_per_package'] > static['average_valid_per_package']
+    # 只保留热循环时加权包数减少的比例远小于静态比例
+    hot = layouts['hot']
+    assert hot['static']['package_reduction_percentage'] == 80
+    assert hot['weighted']['package_reduction_percentage'] == 25
+    
+    path = write_disassembly([('main', packages)])
+    try:
+        analyzer = VLIWAnalyzer(path, log_file=None)
+        analyzer.run_full_analysis()
+        search_stats = analyzer.search_repack(budget_ms=20)
+        profile_stats = analyzer.estimate_static_profile()
+    finally:
+        os.unlink(path)
+    assert set(profile_stats['layouts']) == {'original', 'optimized', 'search'}
+    optimized = profile_stats['layouts']['optimized']
+    # 重打包结果不跨越基本块，与搜索的逐块贪心基准相同，每个包的频率就是所在块的频率
+    assert optimized['static']['packages'] == len(analyzer.optimized_packages) == search_stats['greedy']['packages']
+    assert optimized['static']['cycles'] == search_stats['greedy']['cycles']
+    for pkg in analyzer.optimized_packages:
+        assert len({profile.frequency_of(inst.address) for inst in pkg.instructions}) == 1
+    assert optimized['weighted']['valid'] == weighted['valid']
+    assert analyzer.summary_record()['profile'] == profile_stats
+    report = analyzer.generate_report()
+    assert '--- 静态执行频率加权 ---' in report and '0x80000040' in report
+    
+    print(f"  ✓ 平均每包有效指令 {static['average_valid_per_package']:.2f} → 加权 {weighted['average_valid_per_package']:.2f}")
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_loop_nest_frequency,
+        test_weighted_statistics,
+    ]
+    
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ✗ 失败: {e}")
+            failed += 1
+    
+    return 0 if failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
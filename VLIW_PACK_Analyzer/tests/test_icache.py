@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+测试 I-Cache 模拟器
+"""
+
+import sys
+import os
+import random
+
+# 添加父目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from icache import ICacheSimulator
+
+
+def test_lru_replacement():
+    """测试 2 路组相联 LRU 替换"""
+    print("测试 1: LRU 替换")
+    
+    # 2 组 × 2 路，行 32 字节：行 0/2/4 映射到同一组
+    sim = ICacheSimulator(size_bytes=128, line_bytes=32, associativity=2)
+    fetches = [(0, 32), (64, 32), (0, 32), (128, 32), (64, 32), (0, 32)]
+    stats = sim.simulate(fetches)
+    
+    # 0 miss, 64 miss, 0 hit, 128 miss(替换 64), 64 miss(替换 0), 0 miss
+    assert stats['accesses'] == 6
+    assert stats['misses'] == 5
+    assert stats['miss_cycles'] == 5 * sim.miss_penalty
+    
+    print("  ✓ LRU 替换正确")
+
+
+def test_fast_path_matches_scalar():
+    """测试向量化重放与逐次模拟结果一致"""
+    print("测试 2: 向量化重放结果一致")
+    
+    rng = random.Random(1)
+    fetches = [(rng.randrange(0, 1 << 12) // 4 * 4, rng.choice([0, 20, 32, 36])) for _ in range(5000)]
+    
+    for associativity in (1, 2, 4):
+        sim = ICacheSimulator(size_bytes=1024, line_bytes=32, associativity=associativity)
+        assert sim.simulate_fast(fetches) == sim.simulate(fetches), f"{associativity} 路结果不一致"
+    
+    print("  ✓ 向量化重放与逐次模拟一致")
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_lru_replacement,
+        test_fast_path_matches_scalar,
+    ]
+    
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ✗ 失败: {e}")
+            failed += 1
+    
+    return 0 if failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
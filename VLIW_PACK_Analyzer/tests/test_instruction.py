@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+测试指令译码缓存
+"""
+
+import sys
+import os
+import pickle
+
+# 添加父目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from instruction import Instruction, VLIWPackage, register_index
+from dependency import DependencyAnalyzer
+
+
+def test_decode_cache_shares_record():
+    """测试相同编码的指令共享同一个译码结果，且每次出现只保存地址"""
+    print("测试 1: 译码缓存共享")
+    
+    a = Instruction(0x80000000, "00150593", "addi", "a1,a0,1")
+    b = Instruction(0x80000100, " 00150593 ", "addi", " a1,a0,1")
+    
+    assert a.decoded is b.decoded, "相同编码应共享译码结果"
+    assert a.address != b.address
+    assert a.rd == 'x11' and a.rs1 == 'x10' and a.inst_type == 'ALU'
+    assert not hasattr(a, '__dict__'), "Instruction 不应携带实例字典"
+    
+    try:
+        a.decoded.rd = 'x12'
+        assert False, "共享译码结果应不可修改"
+    except AttributeError:
+        pass
+    
+    print("  ✓ 译码结果按编码共享且不可修改")
+
+
+def test_decoded_record_pickle():
+    """测试序列化后仍通过译码缓存恢复共享实例"""
+    print("测试 2: 序列化经过译码缓存")
+    
+    a = Instruction(0x80000000, "00000013", "nop", "")
+    b = pickle.loads(pickle.dumps(a))
+    
+    assert b.address == a.address
+    assert b.decoded is a.decoded
+    assert b.is_nop
+    
+    print("  ✓ 反序列化得到共享译码结果")
+
+
+def test_register_masks():
+    """测试寄存器读写集合的位掩码表示"""
+    print("测试 3: 寄存器位掩码")
+    
+    assert register_index('x0') == 0 and register_index('f0') == 32
+    assert register_index('f31') == 63 and register_index('pc') is None
+    
+    fsub = Instruction(0x80000000, "08b57553", "fsub.s", "fa0,fa0,fa1")
+    assert fsub.inst_type == 'FPU', "fsub.s 不应被识别为存储指令"
+    assert fsub.reads == (1 << 42) | (1 << 43)
+    assert fsub.writes == 1 << 42
+    
+    flt = Instruction(0x80000004, "a0b51553", "flt.s", "a0,fa0,fa1")
+    assert flt.inst_type == 'FPU', "flt.s 不应被识别为加载指令"
+    
+    assert Instruction(0x80000008, "00150013", "addi", "zero,a0,1").writes == 0
+    
+    addi = Instruction(0x8000000c, "00150593", "addi", "a1,a0,1")
+    use = Instruction(0x80000010, "00b12223", "sw", "a1,4(sp)")
+    analyzer = DependencyAnalyzer()
+    assert analyzer.analyze_raw_dependency(addi, use)
+    assert not analyzer.analyze_war_dependency(addi, use)
+    assert analyzer.analyze_waw_dependency(addi, addi)
+    
+    print("  ✓ 读写集合与依赖判断正确")
+
+
+def test_bundle_conflicts():
+    """测试包内冲突检查（NumPy 与纯 Python 路径一致）"""
+    print("测试 4: 包内冲突检查")
+    
+    import dependency
+    
+    def bundle(*insts):
+        pkg = VLIWPackage(insts[0].address)
+        for inst in insts:
+            pkg.add_instruction(inst)
+        return pkg
+    
+    packages = [
+        # 一层依赖：ALU -> ALU，允许同包
+        bundle(Instruction(0x80000000, "00150593", "addi", "a1,a0,1"),
+               Instruction(0x80000004, "00158613", "addi", "a2,a1,1")),
+        # 乘法结果不能在同包内转发
+        bundle(Instruction(0x80000020, "02b505b3", "mul", "a1,a0,a1"),
+               Instruction(0x80000024, "00158613", "addi", "a2,a1,1")),
+        # 写同一寄存器
+        bundle(Instruction(0x80000040, "00150593", "addi", "a1,a0,1"),
+               Instruction(0x80000044, "00250593", "addi", "a1,a0,2")),
+    ]
+    
+    analyzer = DependencyAnalyzer()
+    expected = [False, True, True]
+    assert analyzer.find_bundle_conflicts(packages) == expected
+    
+    saved = dependency.np
+    dependency.np = None
+    try:
+        assert analyzer.find_bundle_conflicts(packages) == expected
+    finally:
+        dependency.np = saved
+    
+    print("  ✓ 冲突检查结果正确")
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_decode_cache_shares_record,
+        test_decoded_record_pickle,
+        test_register_masks,
+        test_bundle_conflicts,
+    ]
+    
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ✗ 失败: {e}")
+            failed += 1
+    
+    return 0 if failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
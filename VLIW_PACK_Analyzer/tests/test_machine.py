@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+测试机器描述：槽位分配与旁路拓扑
+"""
+
+import sys
+import os
+
+# 添加父目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import machine as machine_module
+from machine import MachineDescription, default_machine, parse_bypass_spec, format_paths
+from packer import OnlinePacker, VLIWPacker
+from timing import StallEstimator
+from exporter import DisassemblyExporter
+from encoding import NOP_WORD
+from config import REGFILE_DISTANCE
+from builders import make_packages, make_instructions
+
+ADDI = ('00150593', 'addi', 'a1,a0,1')
+MUL = ('02b50633', 'mul', 'a2,a0,a1')
+LOAD = ('00c12683', 'lw', 'a3,12(sp)')
+BEQ = ('00060063', 'beq', 'a2,zero,0x80000010')
+BEQ_A1 = ('00058063', 'beq', 'a1,zero,0x8000000c')
+DEF_A2 = ('00150613', 'addi', 'a2,a0,1')
+
+
+def test_slot_assignment():
+    """测试槽位类别、相关指令的槽位先后与按槽位导出"""
+    print("测试 1: 槽位分配")
+    
+    def bundles(items):
+        return list(OnlinePacker().feed(make_instructions(items)))
+    
+    # 分支只能在 7 号槽位：两条分支不能同包
+    assert [len(b.instructions) for b in bundles([BEQ, BEQ])] == [1, 1]
+    # beq 读 a2，其后写 a2 的指令须位于更高的槽位，而 7 号槽位之后没有槽位
+    assert [len(b.instructions) for b in bundles([BEQ, DEF_A2])] == [1, 1]
+    
+    machine = default_machine()
+    [pkg] = bundles([MUL, ADDI, LOAD, BEQ_A1])
+    assert len(pkg.instructions) == 4
+    for index, inst in enumerate(pkg.instructions):
+        assert machine.slot_mask(inst) >> pkg.slot_of(index) & 1, inst.mnemonic
+    # mul 读 a1、addi 写 a1（WAR），addi 须在 mul 之后
+    assert pkg.slot_of(0) < pkg.slot_of(1) < pkg.slot_of(3) == 7
+    
+    # 导出镜像中每条指令位于其槽位，其余槽位为 nop（beq 跳向自身，目标不在包首）
+    original = make_packages([[MUL, ADDI, LOAD, BEQ_A1]])
+    words, _ = DisassemblyExporter().relocate_words(original, [pkg], allow_misaligned=True)
+    assert len(words) == 8
+    layout = pkg.slotted()
+    for slot, word in enumerate(words):
+        if layout[slot] is None:
+            assert word == NOP_WORD
+        elif layout[slot].mnemonic != 'beq':
+            assert word == int(layout[slot].hex_code, 16)
+    
+    # 槽位分配缓存按 LRU 限制容量
+    capacity = machine_module.SLOT_ASSIGNMENT_CACHE_SIZE
+    machine_module.SLOT_ASSIGNMENT_CACHE_SIZE = 2
+    try:
+        bounded = MachineDescription()
+        for count in range(1, 5):
+            assert bounded.assign_slots(((0xff, 0, 0),) * count) == tuple(range(count))
+        assert list(bounded._assignments) == [((0xff, 0, 0),) * 3, ((0xff, 0, 0),) * 4]
+    finally:
+        machine_module.SLOT_ASSIGNMENT_CACHE_SIZE = capacity
+    
+    print("  ✓ 槽位满足类别与顺序约束，导出按槽位排布，分配缓存有界")
+
+
+def test_bypass_what_if():
+    """测试旁路距离表与增删旁路路径的周期对比"""
+    print("测试 2: 旁路拓扑假设分析")
+    
+    machine = default_machine()
+    alu = machine.distance_table('ALU')
+    # 0 号流水线没有 EX2 / EX3 旁路，ALU 结果只能在 WB 级前递
+    assert alu[0] == [3] * 8 and alu[1] == [1] * 8
+    assert machine.with_paths(drop=parse_bypass_spec('WB:0:*')).distance_table('ALU')[0] == [REGFILE_DISTANCE] * 8
+    assert format_paths(parse_bypass_spec('EX3:1-3,5:2') | parse_bypass_spec('WB:*:*')) == ['EX3:1-3,5:2', 'WB:*:*']
+    
+    use = ('00158613', 'addi', 'a2,a1,1')
+    packages = make_packages([[ADDI], [use]])
+    assert StallEstimator().estimate(packages)['data_stalls'] == 2
+    
+    # 为 0 号流水线增加 EX2 旁路后不再停顿
+    packer = VLIWPacker()
+    result = packer.compare_bypass(packages, machine.with_paths(add=parse_bypass_spec('EX2:0:*')))
+    assert result['added'] == ['EX2:0:*'] and result['dropped'] == []
+    assert result['baseline']['original_stalls'] == 2 and result['modified']['original_stalls'] == 0
+    assert result['delta']['original_cycles'] == -2
+    
+    # 删除全部旁路后 load 结果只能经寄存器堆读取，停顿增加
+    packages = make_packages([[LOAD], [('00168613', 'addi', 'a2,a3,1')]])
+    no_bypass = machine.with_paths(drop=machine.paths)
+    result = packer.compare_bypass(packages, no_bypass)
+    assert result['delta']['original_stalls'] == REGFILE_DISTANCE - 3
+    assert result['delta']['cycles'] > 0
+    
+    print("  ✓ 距离表与旁路矩阵一致，增删路径反映在估算周期上")
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_slot_assignment,
+        test_bypass_what_if,
+    ]
+    
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ✗ 失败: {e}")
+            failed += 1
+    
+    return 0 if failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+测试流式重打包与包内前递链深度
+"""
+
+import sys
+import os
+
+# 添加父目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from packer import OnlinePacker, ForwardingModel, VLIWPacker, branch_targets
+from timing import StallEstimator
+from analyzer import VLIWAnalyzer
+from equivalence import EquivalenceChecker, np
+from builders import make_program, make_packages, make_instructions, write_text, exit_loop, addi
+
+
+def test_online_packing():
+    """测试打包规则与包的即时输出"""
+    print("测试 1: 流式打包")
+    
+    addi = ('00150593', 'addi', 'a1,a0,1')
+    add = ('00b50633', 'add', 'a2,a0,a1')
+    load = ('00c12583', 'lw', 'a1,12(sp)')
+    li = ('00000413', 'li', 's0,0')
+    nop = ('00000013', 'nop', '')
+    
+    # addi -> add 为一层依赖可同包；lw -> add 不能同包
+    packer = OnlinePacker()
+    bundles = list(packer.feed(make_instructions([addi, add, nop, load, add])))
+    assert [len(b.instructions) for b in bundles] == [3, 1]
+    assert packer.merged_pairs == 1
+    
+    # 满包在第 8 条指令输入时立即输出，而不是等到下一条指令或输入结束
+    packer = OnlinePacker()
+    emitted = [packer.push(inst) for inst in make_instructions([li] * 9)]
+    assert all(b is None for b in emitted[:7])
+    assert emitted[7] is not None and len(emitted[7].instructions) == 8
+    assert emitted[8] is None and packer.current is not None
+    assert len(packer.flush().instructions) == 1 and packer.emitted == 2
+    
+    print("  ✓ 打包规则正确，包确定后立即输出")
+
+
+def test_forwarding_chain_depth():
+    """测试最大链深、逐级前递规则与深度对比"""
+    print("测试 2: 包内前递链深度")
+    
+    li = ('00100513', 'li', 'a0,1')
+    addi1 = ('00150593', 'addi', 'a1,a0,1')
+    addi2 = ('00158613', 'addi', 'a2,a1,1')
+    beq = ('00060063', 'beq', 'a2,zero,0x80000010')
+    chain = make_instructions([li, addi1, addi2, beq])
+    
+    def sizes(model):
+        return [len(b.instructions) for b in OnlinePacker(model).feed(chain)]
+    
+    assert sizes(ForwardingModel(0)) == [1, 1, 1, 1]
+    assert sizes(ForwardingModel()) == [2, 2]
+    assert sizes(ForwardingModel(2)) == [3, 1]
+    assert sizes(ForwardingModel(3)) == [4]
+    # 第 2 级之后只允许前递给分支指令：addi2 不能作为第 2 级消费者
+    levels = [({'ALU'}, {'ALU', 'BRANCH'}), ({'ALU'}, {'BRANCH'})]
+    assert sizes(ForwardingModel(3, levels)) == [2, 2]
+    
+    packages = make_packages([[li, addi1, addi2, beq], [addi1, ('00c12583', 'lw', 'a1,12(sp)'), addi2]])
+    result = VLIWPacker().compare_forwarding_depths(packages, depths=(3, 1, 0))
+    assert [row['depth'] for row in result['depths']] == [0, 1, 3]
+    estimator = StallEstimator()
+    assert result['original_cycles'] == estimator.estimate(packages)['cycles']
+    for row in result['depths']:
+        repacked, stats = VLIWPacker(ForwardingModel(row['depth'])).repack_with_one_level_dependency(packages)
+        assert row['packages'] == len(repacked) and row['merged_pairs'] == stats['merged_pairs']
+        assert row['cycles'] == estimator.estimate(repacked)['cycles']
+        assert row['cycle_gain'] == result['original_cycles'] - row['cycles']
+    
+    print("  ✓ 链深限制与逐级规则正确，深度对比与单独重打包一致")
+
+
+def test_packing_respects_basic_blocks():
+    """测试包不跨越基本块：分支之后的指令与分支目标都开始新包"""
+    print("测试 3: 包不跨越基本块")
+    
+    def mnemonics(bundles):
+        return [[inst.mnemonic for inst in pkg.instructions] for pkg in bundles]
+    
+    # 出口的 addi s0,s0,100 不能放进 bne 所在的包（否则分支成立时也会执行）
+    packages = exit_loop()
+    optimized, _ = VLIWPacker().repack_with_one_level_dependency(packages)
+    assert mnemonics(optimized) == [['add', 'addi', 'bne'], ['addi', 'add']]
+    if np is not None:
+        assert EquivalenceChecker(lanes=64).check(packages, optimized)['equivalent']
+    
+    # 循环前加一条 li a1,10：循环入口是向后分支的目标，必须位于包首
+    packages = exit_loop(setup=[addi(11, 0, 10)])
+    instructions = [inst for pkg in packages for inst in pkg.instructions if not inst.is_nop]
+    assert branch_targets(instructions) == [0x80000020]
+    assert mnemonics(OnlinePacker().feed(instructions))[0] == ['li', 'add', 'addi', 'bne']
+    optimized, _ = VLIWPacker().repack_with_one_level_dependency(packages)
+    assert mnemonics(optimized) == [['li'], ['add', 'addi', 'bne'], ['addi', 'add']]
+    assert optimized[1].start_address == 0x80000020
+    
+    # 向前的目标在输入分支时记录
+    beq = ('00000463', 'beq', 'zero,zero,0x80000008')
+    li = ('00000413', 'li', 's0,0')
+    bundles = OnlinePacker().feed(make_instructions([beq, li, li, li]))
+    assert [len(pkg.instructions) for pkg in bundles] == [1, 1, 2]
+    
+    print("  ✓ 控制转移指令封闭当前包，分支目标开始新包")
+
+
+def test_streaming_analysis():
+    """测试流式分析与完整分析的汇总一致"""
+    print("测试 4: 流式分析")
+    
+    path = write_text(make_program(11, functions=8))
+    
+    try:
+        full = VLIWAnalyzer(path, log_file=None)
+        full.run_full_analysis()
+        full.compare_forwarding_depths()
+        stream = VLIWAnalyzer(path, log_file=None)
+        stream.run_streaming_analysis(forwarding_depths=(0, 1, 2, 3))
+        assert stream.summary_record() == full.summary_record()
+        assert not stream.original_packages and not stream.optimized_packages
+    finally:
+        os.unlink(path)
+    
+    print("  ✓ 流式分析汇总与完整分析一致")
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_online_packing,
+        test_forwarding_chain_depth,
+        test_packing_respects_basic_blocks,
+        test_streaming_analysis,
+    ]
+    
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ✗ 失败: {e}")
+            failed += 1
+    
+    return 0 if failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
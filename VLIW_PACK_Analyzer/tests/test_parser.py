@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+测试反汇编解析器
+"""
+
+import sys
+import os
+import tempfile
+import gzip
+import bz2
+import lzma
+import pickle
+
+# 添加父目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from parser import DisassemblyParser, split_line_ranges
+from builders import SAMPLE
+
+
+def test_split_line_ranges():
+    """测试字节区间首尾相接且对齐到行首"""
+    print("测试 1: 按行对齐切分")
+    
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+        f.write(SAMPLE)
+        path = f.name
+    
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        for count in (1, 3, 7, 1000):
+            ranges = split_line_ranges(path, count)
+            assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+            for (_, end), (start, _) in zip(ranges, ranges[1:]):
+                assert end == start and data[start - 1:start] == b'\n'
+    finally:
+        os.unlink(path)
+    
+    print("  ✓ 区间划分正确")
+
+
+def test_parallel_parse_matches_serial():
+    """测试并行解析与串行解析结果一致"""
+    print("测试 2: 并行解析结果一致")
+    
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+        f.write(SAMPLE * 20)
+        path = f.name
+    
+    try:
+        parser = DisassemblyParser()
+        serial = parser.parse_file(path)
+        serial_symbols = parser.symbols
+        
+        parallel = parser._parse_parallel(path, 2)
+        
+        def flatten(packages):
+            return [
+                (inst.address, inst.hex_code, inst.mnemonic, inst.operands)
+                for pkg in packages for inst in pkg.instructions
+            ]
+        
+        assert [pkg.valid_count for pkg in parallel] == [pkg.valid_count for pkg in serial]
+        assert [pkg.start_address for pkg in parallel] == [pkg.start_address for pkg in serial]
+        
+        # 尚未取出指令的包经过 pickle（进程池传参）后仍可正常访问
+        restored = pickle.loads(pickle.dumps(parallel))
+        assert flatten(restored) == flatten(serial)
+        
+        assert flatten(parallel) == flatten(serial)
+        assert parser.symbols == serial_symbols
+        assert len(serial_symbols) == 40
+    finally:
+        os.unlink(path)
+    
+    print("  ✓ 指令与符号表一致")
+
+
+def test_fast_parse_matches_serial():
+    """测试 mmap + 字节正则快速解析与串行解析结果一致（含不规则行）"""
+    print("测试 3: 快速解析结果一致")
+    
+    tricky = (
+        "# 80000000: 00000013 nop\n"
+        "80000000 <_start>:  \r\n"
+        "  80000000:\t00000013          \tnop   \r\n"
+        "80000004:\t00008067\tret\n"
+        "80000008: 00a00513  li  a0,10  # x\n"
+        "8000000c:\t00000013\n"
+        "8000000c <f<g>>:\n"
+        "8000000c:\tfe0518e3          \tbnez\ta0,80000034 <main+0xc>\n"
+    )
+    
+    for text in (SAMPLE, tricky, ""):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, newline='') as f:
+            f.write(text)
+            path = f.name
+        
+        try:
+            parser = DisassemblyParser()
+            serial = parser.parse_file(path)
+            serial_symbols = parser.symbols
+            fast = parser.parse_file(path, fast=True)
+            
+            # 包边界与有效指令数在创建指令对象之前就已确定
+            assert [(pkg.start_address, pkg.valid_count) for pkg in fast] == [
+                (pkg.start_address, pkg.valid_count) for pkg in serial
+            ]
+            assert [
+                (inst.address, inst.decoded) for pkg in fast for inst in pkg.instructions
+            ] == [
+                (inst.address, inst.decoded) for pkg in serial for inst in pkg.instructions
+            ]
+            assert parser.symbols == serial_symbols
+        finally:
+            os.unlink(path)
+    
+    print("  ✓ 指令与符号表一致")
+
+
+def test_compressed_input():
+    """测试 .gz / .bz2 / .xz 输入边读边解压，结果与未压缩文件一致"""
+    print("测试 4: 压缩输入")
+    
+    import parser as parser_module
+    
+    tmpdir = tempfile.mkdtemp()
+    plain = os.path.join(tmpdir, 'prog.txt')
+    with open(plain, 'w') as f:
+        f.write(SAMPLE * 3)
+    
+    parser = DisassemblyParser()
+    expected = [(inst.address, inst.decoded) for pkg in parser.parse_file(plain) for inst in pkg.instructions]
+    expected_symbols = parser.symbols
+    
+    saved = parser_module.STREAM_READ_BLOCK_SIZE
+    parser_module.STREAM_READ_BLOCK_SIZE = 37  # 让块边界落在行中间
+    try:
+        for suffix, opener in (('.gz', gzip.open), ('.bz2', bz2.open), ('.xz', lzma.open)):
+            path = plain + suffix
+            with opener(path, 'wt') as f:
+                f.write(SAMPLE * 3)
+            for fast in (False, True):
+                packages = parser.parse_file(path, fast=fast)
+                assert [(inst.address, inst.decoded) for pkg in packages for inst in pkg.instructions] == expected
+                assert parser.symbols == expected_symbols
+            os.unlink(path)
+    finally:
+        parser_module.STREAM_READ_BLOCK_SIZE = saved
+        os.unlink(plain)
+        os.rmdir(tmpdir)
+    
+    print("  ✓ 压缩输入解析结果一致")
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_split_line_ranges,
+        test_parallel_parse_matches_serial,
+        test_fast_parse_matches_serial,
+        test_compressed_input,
+    ]
+    
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ✗ 失败: {e}")
+            failed += 1
+    
+    return 0 if failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+测试流式 NDJSON / CSV 结果输出
+"""
+
+import sys
+import os
+import io
+import csv
+import json
+import tempfile
+
+# 添加父目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer import VLIWAnalyzer
+from record_writer import create_record_writer, NDJSONRecordWriter
+
+
+SAMPLE_ASM = """
+Disassembly of section .text:
+
+80000000 <_start>:
+80000000:	00000413          	li	s0,0
+80000004:	00000013          	nop
+80000008:	00000013          	nop
+8000000c:	00000013          	nop
+80000010:	00000013          	nop
+80000014:	00000013          	nop
+80000018:	00000013          	nop
+8000001c:	0040006f          	j	80000020 <main>
+
+80000020 <main>:
+80000020:	00000013          	nop
+80000024:	ff010113          	addi	sp,sp,-16
+80000028:	00a00513          	li	a0,10
+8000002c:	00150593          	addi	a1,a0,1
+80000030:	00000013          	nop
+80000034:	00000013          	nop
+80000038:	00000013          	nop
+8000003c:	a0002053          	feq.s	zero,ft0,ft0
+"""
+
+
+def _run_with_writer(fmt: str, stream: bool = False) -> str:
+    """分析示例文件并返回流式输出文本"""
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
+        f.write(SAMPLE_ASM)
+        input_path = f.name
+    
+    try:
+        out = io.StringIO()
+        analyzer = VLIWAnalyzer(input_path, log_file=None)
+        record_writer = create_record_writer(fmt, out)
+        if stream:
+            analyzer.run_streaming_analysis(record_writer=record_writer)
+        else:
+            analyzer.run_full_analysis(record_writer=record_writer)
+        record_writer.write_summary(analyzer.summary_record())
+        return out.getvalue()
+    finally:
+        os.remove(input_path)
+
+
+def test_ndjson_records():
+    """测试 NDJSON 输出：逐包、逐函数记录，最后一条为汇总"""
+    print("测试 1: NDJSON 流式输出")
+    
+    records = [json.loads(line) for line in _run_with_writer('ndjson').splitlines()]
+    kinds = [r['record'] for r in records]
+    
+    assert kinds == ['package', 'function', 'package', 'function', 'summary'], kinds
+    assert records[0]['function'] == '_start'
+    assert records[0]['valid'] == 2
+    assert records[1]['removable_padding'] == 0
+    assert records[3]['function'] == 'main'
+    assert records[3]['removable_padding'] == 5
+    assert records[-1]['original']['total_packages'] == 2
+    assert 'one_level_pair_list' not in records[-1]['dependency']
+    
+    print("  ✓ NDJSON 记录顺序与内容正确")
+
+
+def test_csv_records():
+    """测试 CSV 输出：汇总记录展开为 key/value 行"""
+    print("测试 2: CSV 流式输出")
+    
+    rows = list(csv.DictReader(io.StringIO(_run_with_writer('csv'))))
+    
+    assert rows[0]['record'] == 'package'
+    summary = {row['key']: row['value'] for row in rows if row['record'] == 'summary'}
+    assert summary['original.total_packages'] == '2'
+    assert summary['padding.removable_padding'] == '5'
+    
+    print("  ✓ CSV 记录内容正确")
+
+
+def test_records_during_parse():
+    """测试包 / 函数记录在解析过程中输出，流式分析输出相同的记录"""
+    print("测试 3: 边解析边输出记录")
+    
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
+        f.write(SAMPLE_ASM)
+        input_path = f.name
+    
+    try:
+        analyzer = VLIWAnalyzer(input_path, log_file=None)
+        parsed = []
+        
+        class Recorder(NDJSONRecordWriter):
+            def write_package(self, record):
+                # 写出第 i 个包时解析只进行到第 i 个包
+                parsed.append(len(analyzer.original_packages))
+                super().write_package(record)
+        
+        analyzer.run_full_analysis(record_writer=Recorder(io.StringIO()))
+    finally:
+        os.remove(input_path)
+    assert parsed == [1, 2], parsed
+    
+    full = [json.loads(line) for line in _run_with_writer('ndjson').splitlines()]
+    streamed = [json.loads(line) for line in _run_with_writer('ndjson', stream=True).splitlines()]
+    assert [r['record'] for r in streamed] == ['package', 'function', 'package', 'function', 'summary']
+    assert streamed[:-1] == full[:-1]
+    assert streamed[-1]['original']['total_packages'] == 2
+    
+    print("  ✓ 记录随解析逐条输出，--stream 输出相同的包 / 函数记录")
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_ndjson_records,
+        test_csv_records,
+        test_records_during_parse,
+    ]
+    
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ✗ 失败: {e}")
+            failed += 1
+    
+    return 0 if failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
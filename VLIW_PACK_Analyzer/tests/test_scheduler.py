@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+测试搜索式重打包
+"""
+
+import sys
+import os
+import random
+
+# 添加父目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from scheduler import SearchPacker
+from machine import default_machine
+from equivalence import EquivalenceChecker, split_blocks, np
+from builders import make_packages, POOL, BNE
+
+
+def make_dense_program(seed: int, bundles: int = 12):
+    """随机的稠密代码：中间有一个跳回 0x80000008 的分支"""
+    rng = random.Random(seed)
+    items = [[rng.choice(POOL) for _ in range(rng.randrange(3, 8))] for _ in range(bundles)]
+    items[bundles // 2].append(BNE)
+    return make_packages(items)
+
+
+def layout(packages):
+    return [(pkg.start_address, [inst.address for inst in pkg.instructions], pkg.slots) for pkg in packages]
+
+
+def test_search_improves_greedy():
+    """测试搜索结果合法、不劣于逐块贪心，且与原始代码等价"""
+    print("测试 1: 搜索改进贪心打包")
+    
+    original = make_dense_program(0)
+    packages, stats = SearchPacker(budget_ms=5000, anneal_steps=100).repack(original)
+    
+    assert stats['blocks'] == len(split_blocks(original)) == 3
+    assert stats['improved_blocks'] > 0 and stats['fallback_blocks'] == 0
+    assert stats['improved_blocks'] == sum(stats['by_method'].values())
+    assert stats['search']['cycles'] < stats['greedy']['cycles']
+    assert stats['cycle_gain'] == stats['greedy']['cycles'] - stats['search']['cycles']
+    
+    # 每条指令恰好出现一次，槽位互不相同且在可用槽位内，包不跨基本块
+    machine = default_machine()
+    block_of = {inst.address: k for k, block in enumerate(split_blocks(original)) for inst in block}
+    addresses = []
+    for pkg in packages:
+        assert len(set(pkg.slots)) == len(pkg.slots) == len(pkg.instructions)
+        assert pkg.slots == sorted(pkg.slots)
+        for inst, slot in zip(pkg.instructions, pkg.slots):
+            assert machine.slot_mask(inst) >> slot & 1
+        assert len({block_of[inst.address] for inst in pkg.instructions}) == 1
+        addresses.extend(inst.address for inst in pkg.instructions)
+    assert sorted(addresses) == sorted(block_of)
+    
+    if np is not None:
+        result = EquivalenceChecker(lanes=256).check(original, packages)
+        assert result['equivalent'] and result['straddling_bundles'] == 0
+    
+    print(f"  ✓ 估算周期 {stats['greedy']['cycles']} → {stats['search']['cycles']}，调度合法且等价")
+
+
+def test_budget_fallback_and_parallel():
+    """测试预算耗尽时退回贪心，并行搜索与串行结果一致"""
+    print("测试 2: 预算退回与并行搜索")
+    
+    original = make_dense_program(7, bundles=16)
+    packages, stats = SearchPacker(budget_ms=0).repack(original)
+    assert stats['searched_blocks'] > 0 and stats['fallback_blocks'] == stats['searched_blocks']
+    assert stats['improved_blocks'] == 0 and stats['search'] == stats['greedy']
+    
+    serial, serial_stats = SearchPacker(budget_ms=5000, anneal_steps=50).repack(original)
+    parallel, parallel_stats = SearchPacker(budget_ms=5000, anneal_steps=50, jobs=2).repack(original)
+    assert layout(serial) == layout(parallel)
+    assert serial_stats['search'] == parallel_stats['search'] and parallel_stats['jobs'] == 2
+    assert serial_stats['search']['cycles'] <= stats['greedy']['cycles']
+    
+    print("  ✓ 预算为 0 时全部退回贪心，并行与串行结果一致")
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_search_improves_greedy,
+        test_budget_fallback_and_parallel,
+    ]
+    
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ✗ 失败: {e}")
+            failed += 1
+    
+    return 0 if failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+测试常驻分析服务
+"""
+
+import sys
+import os
+import tempfile
+import threading
+
+# 添加父目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from server import AnalysisService, AnalysisServer
+from client import AnalysisClient
+from analyzer import VLIWAnalyzer
+from builders import make_program
+
+
+def full_summary(path: str):
+    analyzer = VLIWAnalyzer(path, log_file=None)
+    analyzer.run_full_analysis()
+    return analyzer.summary_record()
+
+
+def test_incremental_matches_full_analysis():
+    """测试逐函数增量分析与完整分析结果一致，且只重新分析变化的函数"""
+    print("测试 1: 增量分析结果一致")
+    
+    tmpdir = tempfile.mkdtemp()
+    path = os.path.join(tmpdir, 'prog.txt')
+    service = AnalysisService()
+    
+    try:
+        for seed in range(5):
+            with open(path, 'w') as f:
+                f.write(make_program(seed))
+            response = service.handle({'op': 'analyze', 'path': path})
+            assert response['ok'] and response['cache']['program'] == 'miss'
+            assert response['summary'] == full_summary(path)
+            
+            response = service.handle({'op': 'analyze', 'path': path})
+            assert response['cache']['program'] == 'hit'
+            
+            # 修改中间的一个函数：之前的函数全部复用，结果仍与完整分析一致
+            with open(path, 'w') as f:
+                f.write(make_program(seed, changed=3))
+            response = service.handle({'op': 'analyze', 'path': path, 'functions': True})
+            assert response['summary'] == full_summary(path)
+            assert response['cache']['functions_reused'] >= 3
+            assert len(response['functions']) == 6
+    finally:
+        os.unlink(path)
+        os.rmdir(tmpdir)
+    
+    print("  ✓ 增量结果与完整分析一致")
+
+
+def test_socket_protocol():
+    """测试 Unix 套接字上的 JSON 行协议与内存上限淘汰"""
+    print("测试 2: 套接字协议")
+    
+    tmpdir = tempfile.mkdtemp()
+    socket_path = os.path.join(tmpdir, 'analyzer.sock')
+    paths = []
+    for seed in range(3):
+        paths.append(os.path.join(tmpdir, f'prog{seed}.txt'))
+        with open(paths[-1], 'w') as f:
+            f.write(make_program(seed))
+    
+    # 容量只够保留一个程序
+    server = AnalysisServer(socket_path, AnalysisService(cache_bytes=1))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    
+    try:
+        with AnalysisClient(socket_path, timeout=10) as client:
+            assert client.request('ping')['pid'] == os.getpid()
+            for path in paths:
+                response = client.analyze(path, check=True)
+                assert response['summary']['file'] == os.path.basename(path)
+                assert 'legality' in response['summary']
+            
+            stats = client.request('stats')
+            assert stats['programs']['entries'] == 1
+            assert stats['programs']['evictions'] == 2
+            
+            try:
+                client.request('analyze', path=os.path.join(tmpdir, 'missing.txt'))
+                assert False, "缺失文件应返回错误"
+            except RuntimeError:
+                pass
+            
+            # 字段类型错误返回错误响应，连接仍可继续使用
+            for fields in ({'path': 123}, {'path': paths[0], 'functions': 'yes'}):
+                try:
+                    client.request('analyze', **fields)
+                    assert False, "字段类型错误应返回错误"
+                except RuntimeError as e:
+                    assert '应为' in str(e)
+            assert client.request('ping')['pid'] == os.getpid()
+            
+            client.request('shutdown')
+        thread.join(timeout=10)
+        assert not thread.is_alive()
+    finally:
+        server.server_close()
+        for path in paths:
+            os.unlink(path)
+        os.rmdir(tmpdir)
+    
+    print("  ✓ 请求、淘汰与关闭正常")
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_incremental_matches_full_analysis,
+        test_socket_protocol,
+    ]
+    
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ✗ 失败: {e}")
+            failed += 1
+    
+    return 0 if failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
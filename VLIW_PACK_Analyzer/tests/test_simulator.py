@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+测试包级功能模拟器
+"""
+
+import sys
+import os
+import struct
+import tempfile
+
+# 添加父目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from simulator import BundleSimulator, ELF_HEADER, ELF_PROGRAM_HEADER, EM_RISCV, PT_LOAD
+from instruction import Instruction, VLIWPackage
+from timing import StallEstimator
+from encoding import disassemble
+
+BASE = 0x80000000
+
+# 循环 10 次累加 a2，经 UART 输出 'O'，写内存后读回
+LOOP_PROGRAM = [
+    '00a00593',  # li a1,10
+    '00000613',  # li a2,0
+    '00160613',  # addi a2,a2,1      <- 0x80000008
+    'fff58593',  # addi a1,a1,-1
+    'fe059ce3',  # bnez a1,80000008
+    'a00002b7',  # lui t0,0xa0000
+    '04f00313',  # li t1,79
+    '3e628c23',  # sb t1,1016(t0)    UART
+    '800013b7',  # lui t2,0x80001
+    '00c3a023',  # sw a2,0(t2)
+    '0003a683',  # lw a3,0(t2)       <- 0x80000028
+    '00000513',  # li a0,0
+    '80000000',  # 结束标记
+]
+
+# 乘除法与浮点
+ARITH_PROGRAM = [
+    '00700513',  # li a0,7
+    'ffe00593',  # li a1,-2
+    '02b54633',  # div a2,a0,a1
+    '02b566b3',  # rem a3,a0,a1
+    'd0057553',  # fcvt.s.w fa0,a0
+    'd005f5d3',  # fcvt.s.w fa1,a1
+    '18b57653',  # fdiv.s fa2,fa0,fa1
+    'c0067753',  # fcvt.w.s a4,fa2
+    'c00617d3',  # fcvt.w.s a5,fa2,rtz
+    '02b59833',  # mulh a6,a1,a1
+    '00000513',  # li a0,0
+    '80000000',  # 结束标记
+]
+
+
+def image_bytes(words):
+    return b''.join(struct.pack('<I', int(word, 16)) for word in words)
+
+
+def make_bundle(words, start: int, count: int) -> VLIWPackage:
+    """由镜像中从 start 起的 count 个字构造包"""
+    pkg = VLIWPackage(start)
+    for i in range(count):
+        address = start + 4 * i
+        word = int(words[(address - BASE) // 4], 16)
+        pkg.add_instruction(Instruction(address, f"{word:08x}", *disassemble(word, address)))
+    return pkg
+
+
+def make_elf(words, entry: int, bss: int) -> bytes:
+    """只含一个 PT_LOAD 段的 32 位 RISC-V ELF"""
+    code = image_bytes(words)
+    phoff = ELF_HEADER.size
+    offset = phoff + ELF_PROGRAM_HEADER.size
+    ident = b'\x7fELF' + bytes([1, 1, 1]) + bytes(9)
+    header = ELF_HEADER.pack(ident, 2, EM_RISCV, 1, entry, phoff, 0, 0, ELF_HEADER.size,
+                             ELF_PROGRAM_HEADER.size, 1, 0, 0, 0)
+    program = ELF_PROGRAM_HEADER.pack(PT_LOAD, offset, BASE, BASE, len(code), len(code) + bss, 5, 4)
+    return header + program + code
+
+
+def test_bundle_execution():
+    """测试取包、跳转、执行次数、周期与快进"""
+    print("测试 1: 包级执行")
+    
+    simulator = BundleSimulator(memory_bytes=1 << 20)
+    simulator.load([(BASE, image_bytes(LOOP_PROGRAM))], BASE)
+    trace = []
+    result = simulator.run(trace=trace)
+    
+    assert result['ended'] and result['passed'] and result['pc'] == '0x80000028'
+    assert simulator.x[12] == 10 and simulator.x[13] == 10
+    assert result['console'] == 'O'
+    # 第一个包执行到 bnez 跳回 0x80000008；最后一次不跳转时包内其后的槽位继续执行
+    assert result['bundle_counts'] == {BASE: 1, BASE + 8: 9, BASE + 0x28: 1}
+    assert trace == [BASE] + [BASE + 8] * 9 + [BASE + 0x28]
+    assert result['instructions'] == 5 + 8 * 3 + 8 + 2
+    assert result['taken_branches'] == 9 and result['branch_stalls'] == 27
+    
+    # 不计跳转代价时，周期与停顿模型逐包估算实际执行的包一致
+    packages = [make_bundle(LOOP_PROGRAM, BASE, 5)] + [make_bundle(LOOP_PROGRAM, BASE + 8, 3)] * 8
+    packages += [make_bundle(LOOP_PROGRAM, BASE + 8, 8), make_bundle(LOOP_PROGRAM, BASE + 0x28, 2)]
+    simulator = BundleSimulator(memory_bytes=1 << 20, branch_penalty=0)
+    simulator.load([(BASE, image_bytes(LOOP_PROGRAM))], BASE)
+    free = simulator.run()
+    assert free['cycles'] == StallEstimator().estimate(packages)['cycles']
+    # 0 号流水线没有 EX2 旁路，循环中 a2 的相关停顿被跳转冲刷的周期吸收
+    assert free['data_stalls'] > result['data_stalls']
+    
+    # 快进到循环入口：之前的包只做功能执行，不计入统计
+    simulator = BundleSimulator(memory_bytes=1 << 20, estimate_cycles=False)
+    simulator.load([(BASE, image_bytes(LOOP_PROGRAM))], BASE)
+    result = simulator.run(fast_forward=BASE + 8)
+    assert result['fast_forward']['reached'] and result['fast_forward']['instructions'] == 5
+    assert result['bundle_counts'] == {BASE + 8: 9, BASE + 0x28: 1}
+    assert result['instructions'] == 34 and result['cycles'] is None and result['passed']
+    
+    print("  ✓ 取包、跳转与执行次数正确，周期与停顿模型一致")
+
+
+def test_image_formats_and_arithmetic():
+    """测试 ELF / hex 镜像加载与乘除法、浮点语义"""
+    print("测试 2: 镜像格式与运算语义")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        elf_path = os.path.join(tmp, 'program.elf')
+        with open(elf_path, 'wb') as f:
+            f.write(make_elf(ARITH_PROGRAM, BASE, bss=64))
+        hex_path = os.path.join(tmp, 'program.hex')
+        with open(hex_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(ARITH_PROGRAM) + '\n')
+        
+        results = []
+        for path in (elf_path, hex_path):
+            simulator = BundleSimulator(memory_bytes=1 << 20)
+            simulator.load_file(path)
+            result = simulator.run()
+            assert result['passed'] and result['instructions'] == 11
+            x = simulator.x
+            assert x[12] == (-3) & 0xffffffff and x[13] == 1  # 7 / -2 向零舍入
+            assert simulator.f[12] == struct.unpack('<I', struct.pack('<f', -3.5))[0]
+            assert x[14] == (-4) & 0xffffffff  # rne：-3.5 舍入到偶数
+            assert x[15] == (-3) & 0xffffffff  # rtz
+            assert x[16] == 0
+            results.append(result)
+        assert results[0]['cycles'] == results[1]['cycles']
+    
+    print("  ✓ ELF 与 hex 镜像结果一致，运算语义正确")
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_bundle_execution,
+        test_image_formats_and_arithmetic,
+    ]
+    
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ✗ 失败: {e}")
+            failed += 1
+    
+    return 0 if failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
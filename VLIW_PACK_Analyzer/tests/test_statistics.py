@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+测试单遍统计累加器
+"""
+
+import sys
+import os
+import pickle
+import random
+
+# 添加父目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from instruction import Instruction, VLIWPackage
+from statistics import StatsAccumulator
+
+POOL = [
+    ('00000013', 'nop', ''),
+    ('a0002053', 'feq.s', 'zero,ft0,ft0'),
+    ('00150593', 'addi', 'a1,a0,1'),
+    ('02b50633', 'mul', 'a2,a0,a1'),
+    ('00c12583', 'lw', 'a1,12(sp)'),
+    ('00112623', 'sw', 'ra,12(sp)'),
+]
+
+
+def random_packages(seed: int, count: int):
+    """生成随机包，包含全填充包与不满 8 条的末尾包"""
+    rng = random.Random(seed)
+    packages = []
+    address = 0x80000000
+    for i in range(count):
+        pkg = VLIWPackage(address)
+        size = 8 if i < count - 1 else rng.randrange(1, 8)
+        padding_only = rng.random() < 0.1
+        for _ in range(size):
+            hex_code, mnemonic, operands = POOL[0] if padding_only else rng.choice(POOL)
+            pkg.add_instruction(Instruction(address, hex_code, mnemonic, operands))
+            address += 4
+        packages.append(pkg)
+    return packages
+
+
+def test_matches_per_package_stats():
+    """测试单遍累加结果与逐包统计一致"""
+    print("测试 1: 单遍累加")
+    
+    packages = random_packages(1, 200)
+    counts = StatsAccumulator(packages)
+    
+    assert counts.packages == len(packages)
+    assert counts.valid == sum(1 for pkg in packages for inst in pkg.instructions if not inst.is_nop)
+    assert counts.valid == sum(pkg.valid_count for pkg in packages)
+    for field in ('leading', 'trailing', 'middle'):
+        assert getattr(counts, field) == sum(pkg.get_padding_stats()[field] for pkg in packages), field
+    assert counts.nop + counts.feq_zero == counts.instructions - counts.valid
+    assert sum(counts.type_counts.values()) == counts.valid
+    
+    padding = counts.padding_stats()
+    assert padding['total_padding'] == counts.instructions - counts.valid
+    assert counts.original_stats()['padding_instructions'] == padding['total_padding']
+    
+    print("  ✓ 计数与逐包统计一致")
+
+
+def test_merge():
+    """测试任意切分后合并的累加器与整体累加完全相同"""
+    print("测试 2: 累加器合并")
+    
+    packages = random_packages(2, 300)
+    whole = StatsAccumulator(packages)
+    
+    rng = random.Random(3)
+    cuts = sorted(rng.sample(range(1, len(packages)), 9))
+    merged = StatsAccumulator()
+    for start, end in zip([0] + cuts, cuts + [len(packages)]):
+        # 模拟跨进程传递
+        part = pickle.loads(pickle.dumps(StatsAccumulator(packages[start:end])))
+        merged.merge(part)
+    
+    assert merged.original_stats() == whole.original_stats()
+    assert merged.padding_stats() == whole.padding_stats()
+    assert merged.type_stats() == whole.type_stats()
+    assert merged.packing_stats(100) == whole.packing_stats(100)
+    
+    print("  ✓ 合并结果与整体累加相同")
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_matches_per_package_stats,
+        test_merge,
+    ]
+    
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ✗ 失败: {e}")
+            failed += 1
+    
+    return 0 if failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+测试打包策略注册表与策略对比
+"""
+
+import sys
+import os
+
+# 添加父目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import strategies
+from strategies import (
+    PackingStrategy, PACKING_STRATEGIES, register_strategy, create_strategy, parse_strategies,
+    compare_strategies
+)
+from instruction import VLIWPackage
+from packer import VLIWPacker
+from scheduler import SearchPacker
+from equivalence import EquivalenceChecker, np
+from analyzer import VLIWAnalyzer
+from builders import make_program, write_text, exit_loop, addi
+
+
+class SingleIssueStrategy(PackingStrategy):
+    """每条有效指令单独成包"""
+    
+    description = '单发射'
+    
+    def pack(self, original_packages):
+        packages = []
+        for pkg in original_packages:
+            for inst in pkg.instructions:
+                if not inst.is_nop:
+                    single = VLIWPackage(inst.address)
+                    single.add_instruction(inst)
+                    packages.append(single)
+        return packages, {'single': len(packages)}
+
+
+def test_registry():
+    """测试策略注册、创建与逐策略结果"""
+    print("测试 1: 策略注册表")
+    
+    try:
+        create_strategy('no-such-strategy')
+        assert False, "未知策略应抛出 ValueError"
+    except ValueError:
+        pass
+    try:
+        register_strategy('bad', dict)
+        assert False, "非 PackingStrategy 子类应抛出 TypeError"
+    except TypeError:
+        pass
+    try:
+        register_strategy('abstract', type('NoPack', (PackingStrategy,), {}))
+        assert False, "未实现 pack 的策略应抛出 TypeError"
+    except TypeError:
+        pass
+    assert 'abstract' not in PACKING_STRATEGIES
+    
+    register_strategy('single', SingleIssueStrategy)
+    try:
+        assert parse_strategies('greedy, single') == ['greedy', 'single']
+        path = write_text(make_program(3))
+        try:
+            analyzer = VLIWAnalyzer(path, log_file=None, strategy='single')
+            analyzer.run_full_analysis()
+        finally:
+            os.unlink(path)
+        valid = analyzer.all_stats['original']['valid_instructions']
+        assert len(analyzer.optimized_packages) == valid
+        assert analyzer.all_stats['packing']['merged_pairs'] == 0
+        
+        result = compare_strategies(
+            ['original', 'greedy', 'single'], analyzer.original_packages, parallel=False, measure_memory=True
+        )
+        rows = {row['strategy']: row for row in result['strategies']}
+        assert [row['strategy'] for row in result['strategies']] == ['original', 'greedy', 'single']
+        greedy, stats = VLIWPacker().repack_with_one_level_dependency(analyzer.original_packages)
+        assert rows['greedy']['packages'] == len(greedy) and rows['greedy']['stats'] == stats
+        assert rows['original']['cycles'] == result['original_cycles']
+        assert rows['original']['package_reduction_percentage'] == 0
+        assert rows['single']['packages'] == rows['single']['valid'] == valid
+        assert rows['single']['stats'] == {'single': valid}
+        assert all(row['seconds'] >= 0 and row['peak_memory_bytes'] >= 0 for row in rows.values())
+    finally:
+        del PACKING_STRATEGIES['single']
+    
+    print("  ✓ 策略可注册并替换分析器的重打包，逐策略结果正确")
+
+
+def test_parallel_comparison():
+    """测试多进程对比与串行一致，并进入报告与汇总记录"""
+    print("测试 2: 并行策略对比")
+    
+    path = write_text(make_program(8))
+    cpu_count = strategies.os.cpu_count
+    try:
+        analyzer = VLIWAnalyzer(path, log_file=None)
+        analyzer.run_full_analysis()
+        serial = analyzer.compare_strategies(['greedy', 'search', 'original'], parallel=False)
+        # 默认不另运行一次测量内存
+        assert all(row['peak_memory_bytes'] is None for row in serial['strategies'])
+        # 单核环境下也走进程池路径
+        strategies.os.cpu_count = lambda: 4
+        parallel = analyzer.compare_strategies(['greedy', 'search', 'original'])
+    finally:
+        strategies.os.cpu_count = cpu_count
+        os.unlink(path)
+    
+    assert parallel['parallel'] and not serial['parallel']
+    for first, second in zip(serial['strategies'], parallel['strategies']):
+        assert first['strategy'] == second['strategy'] and first['valid'] == second['valid']
+        # 搜索在墙钟预算内进行，结果可能随机器负载变化
+        if first['strategy'] != 'search':
+            assert first['packages'] == second['packages'] and first['cycles'] == second['cycles']
+    assert analyzer.summary_record()['strategies'] == parallel
+    report = analyzer.generate_report()
+    assert '--- 打包策略对比 ---' in report and 'search' in report
+    
+    print("  ✓ 并行与串行结果一致，对比表进入报告")
+
+
+def test_greedy_matches_block_baseline():
+    """测试 greedy 策略不跨越基本块，与搜索的逐块贪心基准一致"""
+    print("测试 3: 贪心策略与逐块贪心基准")
+    
+    packages = exit_loop(setup=[addi(11, 0, 10)])
+    result = compare_strategies(['greedy', 'search'], packages, parallel=False)
+    rows = {row['strategy']: row for row in result['strategies']}
+    _, search_stats = SearchPacker().repack(packages)
+    assert {'packages': rows['greedy']['packages'], 'cycles': rows['greedy']['cycles']} == search_stats['greedy']
+    
+    greedy, _ = create_strategy('greedy').pack(packages)
+    if np is not None:
+        check = EquivalenceChecker(lanes=64).check(packages, greedy)
+        assert check['equivalent'] and check['straddling_bundles'] == 0
+    
+    print("  ✓ 贪心结果可执行，与逐块贪心的包数与周期相同")
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_registry,
+        test_parallel_comparison,
+        test_greedy_matches_block_baseline,
+    ]
+    
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ✗ 失败: {e}")
+            failed += 1
+    
+    return 0 if failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+测试循环展开 what-if 估算
+"""
+
+import sys
+import os
+
+# 添加父目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from unroll import UnrollEstimator, find_loops, loop_registers, rename_instruction, unroll_loop
+from instruction import register_mask
+from encoding import encode_b_imm
+from analyzer import VLIWAnalyzer
+from builders import make_packages, write_disassembly
+
+SETUP = [('00a00513', 'li', 'a0,10'), ('00000593', 'li', 'a1,0')]
+LOAD = ('00052283', 'lw', 't0,0(a0)')
+INC = ('00128293', 'addi', 't0,t0,1')
+STORE = ('00552023', 'sw', 't0,0(a0)')
+STEP = ('00450513', 'addi', 'a0,a0,4')
+# 0x80000068 处跳回 0x80000020 的 bne
+BACK = (f"{encode_b_imm(0x00b51063, -0x48):08x}", 'bne', 'a0,a1,0x80000020')
+EXIT = ('00000413', 'li', 's0,0')
+
+# 循环体 0x80000020 - 0x80000068：load 结果在下一个包使用，展开后的各份可以交错
+LOOP_PROGRAM = [SETUP, [LOAD], [INC], [STORE, STEP, BACK], [EXIT]]
+
+
+def test_unroll_single_loop():
+    """测试循环识别、寄存器分类、重命名与各展开倍数的估算"""
+    print("测试 1: 单循环展开估算")
+    
+    packages = make_packages(LOOP_PROGRAM)
+    loops = find_loops(packages)
+    assert len(loops) == 1
+    body = loops[0]
+    assert [inst.address for inst in body] == [0x80000020, 0x80000040, 0x80000060, 0x80000064, 0x80000068]
+    
+    local, induction = loop_registers(body)
+    assert local == register_mask('x5') and induction == register_mask('x10')
+    
+    renamed = rename_instruction(body[2], {5: 6})
+    assert renamed.operands == 'x6,0(a0)' and renamed.reads == register_mask('x6', 'x10')
+    assert rename_instruction(body[3], {5: 6}) is body[3]
+    
+    # 前 3 份去掉分支与 a0 的更新，t0 依次改名
+    instructions, count, wanted = unroll_loop(body, 4, local, induction, register_mask('x6', 'x7', 'x9'))
+    assert len(instructions) == 3 * 3 + 5 and count == wanted == 3
+    assert instructions[0].writes == register_mask('x6') and instructions[6].writes == register_mask('x9')
+    _, count, wanted = unroll_loop(body, 4, local, induction, register_mask('x6'))
+    assert count == 1 and wanted == 3
+    
+    result = UnrollEstimator().analyze(packages)
+    assert result['factors'] == [1, 2, 4, 8] and len(result['loops']) == 1
+    loop = result['loops'][0]
+    assert loop['address'] == '0x80000020' and loop['original_bundles'] == 3
+    assert loop['local_registers'] == 1 and loop['induction_registers'] == 1
+    rows = {row['factor']: row for row in loop['factors']}
+    assert rows[1]['bundles'] == 3 and rows[1]['cycles_per_iteration'] == loop['original_cycles_per_iteration']
+    assert rows[8]['bundles_per_iteration'] < rows[4]['bundles_per_iteration'] < rows[1]['bundles_per_iteration']
+    assert rows[8]['cycles_per_iteration'] < rows[1]['cycles_per_iteration']
+    assert rows[8]['renamed'] == 7 and not rows[8]['rename_limited']
+    assert loop['best_factor'] == 8 and loop['best_gain_percentage'] > 0
+    
+    # 没有空闲寄存器时不重命名
+    limited = UnrollEstimator(factors=[2]).analyze_loop(body, packages[1:4], free=0)
+    assert limited['factors'][0]['renamed'] == 0 and limited['factors'][0]['rename_limited']
+    
+    print(f"  ✓ 每次迭代 {rows[1]['cycles_per_iteration']:g} → {rows[8]['cycles_per_iteration']:g} 周期（8 倍展开）")
+
+
+def test_analyzer_unroll_report():
+    """测试按函数计算空闲寄存器，并进入报告与汇总记录"""
+    print("测试 2: 分析器循环展开报告")
+    
+    packages = make_packages(LOOP_PROGRAM + [[('00c686b3', 'add', 'a3,a3,a2')]])
+    path = write_disassembly([('kernel', packages[:5]), ('other', packages[5:])])
+    try:
+        analyzer = VLIWAnalyzer(path, log_file=None)
+        analyzer.run_full_analysis()
+        stats = analyzer.estimate_unrolling([1, 4])
+    finally:
+        os.unlink(path)
+    
+    loop = stats['loops'][0]
+    assert stats['factors'] == [1, 4] and len(stats['loops']) == 1
+    # kernel 中出现 a0 / a1 / t0 / s0，other 中的 a2 / a3 不影响 kernel 的空闲寄存器
+    assert loop['function'] == 'kernel' and loop['free_registers'] == 64 - 5 - 4
+    assert analyzer.summary_record()['unroll'] == stats
+    report = analyzer.generate_report()
+    assert '--- 循环展开假设分析 ---' in report and '0x80000020' in report and 'kernel' in report
+    
+    print("  ✓ 空闲寄存器按函数统计，展开结果进入报告")
+
+
+def main():
+    """运行所有测试"""
+    tests = [
+        test_unroll_single_loop,
+        test_analyzer_unroll_report,
+    ]
+    
+    failed = 0
+    for test in tests:
+        try:
+            test()
+        except AssertionError as e:
+            print(f"  ✗ 失败: {e}")
+            failed += 1
+    
+    return 0 if failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
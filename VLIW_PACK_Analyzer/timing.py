@@ -0,0 +1,147 @@
+"""
+静态周期估算：按流水线前递与 Hazard 规则估算顺序执行包序列时的数据相关停顿
+"""
+
+from typing import Dict, Iterable
+from instruction import VLIWPackage
+from machine import MachineDescription, default_machine
+from config import NUM_ARCH_REGS, VLIW_PACKAGE_SIZE, ITERATIVE_EXTRA_CYCLES
+
+# 尚未写入的寄存器：从一开始就可以读取
+NO_DISTANCE = (0,) * VLIW_PACKAGE_SIZE
+
+
+class StallEstimator:
+    """
+    顺序执行（不考虑分支跳转与 Cache 缺失）包序列的停顿估算
+    
+    每个包在所读寄存器全部可前递时才能进入 EX1：生产者进入 EX1 后，其结果经
+    机器描述中 (生产者槽位, 消费者槽位) 之间最近的可用旁路级前递，所需的包间距见
+    MachineDescription.distance_table。包内前面槽位写入的寄存器由包内前递处理，
+    不产生停顿。迭代型除法器额外阻塞 ITERATIVE_EXTRA_CYCLES 个周期。
+    """
+    
+    def __init__(
+        self,
+        latency: Dict[str, int] = None,
+        iterative_cycles: Dict[str, int] = None,
+        machine: MachineDescription = None
+    ):
+        """
+        Args:
+            latency: 指令类型 -> 结果可用所需的包间距（默认 RESULT_LATENCY，给出 machine 时不使用）
+            iterative_cycles: 助记符 -> 额外阻塞周期（默认 ITERATIVE_EXTRA_CYCLES）
+            machine: 机器描述（旁路拓扑，默认按 config 构建）
+        """
+        if machine is None:
+            machine = default_machine() if latency is None else MachineDescription(latency=latency)
+        self.machine = machine
+        self.latency = machine.latency
+        self.iterative_cycles = ITERATIVE_EXTRA_CYCLES if iterative_cycles is None else iterative_cycles
+    
+    def estimate(self, packages: Iterable[VLIWPackage]) -> Dict:
+        """
+        估算包序列的执行周期
+        
+        Args:
+            packages: 按执行顺序排列的 VLIW 包
+        
+        Returns:
+            {'bundles': 包数, 'data_stalls': 数据相关停顿周期,
+             'divide_stalls': 除法器阻塞周期, 'stalls': 总停顿, 'cycles': 估算总周期}
+        """
+        timeline = self.timeline()
+        for pkg in packages:
+            timeline.add_package(pkg)
+        return timeline.result()
+    
+    def timeline(self) -> 'StallTimeline':
+        """创建逐包累加的估算状态（用于包逐个产生的流式场景）"""
+        return StallTimeline(self.machine, self.iterative_cycles)
+
+
+class StallTimeline:
+    """StallEstimator 的逐包估算状态：按执行顺序逐个加入包"""
+    
+    __slots__ = (
+        'machine', 'iterative_cycles', 'ready', 'distance', 'cycle',
+        'bundles', 'data_stalls', 'divide_stalls'
+    )
+    
+    def __init__(self, machine: MachineDescription, iterative_cycles: Dict[str, int]):
+        self.machine = machine
+        self.iterative_cycles = iterative_cycles
+        # 寄存器 r 的结果在 ready[r] + distance[r][消费者槽位] 周期起可被进入 EX1 的包使用
+        self.ready = [0] * NUM_ARCH_REGS
+        self.distance = [NO_DISTANCE] * NUM_ARCH_REGS
+        self.cycle = 0  # 下一个包无停顿时进入 EX1 的周期
+        self.bundles = 0
+        self.data_stalls = 0
+        self.divide_stalls = 0
+    
+    def add_package(self, pkg: VLIWPackage):
+        """加入下一个执行的包（按 pkg.slots 确定各指令所在的流水线）"""
+        ready = self.ready
+        distance = self.distance
+        issue = self.cycle
+        written = 0
+        extra = 0
+        results = []  # (写入的寄存器, 额外阻塞, 到各消费者槽位的包间距)
+        for index, inst in enumerate(pkg.instructions):
+            if inst.is_nop:
+                continue
+            slot = pkg.slot_of(index)
+            pending = inst.reads & ~written
+            while pending:
+                low = pending & -pending
+                reg = low.bit_length() - 1
+                available = ready[reg] + distance[reg][slot]
+                if available > issue:
+                    issue = available
+                pending ^= low
+            
+            blocking = self.iterative_cycles.get(inst.mnemonic, 0)
+            if blocking > extra:
+                extra = blocking
+            writes = inst.writes
+            if writes:
+                written |= writes
+                results.append((writes, blocking, self.machine.distance_table(inst.inst_type)[slot]))
+        
+        self.data_stalls += issue - self.cycle
+        for mask, blocking, row in results:
+            while mask:
+                low = mask & -mask
+                reg = low.bit_length() - 1
+                ready[reg] = issue + blocking
+                distance[reg] = row
+                mask ^= low
+        
+        self.divide_stalls += extra
+        self.cycle = issue + 1 + extra
+        self.bundles += 1
+    
+    def copy(self) -> 'StallTimeline':
+        """复制当前估算状态（用于从同一前缀出发分别加入不同的后续包）"""
+        clone = StallTimeline(self.machine, self.iterative_cycles)
+        clone.ready = self.ready[:]
+        clone.distance = self.distance[:]
+        clone.cycle = self.cycle
+        clone.bundles = self.bundles
+        clone.data_stalls = self.data_stalls
+        clone.divide_stalls = self.divide_stalls
+        return clone
+    
+    def add_bubble(self, cycles: int):
+        """插入流水线气泡（如跳转冲刷）：下一个包进入 EX1 的周期推迟 cycles 个周期"""
+        self.cycle += cycles
+    
+    def result(self) -> Dict:
+        """当前的估算结果（格式同 StallEstimator.estimate）"""
+        return {
+            'bundles': self.bundles,
+            'data_stalls': self.data_stalls,
+            'divide_stalls': self.divide_stalls,
+            'stalls': self.data_stalls + self.divide_stalls,
+            'cycles': self.cycle
+        }
@@ -0,0 +1,298 @@
+"""
+循环展开 what-if：虚拟展开最内层循环，在空闲寄存器预算内重命名循环局部寄存器后重新打包
+"""
+
+import bisect
+from typing import Dict, Iterable, List, Sequence, Tuple
+from instruction import Instruction, VLIWPackage, register_index, register_mask
+from packer import ForwardingModel, OnlinePacker
+from timing import StallEstimator
+from machine import MachineDescription, default_machine
+from equivalence import split_blocks
+from parser import split_functions
+from encoding import OPCODE_BRANCH, opcode, decode_b_imm
+from config import (
+    INT_REG_ALIAS, FLOAT_REG_ALIAS, FLOAT_REG_BASE, NUM_ARCH_REGS, TAKEN_BRANCH_PENALTY,
+    UNROLL_FACTORS, UNROLL_RESERVED_REGS
+)
+
+INT_REGS = (1 << FLOAT_REG_BASE) - 1
+FLOAT_REGS = ((1 << NUM_ARCH_REGS) - 1) & ~INT_REGS
+# 可用于重命名的寄存器
+RENAMABLE_REGS = ((1 << NUM_ARCH_REGS) - 1) & ~register_mask(*UNROLL_RESERVED_REGS)
+
+
+def _popcount(mask: int) -> int:
+    return bin(mask).count('1')
+
+
+def _register_text(index: int) -> str:
+    """寄存器位置 -> 标准化寄存器名（x0-x31 / f0-f31）"""
+    return f"x{index}" if index < FLOAT_REG_BASE else f"f{index - FLOAT_REG_BASE}"
+
+
+def _rename_operand(text: str, mapping: Dict[int, int]) -> str:
+    """重命名一个操作数中的寄存器（非寄存器原样返回）"""
+    if '(' in text:
+        offset, base = text.split('(', 1)
+        return f"{offset}({_rename_operand(base.rstrip(')'), mapping)})"
+    index = register_index(INT_REG_ALIAS.get(text, FLOAT_REG_ALIAS.get(text, text)))
+    return _register_text(mapping[index]) if index in mapping else text
+
+
+def rename_instruction(inst: Instruction, mapping: Dict[int, int]) -> Instruction:
+    """
+    按寄存器映射重写指令的操作数
+    
+    Args:
+        inst: 原指令
+        mapping: 寄存器位置 -> 新寄存器位置
+    
+    Returns:
+        新指令（地址与编码不变，读写掩码按新操作数重新译码）；不涉及映射中的寄存器时返回原指令
+    """
+    if not any((inst.reads | inst.writes) >> reg & 1 for reg in mapping):
+        return inst
+    operands = ','.join(_rename_operand(part.strip(), mapping) for part in inst.operands.split(','))
+    return Instruction(inst.address, inst.hex_code, inst.mnemonic, operands)
+
+
+def find_loops(packages: List[VLIWPackage]) -> List[List[Instruction]]:
+    """
+    找出单基本块的最内层循环：以跳回本块第一条指令的条件分支结束的基本块
+    
+    块内没有其他控制转移，也没有从块外跳入中间的分支，因此循环体就是这个块。
+    
+    Args:
+        packages: 原始 VLIW 包列表
+    
+    Returns:
+        循环体列表（程序顺序的有效指令，最后一条为回跳分支）
+    """
+    addresses = [inst.address for pkg in packages for inst in pkg.instructions if not inst.is_nop]
+    loops = []
+    for block in split_blocks(packages):
+        branch = block[-1]
+        word = int(branch.hex_code, 16)
+        if branch.inst_type != 'BRANCH' or opcode(word) != OPCODE_BRANCH:
+            continue
+        # 分支目标为填充指令时对应其后第一条有效指令
+        target = bisect.bisect_left(addresses, branch.address + decode_b_imm(word))
+        if target < len(addresses) and addresses[target] == block[0].address:
+            loops.append(block)
+    return loops
+
+
+def loop_registers(body: Sequence[Instruction]) -> Tuple[int, int]:
+    """
+    循环体的局部寄存器与归纳寄存器
+    
+    局部寄存器在每次迭代中都先写后读（不是循环入口活跃的），各次迭代的值互不相关，
+    展开后可以改用其他寄存器；归纳寄存器在入口活跃、且只由一条 addi r, r, imm 更新，
+    展开后每个展开体只需更新一次（其余的偏移由编译器折叠进访存偏移）。
+    
+    Args:
+        body: 循环体
+    
+    Returns:
+        (局部寄存器掩码, 归纳寄存器掩码)
+    """
+    written = 0
+    live_in = 0
+    writers = {}
+    for inst in body:
+        live_in |= inst.reads & ~written
+        written |= inst.writes
+        mask = inst.writes
+        while mask:
+            low = mask & -mask
+            writers.setdefault(low.bit_length() - 1, []).append(inst)
+            mask ^= low
+    
+    induction = 0
+    for reg, insts in writers.items():
+        if live_in >> reg & 1 and len(insts) == 1:
+            inst = insts[0]
+            if inst.mnemonic == 'addi' and inst.reads == inst.writes:
+                induction |= 1 << reg
+    return written & ~live_in & RENAMABLE_REGS, induction
+
+
+def unroll_loop(
+    body: Sequence[Instruction],
+    factor: int,
+    local: int,
+    induction: int,
+    free: int
+) -> Tuple[List[Instruction], int, int]:
+    """
+    虚拟展开循环体（假设迭代次数是展开倍数的整数倍）
+    
+    前 factor - 1 份循环体去掉回跳分支与归纳寄存器的更新，局部寄存器依次分配空闲寄存器
+    重命名（按份、按寄存器从低到高分配，空闲寄存器用完后保留原名）；最后一份保持原样，
+    保证循环出口处的寄存器与原循环一致。
+    
+    Args:
+        body: 循环体
+        factor: 展开倍数
+        local: 局部寄存器掩码
+        induction: 归纳寄存器掩码
+        free: 空闲寄存器掩码
+    
+    Returns:
+        (展开后的指令, 重命名的寄存器数, 需要重命名的寄存器数)
+    """
+    instructions = []
+    renamed = 0
+    for copy in range(factor - 1):
+        mapping = {}
+        mask = local
+        while mask:
+            low = mask & -mask
+            reg = low.bit_length() - 1
+            pool = free & (INT_REGS if reg < FLOAT_REG_BASE else FLOAT_REGS)
+            if pool:
+                new = pool & -pool
+                free ^= new
+                mapping[reg] = new.bit_length() - 1
+            mask ^= low
+        renamed += len(mapping)
+        instructions.extend(
+            rename_instruction(inst, mapping) for inst in body[:-1] if not inst.writes & induction
+        )
+    instructions.extend(body)
+    return instructions, renamed, _popcount(local) * (factor - 1)
+
+
+class UnrollEstimator:
+    """
+    循环展开 what-if 估算
+    
+    对每个单基本块的最内层循环，按各展开倍数虚拟展开、重命名后以贪心打包重新打包，
+    给出每次原始迭代的包数与稳态周期（每个展开体计一次回跳的跳转代价），
+    无需重新编译即可判断哪些循环能从展开中获益。
+    """
+    
+    def __init__(
+        self,
+        model: ForwardingModel = None,
+        machine: MachineDescription = None,
+        factors: Sequence[int] = UNROLL_FACTORS,
+        branch_penalty: int = TAKEN_BRANCH_PENALTY
+    ):
+        """
+        Args:
+            model: 包内前递链模型（默认一层依赖）
+            machine: 机器描述（默认 default_machine()）
+            factors: 展开倍数
+            branch_penalty: 回跳分支成立时的额外周期
+        """
+        if not factors or any(factor < 1 for factor in factors):
+            raise ValueError(f"展开倍数必须为正整数: {list(factors)}")
+        self.model = model or ForwardingModel()
+        self.machine = machine or default_machine()
+        self.factors = sorted(set(factors))
+        self.branch_penalty = branch_penalty
+        self.estimator = StallEstimator(machine=self.machine)
+    
+    def steady_cycles(self, packages: Sequence[VLIWPackage]) -> int:
+        """包序列作为循环体反复执行时每次执行的稳态周期（含回跳的跳转代价）"""
+        timeline = self.estimator.timeline()
+        for pkg in packages:
+            timeline.add_package(pkg)
+        timeline.add_bubble(self.branch_penalty)
+        first = timeline.cycle
+        for pkg in packages:
+            timeline.add_package(pkg)
+        timeline.add_bubble(self.branch_penalty)
+        return timeline.cycle - first
+    
+    def analyze(self, packages: List[VLIWPackage], symbols: Iterable[Tuple[int, str]] = ()) -> Dict:
+        """
+        分析全部最内层循环
+        
+        空闲寄存器为循环所在函数中没有出现过的寄存器（不含 UNROLL_RESERVED_REGS）；
+        没有符号表时整个程序视为一个函数。
+        
+        Args:
+            packages: 原始 VLIW 包列表
+            symbols: 符号表 [(起始地址, 函数名)]（可选）
+        
+        Returns:
+            {'factors', 'branch_penalty', 'loops': 按地址顺序的 analyze_loop 结果}
+        """
+        owner = {}  # 指令地址 -> (函数名, 函数中出现的寄存器)
+        package_of = {}
+        index = 0
+        for name, function in split_functions(packages, list(symbols)):
+            used = 0
+            for pkg in function:
+                for inst in pkg.instructions:
+                    if not inst.is_nop:
+                        used |= inst.reads | inst.writes
+                        package_of[inst.address] = index
+                index += 1
+            for pkg in function:
+                for inst in pkg.instructions:
+                    owner[inst.address] = (name, used)
+        
+        loops = []
+        for body in find_loops(packages):
+            name, used = owner[body[0].address]
+            original = packages[package_of[body[0].address]:package_of[body[-1].address] + 1]
+            loops.append(self.analyze_loop(body, original, RENAMABLE_REGS & ~used, name))
+        return {'factors': self.factors, 'branch_penalty': self.branch_penalty, 'loops': loops}
+    
+    def analyze_loop(
+        self,
+        body: Sequence[Instruction],
+        original: Sequence[VLIWPackage],
+        free: int,
+        function: str = ''
+    ) -> Dict:
+        """
+        分析一个循环
+        
+        Args:
+            body: 循环体（最后一条为回跳分支）
+            original: 循环体所在的原始包
+            free: 空闲寄存器掩码
+            function: 所在函数名
+        
+        Returns:
+            {'address', 'function', 'instructions', 'original_bundles', 'original_cycles_per_iteration',
+             'local_registers', 'induction_registers', 'free_registers',
+             'factors': 每个展开倍数的 {'factor', 'bundles', 'bundles_per_iteration',
+             'cycles_per_iteration', 'renamed', 'rename_limited'}, 'best_factor', 'best_gain_percentage'}
+        """
+        local, induction = loop_registers(body)
+        original_cycles = self.steady_cycles(original)
+        rows = []
+        for factor in self.factors:
+            instructions, renamed, wanted = unroll_loop(body, factor, local, induction, free)
+            bundles = list(OnlinePacker(self.model, self.machine).feed(instructions))
+            rows.append({
+                'factor': factor,
+                'bundles': len(bundles),
+                'bundles_per_iteration': len(bundles) / factor,
+                'cycles_per_iteration': self.steady_cycles(bundles) / factor,
+                'renamed': renamed,
+                'rename_limited': renamed < wanted
+            })
+        best = min(rows, key=lambda row: (row['cycles_per_iteration'], row['factor']))
+        return {
+            'address': f"0x{body[0].address:08x}",
+            'function': function,
+            'instructions': len(body),
+            'original_bundles': len(original),
+            'original_cycles_per_iteration': original_cycles,
+            'local_registers': _popcount(local),
+            'induction_registers': _popcount(induction),
+            'free_registers': _popcount(free),
+            'factors': rows,
+            'best_factor': best['factor'],
+            'best_gain_percentage': (
+                (original_cycles - best['cycles_per_iteration']) / original_cycles * 100
+                if original_cycles else 0
+            )
+        }